@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+워커 시작 시간 벤치마크
+
+새 파이썬 프로세스에서 main을 import하고 lifespan(startup)을 실행해 요청을 받을 준비가 될 때까지의
+시간과, 백그라운드 예열(/ready가 200이 되는 시점)이 끝날 때까지의 시간을 측정합니다 (임시 SQLite DB 사용).
+
+- cold:     빈 데이터베이스 (마이그레이션 + 관리자 계정 bcrypt 해싱)
+- warm:     이미 초기화된 데이터베이스 (초기화 생략)
+- eager:    warm과 같지만 anthropic/passlib/jose를 먼저 import (지연 로드 전과 같은 import 비용)
+- parallel: 빈 데이터베이스에 워커 여러 개를 동시에 시작 (초기화는 한 워커만 실행해야 함)
+
+사용법:
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --runs 10 --workers 4 --target-ms 500 --importtime
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import os, sys, json, time, asyncio
+started = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+import logging
+logging.disable(logging.INFO)
+if os.environ.get("BENCH_EAGER"):
+    import anthropic, passlib.context, jose.jwt
+import main
+imported = time.perf_counter()
+from utils.startup import process_uptime
+
+ran = []
+bootstrap = main.bootstrap
+def counting_bootstrap():
+    ran.append(True)
+    bootstrap()
+main.bootstrap = counting_bootstrap
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        ready_ms = (process_uptime() or 0) * 1000
+        await main.app.state.warmup_task
+        warmed = time.perf_counter()
+        print(json.dumps({
+            "import_ms": (imported - started) * 1000,
+            "startup_ms": (ready - imported) * 1000,
+            "ready_ms": ready_ms,
+            "warmup_ms": (warmed - ready) * 1000,
+            "bootstrapped": bool(ran),
+        }), flush=True)
+
+asyncio.run(run())
+"""
+
+
+def _spawn(env):
+    return subprocess.Popen(
+        [sys.executable, "-c", CHILD],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+
+
+def _collect(process):
+    output, _ = process.communicate(timeout=120)
+    lines = [line for line in output.splitlines() if line.startswith("{")]
+    if process.returncode != 0 or not lines:
+        raise RuntimeError(f"워커 시작 실패 (종료 코드 {process.returncode})")
+    return json.loads(lines[-1])
+
+
+def _env(db_path, eager=False):
+    env = dict(os.environ)
+    env["SQLITE_DB_PATH"] = db_path
+    env["BOOTSTRAP_LOCK_PATH"] = db_path + ".lock"
+    env.setdefault("CLAUDE_API_KEY", "benchmark")
+    env.pop("DATABASE_URL", None)
+    env.pop("STARTUP_IMPORT_PROFILE", None)
+    if eager:
+        env["BENCH_EAGER"] = "1"
+    return env
+
+
+def _row(mode, results, target_ms):
+    ready = [r["ready_ms"] for r in results]
+    passed = "OK" if max(ready) <= target_ms else "초과"
+    print(
+        f"{mode:<10}{len(results):>5}"
+        f"{statistics.median(r['import_ms'] for r in results):>12.0f}"
+        f"{statistics.median(r['startup_ms'] for r in results):>12.0f}"
+        f"{statistics.median(ready):>12.0f}{max(ready):>10.0f}"
+        f"{statistics.median(r['warmup_ms'] for r in results):>10.0f}"
+        f"{sum(r['bootstrapped'] for r in results):>10}  {passed}"
+    )
+
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="cold_start_")
+
+    print(f"목표: 프로세스 시작 후 {args.target_ms}ms 안에 준비 (CPU {os.cpu_count()}개)")
+    print(f"{'모드':<10}{'횟수':>5}{'import(ms)':>12}{'startup(ms)':>12}{'준비 p50':>12}{'준비 max':>10}{'예열(ms)':>10}{'초기화':>10}")
+
+    cold = []
+    for i in range(args.runs):
+        cold.append(_collect(_spawn(_env(os.path.join(workdir, f"cold{i}.db")))))
+    _row("cold", cold, args.target_ms)
+
+    warm_db = os.path.join(workdir, "cold0.db")
+    warm = [_collect(_spawn(_env(warm_db))) for _ in range(args.runs)]
+    _row("warm", warm, args.target_ms)
+
+    eager = [_collect(_spawn(_env(warm_db, eager=True))) for _ in range(args.runs)]
+    _row("eager", eager, args.target_ms)
+
+    parallel_db = os.path.join(workdir, "parallel.db")
+    processes = [_spawn(_env(parallel_db)) for _ in range(args.workers)]
+    parallel = [_collect(process) for process in processes]
+    _row("parallel", parallel, args.target_ms)
+
+    if args.importtime:
+        sys.path.insert(0, ROOT)
+        from utils.startup import format_import_profile, profile_imports
+
+        os.chdir(ROOT)
+        print()
+        print(format_import_profile(profile_imports("main", args.top)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="워커 시작 시간 벤치마크")
+    parser.add_argument("--runs", type=int, default=5, help="모드별 실행 횟수")
+    parser.add_argument("--workers", type=int, default=4, help="parallel 모드에서 동시에 시작할 워커 수")
+    parser.add_argument("--target-ms", type=int, default=500, help="준비 시간 목표 (ms)")
+    parser.add_argument("--importtime", action="store_true", help="-X importtime 요약 출력")
+    parser.add_argument("--top", type=int, default=15, help="import 시간 요약에 표시할 모듈 수")
+    main(parser.parse_args())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+로그인 처리량 벤치마크
+
+동시 로그인 요청을 보내면서 처리량(로그인/초)과 지연 시간, 그리고 같은 시간의
+이벤트 루프 지연(10ms 타이머가 실제로 얼마나 늦게 깨어나는지, 다른 요청이 모두 겪는 지연)을 측정합니다.
+
+- pool:   bcrypt 검증을 해싱 스레드 풀에서 실행 (현재 구현)
+- inline: bcrypt 검증을 이벤트 루프에서 바로 실행 (이전 구현과 같은 동작)
+
+사용법:
+    python benchmarks/login_throughput.py
+    python benchmarks/login_throughput.py --concurrency 1 8 32 --requests 64 --rounds 10
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def _run_mode(app, password_hasher, mode, users, concurrency, requests):
+    """한 가지 모드로 동시 로그인 실행"""
+    import httpx
+
+    original_run = password_hasher.run
+
+    async def inline_run(func, *args):
+        return func(*args)
+
+    password_hasher.run = inline_run if mode == "inline" else original_run
+
+    login_latencies = []
+    loop_lags = []
+    done = asyncio.Event()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def login(i):
+            email, password = users[i % len(users)]
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/auth/login", json={"email": email, "password": password})
+                login_latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+
+        async def monitor_loop_lag():
+            while not done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                loop_lags.append(time.perf_counter() - started - 0.01)
+
+        monitor_task = asyncio.create_task(monitor_loop_lag())
+        started = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await monitor_task
+
+    password_hasher.run = original_run
+
+    return {
+        "throughput": requests / elapsed,
+        "login_p50": statistics.median(login_latencies),
+        "login_p95": _percentile(login_latencies, 95),
+        "lag_max": max(loop_lags) if loop_lags else 0.0,
+        "lag_p95": _percentile(loop_lags, 95) if loop_lags else 0.0,
+    }
+
+
+async def main(args):
+    workdir = tempfile.mkdtemp(prefix="login_bench_")
+    os.environ["SQLITE_DB_PATH"] = os.path.join(workdir, "bench.db")
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ.setdefault("CLAUDE_API_KEY", "benchmark")
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    import logging
+    logging.disable(logging.INFO)
+
+    import main as app_module
+    from models.user import UserCreate, UserUpdate
+    from database.user_db import UserDB
+    from utils.auth import hash_password
+    from utils.password_hasher import password_hasher
+
+    app = app_module.app
+    async with app.router.lifespan_context(app):
+        users = []
+        for i in range(args.users):
+            email, password = f"bench{i}@example.com", f"password-{i}"
+            user = UserDB.create_user(
+                UserCreate(email=email, username=f"bench{i}", password=password),
+                hash_password(password)
+            )
+            UserDB.update_user(user.id, UserUpdate(is_active=True))
+            users.append((email, password))
+
+        print(f"BCRYPT_ROUNDS={args.rounds}, 해싱 스레드 {password_hasher.max_workers}개, CPU {os.cpu_count()}개")
+        print(f"{'모드':<8}{'동시성':>6}{'로그인/초':>12}{'p50(ms)':>10}{'p95(ms)':>10}{'루프 지연 p95(ms)':>16}{'루프 지연 max(ms)':>16}")
+        for concurrency in args.concurrency:
+            for mode in ("inline", "pool"):
+                result = await _run_mode(app, password_hasher, mode, users, concurrency, args.requests)
+                print(
+                    f"{mode:<8}{concurrency:>6}{result['throughput']:>12.1f}"
+                    f"{result['login_p50'] * 1000:>10.0f}{result['login_p95'] * 1000:>10.0f}"
+                    f"{result['lag_p95'] * 1000:>16.1f}{result['lag_max'] * 1000:>16.1f}"
+                )
+
+        stats = password_hasher.stats()
+        print(
+            f"대기 평균 {stats['wait_seconds_avg'] * 1000:.1f}ms, 최대 {stats['wait_seconds_max'] * 1000:.1f}ms, "
+            f"해싱 평균 {stats['run_seconds_avg'] * 1000:.1f}ms, 거절 {stats['rejected']}건"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로그인 처리량 벤치마크")
+    parser.add_argument("--users", type=int, default=8, help="테스트 사용자 수")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="동시 요청 수")
+    parser.add_argument("--requests", type=int, default=32, help="동시성 단계별 로그인 요청 수")
+    parser.add_argument("--rounds", type=int, default=int(os.getenv("BCRYPT_ROUNDS", "12")), help="bcrypt 비용 인자")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+지표 기록 비용 벤치마크 (utils/metrics.py)
+
+카운터 증가, 게이지 증감, 히스토그램 기록 한 번에 걸리는 시간(ns)과,
+지표가 많이 쌓인 상태에서 /metrics 응답 본문을 만드는 시간(ms)을 측정합니다.
+보고서 생성 한 건은 기록을 수십 번 하므로 기록 비용은 요청 시간에 비해 무시할 수 있어야 합니다.
+
+사용법:
+    python benchmarks/metrics_overhead.py
+    python benchmarks/metrics_overhead.py --ops 1000000 --threads 4
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.metrics import Counter, Gauge, Histogram, Registry, render  # noqa: E402
+
+
+def _per_op_ns(func, ops: int, threads: int) -> float:
+    """ops번 실행한 평균 시간 (threads개 스레드가 나눠 실행, 잠금 경합 포함)"""
+    per_thread = ops // threads
+
+    def run():
+        for _ in range(per_thread):
+            func()
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) / (per_thread * threads) * 1e9
+
+
+def main(args):
+    registry = Registry()
+    counter = Counter("bench_total", "벤치마크 카운터", ["stage", "type"], registry=registry)
+    gauge = Gauge("bench_in_flight", "벤치마크 게이지", registry=registry)
+    histogram = Histogram("bench_seconds", "벤치마크 히스토그램", ["stage"], registry=registry)
+
+    cases = {
+        "counter.inc (레이블 2개)": lambda: counter.inc(stage="render", type="ValueError"),
+        "gauge.inc + dec": lambda: (gauge.inc(), gauge.dec()),
+        "histogram.observe (레이블 1개)": lambda: histogram.observe(0.123, stage="render"),
+        "빈 함수 (비교용)": lambda: None,
+    }
+
+    print(f"기록 {args.ops:,}회, 스레드 {args.threads}개")
+    print(f"{'항목':<32}{'ns/회':>10}")
+    for name, func in cases.items():
+        print(f"{name:<32}{_per_op_ns(func, args.ops, args.threads):>10.0f}")
+
+    # 레이블 조합이 많을 때 /metrics 본문 생성 시간
+    for i in range(args.series):
+        counter.inc(stage=f"stage{i}", type="Error")
+        histogram.observe(i / 1000, stage=f"stage{i}")
+
+    started = time.perf_counter()
+    body = render(registry.collect())
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"/metrics 본문 생성: 시계열 {args.series * 2}개, {len(body):,} bytes, {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="지표 기록 비용 벤치마크")
+    parser.add_argument("--ops", type=int, default=300_000, help="항목별 기록 횟수")
+    parser.add_argument("--threads", type=int, default=1, help="동시에 기록하는 스레드 수")
+    parser.add_argument("--series", type=int, default=200, help="/metrics 측정용 레이블 조합 수")
+    main(parser.parse_args())
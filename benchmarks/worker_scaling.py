@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+워커 수에 따른 처리량 벤치마크 (serve.py)
+
+워커 수를 바꿔 가며 serve.py를 실제로 띄우고(임시 SQLite DB), 인증된 요청을 일정 시간 동안
+동시에 보내 처리량(요청/초)과 지연 시간을 측정합니다. 배율은 워커 1개 대비 처리량입니다.
+
+- 기본 요청은 GET /api/auth/me (JWT 검증 + 사용자 조회, 파이썬 CPU 작업이 대부분)
+- 부하 생성기도 같은 호스트에서 실행되므로(--clients 프로세스) CPU 수보다 워커가 많으면 오히려 느려질 수 있습니다
+- 리더 임대 보유자 수도 함께 확인합니다 (워커 수와 관계없이 1이어야 함)
+
+사용법:
+    python benchmarks/worker_scaling.py
+    python benchmarks/worker_scaling.py --workers 1 2 4 8 --concurrency 64 --duration 15 --clients 2
+"""
+import os
+import sys
+import time
+import json
+import signal
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ADMIN_EMAIL = "admin@example.com"
+ADMIN_PASSWORD = "benchmark123!"
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(workers: int, port: int, workdir: str):
+    """serve.py 실행 후 /ready가 200이 될 때까지 대기"""
+    import httpx
+
+    env = dict(os.environ)
+    env["SQLITE_DB_PATH"] = os.path.join(workdir, f"workers{workers}.db")
+    env["BOOTSTRAP_LOCK_PATH"] = os.path.join(workdir, f"workers{workers}.lock")
+    env["ADMIN_EMAIL"] = ADMIN_EMAIL
+    env["ADMIN_PASSWORD"] = ADMIN_PASSWORD
+    env.setdefault("CLAUDE_API_KEY", "benchmark")
+    env.pop("DATABASE_URL", None)
+    env.pop("WEB_CONCURRENCY", None)
+
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"서버 시작 실패 (종료 코드 {process.returncode})")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+
+    process.kill()
+    raise RuntimeError("서버가 준비되지 않았습니다.")
+
+
+def _stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _load(base_url, path, headers, concurrency, duration, queue):
+    """부하 생성 프로세스: duration초 동안 concurrency개 요청을 계속 보냄"""
+    import httpx
+
+    async def run():
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+        async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=30) as client:
+
+            async def worker():
+                nonlocal errors
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        response = await client.get(path)
+                        if response.status_code != 200:
+                            errors += 1
+                            continue
+                    except httpx.HTTPError:
+                        errors += 1
+                        continue
+                    latencies.append(time.perf_counter() - started)
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+        return latencies, errors
+
+    queue.put(asyncio.run(run()))
+
+
+def _measure(base_url, path, headers, concurrency, duration, clients):
+    """부하 생성 프로세스 여러 개의 결과 합산"""
+    queue = multiprocessing.Queue()
+    per_client = max(1, concurrency // clients)
+    processes = [
+        multiprocessing.Process(target=_load, args=(base_url, path, headers, per_client, duration, queue))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+
+    latencies, errors = [], 0
+    for _ in processes:
+        client_latencies, client_errors = queue.get()
+        latencies.extend(client_latencies)
+        errors += client_errors
+    for process in processes:
+        process.join()
+
+    return latencies, errors
+
+
+def _leader_count(base_url, headers) -> int:
+    """만료되지 않은 리더 임대 보유자 수"""
+    import httpx
+
+    leases = httpx.get(f"{base_url}/api/admin/coordination", headers=headers).json()["leases"]
+    holders = {lease["holder"] for lease in leases if lease["name"] == "leader"}
+    return len(holders)
+
+
+def main(args):
+    import httpx
+
+    workdir = tempfile.mkdtemp(prefix="worker_scaling_")
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+
+    print(f"요청: GET {args.path}, 동시 요청 {args.concurrency}, {args.duration}초, 부하 생성 프로세스 {args.clients}개 (CPU {cpus}개)")
+    print(f"{'워커':>4}{'요청/초':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'오류':>6}{'배율':>7}{'리더':>5}")
+
+    baseline = None
+    results = []
+    for workers in args.workers:
+        port = _free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        process = _start_server(workers, port, workdir)
+        try:
+            token = httpx.post(
+                f"{base_url}/api/auth/login",
+                json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD},
+                timeout=30,
+            ).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            # 워커별 첫 요청 비용(연결, 지연 로드)을 측정에서 제외
+            _measure(base_url, args.path, headers, args.concurrency, 1, args.clients)
+            latencies, errors = _measure(base_url, args.path, headers, args.concurrency, args.duration, args.clients)
+            leaders = _leader_count(base_url, headers)
+        finally:
+            _stop_server(process)
+
+        throughput = len(latencies) / args.duration
+        baseline = baseline or throughput
+        results.append({
+            "workers": workers,
+            "requests_per_second": throughput,
+            "p50_ms": _percentile(latencies, 50) * 1000,
+            "p95_ms": _percentile(latencies, 95) * 1000,
+            "p99_ms": _percentile(latencies, 99) * 1000,
+            "errors": errors,
+            "scaling": throughput / baseline,
+            "leaders": leaders,
+        })
+        r = results[-1]
+        print(
+            f"{workers:>4}{r['requests_per_second']:>10.0f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+            f"{r['p99_ms']:>10.1f}{errors:>6}{r['scaling']:>6.2f}x{leaders:>5}"
+        )
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="워커 수에 따른 처리량 벤치마크")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="측정할 워커 수 목록")
+    parser.add_argument("--concurrency", type=int, default=32, help="전체 동시 요청 수")
+    parser.add_argument("--duration", type=int, default=10, help="측정 시간 (초)")
+    parser.add_argument("--clients", type=int, default=2, help="부하 생성 프로세스 수")
+    parser.add_argument("--path", default="/api/auth/me", help="요청 경로 (GET, 인증 헤더 포함)")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로도 출력")
+    main(parser.parse_args())
@@ -5,5 +5,27 @@ from .connection import init_db, get_db_connection
 from .user_db import UserDB
 from .report_db import ReportDB
 from .token_usage_db import TokenUsageDB
+from .blob_db import BlobDB
+from .output_file_db import OutputFileDB
+from .archive_db import ArchiveDB
+from .revoked_token_db import RevokedTokenDB
+from .lease_db import LeaseDB
+from .llm_call_db import LLMCallDB
+from .write_buffer import BufferedWriter, flush_all_writers, reopen_all_writers
 
-__all__ = ["init_db", "get_db_connection", "UserDB", "ReportDB", "TokenUsageDB"]
+__all__ = [
+    "init_db",
+    "get_db_connection",
+    "UserDB",
+    "ReportDB",
+    "TokenUsageDB",
+    "BlobDB",
+    "OutputFileDB",
+    "ArchiveDB",
+    "RevokedTokenDB",
+    "LeaseDB",
+    "LLMCallDB",
+    "BufferedWriter",
+    "flush_all_writers",
+    "reopen_all_writers",
+]
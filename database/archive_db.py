@@ -0,0 +1,109 @@
+"""
+보관된 보고서 파일 색인 데이터베이스 작업
+
+보관 기간이 지난 저장소 최상위 보고서 파일은 월별 ZIP 묶음(STORED)으로 옮겨지며,
+파일마다 묶음 안에서 내용이 시작하는 위치(data_offset)와 크기를 기록해 두어
+묶음을 풀지 않고 범위 읽기로 바로 내려받을 수 있습니다.
+"""
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .connection import get_db_connection
+from utils.tracing import traced_methods
+
+
+class ArchivedFile(NamedTuple):
+    """보관된 파일 위치"""
+    filename: str
+    archive_key: str
+    data_offset: int
+    size: int
+    mtime: float
+
+
+@traced_methods
+class ArchiveDB:
+    """보관된 보고서 파일 색인 데이터베이스 클래스"""
+
+    @staticmethod
+    def record_archive(archive_key: str, files: List[Tuple[str, int, int, float]]):
+        """
+        묶음에 담긴 파일을 보관 색인에 기록하고 파일 목록 색인에서 제거 (한 트랜잭션)
+
+        Args:
+            archive_key: 묶음 저장 키
+            files: (파일명, 내용 시작 위치, 크기, 수정 시각) 목록
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.executemany(
+                """
+                INSERT INTO archived_files (filename, archive_key, data_offset, size, mtime)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (filename) DO UPDATE SET
+                    archive_key = excluded.archive_key,
+                    data_offset = excluded.data_offset,
+                    size = excluded.size,
+                    mtime = excluded.mtime,
+                    archived_at = CURRENT_TIMESTAMP
+                """,
+                [(filename, archive_key, offset, size, mtime) for filename, offset, size, mtime in files]
+            )
+            cursor.executemany(
+                "DELETE FROM output_files WHERE filename = ?",
+                [(filename,) for filename, _, _, _ in files]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def get_archived_file(filename: str) -> Optional[ArchivedFile]:
+        """파일명으로 보관 위치 조회"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT filename, archive_key, data_offset, size, mtime FROM archived_files WHERE filename = ?",
+            (filename,)
+        )
+        row = cursor.fetchone()
+        conn.close()
+
+        if not row:
+            return None
+        return ArchivedFile(row["filename"], row["archive_key"], row["data_offset"], row["size"], row["mtime"])
+
+    @staticmethod
+    def list_files(limit: int, offset: int = 0) -> Tuple[int, List[Dict]]:
+        """
+        보관된 파일을 최근 파일 순으로 페이지 조회
+
+        Returns:
+            Tuple[int, List[Dict]]: (전체 파일 수, [{"filename", "size", "created", "archive"}])
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT COUNT(*) as total FROM archived_files")
+        total = cursor.fetchone()["total"]
+
+        cursor.execute(
+            """
+            SELECT filename, archive_key, size, mtime FROM archived_files
+            ORDER BY mtime DESC, filename
+            LIMIT ? OFFSET ?
+            """,
+            (limit, offset)
+        )
+        rows = cursor.fetchall()
+        conn.close()
+
+        files = [
+            {"filename": row["filename"], "size": row["size"], "created": row["mtime"], "archive": row["archive_key"]}
+            for row in rows
+        ]
+        return total, files
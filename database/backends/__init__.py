@@ -0,0 +1,77 @@
+"""
+데이터베이스 백엔드 패키지
+
+환경 변수로 백엔드를 선택합니다.
+- DB_BACKEND: sqlite(기본값) 또는 postgres
+- SQLITE_DB_PATH: SQLite 파일 경로 (기본값: data/hwp_reports.db)
+- DATABASE_URL: PostgreSQL 연결 문자열 (postgres 사용 시 필수)
+- DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE / DB_POOL_TIMEOUT: PostgreSQL 연결 풀 설정
+"""
+import os
+import threading
+from typing import Optional
+
+from .base import DatabaseBackend
+from .sqlite import SQLiteBackend
+
+DEFAULT_SQLITE_PATH = "data/hwp_reports.db"
+
+_backend: Optional[DatabaseBackend] = None
+_backend_lock = threading.Lock()
+
+
+def create_backend() -> DatabaseBackend:
+    """환경 변수 설정에 따라 백엔드 생성"""
+    database_url = os.getenv("DATABASE_URL", "")
+    backend_name = os.getenv("DB_BACKEND", "").lower()
+
+    if not backend_name:
+        backend_name = "postgres" if database_url.startswith(("postgres://", "postgresql://")) else "sqlite"
+
+    if backend_name == "sqlite":
+        return SQLiteBackend(os.getenv("SQLITE_DB_PATH", DEFAULT_SQLITE_PATH))
+
+    if backend_name in ("postgres", "postgresql"):
+        if not database_url:
+            raise ValueError("DB_BACKEND=postgres 사용 시 DATABASE_URL 환경 변수가 필요합니다.")
+
+        from .postgres import PostgresBackend
+        return PostgresBackend(
+            dsn=database_url,
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        )
+
+    raise ValueError(f"지원하지 않는 DB_BACKEND입니다: {backend_name}")
+
+
+def get_backend() -> DatabaseBackend:
+    """현재 프로세스의 백엔드 (최초 호출 시 생성)"""
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend()
+
+    return _backend
+
+
+def set_backend(backend: Optional[DatabaseBackend]):
+    """백엔드 교체 (테스트 또는 설정 재로드용)"""
+    global _backend
+
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
+
+
+__all__ = [
+    "DatabaseBackend",
+    "SQLiteBackend",
+    "create_backend",
+    "get_backend",
+    "set_backend",
+]
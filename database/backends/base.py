@@ -0,0 +1,87 @@
+"""
+데이터베이스 백엔드 인터페이스
+"""
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+
+
+class DatabaseBackend:
+    """
+    데이터베이스 백엔드 기본 클래스
+
+    쿼리 레이어(*DB 클래스)는 DB-API 형태의 연결만 사용합니다.
+    - 플레이스홀더는 항상 `?`를 사용 (백엔드가 필요 시 변환)
+    - 행은 row["컬럼명"] 형태로 접근 가능해야 함
+    - INSERT 후 생성된 행은 RETURNING으로 조회
+    """
+
+    name = "base"
+
+    # 불리언 플래그 컬럼 타입 (마이그레이션에서 사용)
+    boolean_type = "BOOLEAN"
+
+    # 바이너리 컬럼 타입
+    binary_type = "BLOB"
+
+    # 자동 증가 기본 키 컬럼 정의
+    id_column = "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def connect(self):
+        """연결 가져오기 (close() 호출 시 반납/종료)"""
+        raise NotImplementedError
+
+    def schema_statements(self) -> List[str]:
+        """테이블 생성 DDL 목록"""
+        raise NotImplementedError
+
+    def epoch_seconds(self, column: str) -> str:
+        """타임스탬프 컬럼을 유닉스 초(정수)로 변환하는 SQL 식"""
+        raise NotImplementedError
+
+    @contextmanager
+    def migration_lock(self):
+        """
+        마이그레이션 잠금을 획득한 연결을 제공
+
+        여러 워커가 동시에 시작해도 한 프로세스만 마이그레이션을 적용하도록 합니다.
+        """
+        raise NotImplementedError
+        yield
+
+    @contextmanager
+    def migration_transaction(self, conn, online: bool = False):
+        """마이그레이션 한 건을 적용하는 트랜잭션 범위"""
+        raise NotImplementedError
+        yield
+
+    def column_exists(self, cursor, table: str, column: str) -> bool:
+        """테이블에 컬럼이 있는지 확인"""
+        raise NotImplementedError
+
+    def create_index_sql(self, name: str, table: str, columns: Sequence[str], online: bool = False) -> str:
+        """인덱스 생성 SQL (online=True면 가능한 경우 쓰기를 막지 않는 방식으로 생성)"""
+        return f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(columns)})"
+
+    def create_index(self, cursor, name: str, table: str, columns: Sequence[str], online: bool = False):
+        """인덱스 생성 (이미 있으면 생략, 반복 실행해도 안전)"""
+        cursor.execute(self.create_index_sql(name, table, columns, online=online))
+
+    def load_extensions(self, cursor):
+        """설치된 확장 목록을 읽어 둠 (마이그레이션 후 한 번 호출)"""
+        pass
+
+    def has_extension(self, name: str) -> bool:
+        """확장 설치 여부 (load_extensions로 읽어 둔 값)"""
+        return False
+
+    def analyze(self, cursor):
+        """쿼리 플래너 통계 갱신"""
+        cursor.execute("ANALYZE")
+
+    def pool_stats(self) -> Optional[Dict[str, int]]:
+        """연결 풀 사용률 (size/busy/waiting, 풀이 없으면 None)"""
+        return None
+
+    def close(self):
+        """백엔드 자원 정리 (연결 풀 등)"""
+        pass
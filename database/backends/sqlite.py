@@ -0,0 +1,110 @@
+"""
+SQLite 백엔드
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import List
+
+from .base import DatabaseBackend
+
+
+class SQLiteBackend(DatabaseBackend):
+    """단일 호스트용 SQLite 백엔드"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, lock_timeout: float = 60.0):
+        """
+        Args:
+            path: 데이터베이스 파일 경로
+            lock_timeout: 마이그레이션 잠금 대기 시간 (초)
+        """
+        self.path = path
+        self.lock_timeout = lock_timeout
+
+    def connect(self, **kwargs):
+        # 데이터베이스 디렉토리 생성
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        conn = sqlite3.connect(self.path, **kwargs)
+        conn.row_factory = sqlite3.Row  # 딕셔너리 형태로 결과 반환
+        return conn
+
+    @contextmanager
+    def migration_lock(self):
+        # BEGIN IMMEDIATE로 쓰기 잠금을 잡고 모든 마이그레이션을 한 트랜잭션으로 적용
+        # (다른 워커는 잠금이 풀릴 때까지 대기한 뒤 이미 적용된 버전을 보고 건너뜀)
+        conn = self.connect(timeout=self.lock_timeout, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    @contextmanager
+    def migration_transaction(self, conn, online: bool = False):
+        # SQLite는 온라인 인덱스 생성이 없으므로 잠금 트랜잭션 안에서 그대로 실행
+        yield
+
+    def column_exists(self, cursor, table: str, column: str) -> bool:
+        cursor.execute(f"PRAGMA table_info({table})")
+        return column in [row["name"] for row in cursor.fetchall()]
+
+    def schema_statements(self) -> List[str]:
+        return [
+            # 사용자 테이블
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT UNIQUE NOT NULL,
+                username TEXT NOT NULL,
+                hashed_password TEXT NOT NULL,
+                is_active BOOLEAN DEFAULT 0,
+                is_admin BOOLEAN DEFAULT 0,
+                password_reset_required BOOLEAN DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            # 보고서 테이블
+            """
+            CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                topic TEXT NOT NULL,
+                title TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                file_size INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+            """,
+            # 토큰 사용량 테이블
+            """
+            CREATE TABLE IF NOT EXISTS token_usage (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                report_id INTEGER,
+                input_tokens INTEGER DEFAULT 0,
+                output_tokens INTEGER DEFAULT 0,
+                total_tokens INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+                FOREIGN KEY (report_id) REFERENCES reports (id) ON DELETE SET NULL
+            )
+            """,
+            # 인덱스 생성
+            "CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)",
+            "CREATE INDEX IF NOT EXISTS idx_reports_user_id ON reports(user_id)",
+            "CREATE INDEX IF NOT EXISTS idx_token_usage_user_id ON token_usage(user_id)",
+        ]
+
+    def epoch_seconds(self, column: str) -> str:
+        return f"CAST(strftime('%s', {column}) AS INTEGER)"
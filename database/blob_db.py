@@ -0,0 +1,243 @@
+"""
+보고서 파일(blob) 참조 수 데이터베이스 작업
+
+reports.content_hash가 가리키는 파일마다 blobs 행이 하나 있으며,
+ref_count가 0이 된 뒤 유예 시간이 지난 파일만 정리 대상이 됩니다.
+acquire/release는 보고서 행 변경과 같은 트랜잭션 안에서 호출합니다.
+
+정리(gc_blobs.py)는 행을 바로 지우지 않고 삭제 상태로 표시합니다.
+- deleting_at: 파일 삭제 시작 (참조 추가 거절)
+- deleted_at: 파일 삭제 완료 (파일을 다시 넣은 뒤 revive=True로만 참조 추가 가능)
+같은 내용의 보고서를 만드는 요청이 삭제 직전의 파일을 재사용했다가 파일을 잃는 일을 막기 위함이며,
+삭제 완료 표시는 유예 시간이 지난 뒤 purge_deleted로 지웁니다.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Set, Tuple
+from .connection import get_db_connection
+from utils.tracing import traced_methods
+
+# released_at 비교용 형식 (CURRENT_TIMESTAMP와 동일)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 삭제가 끝나기를 기다릴 때 상태를 다시 읽는 간격 (초)
+DELETE_POLL_SECONDS = 0.2
+
+
+class BlobDeletingError(Exception):
+    """정리 중이거나 삭제된 파일에 참조를 추가하려 한 경우 (파일을 다시 넣어야 함)"""
+
+
+@traced_methods
+class BlobDB:
+    """보고서 파일 참조 수 데이터베이스 클래스"""
+
+    @staticmethod
+    def acquire(cursor, content_hash: str, path: str, size: int, revive: bool = False):
+        """
+        파일 참조 추가 (처음 보는 해시면 행 생성, 커밋하지 않음)
+
+        Args:
+            revive: 삭제가 끝난 뒤 파일을 다시 넣은 경우 True (삭제 완료 행을 되살림)
+
+        Raises:
+            BlobDeletingError: 파일이 정리 중이거나(revive와 무관) 삭제된 경우(revive=False)
+        """
+        cursor.execute(
+            """
+            INSERT INTO blobs (hash, path, size, ref_count)
+            VALUES (?, ?, ?, 1)
+            ON CONFLICT (hash) DO UPDATE SET
+                ref_count = CASE WHEN blobs.deleting_at IS NULL THEN blobs.ref_count + 1 ELSE 1 END,
+                path = excluded.path,
+                size = excluded.size,
+                released_at = NULL,
+                deleting_at = NULL,
+                deleted_at = NULL
+            WHERE blobs.deleting_at IS NULL OR (? = 1 AND blobs.deleted_at IS NOT NULL)
+            RETURNING hash
+            """,
+            (content_hash, path, size, int(revive))
+        )
+        if cursor.fetchone() is None:
+            raise BlobDeletingError(f"정리 중인 파일입니다: {content_hash}")
+
+    @staticmethod
+    def release(cursor, content_hash: str):
+        """파일 참조 해제 (0이 되면 해제 시각 기록, 커밋하지 않음)"""
+        cursor.execute(
+            """
+            UPDATE blobs SET
+                ref_count = ref_count - 1,
+                released_at = CASE WHEN ref_count <= 1 THEN CURRENT_TIMESTAMP ELSE NULL END
+            WHERE hash = ?
+            """,
+            (content_hash,)
+        )
+
+    @staticmethod
+    def release_many(cursor, content_hashes: Iterable[str]):
+        """여러 파일 참조 해제 (커밋하지 않음)"""
+        for content_hash in content_hashes:
+            if content_hash:
+                BlobDB.release(cursor, content_hash)
+
+    @staticmethod
+    def collect_unreferenced(grace_seconds: int, dry_run: bool = False) -> List[Tuple[str, str]]:
+        """
+        참조가 없어진 지 유예 시간이 지난 파일을 정리 중(deleting_at)으로 표시
+
+        표시한 뒤에는 참조 추가가 거절되므로 파일을 지워도 됩니다. 파일을 지운 뒤 mark_deleted를 호출합니다.
+        정리 중 표시 후 유예 시간이 지나도록 끝나지 않은 파일(정리 작업 중단)도 다시 반환합니다.
+
+        Args:
+            grace_seconds: 참조 해제 후 유지할 시간 (초)
+            dry_run: True면 표시하지 않고 대상만 반환
+
+        Returns:
+            List[Tuple[str, str]]: 정리할 (해시, 파일 경로) 목록
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=grace_seconds)).strftime(TIMESTAMP_FORMAT)
+        where = (
+            "ref_count <= 0 AND released_at < ?"
+            " AND (deleting_at IS NULL OR (deleted_at IS NULL AND deleting_at < ?))"
+        )
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            if dry_run:
+                cursor.execute(f"SELECT hash, path FROM blobs WHERE {where}", (cutoff, cutoff))
+            else:
+                # 조건을 UPDATE 문에 다시 걸어 그 사이 참조된 파일은 제외
+                cursor.execute(
+                    f"""
+                    UPDATE blobs SET deleting_at = CURRENT_TIMESTAMP
+                    WHERE {where}
+                    RETURNING hash, path
+                    """,
+                    (cutoff, cutoff)
+                )
+            rows = cursor.fetchall()
+            conn.commit()
+        finally:
+            conn.close()
+
+        return [(row["hash"], row["path"]) for row in rows]
+
+    @staticmethod
+    def mark_deleted(content_hash: str) -> bool:
+        """파일 삭제 완료 표시 (이후 파일을 다시 넣은 요청만 revive로 참조 추가)"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "UPDATE blobs SET deleted_at = CURRENT_TIMESTAMP WHERE hash = ? AND deleting_at IS NOT NULL",
+            (content_hash,)
+        )
+
+        conn.commit()
+        affected = cursor.rowcount
+        conn.close()
+
+        return affected > 0
+
+    @staticmethod
+    def purge_deleted(grace_seconds: int) -> int:
+        """
+        삭제 완료 후 유예 시간이 지난 행 삭제
+
+        유예 시간은 파일을 넣은 뒤 참조를 추가하기까지의 시간보다 충분히 길어야 합니다.
+
+        Returns:
+            int: 삭제한 행 수
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=grace_seconds)).strftime(TIMESTAMP_FORMAT)
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("DELETE FROM blobs WHERE deleted_at < ?", (cutoff,))
+
+        conn.commit()
+        deleted = cursor.rowcount
+        conn.close()
+
+        return deleted
+
+    @staticmethod
+    def wait_deleted(content_hash: str, timeout: float = 30.0):
+        """
+        정리 중인 파일의 삭제가 끝날 때까지 대기 (이후 파일을 다시 넣고 revive로 참조 추가)
+
+        Raises:
+            TimeoutError: 시간 안에 삭제가 끝나지 않은 경우
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            conn = get_db_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT deleting_at, deleted_at FROM blobs WHERE hash = ?", (content_hash,))
+                row = cursor.fetchone()
+            finally:
+                conn.close()
+
+            if row is None or row["deleting_at"] is None or row["deleted_at"] is not None:
+                return
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"파일 정리가 끝나지 않았습니다: {content_hash}")
+            time.sleep(DELETE_POLL_SECONDS)
+
+    @staticmethod
+    def get_all_hashes() -> Set[str]:
+        """등록된 모든 파일 해시"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT hash FROM blobs")
+        hashes = {row["hash"] for row in cursor.fetchall()}
+        conn.close()
+
+        return hashes
+
+    @staticmethod
+    def recount() -> int:
+        """
+        reports 테이블 기준으로 참조 수 재계산
+
+        사용자 삭제의 연쇄 삭제 등 코드 밖에서 바뀐 참조를 바로잡습니다.
+
+        Returns:
+            int: 참조 수가 바뀐 행 수
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                """
+                UPDATE blobs SET
+                    ref_count = actual.ref_count,
+                    released_at = CASE
+                        WHEN actual.ref_count = 0 THEN COALESCE(blobs.released_at, CURRENT_TIMESTAMP)
+                        ELSE NULL
+                    END
+                FROM (
+                    SELECT b.hash, COUNT(r.id) as ref_count
+                    FROM blobs b
+                    LEFT JOIN reports r ON r.content_hash = b.hash
+                    GROUP BY b.hash
+                ) as actual
+                WHERE blobs.hash = actual.hash AND blobs.ref_count != actual.ref_count
+                    AND blobs.deleting_at IS NULL
+                """
+            )
+            changed = cursor.rowcount
+            conn.commit()
+        finally:
+            conn.close()
+
+        return changed
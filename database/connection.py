@@ -1,78 +1,48 @@
 """
-SQLite 데이터베이스 연결 및 초기화
+데이터베이스 연결 및 초기화
+
+실제 연결은 설정된 백엔드(SQLite 또는 PostgreSQL)가 제공합니다.
 """
-import sqlite3
-import os
-from pathlib import Path
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+from .backends import get_backend, DEFAULT_SQLITE_PATH
+from .migrations import run_migrations
 
 
-DB_PATH = "data/hwp_reports.db"
+DB_PATH = DEFAULT_SQLITE_PATH
 
 
 def get_db_connection():
     """데이터베이스 연결 가져오기"""
-    # 데이터베이스 디렉토리 생성
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    return get_backend().connect()
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # 딕셔너리 형태로 결과 반환
-    return conn
 
+def to_datetime(value: Optional[Union[str, datetime]]) -> Optional[datetime]:
+    """
+    타임스탬프 컬럼 값을 datetime으로 변환
 
-def init_db():
-    """데이터베이스 초기화 및 테이블 생성"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    SQLite는 문자열, PostgreSQL은 datetime 객체를 반환하므로 둘 다 처리합니다.
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
 
-    # 사용자 테이블
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            username TEXT NOT NULL,
-            hashed_password TEXT NOT NULL,
-            is_active BOOLEAN DEFAULT 0,
-            is_admin BOOLEAN DEFAULT 0,
-            password_reset_required BOOLEAN DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
 
-    # 보고서 테이블
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS reports (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            topic TEXT NOT NULL,
-            title TEXT NOT NULL,
-            filename TEXT NOT NULL,
-            file_path TEXT NOT NULL,
-            file_size INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-        )
-    """)
+def to_utc_naive(value: datetime) -> datetime:
+    """시간대 정보가 있으면 UTC로 변환 후 제거 (DB의 CURRENT_TIMESTAMP는 UTC)"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
-    # 토큰 사용량 테이블
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS token_usage (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            report_id INTEGER,
-            input_tokens INTEGER DEFAULT 0,
-            output_tokens INTEGER DEFAULT 0,
-            total_tokens INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-            FOREIGN KEY (report_id) REFERENCES reports (id) ON DELETE SET NULL
-        )
-    """)
 
-    # 인덱스 생성
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reports_user_id ON reports(user_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_token_usage_user_id ON token_usage(user_id)")
+def init_db():
+    """
+    데이터베이스 초기화 및 테이블 생성
+
+    스키마는 버전 기반 마이그레이션으로 관리합니다 (database/migrations.py).
 
-    conn.commit()
-    conn.close()
+    Returns:
+        List[int]: 이번에 적용된 마이그레이션 버전 목록
+    """
+    return run_migrations()
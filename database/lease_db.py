@@ -0,0 +1,111 @@
+"""
+작업 조정 임대(lease) 데이터베이스 작업
+
+여러 워커(프로세스/호스트)가 같은 데이터베이스를 쓸 때 주기 작업을 한 곳에서만 실행하도록
+이름별로 보유자와 만료 시각을 기록합니다. 보유자는 만료 전에 갱신하고,
+만료된 임대는 다른 워커가 가져갈 수 있습니다.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List
+from .connection import get_db_connection, to_datetime
+from utils.tracing import traced_methods
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@traced_methods
+class LeaseDB:
+    """작업 조정 임대 데이터베이스 클래스"""
+
+    @staticmethod
+    def acquire(name: str, holder: str, ttl_seconds: int) -> bool:
+        """
+        임대 획득 또는 갱신 (비어 있거나, 이미 보유 중이거나, 만료된 경우에만)
+
+        Args:
+            name: 임대 이름
+            holder: 보유자 ID (워커별 고유 값)
+            ttl_seconds: 유효 시간 (초)
+
+        Returns:
+            bool: 획득(갱신)했으면 True
+        """
+        now = datetime.utcnow()
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            # 한 문장으로 조건부 교체 (동시에 시도해도 한 워커만 성공)
+            cursor.execute(
+                """
+                INSERT INTO leases (name, holder, expires_at, acquired_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    holder = excluded.holder,
+                    expires_at = excluded.expires_at,
+                    acquired_at = CASE
+                        WHEN leases.holder = excluded.holder THEN leases.acquired_at
+                        ELSE excluded.acquired_at
+                    END
+                WHERE leases.holder = excluded.holder OR leases.expires_at <= ?
+                """,
+                (
+                    name,
+                    holder,
+                    (now + timedelta(seconds=ttl_seconds)).strftime(TIMESTAMP_FORMAT),
+                    now.strftime(TIMESTAMP_FORMAT),
+                    now.strftime(TIMESTAMP_FORMAT),
+                )
+            )
+            acquired = cursor.rowcount == 1
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return acquired
+
+    @staticmethod
+    def release(name: str, holder: str) -> bool:
+        """
+        보유 중인 임대 반납 (다른 워커가 바로 가져갈 수 있음)
+
+        Returns:
+            bool: 반납했으면 True (보유자가 아니면 False)
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+            released = cursor.rowcount == 1
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return released
+
+    @staticmethod
+    def get_leases() -> List[Dict]:
+        """전체 임대 목록 (만료된 임대 포함)"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT name, holder, expires_at, acquired_at FROM leases ORDER BY name")
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [
+            {
+                "name": row["name"],
+                "holder": row["holder"],
+                "expires_at": to_datetime(row["expires_at"]),
+                "acquired_at": to_datetime(row["acquired_at"]),
+            }
+            for row in rows
+        ]
@@ -0,0 +1,221 @@
+"""
+Claude API 호출 기록 데이터베이스 작업
+
+호출마다 모델, 지연 시간, 첫 토큰까지의 시간, 출력 속도, stop_reason, 재시도 횟수, 캐시 사용량을 남기고
+모델·일별 백분위수(p50/p95/p99)는 SQL 윈도 함수로 계산합니다 (SQLite 3.25+, PostgreSQL 공통).
+기록은 보고서 생성 응답을 늦추지 않도록 버퍼에 모았다가 일괄 저장합니다.
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional
+from .connection import get_db_connection
+from .backends import get_backend
+from .write_buffer import BufferedWriter
+from models.llm_call import LatencyPercentiles, LLMCallStats, LLMUsage
+from utils.tracing import traced_methods
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 계산할 백분위수
+PERCENTILES = (50, 95, 99)
+
+# 백분위수를 계산할 컬럼과 정렬 방향 (출력 속도는 느린 쪽이 꼬리)
+PERCENTILE_COLUMNS = (
+    ("latency_ms", "ASC"),
+    ("first_token_ms", "ASC"),
+    ("output_tokens_per_second", "DESC"),
+)
+
+# Claude API 호출 일괄 기록기
+llm_call_writer = BufferedWriter(
+    name="llm_calls",
+    sql="""
+        INSERT INTO llm_calls (
+            user_id, model, status, error_type, stop_reason, latency_ms, first_token_ms,
+            input_tokens, output_tokens, output_tokens_per_second,
+            cache_read_tokens, cache_creation_tokens, retries, trace_id, created_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+)
+
+
+@traced_methods
+class LLMCallDB:
+    """Claude API 호출 기록 데이터베이스 클래스"""
+
+    @staticmethod
+    def enqueue_call(usage: LLMUsage, user_id: Optional[int] = None, created_at: Optional[datetime] = None):
+        """
+        호출 기록을 버퍼에 추가 (비동기 일괄 저장)
+
+        Args:
+            usage: 호출 사용량과 성능
+            user_id: 요청한 사용자 ID (인증 없는 API면 None)
+            created_at: 호출 시작 시각 (UTC, 기본값 현재)
+        """
+        llm_call_writer.add((
+            user_id,
+            usage.model,
+            usage.status,
+            usage.error_type,
+            usage.stop_reason,
+            usage.latency_ms,
+            usage.first_token_ms,
+            usage.input_tokens,
+            usage.output_tokens,
+            usage.output_tokens_per_second,
+            usage.cache_read_tokens,
+            usage.cache_creation_tokens,
+            usage.retries,
+            usage.trace_id,
+            (created_at or datetime.utcnow()).strftime(TIMESTAMP_FORMAT),
+        ))
+
+    @staticmethod
+    def _stats_sql(day_column: str) -> str:
+        """모델(·일)별 합계와 백분위수 SQL (nearest-rank: 순위 = ceil(n × p / 100))"""
+        ranks = []
+        picks = []
+        for column, direction in PERCENTILE_COLUMNS:
+            # NULL은 백엔드마다 정렬 위치가 달라 항상 뒤로 보냄
+            ranks.append(
+                f"ROW_NUMBER() OVER (PARTITION BY model, day "
+                f"ORDER BY CASE WHEN {column} IS NULL THEN 1 ELSE 0 END, {column} {direction}) as {column}_rank"
+            )
+            ranks.append(f"COUNT({column}) OVER (PARTITION BY model, day) as {column}_count")
+            for p in PERCENTILES:
+                picks.append(
+                    f"MAX(CASE WHEN {column}_rank = ({column}_count * {p} + 99) / 100 "
+                    f"THEN {column} END) as {column}_p{p}"
+                )
+
+        return f"""
+            WITH calls AS (
+                SELECT
+                    model,
+                    {day_column} as day,
+                    status,
+                    retries,
+                    cache_read_tokens,
+                    input_tokens,
+                    output_tokens,
+                    latency_ms,
+                    first_token_ms,
+                    output_tokens_per_second
+                FROM llm_calls
+                WHERE created_at >= ? AND created_at < ?
+            ),
+            ranked AS (
+                SELECT
+                    model,
+                    day,
+                    latency_ms,
+                    first_token_ms,
+                    output_tokens_per_second,
+                    {", ".join(ranks)}
+                FROM calls
+                WHERE status = 'ok'
+            ),
+            percentiles AS (
+                SELECT model, day, {", ".join(picks)}
+                FROM ranked
+                GROUP BY model, day
+            ),
+            totals AS (
+                SELECT
+                    model,
+                    day,
+                    COUNT(*) as calls,
+                    SUM(CASE WHEN status = 'ok' THEN 0 ELSE 1 END) as errors,
+                    SUM(retries) as retries,
+                    SUM(CASE WHEN cache_read_tokens > 0 THEN 1 ELSE 0 END) as cache_hits,
+                    SUM(input_tokens) as input_tokens,
+                    SUM(output_tokens) as output_tokens
+                FROM calls
+                GROUP BY model, day
+            )
+            SELECT totals.*, {", ".join(f"percentiles.{column}_p{p}" for column, _ in PERCENTILE_COLUMNS for p in PERCENTILES)}
+            FROM totals
+            LEFT JOIN percentiles ON percentiles.model = totals.model AND percentiles.day = totals.day
+            ORDER BY totals.model, totals.day
+        """
+
+    @staticmethod
+    def get_stats(start: datetime, end: datetime, per_day: bool = True) -> List[LLMCallStats]:
+        """
+        모델(·일)별 호출 수, 오류/재시도/캐시 사용 수, 지연 시간·첫 토큰·출력 속도 백분위수
+
+        Args:
+            start: 조회 시작 시각 (UTC, 포함)
+            end: 조회 종료 시각 (UTC, 미포함)
+            per_day: 일별(UTC)로 나눌지 여부 (False면 구간 전체)
+
+        Returns:
+            List[LLMCallStats]: 모델, 일 순으로 정렬된 통계
+        """
+        if per_day:
+            day_column = f"{get_backend().epoch_seconds('created_at')} / 86400 * 86400"
+        else:
+            day_column = "0"
+
+        # created_at은 초 단위로 잘려 저장되므로 end를 올림 (방금 끝난 호출도 포함)
+        if end.microsecond:
+            end = end.replace(microsecond=0) + timedelta(seconds=1)
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            LLMCallDB._stats_sql(day_column),
+            (start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT))
+        )
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [LLMCallDB._row_to_stats(row, per_day) for row in rows]
+
+    @staticmethod
+    def delete_before(cutoff: datetime) -> int:
+        """
+        기준 시각 이전 호출 기록 삭제 (보관 정책)
+
+        Returns:
+            int: 삭제한 행 수
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("DELETE FROM llm_calls WHERE created_at < ?", (cutoff.strftime(TIMESTAMP_FORMAT),))
+            deleted = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return deleted
+
+    @staticmethod
+    def _row_to_stats(row, per_day: bool) -> LLMCallStats:
+        """데이터베이스 행을 LLMCallStats 모델로 변환"""
+        percentiles = {
+            column: LatencyPercentiles(**{
+                f"p{p}": round(float(row[f"{column}_p{p}"]), 1) if row[f"{column}_p{p}"] is not None else None
+                for p in PERCENTILES
+            })
+            for column, _ in PERCENTILE_COLUMNS
+        }
+
+        return LLMCallStats(
+            model=row["model"],
+            day=datetime.utcfromtimestamp(row["day"]) if per_day else None,
+            calls=row["calls"],
+            errors=row["errors"] or 0,
+            retries=row["retries"] or 0,
+            cache_hits=row["cache_hits"] or 0,
+            input_tokens=row["input_tokens"] or 0,
+            output_tokens=row["output_tokens"] or 0,
+            **percentiles
+        )
@@ -0,0 +1,470 @@
+"""
+버전 기반 스키마 마이그레이션
+
+적용된 버전은 schema_version 테이블에 기록되며, 시작 시 잠금을 잡은 상태에서
+아직 적용되지 않은 마이그레이션만 순서대로 실행합니다.
+새 마이그레이션은 MIGRATIONS 목록 끝에 버전을 올려 추가합니다.
+"""
+import logging
+from typing import Callable, List, NamedTuple
+
+from .backends import get_backend
+
+logger = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    """마이그레이션 정의"""
+    version: int
+    description: str
+    apply: Callable  # apply(cursor, backend)
+    # True면 온라인 인덱스 생성처럼 트랜잭션 밖에서 실행 (문장마다 바로 커밋)
+    # 버전 기록은 별도 커밋이므로 그 사이 중단되면 다음 시작 때 다시 실행됨 (반복 실행해도 안전해야 함)
+    online: bool = False
+
+
+def _initial_schema(cursor, backend):
+    """기본 테이블 및 인덱스"""
+    for statement in backend.schema_statements():
+        cursor.execute(statement)
+
+
+def _add_password_reset_required(cursor, backend):
+    """users.password_reset_required 컬럼 추가 (구버전 데이터베이스용)"""
+    if not backend.column_exists(cursor, "users", "password_reset_required"):
+        cursor.execute(
+            f"ALTER TABLE users ADD COLUMN password_reset_required {backend.boolean_type} DEFAULT 0"
+        )
+
+
+def _add_performance_indexes(cursor, backend):
+    """조회/집계 성능을 위한 인덱스"""
+    indexes = [
+        ("idx_token_usage_report_id", "token_usage", ["report_id"]),
+        ("idx_token_usage_created_at", "token_usage", ["created_at"]),
+        ("idx_token_usage_user_created", "token_usage", ["user_id", "created_at"]),
+        ("idx_reports_created_at", "reports", ["created_at"]),
+        ("idx_reports_user_created", "reports", ["user_id", "created_at"]),
+    ]
+    for name, table, columns in indexes:
+        backend.create_index(cursor, name, table, columns, online=True)
+
+
+def _add_report_search(cursor, backend):
+    """보고서 본문 전문 검색 테이블"""
+    if backend.name == "sqlite":
+        # 한국어는 공백 단위 토큰화가 맞지 않으므로 trigram 토크나이저 사용
+        cursor.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+                title, topic, body, tokenize = 'trigram'
+            )
+            """
+        )
+        # reports 삭제/수정 시 검색 인덱스 동기화
+        cursor.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_reports_fts_delete AFTER DELETE ON reports
+            BEGIN
+                DELETE FROM reports_fts WHERE rowid = old.id;
+            END
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_reports_fts_update AFTER UPDATE OF title, topic ON reports
+            BEGIN
+                UPDATE reports_fts SET title = new.title, topic = new.topic WHERE rowid = new.id;
+            END
+            """
+        )
+        # 기존 보고서는 제목/주제만 색인 (본문은 저장되어 있지 않음)
+        cursor.execute(
+            """
+            INSERT INTO reports_fts (rowid, title, topic, body)
+            SELECT id, title, topic, '' FROM reports
+            WHERE id NOT IN (SELECT rowid FROM reports_fts)
+            """
+        )
+    else:
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS report_search (
+                report_id BIGINT PRIMARY KEY REFERENCES reports (id) ON DELETE CASCADE,
+                body TEXT NOT NULL DEFAULT ''
+            )
+            """
+        )
+
+        # pg_trgm이 없는 서버에서는 인덱스 없이 ILIKE 검색으로 동작
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            logger.warning("pg_trgm 확장을 사용할 수 없어 검색 인덱스를 생성하지 않습니다.")
+            return
+
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column, table in (("body", "report_search"), ("title", "reports"), ("topic", "reports")):
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_{column}_trgm "
+                f"ON {table} USING gin ({column} gin_trgm_ops)"
+            )
+
+
+def _add_report_content(cursor, backend):
+    """reports.content 컬럼 추가 (압축된 섹션 내용, 재렌더링용)"""
+    if not backend.column_exists(cursor, "reports", "content"):
+        cursor.execute(f"ALTER TABLE reports ADD COLUMN content {backend.binary_type}")
+
+
+def _add_blob_store(cursor, backend):
+    """내용 주소 기반 파일 저장소 참조 수 테이블 및 reports.content_hash 컬럼"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS blobs (
+            hash TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            size BIGINT DEFAULT 0,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            released_at TIMESTAMP
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_blobs_released_at ON blobs(released_at)")
+
+    if not backend.column_exists(cursor, "reports", "content_hash"):
+        cursor.execute("ALTER TABLE reports ADD COLUMN content_hash TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_reports_content_hash ON reports(content_hash)")
+
+
+def _add_output_files(cursor, backend):
+    """저장소 최상위 보고서 파일 목록 색인 (/api/reports)"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS output_files (
+            filename TEXT PRIMARY KEY,
+            size BIGINT DEFAULT 0,
+            mtime DOUBLE PRECISION NOT NULL,
+            indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_output_files_mtime ON output_files(mtime)")
+
+
+def _add_retention_tables(cursor, backend):
+    """보관 정책용 테이블 (월별 묶음에 보관된 파일 색인, 토큰 사용량 일별 요약)"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS archived_files (
+            filename TEXT PRIMARY KEY,
+            archive_key TEXT NOT NULL,
+            data_offset BIGINT NOT NULL,
+            size BIGINT NOT NULL,
+            mtime DOUBLE PRECISION NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_archived_files_archive_key ON archived_files(archive_key)")
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS token_usage_daily (
+            day TIMESTAMP NOT NULL,
+            user_id INTEGER NOT NULL,
+            input_tokens INTEGER DEFAULT 0,
+            output_tokens INTEGER DEFAULT 0,
+            total_tokens INTEGER DEFAULT 0,
+            request_count INTEGER DEFAULT 0,
+            report_count INTEGER DEFAULT 0,
+            PRIMARY KEY (day, user_id),
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_token_usage_daily_user_day ON token_usage_daily(user_id, day)"
+    )
+
+
+def _add_token_version(cursor, backend):
+    """users.token_version 컬럼 추가 (클레임 기반 인증 토큰 무효화용)"""
+    if not backend.column_exists(cursor, "users", "token_version"):
+        cursor.execute("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_updated_at ON users(updated_at)")
+
+
+def _add_revoked_tokens(cursor, backend):
+    """폐기된 토큰(jti) 목록 (만료 시각이 지나면 정리)"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            jti TEXT PRIMARY KEY,
+            user_id INTEGER,
+            expires_at TIMESTAMP NOT NULL,
+            revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens(expires_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked_at ON revoked_tokens(revoked_at)")
+
+
+def _add_leases(cursor, backend):
+    """작업 조정 임대 (여러 워커 중 한 곳에서만 주기 작업 실행)"""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at TIMESTAMP NOT NULL,
+            acquired_at TIMESTAMP NOT NULL
+        )
+        """
+    )
+
+
+def _add_llm_calls(cursor, backend):
+    """Claude API 호출 기록 (모델별 지연 시간/처리량 분석용)"""
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS llm_calls (
+            id {backend.id_column},
+            user_id INTEGER,
+            model TEXT NOT NULL,
+            status TEXT NOT NULL,
+            error_type TEXT,
+            stop_reason TEXT,
+            latency_ms DOUBLE PRECISION NOT NULL,
+            first_token_ms DOUBLE PRECISION,
+            input_tokens INTEGER DEFAULT 0,
+            output_tokens INTEGER DEFAULT 0,
+            output_tokens_per_second DOUBLE PRECISION,
+            cache_read_tokens INTEGER DEFAULT 0,
+            cache_creation_tokens INTEGER DEFAULT 0,
+            retries INTEGER DEFAULT 0,
+            trace_id TEXT,
+            created_at TIMESTAMP NOT NULL
+        )
+        """
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_created_at ON llm_calls(created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_llm_calls_model_created ON llm_calls(model, created_at)")
+
+
+def _add_reports_filename_index(cursor, backend):
+    """보관 대상 조회에서 보고서가 가리키는 파일을 제외하기 위한 인덱스"""
+    backend.create_index(cursor, "idx_reports_filename", "reports", ["filename"], online=True)
+
+
+def _add_search_user_id(cursor, backend):
+    """SQLite 검색 인덱스(reports_fts)에 user_id 추가 (다른 사용자의 일치 결과를 조인 전에 제외)"""
+    if backend.name != "sqlite":
+        return
+
+    # FTS5 테이블은 컬럼을 추가할 수 없으므로 새로 만들어 옮김
+    cursor.execute("DROP TRIGGER IF EXISTS trg_reports_fts_delete")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_reports_fts_update")
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE reports_fts_v2 USING fts5(
+            title, topic, body, user_id UNINDEXED, tokenize = 'trigram'
+        )
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO reports_fts_v2 (rowid, title, topic, body, user_id)
+        SELECT f.rowid, f.title, f.topic, f.body, r.user_id
+        FROM reports_fts f JOIN reports r ON r.id = f.rowid
+        """
+    )
+    cursor.execute("DROP TABLE reports_fts")
+    cursor.execute("ALTER TABLE reports_fts_v2 RENAME TO reports_fts")
+    cursor.execute(
+        """
+        CREATE TRIGGER trg_reports_fts_delete AFTER DELETE ON reports
+        BEGIN
+            DELETE FROM reports_fts WHERE rowid = old.id;
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER trg_reports_fts_update AFTER UPDATE OF title, topic ON reports
+        BEGIN
+            UPDATE reports_fts SET title = new.title, topic = new.topic WHERE rowid = new.id;
+        END
+        """
+    )
+
+
+def _add_blob_tombstones(cursor, backend):
+    """blobs 삭제 상태 컬럼 (정리 중인 파일은 참조 추가를 거절)"""
+    for column in ("deleting_at", "deleted_at"):
+        if not backend.column_exists(cursor, "blobs", column):
+            cursor.execute(f"ALTER TABLE blobs ADD COLUMN {column} TIMESTAMP")
+
+
+def _backfill_report_search(cursor, backend):
+    """검색 인덱스에 빠진 보고서(create_report로 만든 보고서) 추가"""
+    if backend.name == "sqlite":
+        cursor.execute(
+            """
+            INSERT INTO reports_fts (rowid, title, topic, body, user_id)
+            SELECT id, title, topic, '', user_id FROM reports
+            WHERE id NOT IN (SELECT rowid FROM reports_fts)
+            """
+        )
+    else:
+        cursor.execute(
+            """
+            INSERT INTO report_search (report_id, body)
+            SELECT id, '' FROM reports
+            WHERE id NOT IN (SELECT report_id FROM report_search)
+            """
+        )
+
+
+def _add_search_owner(cursor, backend):
+    """
+    SQLite 검색 인덱스의 user_id를 색인되는 소유자 토큰(owner)으로 교체
+
+    UNINDEXED 컬럼은 일치 결과를 모두 읽은 뒤에야 거를 수 있으므로,
+    '<user_id>' 토큰을 색인해 MATCH 안에서 사용자 보고서로 좁힙니다.
+    """
+    if backend.name != "sqlite":
+        return
+
+    cursor.execute("DROP TRIGGER IF EXISTS trg_reports_fts_delete")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_reports_fts_update")
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE reports_fts_v3 USING fts5(
+            title, topic, body, owner, tokenize = 'trigram'
+        )
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO reports_fts_v3 (rowid, title, topic, body, owner)
+        SELECT f.rowid, f.title, f.topic, f.body, '<' || r.user_id || '>'
+        FROM reports_fts f JOIN reports r ON r.id = f.rowid
+        """
+    )
+    cursor.execute("DROP TABLE reports_fts")
+    cursor.execute("ALTER TABLE reports_fts_v3 RENAME TO reports_fts")
+    cursor.execute(
+        """
+        CREATE TRIGGER trg_reports_fts_delete AFTER DELETE ON reports
+        BEGIN
+            DELETE FROM reports_fts WHERE rowid = old.id;
+        END
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER trg_reports_fts_update AFTER UPDATE OF title, topic ON reports
+        BEGIN
+            UPDATE reports_fts SET title = new.title, topic = new.topic WHERE rowid = new.id;
+        END
+        """
+    )
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "기본 스키마", _initial_schema),
+    Migration(2, "users.password_reset_required 컬럼 추가", _add_password_reset_required),
+    Migration(3, "token_usage/reports 성능 인덱스 추가", _add_performance_indexes, online=True),
+    Migration(4, "보고서 전문 검색 인덱스 추가", _add_report_search),
+    Migration(5, "reports.content 컬럼 추가", _add_report_content),
+    Migration(6, "보고서 파일 저장소(blobs) 추가", _add_blob_store),
+    Migration(7, "보고서 파일 목록 색인(output_files) 추가", _add_output_files),
+    Migration(8, "보관 정책 테이블(archived_files, token_usage_daily) 추가", _add_retention_tables),
+    Migration(9, "users.token_version 컬럼 추가", _add_token_version),
+    Migration(10, "폐기된 토큰 목록(revoked_tokens) 추가", _add_revoked_tokens),
+    Migration(11, "작업 조정 임대(leases) 추가", _add_leases),
+    Migration(12, "Claude API 호출 기록(llm_calls) 추가", _add_llm_calls),
+    Migration(13, "reports.filename 인덱스 추가", _add_reports_filename_index, online=True),
+    Migration(14, "검색 인덱스에 user_id 추가 (SQLite)", _add_search_user_id),
+    Migration(15, "blobs 삭제 상태(deleting_at, deleted_at) 추가", _add_blob_tombstones),
+    Migration(16, "검색 인덱스에 빠진 보고서 추가", _backfill_report_search),
+    Migration(17, "검색 인덱스 사용자 토큰(owner) 추가 (SQLite)", _add_search_owner),
+]
+
+
+def _record_version(cursor, migration: Migration):
+    """적용한 마이그레이션 버전 기록 (커밋하지 않음)"""
+    cursor.execute(
+        "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+        (migration.version, migration.description)
+    )
+
+
+def run_migrations() -> List[int]:
+    """
+    적용되지 않은 마이그레이션 실행
+
+    Returns:
+        List[int]: 이번에 적용된 마이그레이션 버전 목록
+    """
+    backend = get_backend()
+    applied_now = []
+
+    with backend.migration_lock() as conn:
+        cursor = conn.cursor()
+
+        with backend.migration_transaction(conn):
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+
+        cursor.execute("SELECT version FROM schema_version")
+        applied = {row["version"] for row in cursor.fetchall()}
+
+        for migration in MIGRATIONS:
+            if migration.version in applied:
+                continue
+
+            logger.info(f"마이그레이션 적용: v{migration.version} {migration.description}")
+            with backend.migration_transaction(conn, online=migration.online):
+                migration.apply(cursor, backend)
+                if not migration.online:
+                    _record_version(cursor, migration)
+
+            # 온라인 마이그레이션은 이미 커밋된 변경 뒤에 버전만 따로 기록
+            if migration.online:
+                with backend.migration_transaction(conn):
+                    _record_version(cursor, migration)
+            applied_now.append(migration.version)
+
+        # 새 인덱스가 바로 사용되도록 플래너 통계 갱신
+        if applied_now:
+            backend.analyze(cursor)
+
+        # 설치된 확장 확인 (검색마다 조회하지 않도록 한 번만)
+        backend.load_extensions(cursor)
+
+    return applied_now
+
+
+def get_schema_version() -> int:
+    """현재 적용된 최신 스키마 버전 (없으면 0)"""
+    conn = get_backend().connect()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("SELECT MAX(version) as version FROM schema_version")
+        row = cursor.fetchone()
+        return row["version"] or 0
+    except Exception:
+        return 0
+    finally:
+        conn.close()
@@ -0,0 +1,187 @@
+"""
+보고서 파일 목록 색인 데이터베이스 작업
+
+/api/reports는 저장소를 매번 나열하지 않고 output_files 테이블에서 페이지 단위로 조회합니다.
+앱이 파일을 저장할 때 색인을 갱신하고, 앱 밖에서 추가/삭제된 파일은
+reconcile_output_files.py(또는 시작 시 자동 동기화)가 반영합니다.
+"""
+from typing import Dict, Iterable, List, Tuple
+from .connection import get_db_connection
+from utils.tracing import traced_methods
+
+# 동기화 시 한 번에 기록하는 행 수
+RECONCILE_BATCH_SIZE = 1000
+
+
+@traced_methods
+class OutputFileDB:
+    """보고서 파일 목록 색인 데이터베이스 클래스"""
+
+    @staticmethod
+    def upsert(filename: str, size: int, mtime: float):
+        """파일 색인 추가/갱신"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            OutputFileDB._upsert_many(cursor, [(filename, size, mtime)])
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def remove_many(filenames: List[str]):
+        """파일 색인 삭제"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.executemany(
+                "DELETE FROM output_files WHERE filename = ?",
+                [(filename,) for filename in filenames]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def list_files(limit: int, offset: int = 0) -> Tuple[int, List[Dict]]:
+        """
+        최근 파일 순으로 페이지 조회 (mtime 인덱스 사용)
+
+        Returns:
+            Tuple[int, List[Dict]]: (전체 파일 수, [{"filename", "size", "created"}])
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT COUNT(*) as total FROM output_files")
+        total = cursor.fetchone()["total"]
+
+        cursor.execute(
+            """
+            SELECT filename, size, mtime FROM output_files
+            ORDER BY mtime DESC, filename
+            LIMIT ? OFFSET ?
+            """,
+            (limit, offset)
+        )
+        rows = cursor.fetchall()
+        conn.close()
+
+        files = [
+            {"filename": row["filename"], "size": row["size"], "created": row["mtime"]}
+            for row in rows
+        ]
+        return total, files
+
+    @staticmethod
+    def get_files_before(mtime: float, limit: int) -> List[Tuple[str, int, float]]:
+        """
+        수정 시각이 mtime 이전인 파일 (오래된 순, 보관 대상 조회용)
+
+        보고서 행이 아직 가리키는 파일(저장된 내용이 없는 이전 버전 보고서)은 제외합니다.
+        보관하면 보고서 다운로드가 원본 파일을 찾지 못하기 때문입니다.
+
+        Returns:
+            List[Tuple[str, int, float]]: (파일명, 크기, 수정 시각) 목록
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            """
+            SELECT filename, size, mtime FROM output_files
+            WHERE mtime < ?
+              AND NOT EXISTS (SELECT 1 FROM reports WHERE reports.filename = output_files.filename)
+            ORDER BY mtime, filename
+            LIMIT ?
+            """,
+            (mtime, limit)
+        )
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [(row["filename"], row["size"], row["mtime"]) for row in rows]
+
+    @staticmethod
+    def count() -> int:
+        """색인된 파일 수"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT COUNT(*) as total FROM output_files")
+        total = cursor.fetchone()["total"]
+        conn.close()
+
+        return total
+
+    @staticmethod
+    def reconcile(objects: Iterable, dry_run: bool = False) -> Tuple[int, int, int]:
+        """
+        저장소 목록과 색인 동기화
+
+        Args:
+            objects: 저장소 최상위의 보고서 파일 목록 (StorageObject: key, size, mtime)
+            dry_run: True면 변경하지 않고 건수만 계산
+
+        Returns:
+            Tuple[int, int, int]: (추가, 수정, 삭제) 건수
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("SELECT filename, size, mtime FROM output_files")
+            indexed = {row["filename"]: (row["size"], row["mtime"]) for row in cursor.fetchall()}
+
+            added = 0
+            updated = 0
+            pending = []
+            for obj in objects:
+                current = indexed.pop(obj.key, None)
+                if current is None:
+                    added += 1
+                elif current != (obj.size, obj.mtime):
+                    updated += 1
+                else:
+                    continue
+
+                pending.append((obj.key, obj.size, obj.mtime))
+                if not dry_run and len(pending) >= RECONCILE_BATCH_SIZE:
+                    OutputFileDB._upsert_many(cursor, pending)
+                    pending = []
+
+            # 목록에 남은 항목은 저장소에서 사라진 파일
+            removed = list(indexed)
+            if not dry_run:
+                if pending:
+                    OutputFileDB._upsert_many(cursor, pending)
+                if removed:
+                    cursor.executemany(
+                        "DELETE FROM output_files WHERE filename = ?",
+                        [(filename,) for filename in removed]
+                    )
+                conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return added, updated, len(removed)
+
+    @staticmethod
+    def _upsert_many(cursor, rows: List[Tuple[str, int, float]]):
+        """파일 색인 일괄 추가/갱신 (커밋하지 않음)"""
+        cursor.executemany(
+            """
+            INSERT INTO output_files (filename, size, mtime)
+            VALUES (?, ?, ?)
+            ON CONFLICT (filename) DO UPDATE SET
+                size = excluded.size,
+                mtime = excluded.mtime,
+                indexed_at = CURRENT_TIMESTAMP
+            """,
+            rows
+        )
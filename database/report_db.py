@@ -1,12 +1,47 @@
 """
 보고서 데이터베이스 작업
 """
-from typing import Optional, List
+import os
+import html
+import json
+import zlib
+from typing import Optional, List, Dict, Tuple
 from datetime import datetime
-from .connection import get_db_connection
+from .connection import get_db_connection, to_datetime
+from .backends import get_backend
+from .blob_db import BlobDB
 from models.report import Report
+from utils.tracing import traced_methods
 
+# 목록/조회 시 가져올 컬럼 (압축된 본문 content는 제외)
+REPORT_COLUMNS = "id, user_id, topic, title, filename, file_path, file_size, content_hash, created_at"
 
+# 기간 조회 파라미터 형식 (CURRENT_TIMESTAMP와 같은 형식)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 검색 본문에 포함할 섹션 순서
+SEARCH_SECTIONS = [
+    "title_summary", "summary",
+    "title_background", "background",
+    "title_main_content", "main_content",
+    "title_conclusion", "conclusion",
+]
+
+# trigram 인덱스로 찾을 수 있는 최소 검색어 길이
+MIN_TRIGRAM_TERM_LENGTH = 3
+
+# 짧은 검색어만 있을 때 훑어볼 최근 보고서 수 (인덱스를 쓸 수 없으므로 사용자별로 제한)
+SEARCH_SCAN_LIMIT = int(os.getenv("REPORT_SEARCH_SCAN_LIMIT", "1000"))
+
+# 검색 결과 건수를 셀 최대값 (넘으면 이 값으로 표시)
+SEARCH_COUNT_LIMIT = int(os.getenv("REPORT_SEARCH_COUNT_LIMIT", "1000"))
+
+# 하이라이트 표시 (본문 이스케이프 후 <mark>로 치환)
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+
+
+@traced_methods
 class ReportDB:
     """보고서 데이터베이스 클래스"""
 
@@ -19,27 +54,364 @@ class ReportDB:
         file_path: str,
         file_size: int
     ) -> Report:
-        """보고서 생성"""
+        """보고서 생성 (제목/주제를 같은 트랜잭션에서 검색 인덱스에 추가)"""
         conn = get_db_connection()
         cursor = conn.cursor()
 
+        try:
+            row = ReportDB._insert_report(cursor, user_id, topic, title, filename, file_path, file_size, None, None)
+            ReportDB._index_report(cursor, row["id"], user_id, title, topic, "")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return ReportDB._row_to_report(row)
+
+    @staticmethod
+    def create_report_with_usage(
+        user_id: int,
+        topic: str,
+        title: str,
+        filename: str,
+        file_path: str,
+        file_size: int,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        content: Optional[Dict[str, str]] = None,
+        content_hash: Optional[str] = None,
+        revive_blob: bool = False
+    ) -> Report:
+        """
+        보고서와 토큰 사용량을 하나의 트랜잭션으로 저장
+
+        INSERT ... RETURNING으로 조회 왕복을 없애고 커밋(fsync)을 한 번만 수행합니다.
+        토큰 사용량이 0이면 사용량 기록은 생략합니다.
+        content가 주어지면 압축하여 함께 저장하고(재렌더링용) 섹션 본문을 검색 인덱스에 추가합니다.
+        content_hash가 주어지면 file_path는 파일 저장소 경로이며 같은 트랜잭션에서 참조 수를 올립니다.
+        파일이 정리 중이면 BlobDeletingError가 발생하며, 파일을 다시 넣은 뒤 revive_blob=True로 재시도합니다.
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            row = ReportDB._insert_report(
+                cursor, user_id, topic, title, filename, file_path, file_size,
+                ReportDB._compress_content(content), content_hash
+            )
+            if content_hash:
+                BlobDB.acquire(cursor, content_hash, file_path, file_size, revive=revive_blob)
+            ReportDB._index_report(cursor, row["id"], user_id, title, topic, ReportDB.content_to_text(content))
+
+            total_tokens = input_tokens + output_tokens
+            if total_tokens > 0:
+                cursor.execute(
+                    """
+                    INSERT INTO token_usage (user_id, report_id, input_tokens, output_tokens, total_tokens)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (user_id, row["id"], input_tokens, output_tokens, total_tokens)
+                )
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return ReportDB._row_to_report(row)
+
+    @staticmethod
+    def _insert_report(cursor, user_id, topic, title, filename, file_path, file_size, content, content_hash):
+        """보고서 행 삽입 후 삽입된 행 반환 (커밋하지 않음)"""
         cursor.execute(
-            """
-            INSERT INTO reports (user_id, topic, title, filename, file_path, file_size)
-            VALUES (?, ?, ?, ?, ?, ?)
+            f"""
+            INSERT INTO reports (user_id, topic, title, filename, file_path, file_size, content, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            RETURNING {REPORT_COLUMNS}
             """,
-            (user_id, topic, title, filename, file_path, file_size)
+            (user_id, topic, title, filename, file_path, file_size, content, content_hash)
         )
+        return cursor.fetchone()
 
-        conn.commit()
-        report_id = cursor.lastrowid
+    @staticmethod
+    def _index_report(cursor, report_id: int, user_id: int, title: str, topic: str, body: str):
+        """검색 인덱스에 보고서 추가 (커밋하지 않음)"""
+        if get_backend().name == "sqlite":
+            cursor.execute(
+                "INSERT INTO reports_fts (rowid, title, topic, body, owner) VALUES (?, ?, ?, ?, ?)",
+                (report_id, title, topic, body, ReportDB._owner_token(user_id))
+            )
+        else:
+            cursor.execute(
+                "INSERT INTO report_search (report_id, body) VALUES (?, ?)",
+                (report_id, body)
+            )
 
-        # 생성된 보고서 조회
-        cursor.execute("SELECT * FROM reports WHERE id = ?", (report_id,))
-        row = cursor.fetchone()
+    @staticmethod
+    def _owner_token(user_id: int) -> str:
+        """SQLite 검색 인덱스의 소유자 토큰 (구분 문자로 감싸 다른 사용자 번호와 부분 일치하지 않음)"""
+        return f"<{user_id}>"
+
+    @staticmethod
+    def content_to_text(content: Optional[Dict[str, str]]) -> str:
+        """보고서 섹션 내용을 검색용 본문 텍스트로 변환"""
+        if not content:
+            return ""
+        return "\n\n".join(content[key] for key in SEARCH_SECTIONS if content.get(key))
+
+    @staticmethod
+    def search_reports(
+        user_id: int,
+        query: str,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[int, List[Tuple[Report, str, float]]]:
+        """
+        보고서 전문 검색
+
+        3자 이상 검색어는 trigram 인덱스로 찾고, 더 짧은 검색어는 인덱스 결과 안에서
+        부분 문자열로 거릅니다. 짧은 검색어만 있으면(한국어 2음절 단어 등) 인덱스를 쓸 수 없으므로
+        사용자의 최근 보고서 SEARCH_SCAN_LIMIT개 안에서 찾습니다.
+
+        Args:
+            user_id: 검색 대상 사용자
+            query: 검색어 (공백으로 구분된 모든 단어를 포함하는 보고서 검색)
+            limit: 페이지 크기
+            offset: 건너뛸 결과 수
+
+        Returns:
+            Tuple[int, List[Tuple[Report, str, float]]]:
+                (전체 건수(최대 SEARCH_COUNT_LIMIT), [(보고서, 하이라이트 스니펫, 점수)])
+        """
+        terms = [term for term in query.split() if term]
+        if not terms:
+            return 0, []
+
+        if all(len(term) < MIN_TRIGRAM_TERM_LENGTH for term in terms):
+            if get_backend().name == "sqlite":
+                return ReportDB._scan_recent_reports_sqlite(user_id, terms, limit, offset)
+            return ReportDB._search_reports_postgres(user_id, terms, limit, offset, scan_limit=SEARCH_SCAN_LIMIT)
+
+        if get_backend().name == "sqlite":
+            return ReportDB._search_reports_sqlite(user_id, terms, limit, offset)
+        return ReportDB._search_reports_postgres(user_id, terms, limit, offset)
+
+    @staticmethod
+    def _short_term_filters(terms, columns):
+        """짧은 검색어 부분 문자열 조건 (SQLite, 모든 단어가 어느 한 컬럼에 포함)"""
+        where = []
+        params = []
+        for term in terms:
+            where.append("(" + " OR ".join(f"instr(lower({c}), lower(?)) > 0" for c in columns) + ")")
+            params.extend([term] * len(columns))
+        return where, params
+
+    @staticmethod
+    def _count_matches(cursor, from_sql: str, where_sql: str, params) -> int:
+        """검색 결과 건수 (SEARCH_COUNT_LIMIT개까지만 셈)"""
+        cursor.execute(
+            f"SELECT COUNT(*) as total FROM (SELECT 1 FROM {from_sql} WHERE {where_sql} LIMIT ?) matched",
+            list(params) + [SEARCH_COUNT_LIMIT]
+        )
+        return cursor.fetchone()["total"]
+
+    @staticmethod
+    def _search_reports_sqlite(user_id, terms, limit, offset):
+        """SQLite FTS5(trigram) 검색"""
+        long_terms = [t for t in terms if len(t) >= MIN_TRIGRAM_TERM_LENGTH]
+        short_terms = [t for t in terms if len(t) < MIN_TRIGRAM_TERM_LENGTH]
+
+        # 각 단어를 구문(phrase)으로 감싸 FTS 연산자 해석 방지
+        # 소유자 토큰도 인덱스에서 함께 찾으므로 다른 사용자의 일치 결과는 읽지 않음
+        phrases = " AND ".join('"' + t.replace('"', '""') + '"' for t in long_terms)
+        match = f'owner : "{ReportDB._owner_token(user_id)}" AND {{title topic body}} : ({phrases})'
+
+        short_where, short_params = ReportDB._short_term_filters(short_terms, ["f.title", "f.topic", "f.body"])
+        where_sql = " AND ".join(["reports_fts MATCH ?"] + short_where)
+        params = [match] + short_params
+        r_columns = ReportDB._prefixed_columns("r")
+
+        # 제목 > 주제 > 본문 순으로 가중치 (소유자 토큰은 점수에서 제외)
+        score_sql = "bm25(reports_fts, 10.0, 5.0, 1.0, 0.0)"
+        snippet_sql = f"snippet(reports_fts, 2, '{_MARK_START}', '{_MARK_END}', '…', 24)"
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        # 건수는 검색 인덱스만으로 계산
+        total = ReportDB._count_matches(cursor, "reports_fts f", where_sql, params)
+
+        cursor.execute(
+            f"""
+            SELECT {r_columns}, {snippet_sql} as snippet, {score_sql} as score
+            FROM reports_fts f JOIN reports r ON r.id = f.rowid
+            WHERE {where_sql}
+            ORDER BY score, r.created_at DESC
+            LIMIT ? OFFSET ?
+            """,
+            params + [limit, offset]
+        )
+        rows = cursor.fetchall()
         conn.close()
 
-        return ReportDB._row_to_report(row)
+        # bm25는 작을수록 관련도가 높으므로 부호를 바꿔 반환
+        results = [
+            (ReportDB._row_to_report(row), ReportDB._render_snippet(row["snippet"] or ""), 0.0 - row["score"])
+            for row in rows
+        ]
+
+        return total, results
+
+    @staticmethod
+    def _scan_recent_reports_sqlite(user_id, terms, limit, offset):
+        """SQLite 짧은 검색어 검색 (사용자의 최근 보고서 SEARCH_SCAN_LIMIT개를 훑음, 최신순)"""
+        where, params = ReportDB._short_term_filters(terms, ["r.title", "r.topic", "f.body"])
+        where_sql = " AND ".join(where)
+        from_sql = """
+            (SELECT id FROM reports WHERE user_id = ? ORDER BY created_at DESC LIMIT ?) recent
+            JOIN reports r ON r.id = recent.id
+            JOIN reports_fts f ON f.rowid = recent.id
+        """
+        from_params = [user_id, SEARCH_SCAN_LIMIT]
+        r_columns = ReportDB._prefixed_columns("r")
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        total = ReportDB._count_matches(cursor, from_sql, where_sql, from_params + params)
+
+        cursor.execute(
+            f"""
+            SELECT {r_columns}, f.body as body
+            FROM {from_sql}
+            WHERE {where_sql}
+            ORDER BY r.created_at DESC, r.id DESC
+            LIMIT ? OFFSET ?
+            """,
+            from_params + params + [limit, offset]
+        )
+        rows = cursor.fetchall()
+        conn.close()
+
+        results = [
+            (
+                ReportDB._row_to_report(row),
+                ReportDB._render_snippet(ReportDB._make_snippet(row["body"] or "", terms)),
+                0.0
+            )
+            for row in rows
+        ]
+
+        return total, results
+
+    @staticmethod
+    def _search_reports_postgres(user_id, terms, limit, offset, scan_limit: Optional[int] = None):
+        """
+        PostgreSQL pg_trgm 검색
+
+        scan_limit이 주어지면(짧은 검색어만 있는 경우) 사용자의 최근 보고서 scan_limit개 안에서 찾습니다.
+        """
+        where = ["r.user_id = ?"]
+        params = [user_id]
+
+        for term in terms:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            where.append("(r.title ILIKE ? OR r.topic ILIKE ? OR s.body ILIKE ?)")
+            params.extend([pattern, pattern, pattern])
+
+        where_sql = " AND ".join(where)
+        from_sql = "reports r LEFT JOIN report_search s ON s.report_id = r.id"
+        from_params = []
+        if scan_limit is not None:
+            from_sql = (
+                "(SELECT id FROM reports WHERE user_id = ? ORDER BY created_at DESC LIMIT ?) recent "
+                "JOIN reports r ON r.id = recent.id "
+                "LEFT JOIN report_search s ON s.report_id = r.id"
+            )
+            from_params = [user_id, scan_limit]
+        r_columns = ReportDB._prefixed_columns("r")
+
+        if get_backend().has_extension("pg_trgm"):
+            score_sql = "word_similarity(?, r.title || ' ' || r.topic || ' ' || COALESCE(s.body, ''))"
+            score_params = [" ".join(terms)]
+        else:
+            score_sql = "0.0"
+            score_params = []
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        total = ReportDB._count_matches(cursor, from_sql, where_sql, from_params + params)
+
+        cursor.execute(
+            f"""
+            SELECT {r_columns}, COALESCE(s.body, '') as body, {score_sql} as score
+            FROM {from_sql}
+            WHERE {where_sql}
+            ORDER BY score DESC, r.created_at DESC
+            LIMIT ? OFFSET ?
+            """,
+            score_params + from_params + params + [limit, offset]
+        )
+        rows = cursor.fetchall()
+        conn.close()
+
+        results = [
+            (
+                ReportDB._row_to_report(row),
+                ReportDB._render_snippet(ReportDB._make_snippet(row["body"], terms)),
+                float(row["score"])
+            )
+            for row in rows
+        ]
+
+        return total, results
+
+    @staticmethod
+    def _make_snippet(text: str, terms: List[str], width: int = 120) -> str:
+        """검색어 주변 본문을 잘라 하이라이트 표시를 붙임"""
+        lowered = text.lower()
+        positions = [lowered.find(t.lower()) for t in terms]
+        positions = [p for p in positions if p >= 0]
+
+        start = max(min(positions) - width // 3, 0) if positions else 0
+        snippet = text[start:start + width]
+        prefix = "…" if start > 0 else ""
+        suffix = "…" if start + width < len(text) else ""
+
+        # 겹치는 일치 구간을 합친 뒤 표시
+        lowered = snippet.lower()
+        spans = []
+        for term in set(t.lower() for t in terms):
+            found = lowered.find(term)
+            while found >= 0:
+                spans.append([found, found + len(term)])
+                found = lowered.find(term, found + 1)
+
+        merged = []
+        for span in sorted(spans):
+            if merged and span[0] <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], span[1])
+            else:
+                merged.append(span)
+
+        for begin, end in reversed(merged):
+            snippet = snippet[:begin] + _MARK_START + snippet[begin:end] + _MARK_END + snippet[end:]
+
+        return prefix + snippet + suffix
+
+    @staticmethod
+    def _render_snippet(snippet: str) -> str:
+        """스니펫을 HTML 이스케이프하고 하이라이트를 <mark> 태그로 변환"""
+        return (
+            html.escape(snippet)
+            .replace(_MARK_START, "<mark>")
+            .replace(_MARK_END, "</mark>")
+        )
 
     @staticmethod
     def get_report_by_id(report_id: int) -> Optional[Report]:
@@ -47,7 +419,7 @@ class ReportDB:
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM reports WHERE id = ?", (report_id,))
+        cursor.execute(f"SELECT {REPORT_COLUMNS} FROM reports WHERE id = ?", (report_id,))
         row = cursor.fetchone()
         conn.close()
 
@@ -60,7 +432,7 @@ class ReportDB:
         cursor = conn.cursor()
 
         cursor.execute(
-            "SELECT * FROM reports WHERE user_id = ? ORDER BY created_at DESC",
+            f"SELECT {REPORT_COLUMNS} FROM reports WHERE user_id = ? ORDER BY created_at DESC",
             (user_id,)
         )
         rows = cursor.fetchall()
@@ -68,30 +440,160 @@ class ReportDB:
 
         return [ReportDB._row_to_report(row) for row in rows]
 
+    @staticmethod
+    def get_reports_by_ids(report_ids: List[int]) -> List[Report]:
+        """
+        ID 목록으로 보고서 일괄 조회 (한 번의 쿼리, 요청 순서 유지)
+
+        없는 ID는 결과에서 빠지며, 소유권 확인은 호출자가 결과의 user_id로 합니다.
+        """
+        if not report_ids:
+            return []
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        placeholders = ", ".join("?" for _ in report_ids)
+        cursor.execute(f"SELECT {REPORT_COLUMNS} FROM reports WHERE id IN ({placeholders})", list(report_ids))
+        rows = cursor.fetchall()
+        conn.close()
+
+        reports = {row["id"]: ReportDB._row_to_report(row) for row in rows}
+        return [reports[report_id] for report_id in dict.fromkeys(report_ids) if report_id in reports]
+
+    @staticmethod
+    def get_reports_by_period(start: datetime, end: datetime, user_id: Optional[int] = None) -> List[Report]:
+        """
+        기간별 보고서 조회 (created_at 인덱스 범위 스캔)
+
+        Args:
+            start: 시작 시각 (UTC, 포함)
+            end: 종료 시각 (UTC, 미포함)
+            user_id: 특정 사용자로 한정 (없으면 전체)
+        """
+        where = "created_at >= ? AND created_at < ?"
+        params = [start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT)]
+
+        if user_id is not None:
+            where += " AND user_id = ?"
+            params.append(user_id)
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(f"SELECT {REPORT_COLUMNS} FROM reports WHERE {where} ORDER BY created_at, id", params)
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [ReportDB._row_to_report(row) for row in rows]
+
     @staticmethod
     def get_all_reports() -> List[Report]:
         """모든 보고서 조회"""
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM reports ORDER BY created_at DESC")
+        cursor.execute(f"SELECT {REPORT_COLUMNS} FROM reports ORDER BY created_at DESC")
         rows = cursor.fetchall()
         conn.close()
 
         return [ReportDB._row_to_report(row) for row in rows]
 
     @staticmethod
-    def delete_report(report_id: int) -> bool:
-        """보고서 삭제"""
+    def get_report_content(report_id: int) -> Optional[Dict[str, str]]:
+        """저장된 보고서 섹션 내용 조회 (저장되지 않은 보고서는 None)"""
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute("DELETE FROM reports WHERE id = ?", (report_id,))
-        conn.commit()
-        affected = cursor.rowcount
+        cursor.execute("SELECT content FROM reports WHERE id = ?", (report_id,))
+        row = cursor.fetchone()
         conn.close()
 
-        return affected > 0
+        if not row or row["content"] is None:
+            return None
+
+        return json.loads(zlib.decompress(bytes(row["content"])).decode("utf-8"))
+
+    @staticmethod
+    def update_report_file(
+        report_id: int,
+        filename: str,
+        file_path: str,
+        file_size: int,
+        content_hash: Optional[str] = None,
+        revive_blob: bool = False
+    ) -> Optional[Report]:
+        """
+        보고서 파일 정보 수정 (재렌더링 후)
+
+        파일 저장소 참조가 바뀌면 이전 파일 참조를 해제하고 새 파일 참조를 추가합니다.
+        content_hash가 None이면(캐시 파일 등) 저장소 참조가 없는 것으로 기록합니다.
+        revive_blob은 create_report_with_usage와 같습니다.
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("SELECT content_hash FROM reports WHERE id = ?", (report_id,))
+            previous = cursor.fetchone()
+            if previous is None:
+                return None
+
+            cursor.execute(
+                f"""
+                UPDATE reports SET filename = ?, file_path = ?, file_size = ?, content_hash = ?
+                WHERE id = ?
+                RETURNING {REPORT_COLUMNS}
+                """,
+                (filename, file_path, file_size, content_hash, report_id)
+            )
+            row = cursor.fetchone()
+
+            if previous["content_hash"] != content_hash:
+                if content_hash:
+                    BlobDB.acquire(cursor, content_hash, file_path, file_size, revive=revive_blob)
+                BlobDB.release_many(cursor, [previous["content_hash"]])
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return ReportDB._row_to_report(row) if row else None
+
+    @staticmethod
+    def delete_report(report_id: int) -> bool:
+        """보고서 삭제 (파일 저장소 참조도 해제)"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("DELETE FROM reports WHERE id = ? RETURNING content_hash", (report_id,))
+            row = cursor.fetchone()
+            if row:
+                BlobDB.release_many(cursor, [row["content_hash"]])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return row is not None
+
+    @staticmethod
+    def _compress_content(content: Optional[Dict[str, str]]) -> Optional[bytes]:
+        """섹션 내용을 JSON + zlib으로 압축"""
+        if not content:
+            return None
+        return zlib.compress(json.dumps(content, ensure_ascii=False).encode("utf-8"), 6)
+
+    @staticmethod
+    def _prefixed_columns(alias: str) -> str:
+        """REPORT_COLUMNS에 테이블 별칭을 붙인 컬럼 목록"""
+        return ", ".join(f"{alias}.{column.strip()}" for column in REPORT_COLUMNS.split(","))
 
     @staticmethod
     def _row_to_report(row) -> Report:
@@ -104,5 +606,6 @@ class ReportDB:
             filename=row["filename"],
             file_path=row["file_path"],
             file_size=row["file_size"],
-            created_at=datetime.fromisoformat(row["created_at"])
+            content_hash=row["content_hash"],
+            created_at=to_datetime(row["created_at"])
         )
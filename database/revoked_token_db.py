@@ -0,0 +1,108 @@
+"""
+폐기된 토큰 데이터베이스 작업
+
+로그아웃 등으로 폐기된 JWT의 jti를 원래 만료 시각과 함께 기록합니다.
+만료 시각이 지난 토큰은 서명 검증 단계에서 이미 거절되므로 행을 지워도 됩니다.
+"""
+from datetime import datetime
+from typing import List, Optional
+from .connection import get_db_connection
+from utils.tracing import traced_methods
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@traced_methods
+class RevokedTokenDB:
+    """폐기된 토큰 데이터베이스 클래스"""
+
+    @staticmethod
+    def revoke(jti: str, expires_at: datetime, user_id: Optional[int] = None):
+        """
+        토큰 폐기 기록 (이미 폐기된 토큰이면 무시)
+
+        Args:
+            jti: 토큰 ID
+            expires_at: 토큰 만료 시각 (UTC)
+            user_id: 토큰 소유자 ID
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                """
+                INSERT INTO revoked_tokens (jti, user_id, expires_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT (jti) DO NOTHING
+                """,
+                (jti, user_id, expires_at.strftime(TIMESTAMP_FORMAT))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def is_revoked(jti: str) -> bool:
+        """토큰 폐기 여부"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT 1 as revoked FROM revoked_tokens WHERE jti = ?", (jti,))
+        row = cursor.fetchone()
+        conn.close()
+
+        return row is not None
+
+    @staticmethod
+    def get_active_jtis(since: Optional[datetime] = None) -> List[str]:
+        """
+        아직 만료되지 않은 폐기 토큰의 jti 목록
+
+        Args:
+            since: 이 시각(UTC) 이후 폐기된 토큰만 (없으면 전체)
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        now = datetime.utcnow().strftime(TIMESTAMP_FORMAT)
+        if since is None:
+            cursor.execute("SELECT jti FROM revoked_tokens WHERE expires_at > ?", (now,))
+        else:
+            cursor.execute(
+                "SELECT jti FROM revoked_tokens WHERE expires_at > ? AND revoked_at >= ?",
+                (now, since.strftime(TIMESTAMP_FORMAT))
+            )
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [row["jti"] for row in rows]
+
+    @staticmethod
+    def purge_expired() -> int:
+        """
+        만료 시각이 지난 행 삭제
+
+        Returns:
+            int: 삭제된 행 수
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                "DELETE FROM revoked_tokens WHERE expires_at <= ?",
+                (datetime.utcnow().strftime(TIMESTAMP_FORMAT),)
+            )
+            deleted = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return deleted
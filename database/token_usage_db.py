@@ -1,12 +1,34 @@
 """
 토큰 사용량 데이터베이스 작업
 """
-from typing import Optional, List
-from datetime import datetime
-from .connection import get_db_connection
-from models.token_usage import TokenUsage, TokenUsageCreate, UserTokenStats
+from typing import Optional, List, Tuple
+from datetime import datetime, timedelta
+from .connection import get_db_connection, to_datetime
+from .backends import get_backend
+from models.token_usage import (
+    TokenUsage,
+    TokenUsageCreate,
+    UserTokenStats,
+    TokenUsagePoint,
+    TokenUsageSeries,
+)
+from utils.tracing import traced_methods
 
+# 시계열 버킷 단위 (초)
+BUCKET_SECONDS = {
+    "hour": 3600,
+    "day": 86400,
+    "week": 604800,
+}
 
+# 주 단위 버킷은 월요일 00:00(UTC)에 맞춤 (1970-01-05가 월요일)
+WEEK_ORIGIN_SECONDS = 345600
+
+# created_at(CURRENT_TIMESTAMP)과 같은 형식으로 비교해야 인덱스 범위 스캔이 가능
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@traced_methods
 class TokenUsageDB:
     """토큰 사용량 데이터베이스 클래스"""
 
@@ -20,16 +42,13 @@ class TokenUsageDB:
             """
             INSERT INTO token_usage (user_id, report_id, input_tokens, output_tokens, total_tokens)
             VALUES (?, ?, ?, ?, ?)
+            RETURNING *
             """,
             (usage.user_id, usage.report_id, usage.input_tokens, usage.output_tokens, usage.total_tokens)
         )
+        row = cursor.fetchone()
 
         conn.commit()
-        usage_id = cursor.lastrowid
-
-        # 생성된 기록 조회
-        cursor.execute("SELECT * FROM token_usage WHERE id = ?", (usage_id,))
-        row = cursor.fetchone()
         conn.close()
 
         return TokenUsageDB._row_to_token_usage(row)
@@ -49,6 +68,38 @@ class TokenUsageDB:
 
         return [TokenUsageDB._row_to_token_usage(row) for row in rows]
 
+    @staticmethod
+    def _usage_totals_sql(where: str = "") -> str:
+        """
+        사용자별 누적 사용량 (원본 행 + 일별 요약 행)
+
+        보관 기간이 지나 token_usage_daily로 요약된 사용량도 합계에 포함합니다.
+        """
+        condition = f"WHERE {where}" if where else ""
+        return f"""
+            SELECT
+                user_id,
+                SUM(input_tokens) as input_tokens,
+                SUM(output_tokens) as output_tokens,
+                SUM(total_tokens) as total_tokens,
+                COUNT(DISTINCT report_id) as report_count,
+                MAX(created_at) as last_usage
+            FROM token_usage
+            {condition}
+            GROUP BY user_id
+            UNION ALL
+            SELECT
+                user_id,
+                SUM(input_tokens),
+                SUM(output_tokens),
+                SUM(total_tokens),
+                SUM(report_count),
+                MAX(day)
+            FROM token_usage_daily
+            {condition}
+            GROUP BY user_id
+        """
+
     @staticmethod
     def get_all_user_stats() -> List[UserTokenStats]:
         """모든 사용자의 토큰 통계 조회"""
@@ -56,7 +107,7 @@ class TokenUsageDB:
         cursor = conn.cursor()
 
         cursor.execute(
-            """
+            f"""
             SELECT
                 u.id as user_id,
                 u.username,
@@ -64,10 +115,10 @@ class TokenUsageDB:
                 COALESCE(SUM(t.input_tokens), 0) as total_input_tokens,
                 COALESCE(SUM(t.output_tokens), 0) as total_output_tokens,
                 COALESCE(SUM(t.total_tokens), 0) as total_tokens,
-                COUNT(DISTINCT t.report_id) as report_count,
-                MAX(t.created_at) as last_usage
+                COALESCE(SUM(t.report_count), 0) as report_count,
+                MAX(t.last_usage) as last_usage
             FROM users u
-            LEFT JOIN token_usage t ON u.id = t.user_id
+            LEFT JOIN ({TokenUsageDB._usage_totals_sql()}) t ON u.id = t.user_id
             GROUP BY u.id, u.username, u.email
             ORDER BY total_tokens DESC
             """
@@ -84,7 +135,7 @@ class TokenUsageDB:
         cursor = conn.cursor()
 
         cursor.execute(
-            """
+            f"""
             SELECT
                 u.id as user_id,
                 u.username,
@@ -92,20 +143,259 @@ class TokenUsageDB:
                 COALESCE(SUM(t.input_tokens), 0) as total_input_tokens,
                 COALESCE(SUM(t.output_tokens), 0) as total_output_tokens,
                 COALESCE(SUM(t.total_tokens), 0) as total_tokens,
-                COUNT(DISTINCT t.report_id) as report_count,
-                MAX(t.created_at) as last_usage
+                COALESCE(SUM(t.report_count), 0) as report_count,
+                MAX(t.last_usage) as last_usage
             FROM users u
-            LEFT JOIN token_usage t ON u.id = t.user_id
+            LEFT JOIN ({TokenUsageDB._usage_totals_sql("user_id = ?")}) t ON u.id = t.user_id
             WHERE u.id = ?
             GROUP BY u.id, u.username, u.email
             """,
-            (user_id,)
+            (user_id, user_id, user_id)
         )
         row = cursor.fetchone()
         conn.close()
 
         return TokenUsageDB._row_to_user_stats(row) if row else None
 
+    @staticmethod
+    def resolve_bucket_width(bucket: str, start: datetime, end: datetime, max_points: int) -> int:
+        """
+        요청 구간이 max_points 개 이하의 버킷으로 나뉘도록 버킷 폭을 계산합니다.
+
+        기본 버킷 폭의 정수배로만 넓히므로 다운샘플링된 버킷도 시/일/주 경계에 맞습니다.
+
+        Args:
+            bucket: 기본 버킷 단위 (hour, day, week)
+            start: 조회 시작 시각 (UTC)
+            end: 조회 종료 시각 (UTC, 미포함)
+            max_points: 시계열당 최대 포인트 수
+
+        Returns:
+            int: 버킷 폭 (초)
+        """
+        base = BUCKET_SECONDS[bucket]
+        span = max(int((end - start).total_seconds()), 1)
+        buckets = -(-span // base)  # 올림 나눗셈
+        multiplier = max(1, -(-buckets // max_points))
+        return base * multiplier
+
+    @staticmethod
+    def bucket_origin(bucket_seconds: int) -> int:
+        """버킷 경계 기준점 (주 단위의 배수이면 월요일 기준)"""
+        return WEEK_ORIGIN_SECONDS if bucket_seconds % BUCKET_SECONDS["week"] == 0 else 0
+
+    @staticmethod
+    def get_usage_timeseries(
+        start: datetime,
+        end: datetime,
+        bucket_seconds: int,
+        user_id: Optional[int] = None,
+        per_user: bool = False
+    ) -> List[TokenUsageSeries]:
+        """
+        기간별 토큰 사용량 시계열 조회
+
+        버킷 집계는 SQL에서 수행하며 created_at 인덱스 범위 스캔만 사용합니다.
+        일별 요약으로 옮겨진 사용량은 해당 일 00:00(UTC) 시각으로 집계됩니다.
+
+        Args:
+            start: 조회 시작 시각 (UTC, 포함)
+            end: 조회 종료 시각 (UTC, 미포함)
+            bucket_seconds: 버킷 폭 (초)
+            user_id: 특정 사용자로 한정 (없으면 전체)
+            per_user: 사용자별 시계열로 분리할지 여부
+
+        Returns:
+            List[TokenUsageSeries]: 시계열 목록
+        """
+        origin = TokenUsageDB.bucket_origin(bucket_seconds)
+
+        group_user = per_user and user_id is None
+        user_column = "user_id" if group_user else "NULL"
+        where = "created_at >= ? AND created_at < ?"
+        daily_where = "day >= ? AND day < ?"
+
+        # created_at은 초 단위로 잘려 저장되므로 end를 올림 (방금 기록된 사용량도 포함)
+        if end.microsecond:
+            end = end.replace(microsecond=0) + timedelta(seconds=1)
+        range_params = [start.strftime(TIMESTAMP_FORMAT), end.strftime(TIMESTAMP_FORMAT)]
+
+        if user_id is not None:
+            where += " AND user_id = ?"
+            daily_where += " AND user_id = ?"
+            range_params.append(user_id)
+
+        params = [origin, bucket_seconds, bucket_seconds, origin] + range_params + range_params
+
+        group_by = "user_id, bucket_start" if group_user else "bucket_start"
+        epoch_column = get_backend().epoch_seconds("created_at")
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            f"""
+            SELECT
+                {user_column} as series_user_id,
+                ({epoch_column} - ?) / ? * ? + ? as bucket_start,
+                SUM(input_tokens) as input_tokens,
+                SUM(output_tokens) as output_tokens,
+                SUM(total_tokens) as total_tokens,
+                SUM(request_count) as request_count
+            FROM (
+                SELECT user_id, created_at, input_tokens, output_tokens, total_tokens, 1 as request_count
+                FROM token_usage
+                WHERE {where}
+                UNION ALL
+                SELECT user_id, day, input_tokens, output_tokens, total_tokens, request_count
+                FROM token_usage_daily
+                WHERE {daily_where}
+            ) usage
+            GROUP BY {group_by}
+            ORDER BY {group_by}
+            """,
+            params
+        )
+        rows = cursor.fetchall()
+        conn.close()
+
+        series = {}
+        if not group_user:
+            series[user_id] = TokenUsageSeries(user_id=user_id, points=[])
+
+        for row in rows:
+            key = row["series_user_id"] if group_user else user_id
+            if key not in series:
+                series[key] = TokenUsageSeries(user_id=key, points=[])
+            series[key].points.append(TokenUsagePoint(
+                bucket_start=datetime.utcfromtimestamp(row["bucket_start"]),
+                input_tokens=row["input_tokens"],
+                output_tokens=row["output_tokens"],
+                total_tokens=row["total_tokens"],
+                request_count=row["request_count"]
+            ))
+
+        return list(series.values())
+
+    @staticmethod
+    def get_oldest_usage_day(before: datetime) -> Optional[datetime]:
+        """before 이전 원본 사용량 행 중 가장 오래된 날짜 (00:00, 없으면 None)"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            "SELECT MIN(created_at) as oldest FROM token_usage WHERE created_at < ?",
+            (before.strftime(TIMESTAMP_FORMAT),)
+        )
+        row = cursor.fetchone()
+        conn.close()
+
+        if not row or row["oldest"] is None:
+            return None
+        oldest = to_datetime(row["oldest"])
+        return oldest.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def rollup_day(day: datetime) -> int:
+        """
+        하루치 원본 사용량 행을 사용자별 일별 요약으로 옮김 (한 트랜잭션)
+
+        Args:
+            day: 대상 날짜 (UTC 00:00)
+
+        Returns:
+            int: 요약 후 삭제된 원본 행 수
+        """
+        day_start = day.strftime(TIMESTAMP_FORMAT)
+        day_end = (day + timedelta(days=1)).strftime(TIMESTAMP_FORMAT)
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                """
+                INSERT INTO token_usage_daily
+                    (day, user_id, input_tokens, output_tokens, total_tokens, request_count, report_count)
+                SELECT
+                    ?, user_id,
+                    SUM(input_tokens), SUM(output_tokens), SUM(total_tokens),
+                    COUNT(*), COUNT(DISTINCT report_id)
+                FROM token_usage
+                WHERE created_at >= ? AND created_at < ?
+                GROUP BY user_id
+                ON CONFLICT (day, user_id) DO UPDATE SET
+                    input_tokens = token_usage_daily.input_tokens + excluded.input_tokens,
+                    output_tokens = token_usage_daily.output_tokens + excluded.output_tokens,
+                    total_tokens = token_usage_daily.total_tokens + excluded.total_tokens,
+                    request_count = token_usage_daily.request_count + excluded.request_count,
+                    report_count = token_usage_daily.report_count + excluded.report_count
+                """,
+                (day_start, day_start, day_end)
+            )
+            cursor.execute(
+                "DELETE FROM token_usage WHERE created_at >= ? AND created_at < ?",
+                (day_start, day_end)
+            )
+            deleted = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return deleted
+
+    @staticmethod
+    def get_token_totals(
+        day_start: datetime,
+        month_start: datetime,
+        user_id: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """
+        오늘/이번 달 사용 토큰 합계 (원본 행 + 일별 요약 행, 한도 확인용)
+
+        Args:
+            day_start: 오늘 시작 시각 (UTC 00:00)
+            month_start: 이번 달 시작 시각 (UTC 1일 00:00)
+            user_id: 사용자 ID (없으면 전체 사용자)
+
+        Returns:
+            Tuple[int, int]: (오늘 토큰 수, 이번 달 토큰 수)
+        """
+        day = day_start.strftime(TIMESTAMP_FORMAT)
+        month = month_start.strftime(TIMESTAMP_FORMAT)
+        user_filter = "AND user_id = ?" if user_id is not None else ""
+        user_params = [user_id] if user_id is not None else []
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            f"""
+            SELECT
+                COALESCE(SUM(CASE WHEN created_at >= ? THEN total_tokens ELSE 0 END), 0) as day_tokens,
+                COALESCE(SUM(total_tokens), 0) as month_tokens
+            FROM token_usage
+            WHERE created_at >= ? {user_filter}
+            UNION ALL
+            SELECT
+                COALESCE(SUM(CASE WHEN day >= ? THEN total_tokens ELSE 0 END), 0),
+                COALESCE(SUM(total_tokens), 0)
+            FROM token_usage_daily
+            WHERE day >= ? {user_filter}
+            """,
+            [day, month, *user_params, day, month, *user_params]
+        )
+        rows = cursor.fetchall()
+        conn.close()
+
+        return (
+            sum(int(row["day_tokens"]) for row in rows),
+            sum(int(row["month_tokens"]) for row in rows),
+        )
+
     @staticmethod
     def _row_to_token_usage(row) -> TokenUsage:
         """데이터베이스 행을 TokenUsage 객체로 변환"""
@@ -116,15 +406,13 @@ class TokenUsageDB:
             input_tokens=row["input_tokens"],
             output_tokens=row["output_tokens"],
             total_tokens=row["total_tokens"],
-            created_at=datetime.fromisoformat(row["created_at"])
+            created_at=to_datetime(row["created_at"])
         )
 
     @staticmethod
     def _row_to_user_stats(row) -> UserTokenStats:
         """데이터베이스 행을 UserTokenStats 객체로 변환"""
-        last_usage = None
-        if row["last_usage"]:
-            last_usage = datetime.fromisoformat(row["last_usage"])
+        last_usage = to_datetime(row["last_usage"]) if row["last_usage"] else None
 
         return UserTokenStats(
             user_id=row["user_id"],
@@ -1,12 +1,15 @@
 """
 사용자 데이터베이스 작업
 """
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
-from .connection import get_db_connection
+from .connection import get_db_connection, to_datetime
+from .blob_db import BlobDB
 from models.user import User, UserCreate, UserUpdate
+from utils.tracing import traced_methods
 
 
+@traced_methods
 class UserDB:
     """사용자 데이터베이스 클래스"""
 
@@ -20,16 +23,13 @@ class UserDB:
             """
             INSERT INTO users (email, username, hashed_password)
             VALUES (?, ?, ?)
+            RETURNING *
             """,
             (user.email, user.username, hashed_password)
         )
+        row = cursor.fetchone()
 
         conn.commit()
-        user_id = cursor.lastrowid
-
-        # 생성된 사용자 조회
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        row = cursor.fetchone()
         conn.close()
 
         return UserDB._row_to_user(row)
@@ -92,22 +92,29 @@ class UserDB:
             update_fields.append("is_admin = ?")
             values.append(int(update.is_admin))
 
+        # 토큰에 담기는 권한이 바뀌면 이전에 발급된 토큰 무효화
+        if update.is_active is not None or update.is_admin is not None:
+            update_fields.append("token_version = token_version + 1")
+
         if update.password_reset_required is not None:
             update_fields.append("password_reset_required = ?")
             values.append(int(update.password_reset_required))
 
         if not update_fields:
+            conn.close()
             return UserDB.get_user_by_id(user_id)
 
         update_fields.append("updated_at = CURRENT_TIMESTAMP")
         values.append(user_id)
 
-        query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ?"
+        # 바뀐 token_version을 호출자가 토큰 버전 캐시에 바로 반영할 수 있도록 수정된 행 반환
+        query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ? RETURNING *"
         cursor.execute(query, values)
+        row = cursor.fetchone()
         conn.commit()
         conn.close()
 
-        return UserDB.get_user_by_id(user_id)
+        return UserDB._row_to_user(row) if row else None
 
     @staticmethod
     def update_password(user_id: int, hashed_password: str) -> bool:
@@ -127,16 +134,114 @@ class UserDB:
         return affected > 0
 
     @staticmethod
-    def delete_user(user_id: int) -> bool:
-        """사용자 삭제"""
+    def change_password(user_id: int, hashed_password: str, reset_required: bool) -> Optional[int]:
+        """
+        비밀번호 변경 (이전에 발급된 토큰 무효화)
+
+        비밀번호, password_reset_required 플래그, 토큰 버전을 한 UPDATE로 바꿉니다.
+
+        Args:
+            user_id: 사용자 ID
+            hashed_password: 새 비밀번호 해시
+            reset_required: 다음 로그인 때 비밀번호 변경이 필요한지 여부
+
+        Returns:
+            Optional[int]: 새 토큰 버전 (사용자가 없으면 None)
+        """
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+        cursor.execute(
+            """
+            UPDATE users
+            SET hashed_password = ?, password_reset_required = ?,
+                token_version = token_version + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            RETURNING token_version
+            """,
+            (hashed_password, int(reset_required), user_id)
+        )
+        row = cursor.fetchone()
+
+        conn.commit()
+        conn.close()
+
+        return row["token_version"] if row else None
+
+    @staticmethod
+    def bump_token_version(user_id: int) -> Optional[int]:
+        """
+        토큰 버전 증가 (이전에 발급된 토큰 무효화)
+
+        Returns:
+            Optional[int]: 새 토큰 버전 (사용자가 없으면 None)
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            """
+            UPDATE users SET token_version = token_version + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+            RETURNING token_version
+            """,
+            (user_id,)
+        )
+        row = cursor.fetchone()
+
         conn.commit()
-        affected = cursor.rowcount
         conn.close()
 
+        return row["token_version"] if row else None
+
+    @staticmethod
+    def get_token_versions(since: Optional[datetime] = None) -> Dict[int, int]:
+        """
+        사용자별 토큰 버전 조회
+
+        Args:
+            since: 이 시각(UTC) 이후 수정된 사용자만 (없으면 전체)
+
+        Returns:
+            Dict[int, int]: {사용자 ID: 토큰 버전}
+        """
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        if since is None:
+            cursor.execute("SELECT id, token_version FROM users")
+        else:
+            cursor.execute(
+                "SELECT id, token_version FROM users WHERE updated_at >= ?",
+                (since.strftime("%Y-%m-%d %H:%M:%S"),)
+            )
+        rows = cursor.fetchall()
+        conn.close()
+
+        return {row["id"]: row["token_version"] for row in rows}
+
+    @staticmethod
+    def delete_user(user_id: int) -> bool:
+        """사용자 삭제 (연쇄 삭제되는 보고서의 파일 저장소 참조도 해제)"""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute(
+                "SELECT content_hash FROM reports WHERE user_id = ? AND content_hash IS NOT NULL",
+                (user_id,)
+            )
+            BlobDB.release_many(cursor, [row["content_hash"] for row in cursor.fetchall()])
+
+            cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            conn.commit()
+            affected = cursor.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
         return affected > 0
 
     @staticmethod
@@ -150,6 +255,7 @@ class UserDB:
             is_active=bool(row["is_active"]),
             is_admin=bool(row["is_admin"]),
             password_reset_required=bool(row["password_reset_required"]),
-            created_at=datetime.fromisoformat(row["created_at"]),
-            updated_at=datetime.fromisoformat(row["updated_at"])
+            token_version=row["token_version"],
+            created_at=to_datetime(row["created_at"]),
+            updated_at=to_datetime(row["updated_at"])
         )
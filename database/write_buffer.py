@@ -0,0 +1,178 @@
+"""
+버퍼링된 일괄 쓰기 (group commit)
+
+대량으로 발생하는 기록(토큰 사용량, 지표 등)을 메모리에 모았다가
+일정 시간(ms) 또는 일정 건수마다 executemany + 단일 커밋으로 저장합니다.
+커밋마다 발생하는 fsync 횟수를 줄이기 위한 용도입니다.
+
+버퍼가 최대 크기(DB_WRITE_MAX_BUFFER)에 이르면 백그라운드 플러시를 기다리지 않고
+기록을 추가한 호출자가 직접 플러시합니다 (저장이 밀리면 호출자가 느려지는 대신 메모리가 늘지 않음).
+"""
+import os
+import atexit
+import logging
+import threading
+from typing import List, Sequence
+
+from .connection import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+# 기본 플러시 주기 및 배치 크기
+FLUSH_INTERVAL_MS = int(os.getenv("DB_WRITE_FLUSH_MS", "200"))
+MAX_BATCH_ROWS = int(os.getenv("DB_WRITE_BATCH_SIZE", "100"))
+
+# 버퍼 최대 행 수 (이 건수에 이르면 add()에서 동기 플러시)
+MAX_BUFFER_ROWS = int(os.getenv("DB_WRITE_MAX_BUFFER", "1000"))
+
+# 저장 실패 시 재시도를 위해 보관할 최대 행 수 (초과분은 버림)
+MAX_PENDING_ROWS = int(os.getenv("DB_WRITE_MAX_PENDING", "10000"))
+
+# 종료 시 플러시할 기록기 목록
+_writers: List["BufferedWriter"] = []
+
+
+class BufferedWriter:
+    """단일 INSERT 문에 대한 버퍼링 기록기"""
+
+    def __init__(
+        self,
+        name: str,
+        sql: str,
+        flush_interval_ms: int = None,
+        max_batch: int = None,
+        max_buffer: int = None
+    ):
+        """
+        기록기 초기화
+
+        Args:
+            name: 로그에 표시할 이름
+            sql: executemany로 실행할 INSERT 문
+            flush_interval_ms: 플러시 주기 (밀리초)
+            max_batch: 이 건수 이상 쌓이면 즉시 플러시
+            max_buffer: 이 건수 이상 쌓이면 add()를 호출한 스레드에서 플러시
+        """
+        self.name = name
+        self.sql = sql
+        self.flush_interval = (flush_interval_ms or FLUSH_INTERVAL_MS) / 1000
+        self.max_batch = max_batch or MAX_BATCH_ROWS
+        self.max_buffer = max(max_buffer or MAX_BUFFER_ROWS, self.max_batch)
+
+        self._rows: List[Sequence] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._closed = False
+
+        _writers.append(self)
+
+    def add(self, row: Sequence):
+        """기록 추가 (종료 후이거나 버퍼가 가득 차면 즉시 저장)"""
+        with self._lock:
+            self._rows.append(row)
+            pending = len(self._rows)
+            closed = self._closed
+
+            if not closed and self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f"buffered-writer-{self.name}",
+                    daemon=True
+                )
+                self._thread.start()
+
+        if closed or pending >= self.max_buffer:
+            # 백그라운드 플러시가 따라가지 못하면 호출자가 직접 저장 (backpressure)
+            self.flush()
+        elif pending >= self.max_batch:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """버퍼에 쌓인 기록을 한 트랜잭션으로 저장"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+
+            if not rows:
+                return 0
+
+            conn = get_db_connection()
+            try:
+                conn.cursor().executemany(self.sql, rows)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"[{self.name}] 일괄 저장 실패 ({len(rows)}건): {str(e)}")
+
+                # 다음 플러시에서 재시도 (상한 초과 시 버림)
+                with self._lock:
+                    if len(self._rows) + len(rows) <= MAX_PENDING_ROWS:
+                        self._rows[:0] = rows
+                    else:
+                        logger.error(f"[{self.name}] 대기 행이 너무 많아 {len(rows)}건을 버립니다.")
+                return 0
+            finally:
+                conn.close()
+
+            return len(rows)
+
+    def close(self):
+        """백그라운드 스레드를 멈추고 남은 기록을 모두 저장"""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+
+        self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout=5)
+
+        self.flush()
+
+    def reopen(self):
+        """
+        close() 후 다시 버퍼링 상태로 전환 (다음 add()에서 백그라운드 스레드를 새로 시작)
+
+        같은 프로세스에서 애플리케이션을 다시 시작할 때(테스트 등) 사용합니다.
+        """
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+
+        with self._lock:
+            self._closed = False
+            self._wakeup.clear()
+            # 종료된 스레드만 정리 (아직 플러시 중이면 그 스레드가 이어서 동작)
+            if self._thread is not None and not self._thread.is_alive():
+                self._thread = None
+
+    def _run(self):
+        """주기적 플러시 루프"""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"[{self.name}] 플러시 중 오류: {str(e)}")
+
+            if self._closed:
+                return
+
+
+def flush_all_writers():
+    """모든 버퍼링 기록기를 플러시하고 종료 (애플리케이션 종료 시 호출)"""
+    for writer in _writers:
+        writer.close()
+
+
+def reopen_all_writers():
+    """종료한 버퍼링 기록기를 다시 사용 가능하게 전환 (애플리케이션 시작 시 호출)"""
+    for writer in _writers:
+        writer.reopen()
+
+
+atexit.register(flush_all_writers)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+보고서 파일 저장소 정리 스크립트
+
+1. (--recount) reports 테이블 기준으로 참조 수를 다시 계산
+2. 참조가 없어진 지 유예 시간이 지난 파일 삭제
+   (행을 정리 중으로 표시한 뒤 파일을 지우고 삭제 완료로 표시, 유예 시간이 지난 표시 행은 삭제)
+3. blobs 테이블에 등록되지 않은 고아 파일 삭제 (DB 저장 전에 실패한 생성 등)
+"""
+import time
+import argparse
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+from database import init_db
+from database.blob_db import BlobDB
+from utils.blob_store import blob_store
+
+# 기본 유예 시간 (초): 생성 중인 파일이나 방금 참조가 해제된 파일은 건드리지 않음
+DEFAULT_GRACE_SECONDS = 3600
+
+
+def gc(grace_seconds: int = DEFAULT_GRACE_SECONDS, recount: bool = False, dry_run: bool = False):
+    """파일 저장소 정리 실행"""
+    try:
+        init_db()
+        prefix = "[dry-run] " if dry_run else ""
+
+        if recount and not dry_run:
+            changed = BlobDB.recount()
+            print(f"✅ 참조 수를 다시 계산했습니다. ({changed}건 수정)")
+
+        # 1. 참조가 없는 파일
+        # 행을 먼저 정리 중으로 표시하므로 그 뒤로는 참조 추가가 거절되고,
+        # 같은 내용을 저장하려는 요청은 삭제 완료를 기다렸다가 파일을 다시 넣습니다.
+        removed = 0
+        freed = 0
+        for content_hash, key in BlobDB.collect_unreferenced(grace_seconds, dry_run=dry_run):
+            info = blob_store.storage.stat(key)
+            if info is not None:
+                if not dry_run:
+                    blob_store.remove(content_hash)
+                removed += 1
+                freed += info.size
+            if not dry_run:
+                BlobDB.mark_deleted(content_hash)
+        if not dry_run:
+            BlobDB.purge_deleted(grace_seconds)
+        print(f"✅ {prefix}참조가 없는 파일 {removed}개 삭제 ({freed:,} bytes)")
+
+        # 2. DB에 등록되지 않은 고아 파일
+        known = BlobDB.get_all_hashes()
+        cutoff = time.time() - grace_seconds
+        orphans = 0
+        orphan_bytes = 0
+        for content_hash, key, size, mtime in blob_store.iter_blobs():
+            if content_hash in known or mtime > cutoff:
+                continue
+            orphan_bytes += size
+            if not dry_run:
+                blob_store.storage.delete(key)
+            orphans += 1
+        print(f"✅ {prefix}고아 파일 {orphans}개 삭제 ({orphan_bytes:,} bytes)")
+
+    except Exception as e:
+        print(f"❌ 파일 저장소 정리 중 오류 발생: {str(e)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="보고서 파일 저장소 정리")
+    parser.add_argument(
+        "--grace-seconds", type=int, default=DEFAULT_GRACE_SECONDS,
+        help=f"참조 해제/생성 후 유지할 시간 (기본 {DEFAULT_GRACE_SECONDS}초)"
+    )
+    parser.add_argument("--recount", action="store_true", help="reports 기준으로 참조 수 재계산")
+    parser.add_argument("--dry-run", action="store_true", help="삭제하지 않고 대상만 출력")
+    args = parser.parse_args()
+
+    gc(grace_seconds=args.grace_seconds, recount=args.recount, dry_run=args.dry_run)
@@ -2,19 +2,50 @@
 HWP 보고서 자동 생성 시스템 - FastAPI 메인 애플리케이션
 """
 import os
-from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import FileResponse, HTMLResponse
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import logging
 
 from utils.claude_client import ClaudeClient
-from utils.hwp_handler import HWPHandler
-from utils.auth import hash_password
-from database import init_db, UserDB
+from utils.resources import AppResources, get_claude_client, get_resources
+from utils.auth import AUTH_CLAIMS_MODE, hash_password
+from utils.storage import get_storage
+from utils.download import archived_file_response
+from utils.offload import storage_download
+from utils.output_index import run_reconcile_loop, store_output_file
+from utils.retention import run_retention_loop
+from utils.password_hasher import password_hasher
+from utils.quota import quota_manager
+from utils.startup import STARTUP_IMPORT_PROFILE, bootstrap_once, log_import_profile, process_uptime
+from utils.token_versions import run_version_sync_loop
+from utils.revocation import revocation_list, run_revocation_loop
+from utils.coordination import coordinator, run_leader_loop
+from utils.tracing import TracingMiddleware, install_log_record_factory, log_handler, shutdown as shutdown_tracing
+from utils.metrics import (
+    CONTENT_TYPE,
+    ERRORS,
+    GENERATIONS_IN_FLIGHT,
+    METRICS_DIR,
+    METRICS_TOKEN,
+    MetricsMiddleware,
+    record_tokens,
+    register_collector,
+    render_latest,
+    run_metrics_flush_loop,
+    unregister_collector,
+)
+from database.migrations import MIGRATIONS, get_schema_version
+from database import init_db, UserDB, OutputFileDB, ArchiveDB, flush_all_writers, reopen_all_writers
 from routers import auth_router, reports_router, admin_router
 
 # 환경 변수 로드
@@ -23,21 +54,21 @@ load_dotenv()
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    handlers=[log_handler()]
 )
 logger = logging.getLogger(__name__)
 
-# FastAPI 앱 초기화
-app = FastAPI(
-    title="HWP 보고서 자동 생성 시스템",
-    description="Claude AI를 사용하여 금융 업무보고서를 자동 생성하는 시스템",
-    version="1.0.0"
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    애플리케이션 수명 주기
 
-# 앱 시작 시 실행
-@app.on_event("startup")
-async def startup_event():
-    """애플리케이션 시작 시 실행"""
+    시작: 디렉토리 생성 → 데이터베이스/관리자 계정 초기화 → 버퍼링 기록기 준비 → 템플릿 로드/검증 → 공유 자원 생성
+          → 리더 선출 → 백그라운드 작업 시작 (예열은 백그라운드에서 진행, 완료 여부는 /ready)
+    종료: 백그라운드 작업 취소 → 리더 임대 반납 → 스레드 풀 종료 → 버퍼에 남은 기록/추적 저장
+    """
+    # 로그 레코드에 trace_id 추가 (LOG_FORMAT에서 사용)
+    install_log_record_factory()
     logger.info("애플리케이션 시작 중...")
 
     # 필요한 디렉토리 생성
@@ -47,15 +78,78 @@ async def startup_event():
     os.makedirs("temp", exist_ok=True)
     os.makedirs("data", exist_ok=True)
 
-    # 데이터베이스 초기화
-    logger.info("데이터베이스를 초기화합니다...")
-    init_db()
-    logger.info("데이터베이스 초기화 완료")
+    # 데이터베이스 초기화 및 관리자 계정 생성 (여러 워커 중 한 곳에서만, 이미 끝났으면 생략)
+    if not bootstrap_once(is_bootstrapped, bootstrap):
+        logger.info("데이터베이스와 관리자 계정이 이미 준비되어 있습니다.")
+
+    # 같은 프로세스에서 다시 시작한 경우 이전 종료 때 닫은 버퍼링 기록기를 다시 사용
+    reopen_all_writers()
+
+    # 보고서 템플릿 로드/검증 및 공유 자원 생성 (의존성 get_resources로 주입)
+    resources = AppResources()
+    resources.load_templates()
+    app.state.resources = resources
+    app.state.warmup_task = asyncio.create_task(resources.warm_up())
+    register_collector(resources.collect_metrics)
+
+    # 폐기된 토큰 필터 로드 (이후 주기적으로 동기화/정리)
+    revocation_list.sync()
+
+    # 리더 선출 (워커가 여러 개이면 주기 작업은 리더 임대를 가진 워커만 실행)
+    coordinator.elect()
+
+    # 백그라운드 작업
+    # - 리더 임대 갱신 (리더가 종료되면 다른 워커가 이어받음)
+    # - 보고서 파일 목록 색인 동기화 (색인이 비어 있을 때, 또는 주기 실행) - 리더만
+    # - 보관 정책 주기 실행 (RETENTION_INTERVAL 설정 시) - 리더만
+    # - 폐기된 토큰 필터 동기화/정리 (만료된 행 삭제는 리더만)
+    # - 클레임 기반 인증: 권한이 바뀐 사용자의 토큰 버전 주기 동기화
+    # - 워커가 여러 개이면 지표 스냅샷 기록 (/metrics가 전체 워커 합계를 응답)
+    background_loops = [
+        run_leader_loop(),
+        run_reconcile_loop(),
+        run_retention_loop(),
+        run_revocation_loop(),
+    ]
+    if AUTH_CLAIMS_MODE:
+        background_loops.append(run_version_sync_loop())
+    if METRICS_DIR:
+        background_loops.append(run_metrics_flush_loop())
+    app.state.background_tasks = [asyncio.create_task(loop) for loop in background_loops]
+
+    # import 시간 분석 (STARTUP_IMPORT_PROFILE 설정 시, 별도 프로세스, 리더 워커만)
+    if STARTUP_IMPORT_PROFILE and coordinator.is_leader:
+        log_import_profile("main")
+
+    uptime = process_uptime()
+    if uptime is not None:
+        logger.info(f"애플리케이션 시작 완료 (프로세스 시작 후 {uptime * 1000:.0f}ms)")
+    else:
+        logger.info("애플리케이션 시작 완료")
+
+    yield
+
+    app.state.warmup_task.cancel()
+    for task in app.state.background_tasks:
+        task.cancel()
+    coordinator.resign()
+    unregister_collector(resources.collect_metrics)
+    resources.shutdown()
+    password_hasher.shutdown()
+
+    # 버퍼에 남은 기록 저장, 남은 추적 span 내보내기
+    flush_all_writers()
+    shutdown_tracing()
+    logger.info("애플리케이션 종료 완료")
 
-    # 관리자 계정 생성
-    logger.info("관리자 계정을 확인/생성합니다...")
-    init_admin_user()
-    logger.info("애플리케이션 시작 완료")
+
+# FastAPI 앱 초기화
+app = FastAPI(
+    title="HWP 보고서 자동 생성 시스템",
+    description="Claude AI를 사용하여 금융 업무보고서를 자동 생성하는 시스템",
+    version="1.0.0",
+    lifespan=lifespan
+)
 
 # CORS 설정
 app.add_middleware(
@@ -66,6 +160,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 요청 수/처리 시간, 다운로드 바이트/시간 지표
+app.add_middleware(MetricsMiddleware)
+
+# 요청별 추적 (응답 헤더 X-Trace-Id, 로그의 trace ID)
+app.add_middleware(TracingMiddleware)
+
 # 정적 파일 및 템플릿 설정
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
@@ -75,10 +175,6 @@ app.include_router(auth_router)
 app.include_router(reports_router)
 app.include_router(admin_router)
 
-# 템플릿 파일 경로
-TEMPLATE_PATH = "templates/report_template.hwpx"
-
-
 class ReportRequest(BaseModel):
     """보고서 생성 요청 모델"""
     topic: str
@@ -124,7 +220,7 @@ async def change_password_page(request: Request):
 
 @app.get("/health")
 async def health_check():
-    """헬스 체크 엔드포인트"""
+    """헬스 체크 엔드포인트 (프로세스 생존 여부)"""
     return {
         "status": "healthy",
         "service": "HWP Report Generator",
@@ -132,8 +228,38 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check(request: Request):
+    """
+    준비 상태 엔드포인트
+
+    템플릿 로드와 예열(SDK 클라이언트, 비밀번호 해싱, JWT)이 끝나면 200, 아니면 503
+    """
+    resources = getattr(request.app.state, "resources", None)
+    if resources is None:
+        return JSONResponse(status_code=503, content={"ready": False})
+
+    status = resources.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=jsonable_encoder(status))
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus 지표 (METRICS_TOKEN 설정 시 Bearer 토큰 필요)"""
+    if METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=401, detail="지표를 조회할 권한이 없습니다.")
+
+    return Response(render_latest(), media_type=CONTENT_TYPE)
+
+
 @app.post("/api/generate", response_model=ReportResponse)
-async def generate_report(request: ReportRequest):
+async def generate_report(
+    request: ReportRequest,
+    resources: AppResources = Depends(get_resources),
+    claude_client: ClaudeClient = Depends(get_claude_client)
+):
     """
     보고서 생성 API
 
@@ -143,88 +269,37 @@ async def generate_report(request: ReportRequest):
     Returns:
         ReportResponse: 생성 결과
     """
-    try:
-        logger.info(f"보고서 생성 요청: {request.topic}")
+    logger.info(f"보고서 생성 요청: {request.topic}")
 
-        # 입력 검증
-        if not request.topic or len(request.topic.strip()) < 3:
-            raise HTTPException(
-                status_code=400,
-                detail="보고서 주제는 최소 3자 이상이어야 합니다."
-            )
+    # 입력 검증 (잘못된 요청은 한도를 소모하지 않음)
+    if not request.topic or len(request.topic.strip()) < 3:
+        raise HTTPException(
+            status_code=400,
+            detail="보고서 주제는 최소 3자 이상이어야 합니다."
+        )
 
-        # Claude 클라이언트 초기화
-        claude_client = ClaudeClient()
+    # 인증 없는 API이므로 전체 한도만 확인 (사용량 합계 DB 조회가 있으므로 스레드 풀에서 실행)
+    await run_in_threadpool(quota_manager.check, None)
 
-        # 보고서 내용 생성
+    GENERATIONS_IN_FLIGHT.inc()
+    try:
+        # 보고서 내용 생성 (보고서 생성 스레드 풀에서 실행)
         logger.info("Claude AI로 보고서 내용 생성 중...")
-        content = claude_client.generate_report(request.topic)
+        result = await resources.run(claude_client.generate_report, request.topic)
+        content = result.content
+        quota_manager.record(None, result.usage.total_tokens)
+        record_tokens(result.usage.model, None, result.usage.input_tokens, result.usage.output_tokens)
         logger.info("보고서 내용 생성 완료")
 
-        # HWP 파일 생성
+        # HWP 파일 생성 (시작 시 로드/검증한 템플릿 사용)
         logger.info("HWPX 파일 생성 중...")
-
-        # 템플릿이 없으면 간단한 템플릿 생성
-        if not os.path.exists(TEMPLATE_PATH):
-            logger.warning("템플릿 파일이 없습니다. 기본 템플릿을 생성합니다.")
-            os.makedirs("templates", exist_ok=True)
-            os.makedirs("temp", exist_ok=True)
-
-            # 간단한 HWPX 템플릿 직접 생성
-            import zipfile
-            work_dir = "temp/template_creation"
-            os.makedirs(work_dir, exist_ok=True)
-            os.makedirs(f"{work_dir}/Contents", exist_ok=True)
-
-            # section0.xml 생성
-            section_content = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
-<section>
-    <p><text>제목: {{TITLE}}</text></p>
-    <p><text>작성일: {{DATE}}</text></p>
-    <p><text>━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━</text></p>
-    <p><text>1. 요약</text></p>
-    <p><text>{{SUMMARY}}</text></p>
-    <p><text>━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━</text></p>
-    <p><text>2. 배경 및 목적</text></p>
-    <p><text>{{BACKGROUND}}</text></p>
-    <p><text>━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━</text></p>
-    <p><text>3. 주요 내용</text></p>
-    <p><text>{{MAIN_CONTENT}}</text></p>
-    <p><text>━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━</text></p>
-    <p><text>4. 결론 및 제언</text></p>
-    <p><text>{{CONCLUSION}}</text></p>
-</section>"""
-
-            with open(f"{work_dir}/Contents/section0.xml", 'w', encoding='utf-8') as f:
-                f.write(section_content)
-
-            # version.xml 생성
-            with open(f"{work_dir}/version.xml", 'w', encoding='utf-8') as f:
-                f.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<version>5.0.0.0</version>')
-
-            # HWPX 압축
-            with zipfile.ZipFile(TEMPLATE_PATH, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for root, dirs, files in os.walk(work_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, work_dir)
-                        zipf.write(file_path, arcname)
-
-            # 임시 디렉토리 정리
-            import shutil
-            shutil.rmtree(work_dir)
-            logger.info("기본 템플릿이 생성되었습니다.")
-
-        # HWP 핸들러 초기화 및 보고서 생성
-        hwp_handler = HWPHandler(
-            template_path=TEMPLATE_PATH,
-            temp_dir="temp",
-            output_dir="output"
-        )
-
-        output_path = hwp_handler.generate_report(content)
+        output_path = await resources.run(resources.report_handler.generate_report, content)
         filename = os.path.basename(output_path)
 
+        # 저장소에 파일명 그대로 저장하고 색인에 반영 (로컬 저장소면 이동 없음)
+        # 업로드와 색인 기록은 블로킹 호출이므로 스레드 풀에서 실행
+        await resources.run(store_output_file, filename, output_path)
+
         logger.info(f"보고서 생성 완료: {filename}")
 
         return ReportResponse(
@@ -235,51 +310,67 @@ async def generate_report(request: ReportRequest):
         )
 
     except ValueError as e:
+        ERRORS.inc(stage="generate", type=type(e).__name__)
         logger.error(f"설정 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"설정 오류: {str(e)}")
 
     except FileNotFoundError as e:
+        ERRORS.inc(stage="generate", type=type(e).__name__)
         logger.error(f"파일 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"파일 오류: {str(e)}")
 
     except Exception as e:
+        ERRORS.inc(stage="generate", type=type(e).__name__)
         logger.error(f"보고서 생성 중 오류 발생: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"보고서 생성 중 오류가 발생했습니다: {str(e)}"
         )
 
+    finally:
+        GENERATIONS_IN_FLIGHT.dec()
+
 
 @app.get("/api/download/{filename}")
-async def download_report(filename: str):
+async def download_report(filename: str, request: Request):
     """
     생성된 보고서 다운로드
 
+    ETag/If-None-Match/If-Modified-Since(304) 및 Range(206)를 지원합니다.
+
     Args:
         filename: 다운로드할 파일명
 
     Returns:
-        FileResponse: 파일 다운로드 응답
+        FileResponse 또는 StreamingResponse: 파일 다운로드 응답
     """
     try:
-        file_path = os.path.join("output", filename)
-
-        # 파일 존재 확인
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
-
         # 보안: 파일명 검증 (디렉토리 탐색 방지)
         if ".." in filename or "/" in filename or "\\" in filename:
             raise HTTPException(status_code=400, detail="잘못된 파일명입니다.")
 
-        logger.info(f"파일 다운로드: {filename}")
-
-        return FileResponse(
-            path=file_path,
-            filename=filename,
-            media_type="application/octet-stream"
+        # 저장소 파일 (인증 없는 경로이므로 공유 캐시 허용, 검증은 매번)
+        # 파일 정보 조회는 블로킹 호출이므로 스레드 풀에서 실행
+        storage = get_storage()
+        response = await run_in_threadpool(
+            storage_download, request, storage, filename, filename, private=False
         )
 
+        # 파일이 없으면 보관 기간이 지나 월별 묶음으로 옮겨진 파일을 묶음에서 전송
+        if response is None:
+            archived = ArchiveDB.get_archived_file(filename)
+            if archived is None:
+                raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+
+            logger.info(f"보관된 파일 다운로드: {filename} ({archived.archive_key})")
+            return archived_file_response(
+                request, storage, archived.archive_key, archived.data_offset,
+                archived.size, archived.mtime, filename, private=False
+            )
+
+        logger.info(f"파일 다운로드: {filename}")
+        return response
+
     except HTTPException:
         raise
     except Exception as e:
@@ -291,32 +382,29 @@ async def download_report(filename: str):
 
 
 @app.get("/api/reports")
-async def list_reports():
+async def list_reports(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=1000),
+    archived: bool = Query(False, description="보관 기간이 지나 월별 묶음으로 옮겨진 파일 목록")
+):
     """
     생성된 보고서 목록 조회
 
+    저장소를 매번 나열하지 않고 output_files 색인(archived=true면 archived_files)에서 최신순으로 조회합니다.
+
     Returns:
-        dict: 보고서 파일 목록
+        dict: 보고서 파일 목록 (페이지)
     """
     try:
-        output_dir = "output"
-        if not os.path.exists(output_dir):
-            return {"reports": []}
-
-        files = [
-            {
-                "filename": f,
-                "size": os.path.getsize(os.path.join(output_dir, f)),
-                "created": os.path.getctime(os.path.join(output_dir, f))
-            }
-            for f in os.listdir(output_dir)
-            if f.endswith(".hwpx")
-        ]
+        index = ArchiveDB if archived else OutputFileDB
+        total, files = index.list_files(limit=page_size, offset=(page - 1) * page_size)
 
-        # 생성 시간 기준 내림차순 정렬
-        files.sort(key=lambda x: x["created"], reverse=True)
-
-        return {"reports": files}
+        return {
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "reports": files
+        }
 
     except Exception as e:
         logger.error(f"보고서 목록 조회 중 오류: {str(e)}")
@@ -326,6 +414,23 @@ async def list_reports():
         )
 
 
+def is_bootstrapped() -> bool:
+    """스키마가 최신이고 관리자 계정이 있으면 True (시작 시 초기화 생략)"""
+    if get_schema_version() < MIGRATIONS[-1].version:
+        return False
+    return UserDB.get_user_by_email(os.getenv("ADMIN_EMAIL", "admin@example.com")) is not None
+
+
+def bootstrap():
+    """데이터베이스 초기화 및 관리자 계정 생성"""
+    logger.info("데이터베이스를 초기화합니다...")
+    init_db()
+    logger.info("데이터베이스 초기화 완료")
+
+    logger.info("관리자 계정을 확인/생성합니다...")
+    init_admin_user()
+
+
 def init_admin_user():
     """관리자 계정 자동 생성"""
     try:
@@ -370,14 +475,8 @@ if __name__ == "__main__":
     os.makedirs("temp", exist_ok=True)
     os.makedirs("data", exist_ok=True)
 
-    # 데이터베이스 초기화
-    logger.info("데이터베이스를 초기화합니다...")
-    init_db()
-    logger.info("데이터베이스 초기화 완료")
-
-    # 관리자 계정 생성
-    logger.info("관리자 계정을 확인/생성합니다...")
-    init_admin_user()
+    # 데이터베이스 초기화 및 관리자 계정 생성
+    bootstrap_once(is_bootstrapped, bootstrap)
 
     logger.info("HWP 보고서 생성 시스템을 시작합니다...")
     logger.info("서버 주소: http://localhost:8000")
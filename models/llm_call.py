@@ -0,0 +1,71 @@
+"""
+Claude API 호출 기록 모델
+"""
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class LLMUsage(BaseModel):
+    """Claude API 호출 한 번의 사용량과 성능 (재시도 포함)"""
+    model: str
+    status: str = "ok"  # ok / error
+    error_type: Optional[str] = None
+    stop_reason: Optional[str] = None
+    latency_ms: float  # 첫 시도부터 응답 완료(또는 실패)까지
+    first_token_ms: Optional[float] = None  # 첫 시도부터 첫 토큰까지
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    retries: int = 0
+    trace_id: Optional[str] = None
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    @property
+    def output_tokens_per_second(self) -> Optional[float]:
+        """첫 토큰 이후 출력 토큰 생성 속도"""
+        if self.status != "ok" or not self.output_tokens:
+            return None
+        generation_ms = self.latency_ms - (self.first_token_ms or 0)
+        if generation_ms <= 0:
+            return None
+        return self.output_tokens / (generation_ms / 1000)
+
+
+class LatencyPercentiles(BaseModel):
+    """백분위수 (호출이 없으면 None)"""
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+
+
+class LLMCallStats(BaseModel):
+    """
+    모델(·일)별 Claude API 호출 통계 (day가 None이면 조회 구간 전체)
+
+    백분위수는 성공한 호출 기준이며, output_tokens_per_second는 느린 쪽 꼬리입니다
+    (p95: 95%의 호출이 이보다 빠름).
+    """
+    model: str
+    day: Optional[datetime] = None
+    calls: int
+    errors: int
+    retries: int
+    cache_hits: int
+    input_tokens: int
+    output_tokens: int
+    latency_ms: LatencyPercentiles
+    first_token_ms: LatencyPercentiles
+    output_tokens_per_second: LatencyPercentiles
+
+
+class LLMCallStatsResponse(BaseModel):
+    """Claude API 호출 통계 응답 모델"""
+    bucket: str
+    start: datetime
+    end: datetime
+    stats: list[LLMCallStats]
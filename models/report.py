@@ -15,6 +15,7 @@ class Report(BaseModel):
     filename: str
     file_path: str
     file_size: int = 0
+    content_hash: Optional[str] = None  # 파일 저장소(blobs)의 SHA-256 해시
     created_at: Optional[datetime] = None
 
 
@@ -23,6 +24,18 @@ class ReportCreate(BaseModel):
     topic: str = Field(..., min_length=3)
 
 
+class ReportRenderRequest(BaseModel):
+    """보고서 재렌더링 요청 모델"""
+    template: Optional[str] = None  # templates/ 아래 HWPX 파일명 (없으면 기본 템플릿)
+
+
+class ReportBulkDownloadRequest(BaseModel):
+    """보고서 일괄 다운로드 요청 모델 (ID 목록 또는 기간 중 하나)"""
+    report_ids: Optional[list[int]] = None
+    start: Optional[datetime] = None  # 포함
+    end: Optional[datetime] = None    # 미포함
+
+
 class ReportResponse(BaseModel):
     """보고서 응답 모델"""
     id: int
@@ -38,3 +51,18 @@ class ReportListResponse(BaseModel):
     """보고서 목록 응답 모델"""
     total: int
     reports: list[ReportResponse]
+
+
+class ReportSearchResult(ReportResponse):
+    """보고서 검색 결과 모델"""
+    snippet: str
+    score: float
+
+
+class ReportSearchResponse(BaseModel):
+    """보고서 검색 응답 모델"""
+    total: int
+    total_capped: bool = False  # True면 실제 건수가 total 이상 (건수 계산 상한)
+    page: int
+    page_size: int
+    results: list[ReportSearchResult]
@@ -47,3 +47,27 @@ class UserTokenStats(BaseModel):
     total_tokens: int
     report_count: int
     last_usage: Optional[datetime]
+
+
+class TokenUsagePoint(BaseModel):
+    """시계열 버킷 하나의 토큰 사용량"""
+    bucket_start: datetime
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+    request_count: int
+
+
+class TokenUsageSeries(BaseModel):
+    """토큰 사용량 시계열 (user_id가 None이면 전체 합계)"""
+    user_id: Optional[int] = None
+    points: list[TokenUsagePoint]
+
+
+class TokenUsageTimeseries(BaseModel):
+    """토큰 사용량 시계열 응답 모델"""
+    bucket: str
+    bucket_seconds: int
+    start: datetime
+    end: datetime
+    series: list[TokenUsageSeries]
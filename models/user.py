@@ -15,6 +15,7 @@ class User(BaseModel):
     is_active: bool = False  # 관리자 승인 대기
     is_admin: bool = False
     password_reset_required: bool = False  # 비밀번호 변경 필요 여부
+    token_version: int = 0  # 권한 변경 시 증가 (이전 버전의 토큰 무효화)
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
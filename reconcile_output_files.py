@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+보고서 파일 목록 색인 동기화 스크립트
+
+/api/reports가 조회하는 output_files 색인을 저장소 실제 파일 목록과 맞춥니다.
+앱 밖에서 output/에 복사하거나 삭제한 파일을 반영할 때 실행합니다 (cron 등).
+"""
+import argparse
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+from database import init_db
+from utils.output_index import reconcile_output_index
+
+
+def reconcile(dry_run: bool = False):
+    """색인 동기화 실행"""
+    try:
+        init_db()
+        prefix = "[dry-run] " if dry_run else ""
+
+        added, updated, removed = reconcile_output_index(dry_run=dry_run)
+        print(f"✅ {prefix}보고서 파일 색인 동기화: 추가 {added}개, 수정 {updated}개, 삭제 {removed}개")
+
+    except Exception as e:
+        print(f"❌ 보고서 파일 색인 동기화 중 오류 발생: {str(e)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="보고서 파일 목록 색인 동기화")
+    parser.add_argument("--dry-run", action="store_true", help="변경하지 않고 건수만 출력")
+    args = parser.parse_args()
+
+    reconcile(dry_run=args.dry_run)
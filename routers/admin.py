@@ -1,15 +1,25 @@
 """
 관리자 전용 API 라우터
 """
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query
 from pydantic import BaseModel
 
 from models.user import UserResponse, UserUpdate
-from models.token_usage import UserTokenStats
+from models.token_usage import UserTokenStats, TokenUsageTimeseries
+from models.llm_call import LLMCallStatsResponse
+from database.connection import to_utc_naive
 from database.user_db import UserDB
 from database.token_usage_db import TokenUsageDB
-from utils.auth import get_current_admin_user, hash_password
+from database.llm_call_db import LLMCallDB
+from utils.auth import get_current_admin_user, hash_password_async
+from utils.password_hasher import password_hasher
+from utils.revocation import revocation_list
+from utils.token_versions import token_versions
+from utils.quota import quota_manager
+from utils.retention import retention_engine
+from utils.coordination import coordinator
 import secrets
 import string
 
@@ -74,7 +84,8 @@ async def approve_user(
             return MessageResponse(message="이미 승인된 사용자입니다.")
 
         update = UserUpdate(is_active=True)
-        UserDB.update_user(user_id, update)
+        updated = UserDB.update_user(user_id, update)
+        token_versions.set(user_id, updated.token_version)
 
         return MessageResponse(message=f"{user.username} 사용자가 승인되었습니다.")
 
@@ -103,7 +114,9 @@ async def reject_user(
             raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
 
         update = UserUpdate(is_active=False)
-        UserDB.update_user(user_id, update)
+        updated = UserDB.update_user(user_id, update)
+        # 이 프로세스에서는 이전 토큰을 바로 거절 (다른 워커는 다음 동기화 때)
+        token_versions.set(user_id, updated.token_version)
 
         return MessageResponse(message=f"{user.username} 사용자의 승인이 취소되었습니다.")
 
@@ -135,13 +148,11 @@ async def reset_user_password(
         alphabet = string.ascii_letters + string.digits
         temporary_password = ''.join(secrets.choice(alphabet) for _ in range(12))
 
-        # 비밀번호 해싱 및 업데이트
-        hashed_password = hash_password(temporary_password)
-        UserDB.update_password(user_id, hashed_password)
-
-        # password_reset_required 플래그 설정
-        update = UserUpdate(password_reset_required=True)
-        UserDB.update_user(user_id, update)
+        # 비밀번호 변경, password_reset_required 플래그 설정, 기존 토큰 무효화를 한 번에
+        hashed_password = await hash_password_async(temporary_password)
+        version = UserDB.change_password(user_id, hashed_password, reset_required=True)
+        if version is not None:
+            token_versions.set(user_id, version)
 
         return PasswordResetResponse(
             message=f"{user.username} 사용자의 비밀번호가 초기화되었습니다. 사용자는 다음 로그인 시 비밀번호를 변경해야 합니다.",
@@ -173,6 +184,98 @@ async def get_all_token_usage(current_admin = Depends(get_current_admin_user)):
         )
 
 
+@router.get("/token-usage/timeseries", response_model=TokenUsageTimeseries)
+async def get_token_usage_timeseries(
+    bucket: str = Query("day", pattern="^(hour|day|week)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    per_user: bool = False,
+    max_points: int = Query(500, ge=10, le=5000),
+    current_admin = Depends(get_current_admin_user)
+):
+    """
+    기간별 토큰 사용량 시계열 조회 (관리자 전용)
+
+    - bucket: 기본 집계 단위 (hour, day, week)
+    - start/end: 조회 구간 (기본값: 최근 30일)
+    - user_id: 특정 사용자 시계열, per_user: 사용자별 시계열 분리
+    - 구간이 길면 max_points 이하가 되도록 버킷을 자동으로 넓힘
+    """
+    try:
+        end = to_utc_naive(end) if end else datetime.utcnow()
+        start = to_utc_naive(start) if start else end - timedelta(days=30)
+
+        if start >= end:
+            raise HTTPException(status_code=400, detail="start는 end보다 이전이어야 합니다.")
+
+        bucket_seconds = TokenUsageDB.resolve_bucket_width(bucket, start, end, max_points)
+
+        # 버킷 경계에 맞춰 시작 시각을 내림 (첫 버킷이 잘리지 않도록)
+        origin = TokenUsageDB.bucket_origin(bucket_seconds)
+        start_ts = int(start.replace(tzinfo=timezone.utc).timestamp())
+        start_ts = (start_ts - origin) // bucket_seconds * bucket_seconds + origin
+        start = datetime.utcfromtimestamp(start_ts)
+
+        series = TokenUsageDB.get_usage_timeseries(
+            start=start,
+            end=end,
+            bucket_seconds=bucket_seconds,
+            user_id=user_id,
+            per_user=per_user
+        )
+
+        return TokenUsageTimeseries(
+            bucket=bucket,
+            bucket_seconds=bucket_seconds,
+            start=start,
+            end=end,
+            series=series
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"토큰 사용량 시계열 조회 중 오류가 발생했습니다: {str(e)}"
+        )
+
+
+@router.get("/llm-calls/stats", response_model=LLMCallStatsResponse)
+async def get_llm_call_stats(
+    bucket: str = Query("day", pattern="^(day|all)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_admin = Depends(get_current_admin_user)
+):
+    """
+    모델(·일)별 Claude API 호출 지연 시간/처리량 통계 (관리자 전용)
+
+    - bucket: day(일별, UTC) 또는 all(조회 구간 전체)
+    - start/end: 조회 구간 (기본값: 최근 7일)
+    - 지연 시간, 첫 토큰까지의 시간, 출력 토큰/초의 p50/p95/p99 (성공한 호출 기준)와
+      호출/오류/재시도/캐시 사용 수
+    """
+    try:
+        end = to_utc_naive(end) if end else datetime.utcnow()
+        start = to_utc_naive(start) if start else end - timedelta(days=7)
+
+        if start >= end:
+            raise HTTPException(status_code=400, detail="start는 end보다 이전이어야 합니다.")
+
+        stats = LLMCallDB.get_stats(start=start, end=end, per_day=bucket == "day")
+        return LLMCallStatsResponse(bucket=bucket, start=start, end=end, stats=stats)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Claude API 호출 통계 조회 중 오류가 발생했습니다: {str(e)}"
+        )
+
+
 @router.get("/token-usage/{user_id}", response_model=UserTokenStats)
 async def get_user_token_usage(
     user_id: int,
@@ -195,3 +298,72 @@ async def get_user_token_usage(
             status_code=500,
             detail=f"토큰 사용량 조회 중 오류가 발생했습니다: {str(e)}"
         )
+
+
+@router.get("/password-hashing")
+async def get_password_hashing_stats(current_admin = Depends(get_current_admin_user)):
+    """
+    비밀번호 해싱 스레드 풀 통계 (관리자 전용)
+
+    - running/queued: 실행 중/대기 중인 해싱 작업 수
+    - rejected: 대기열이 가득 차 503으로 거절된 요청 수
+    - wait_seconds_*: 대기열에서 기다린 시간, run_seconds_*: 해싱에 걸린 시간
+    """
+    return password_hasher.stats()
+
+
+@router.get("/token-revocation")
+async def get_token_revocation_stats(current_admin = Depends(get_current_admin_user)):
+    """
+    폐기된 토큰 필터 통계 (관리자 전용, 이 프로세스 기준)
+
+    - checks: 폐기 여부를 확인한 토큰 수
+    - filter_hits: 필터가 "있음"이라고 답해 데이터베이스를 확인한 횟수 (revoked를 뺀 나머지가 오탐)
+    - entries/capacity: 필터에 담긴 jti 수와 재생성 기준 크기
+    """
+    return revocation_list.stats()
+
+
+@router.get("/quota")
+async def get_quota_stats(current_admin = Depends(get_current_admin_user)):
+    """
+    보고서 생성 한도 설정과 허용/거절 건수 (관리자 전용, 이 프로세스 기준)
+    """
+    return quota_manager.stats()
+
+
+@router.get("/coordination")
+async def get_coordination_status(current_admin = Depends(get_current_admin_user)):
+    """
+    워커 간 작업 조정 상태 (관리자 전용)
+
+    - worker_id/is_leader: 이 요청을 처리한 워커와 리더 여부
+    - leases: 리더 임대 보유자와 만료 시각 (주기 작업은 보유자만 실행)
+    """
+    return coordinator.status()
+
+
+@router.get("/retention")
+async def get_retention_status(current_admin = Depends(get_current_admin_user)):
+    """
+    보관 정책 실행 상태 조회 (관리자 전용)
+
+    - state/phase: 실행 여부와 현재 단계 (temp, usage, archive)
+    - current: 현재(또는 마지막) 실행의 처리 건수, totals: 프로세스 시작 이후 누적
+    """
+    return retention_engine.status()
+
+
+@router.post("/retention/run", status_code=202)
+async def run_retention(
+    background_tasks: BackgroundTasks,
+    current_admin = Depends(get_current_admin_user)
+):
+    """
+    보관 정책 즉시 실행 (관리자 전용, 백그라운드 실행)
+    """
+    if retention_engine.running:
+        raise HTTPException(status_code=409, detail="보관 정책이 이미 실행 중입니다.")
+
+    background_tasks.add_task(retention_engine.run)
+    return {"message": "보관 정책 실행을 시작했습니다."}
@@ -1,19 +1,27 @@
 """
 인증 관련 API 라우터
 """
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Security
+from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import BaseModel
 
-from models.user import UserCreate, UserLogin, UserResponse, PasswordChange, UserUpdate
+from models.user import UserCreate, UserLogin, UserResponse, PasswordChange
 from database.user_db import UserDB
 from utils.auth import (
-    hash_password,
-    verify_password,
-    authenticate_user,
-    create_access_token,
+    hash_password_async,
+    verify_password_async,
+    authenticate_user_async,
+    create_user_tokens,
+    refresh_user_tokens,
+    decode_access_token,
+    revoke_token,
+    security,
     get_current_user,
     get_current_active_user
 )
+from utils.token_versions import token_versions
 
 router = APIRouter(prefix="/api/auth", tags=["인증"])
 
@@ -21,10 +29,21 @@ router = APIRouter(prefix="/api/auth", tags=["인증"])
 class TokenResponse(BaseModel):
     """토큰 응답 모델"""
     access_token: str
+    refresh_token: Optional[str] = None  # 클레임 기반 인증(AUTH_CLAIMS_MODE)에서만 발급
     token_type: str = "bearer"
     user: UserResponse
 
 
+class RefreshRequest(BaseModel):
+    """토큰 갱신 요청 모델"""
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    """로그아웃 요청 모델"""
+    refresh_token: Optional[str] = None
+
+
 class MessageResponse(BaseModel):
     """메시지 응답 모델"""
     message: str
@@ -48,7 +67,7 @@ async def register(user_data: UserCreate):
             )
 
         # 비밀번호 해싱
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password_async(user_data.password)
 
         # 사용자 생성
         user = UserDB.create_user(user_data, hashed_password)
@@ -76,7 +95,7 @@ async def login(credentials: UserLogin):
     """
     try:
         # 사용자 인증
-        user = authenticate_user(credentials.email, credentials.password)
+        user = await authenticate_user_async(credentials.email, credentials.password)
         if not user:
             raise HTTPException(
                 status_code=401,
@@ -91,9 +110,7 @@ async def login(credentials: UserLogin):
             )
 
         # JWT 토큰 생성
-        access_token = create_access_token(
-            data={"user_id": user.id, "email": user.email}
-        )
+        access_token, refresh_token = create_user_tokens(user)
 
         user_response = UserResponse(
             id=user.id,
@@ -107,6 +124,7 @@ async def login(credentials: UserLogin):
 
         return TokenResponse(
             access_token=access_token,
+            refresh_token=refresh_token,
             user=user_response
         )
 
@@ -119,11 +137,39 @@ async def login(credentials: UserLogin):
         )
 
 
+@router.post("/refresh", response_model=TokenResponse)
+async def refresh(request: RefreshRequest):
+    """
+    토큰 갱신 API (클레임 기반 인증)
+
+    - 리프레시 토큰으로 새 액세스/리프레시 토큰 발급
+    - 데이터베이스에서 계정 상태와 토큰 버전을 다시 확인
+    """
+    user, access_token, refresh_token = refresh_user_tokens(request.refresh_token)
+
+    return TokenResponse(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        user=UserResponse(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            is_active=user.is_active,
+            is_admin=user.is_admin,
+            password_reset_required=user.password_reset_required,
+            created_at=user.created_at
+        )
+    )
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_me(current_user = Depends(get_current_active_user)):
     """
     현재 로그인한 사용자 정보 조회
     """
+    # 클레임 기반 토큰에는 가입일 등이 없으므로 데이터베이스에서 조회
+    current_user = UserDB.get_user_by_id(current_user.id) or current_user
+
     return UserResponse(
         id=current_user.id,
         email=current_user.email,
@@ -136,12 +182,28 @@ async def get_me(current_user = Depends(get_current_active_user)):
 
 
 @router.post("/logout", response_model=MessageResponse)
-async def logout(current_user = Depends(get_current_user)):
+async def logout(
+    request: Optional[LogoutRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Security(security),
+    current_user = Depends(get_current_user)
+):
     """
     로그아웃 API
 
-    - JWT는 stateless이므로 클라이언트에서 토큰 삭제 처리
+    - 요청에 사용한 액세스 토큰(과 함께 보낸 리프레시 토큰)을 만료 시각까지 폐기
     """
+    revoke_token(decode_access_token(credentials.credentials))
+
+    if request and request.refresh_token:
+        try:
+            payload = decode_access_token(request.refresh_token)
+        except HTTPException:
+            payload = None
+
+        # 다른 사용자의 토큰은 폐기하지 않음
+        if payload and payload.get("user_id") == current_user.id:
+            revoke_token(payload)
+
     return MessageResponse(
         message="로그아웃되었습니다."
     )
@@ -157,32 +219,35 @@ async def change_password(
 
     - 현재 비밀번호 확인 후 새 비밀번호로 변경
     - 변경 후 password_reset_required 플래그 해제
+    - 기존 토큰은 무효화되므로 다시 로그인해야 함
     """
     try:
+        # 클레임 기반 토큰에는 비밀번호 해시가 없으므로 데이터베이스에서 조회
+        current_user = UserDB.get_user_by_id(current_user.id)
+        if not current_user:
+            raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+
         # 현재 비밀번호 확인
-        if not verify_password(password_data.current_password, current_user.hashed_password):
+        if not await verify_password_async(password_data.current_password, current_user.hashed_password):
             raise HTTPException(
                 status_code=400,
                 detail="현재 비밀번호가 올바르지 않습니다."
             )
 
         # 새 비밀번호 해싱
-        new_hashed_password = hash_password(password_data.new_password)
+        new_hashed_password = await hash_password_async(password_data.new_password)
 
-        # 비밀번호 업데이트
-        success = UserDB.update_password(current_user.id, new_hashed_password)
-        if not success:
+        # 비밀번호 변경, password_reset_required 플래그 해제, 이전 토큰(다른 기기 포함) 무효화를 한 번에
+        version = UserDB.change_password(current_user.id, new_hashed_password, reset_required=False)
+        if version is None:
             raise HTTPException(
                 status_code=500,
                 detail="비밀번호 업데이트에 실패했습니다."
             )
-
-        # password_reset_required 플래그 해제
-        update = UserUpdate(password_reset_required=False)
-        UserDB.update_user(current_user.id, update)
+        token_versions.set(current_user.id, version)
 
         return MessageResponse(
-            message="비밀번호가 성공적으로 변경되었습니다."
+            message="비밀번호가 성공적으로 변경되었습니다. 새 비밀번호로 다시 로그인해주세요."
         )
 
     except HTTPException:
@@ -2,81 +2,147 @@
 보고서 관련 API 라우터
 """
 import os
+import uuid
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 
-from models.report import ReportCreate, ReportResponse, ReportListResponse
-from models.token_usage import TokenUsageCreate
-from database.report_db import ReportDB
-from database.token_usage_db import TokenUsageDB
+from models.report import (
+    ReportBulkDownloadRequest,
+    ReportCreate,
+    ReportRenderRequest,
+    ReportResponse,
+    ReportListResponse,
+    ReportSearchResult,
+    ReportSearchResponse,
+)
+from database.connection import to_utc_naive
+from database.report_db import SEARCH_COUNT_LIMIT, ReportDB
+from database.blob_db import BlobDB, BlobDeletingError
+from database.archive_db import ArchiveDB
 from utils.auth import get_current_active_user
 from utils.claude_client import ClaudeClient
 from utils.hwp_handler import HWPHandler
+from utils.output_cache import LAZY_RENDER, report_cache
+from utils.blob_store import blob_store
+from utils.storage import READ_CHUNK_SIZE, get_storage
+from utils.download import (
+    archived_file_response,
+    is_not_modified,
+    local_file_response,
+    make_etag,
+    not_modified_response,
+    storage_response,
+    stream_response,
+)
+from starlette.concurrency import run_in_threadpool
+from utils.offload import offload_response, storage_download, verify_download_signature
+from utils.zip_stream import iter_zip
+from utils.quota import check_generation_quota, quota_manager
+from utils.metrics import ERRORS, GENERATIONS_IN_FLIGHT, REPORT_STAGE_SECONDS, record_tokens
+from utils.resources import TEMPLATE_DIR, TEMPLATE_PATH, AppResources, get_claude_client, get_resources
 
 router = APIRouter(prefix="/api/reports", tags=["보고서"])
 
-TEMPLATE_PATH = "templates/report_template.hwpx"
+# 일괄 다운로드 한 번에 담을 수 있는 최대 보고서 수
+BULK_DOWNLOAD_MAX_REPORTS = int(os.getenv("REPORT_BULK_MAX_REPORTS", "500"))
+
+
+def _resolve_template(template: str = None) -> str:
+    """요청된 템플릿 파일명을 경로로 변환 (templates/ 아래 .hwpx만 허용)"""
+    if not template:
+        return TEMPLATE_PATH
+
+    # 보안: 파일명 검증 (디렉토리 탐색 방지)
+    if ".." in template or "/" in template or "\\" in template or not template.endswith(".hwpx"):
+        raise HTTPException(status_code=400, detail="잘못된 템플릿 파일명입니다.")
+
+    template_path = os.path.join(TEMPLATE_DIR, template)
+    if not os.path.exists(template_path):
+        raise HTTPException(status_code=404, detail="템플릿 파일을 찾을 수 없습니다.")
+
+    return template_path
+
+
+async def _store_rendered(resources: AppResources, render, save):
+    """
+    렌더링한 파일을 저장소에 넣고 보고서 정보 저장
+
+    정리 작업이 같은 해시의 파일을 지우는 중이면(BlobDeletingError) 삭제가 끝나기를 기다린 뒤
+    파일을 다시 만들어 넣고 한 번 더 저장합니다.
+
+    Args:
+        resources: 앱 리소스 (보고서 생성 스레드 풀)
+        render: 로컬 파일을 만들고 경로를 반환하는 함수
+        save: (생성 파일 경로, 해시, 저장 키, 크기, revive_blob)를 받아 DB에 저장하는 함수
+
+    Returns:
+        save의 반환값
+    """
+    generated_path = await resources.run(render)
+    content_hash, output_path, file_size = await resources.run(blob_store.put, generated_path)
+    try:
+        return save(generated_path, content_hash, output_path, file_size, False)
+    except BlobDeletingError:
+        await resources.run(BlobDB.wait_deleted, content_hash)
+
+    generated_path = await resources.run(render)
+    content_hash, output_path, file_size = await resources.run(blob_store.put, generated_path)
+    return save(generated_path, content_hash, output_path, file_size, True)
 
 
 @router.post("/generate", response_model=ReportResponse)
 async def generate_report(
     request: ReportCreate,
-    current_user = Depends(get_current_active_user)
+    current_user = Depends(check_generation_quota),
+    resources: AppResources = Depends(get_resources),
+    claude_client: ClaudeClient = Depends(get_claude_client)
 ):
     """
     보고서 생성 API
 
     - 로그인한 사용자만 접근 가능
+    - 분당 요청 수 / 일·월 토큰 한도를 넘으면 429 (남은 한도는 X-Quota-* 헤더)
     - 토큰 사용량 자동 기록
     """
+    GENERATIONS_IN_FLIGHT.inc()
     try:
-        # Claude 클라이언트 초기화
-        claude_client = ClaudeClient()
-
-        # 보고서 내용 생성
-        content = claude_client.generate_report(request.topic)
-
-        # 토큰 사용량 추출 (Claude API 응답에서)
-        # Note: anthropic SDK의 Message 객체에서 usage 정보 가져오기
-        # 실제 구현 시 claude_client에서 usage 정보를 반환하도록 수정 필요
-
-        # HWP 파일 생성
-        hwp_handler = HWPHandler(
-            template_path=TEMPLATE_PATH,
-            temp_dir="temp",
-            output_dir="output"
-        )
-
-        output_path = hwp_handler.generate_report(content)
-        filename = os.path.basename(output_path)
-        file_size = os.path.getsize(output_path)
+        # 보고서 내용 생성 (보고서 생성 스레드 풀에서 실행)
+        result = await resources.run(claude_client.generate_report, request.topic, current_user.id)
+        content, usage = result.content, result.usage
+        quota_manager.record(current_user.id, usage.total_tokens)
+        record_tokens(usage.model, current_user, usage.input_tokens, usage.output_tokens)
 
-        # 데이터베이스에 보고서 정보 저장
-        report = ReportDB.create_report(
-            user_id=current_user.id,
-            topic=request.topic,
-            title=content.get("title", request.topic),
-            filename=filename,
-            file_path=output_path,
-            file_size=file_size
-        )
+        def save(generated_path, content_hash, output_path, file_size, revive_blob=False):
+            # 데이터베이스에 보고서 정보 및 토큰 사용량 저장 (단일 트랜잭션)
+            with REPORT_STAGE_SECONDS.time(stage="db_write"):
+                return ReportDB.create_report_with_usage(
+                    user_id=current_user.id,
+                    topic=request.topic,
+                    title=content.get("title", request.topic),
+                    filename=os.path.basename(generated_path),
+                    file_path=output_path,
+                    file_size=file_size,
+                    input_tokens=usage.input_tokens,
+                    output_tokens=usage.output_tokens,
+                    content=content,
+                    content_hash=content_hash,
+                    revive_blob=revive_blob
+                )
 
-        # 토큰 사용량 기록 (임시값 - 실제로는 Claude API 응답에서 가져와야 함)
-        # TODO: ClaudeClient를 수정하여 usage 정보를 반환하도록 개선
-        input_tokens = getattr(claude_client, 'last_input_tokens', 0)
-        output_tokens = getattr(claude_client, 'last_output_tokens', 0)
-        total_tokens = input_tokens + output_tokens
-
-        if total_tokens > 0:
-            token_usage = TokenUsageCreate(
-                user_id=current_user.id,
-                report_id=report.id,
-                input_tokens=input_tokens,
-                output_tokens=output_tokens,
-                total_tokens=total_tokens
+        if LAZY_RENDER:
+            # 지연 생성 모드: 내용만 저장하고 HWPX는 첫 다운로드 때 생성
+            # (작성일은 생성 시점 기준으로 고정)
+            content["date"] = datetime.now().strftime("%Y년 %m월 %d일")
+            filename = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.hwpx"
+            report = save(filename, None, "", 0)
+        else:
+            # HWP 파일 생성 (시작 시 로드한 템플릿으로 로컬에 만든 뒤 저장소로 이동,
+            # 내용 해시 키로 저장하므로 같은 내용의 파일은 하나만 보관)
+            report = await _store_rendered(
+                resources,
+                lambda: resources.report_handler.generate_report(content),
+                save
             )
-            TokenUsageDB.create_token_usage(token_usage)
 
         return ReportResponse(
             id=report.id,
@@ -89,10 +155,13 @@ async def generate_report(
         )
 
     except Exception as e:
+        ERRORS.inc(stage="generate", type=type(e).__name__)
         raise HTTPException(
             status_code=500,
             detail=f"보고서 생성 중 오류가 발생했습니다: {str(e)}"
         )
+    finally:
+        GENERATIONS_IN_FLIGHT.dec()
 
 
 @router.get("/my-reports", response_model=ReportListResponse)
@@ -130,15 +199,226 @@ async def get_my_reports(current_user = Depends(get_current_active_user)):
         )
 
 
+def _materialize_report(report, hwp_handler: HWPHandler):
+    """
+    저장된 내용으로 보고서 파일을 캐시에 생성하고 파일 정보를 갱신
+
+    저장된 내용이 없는 보고서(이전 버전에서 생성)는 404를 반환합니다.
+
+    Args:
+        report: 보고서
+        hwp_handler: 캐시 디렉토리에 파일을 만드는 핸들러 (AppResources.cache_handler)
+    """
+    content = ReportDB.get_report_content(report.id)
+    if content is None:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+
+    file_path = report_cache.materialize(
+        report.id,
+        lambda output_dir, output_filename: hwp_handler.generate_report(content, output_filename)
+    )
+
+    return ReportDB.update_report_file(
+        report_id=report.id,
+        filename=report.filename,
+        file_path=file_path,
+        file_size=os.path.getsize(file_path)
+    )
+
+
+def _archived_report_file(report):
+    """
+    보관 정책으로 월별 묶음에 옮겨진 보고서 파일 (없으면 None)
+
+    저장소 최상위 파일만 보관되므로 이전 버전 보고서(output/report_*.hwpx)만 해당합니다.
+    """
+    if not report.file_path:
+        return None
+    try:
+        key = get_storage().normalize_key(report.file_path)
+    except ValueError:
+        return None
+    if "/" in key:
+        return None
+    return ArchiveDB.get_archived_file(key)
+
+
+def _cache_file_hash(path: str) -> str:
+    """캐시 파일명에서 내용 해시 추출 (<hash>.hwpx)"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _local_download(request: Request, path: str, filename: str):
+    """
+    노드 로컬 캐시 파일 다운로드
+
+    캐시 디렉토리가 로컬 저장소 루트 아래에 있으면 프록시 전송 위임도 적용합니다.
+    """
+    content_hash = _cache_file_hash(path)
+
+    storage = get_storage()
+    if storage.local:
+        root = os.path.abspath(storage.root)
+        if os.path.commonpath([root, os.path.abspath(path)]) == root:
+            key = os.path.relpath(path, storage.root).replace(os.sep, "/")
+            response = offload_response(storage, key, filename, content_hash)
+            if response is not None:
+                return response
+
+    return local_file_response(request, path, filename, content_hash)
+
+
+@router.post("/{report_id}/render", response_model=ReportResponse)
+async def render_report(
+    report_id: int,
+    request: ReportRenderRequest = None,
+    current_user = Depends(get_current_active_user),
+    resources: AppResources = Depends(get_resources)
+):
+    """
+    저장된 내용으로 보고서 HWPX 재생성
+
+    - Claude API를 다시 호출하지 않고 저장된 섹션 내용으로 파일만 다시 만듦
+    - template을 지정하면 다른 템플릿으로 렌더링
+    - 본인이 생성한 보고서만 가능
+    """
+    try:
+        report = ReportDB.get_report_by_id(report_id)
+        if not report:
+            raise HTTPException(status_code=404, detail="보고서를 찾을 수 없습니다.")
+
+        # 소유권 확인
+        if report.user_id != current_user.id and not current_user.is_admin:
+            raise HTTPException(
+                status_code=403,
+                detail="본인이 생성한 보고서만 다시 생성할 수 있습니다."
+            )
+
+        content = ReportDB.get_report_content(report_id)
+        if content is None:
+            raise HTTPException(
+                status_code=409,
+                detail="저장된 보고서 내용이 없어 다시 생성할 수 없습니다."
+            )
+
+        template_path = _resolve_template(request.template if request else None)
+
+        # 템플릿별 핸들러 (시작 후 추가된 템플릿은 처음 사용할 때 검증)
+        try:
+            hwp_handler = resources.template_handler(template_path)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"사용할 수 없는 템플릿입니다: {str(e)}")
+
+        # 이전 파일은 다른 보고서와 공유될 수 있으므로 참조만 해제 (정리는 gc_blobs.py)
+        updated = await _store_rendered(
+            resources,
+            lambda: hwp_handler.generate_report(content),
+            lambda generated_path, content_hash, output_path, file_size, revive_blob: ReportDB.update_report_file(
+                report_id=report_id,
+                filename=os.path.basename(generated_path),
+                file_path=output_path,
+                file_size=file_size,
+                content_hash=content_hash,
+                revive_blob=revive_blob
+            )
+        )
+
+        # 저장소 이전에 만든 개별 파일은 공유되지 않으므로 바로 삭제
+        if (
+            report.file_path
+            and not report.content_hash
+            and not blob_store.contains(report.file_path)
+            and not report_cache.contains(report.file_path)
+        ):
+            get_storage().delete(report.file_path)
+
+        return ReportResponse(
+            id=updated.id,
+            user_id=updated.user_id,
+            topic=updated.topic,
+            title=updated.title,
+            filename=updated.filename,
+            file_size=updated.file_size,
+            created_at=updated.created_at
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"보고서 재생성 중 오류가 발생했습니다: {str(e)}"
+        )
+
+
+@router.get("/search", response_model=ReportSearchResponse)
+async def search_reports(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    current_user = Depends(get_current_active_user)
+):
+    """
+    내 보고서 전문 검색
+
+    - 제목, 주제, 생성된 본문에서 검색 (공백으로 구분된 모든 단어 포함)
+    - 관련도 순으로 정렬하며 검색어가 <mark>로 강조된 스니펫 반환
+    - 2자 이하 단어만 있으면 최근 보고서 안에서 최신순으로 검색
+    - 건수는 REPORT_SEARCH_COUNT_LIMIT까지만 세며, 넘으면 total_capped=true
+    """
+    try:
+        total, results = ReportDB.search_reports(
+            user_id=current_user.id,
+            query=q,
+            limit=page_size,
+            offset=(page - 1) * page_size
+        )
+
+        return ReportSearchResponse(
+            total=total,
+            total_capped=total >= SEARCH_COUNT_LIMIT,
+            page=page,
+            page_size=page_size,
+            results=[
+                ReportSearchResult(
+                    id=r.id,
+                    user_id=r.user_id,
+                    topic=r.topic,
+                    title=r.title,
+                    filename=r.filename,
+                    file_size=r.file_size,
+                    created_at=r.created_at,
+                    snippet=snippet,
+                    score=score
+                )
+                for r, snippet, score in results
+            ]
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"보고서 검색 중 오류가 발생했습니다: {str(e)}"
+        )
+
+
 @router.get("/download/{report_id}")
 async def download_report(
     report_id: int,
-    current_user = Depends(get_current_active_user)
+    request: Request,
+    stream: bool = Query(False, description="저장된 내용으로 HWPX를 만들면서 바로 전송 (디스크 미사용)"),
+    current_user = Depends(get_current_active_user),
+    resources: AppResources = Depends(get_resources)
 ):
     """
     보고서 다운로드
 
     - 본인이 생성한 보고서만 다운로드 가능
+    - stream=true: 파일을 저장/조회하지 않고 엔트리 단위로 압축하면서 전송
+      (저장된 내용이 없는 보고서는 저장된 파일로 응답)
+    - ETag/If-None-Match/If-Modified-Since(304) 및 Range(206) 지원 (stream 모드 제외)
     """
     try:
         # 보고서 조회
@@ -153,16 +433,194 @@ async def download_report(
                 detail="본인이 생성한 보고서만 다운로드할 수 있습니다."
             )
 
-        # 파일 존재 확인
-        if not os.path.exists(report.file_path):
-            raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+        # 스트리밍 모드: 압축이 끝나기 전에 첫 바이트 전송 (데이터 디스크립터 사용)
+        if stream:
+            content = ReportDB.get_report_content(report.id)
+            if content is not None:
+                return stream_response(resources.report_handler.iter_report(content), report.filename)
 
-        return FileResponse(
-            path=report.file_path,
-            filename=report.filename,
-            media_type="application/octet-stream"
+        # 내용 해시를 알면 저장소를 조회하기 전에 캐시 검증
+        if report.content_hash:
+            etag = make_etag(report.file_size, 0, report.content_hash)
+            if is_not_modified(request, etag):
+                return not_modified_response(etag)
+
+        # 노드 로컬 캐시 파일 (파일명이 내용 해시)
+        if report.file_path and report_cache.contains(report.file_path):
+            if os.path.exists(report.file_path):
+                report_cache.touch(report.file_path)
+                return _local_download(request, report.file_path, report.filename)
+
+        else:
+            # 저장소 파일 (다른 노드에서 생성했어도 공유 저장소에서 읽음, 설정된 경우 전송 위임)
+            # 파일 정보 조회는 블로킹 호출이므로 스레드 풀에서 실행
+            if report.file_path:
+                response = await run_in_threadpool(
+                    storage_download, request, get_storage(), report.file_path, report.filename, report.content_hash
+                )
+                if response is not None:
+                    return response
+
+            # 보관 묶음으로 옮겨진 파일은 묶음에서 범위 읽기로 전송
+            archived = _archived_report_file(report)
+            if archived is not None:
+                return archived_file_response(
+                    request, get_storage(), archived.archive_key, archived.data_offset,
+                    archived.size, archived.mtime, report.filename
+                )
+
+        # 파일이 없으면(지연 생성 또는 캐시에서 삭제됨) 저장된 내용으로 생성
+        report = await resources.run(_materialize_report, report, resources.cache_handler)
+        return _local_download(request, report.file_path, report.filename)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"파일 다운로드 중 오류가 발생했습니다: {str(e)}"
         )
 
+
+def _iter_file(path: str):
+    """로컬 파일을 조각 단위로 읽기"""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            yield chunk
+
+
+def _report_chunks(report, hwp_handler: HWPHandler):
+    """
+    보고서 파일 내용 조각 (캐시 → 저장소 → 보관 묶음 → 저장된 내용으로 스트리밍 생성 순)
+
+    파일도 저장된 내용도 없으면 None
+    """
+    if report.file_path and report_cache.contains(report.file_path):
+        if os.path.exists(report.file_path):
+            return _iter_file(report.file_path)
+    elif report.file_path and get_storage().exists(report.file_path):
+        return get_storage().iter_chunks(report.file_path)
+    else:
+        archived = _archived_report_file(report)
+        if archived is not None:
+            return get_storage().iter_chunks(
+                archived.archive_key, archived.data_offset, archived.data_offset + archived.size - 1
+            )
+
+    content = ReportDB.get_report_content(report.id)
+    if content is None:
+        return None
+    return hwp_handler.iter_report(content)
+
+
+def _bulk_members(reports, hwp_handler: HWPHandler):
+    """일괄 다운로드 ZIP 엔트리 (파일명 중복 시 번호를 붙이고, 누락된 파일은 목록으로 첨부)"""
+    used = set()
+    missing = []
+    for report in reports:
+        chunks = _report_chunks(report, hwp_handler)
+        if chunks is None:
+            missing.append(report.filename)
+            continue
+
+        arcname = report.filename
+        stem, ext = os.path.splitext(report.filename)
+        number = 1
+        while arcname in used:
+            number += 1
+            arcname = f"{stem} ({number}){ext}"
+        used.add(arcname)
+
+        yield arcname, report.created_at, report.file_size, chunks
+
+    if missing:
+        text = "다음 보고서는 파일을 찾을 수 없어 제외되었습니다.\n" + "\n".join(missing) + "\n"
+        yield "누락된_파일.txt", datetime.utcnow(), None, [text.encode("utf-8")]
+
+
+@router.post("/download-bulk")
+async def download_reports_bulk(
+    request: ReportBulkDownloadRequest,
+    current_user = Depends(get_current_active_user),
+    resources: AppResources = Depends(get_resources)
+):
+    """
+    보고서 일괄 다운로드 (ZIP)
+
+    - report_ids: 보고서 ID 목록 (본인 보고서만, 관리자는 전체)
+    - start/end: 생성 시각 구간 [start, end) (본인 보고서, 관리자는 전체 사용자)
+    - HWPX는 이미 압축되어 있으므로 다시 압축하지 않고(STORED) 담으며,
+      ZIP 전체를 메모리나 디스크에 만들지 않고 파일 조각 단위로 스트리밍합니다
+    """
+    try:
+        if request.report_ids:
+            # 한 번의 쿼리로 조회한 뒤 존재 여부와 소유권 확인
+            reports = ReportDB.get_reports_by_ids(request.report_ids)
+            if len(reports) < len(set(request.report_ids)):
+                raise HTTPException(status_code=404, detail="보고서를 찾을 수 없습니다.")
+            if not current_user.is_admin and any(r.user_id != current_user.id for r in reports):
+                raise HTTPException(
+                    status_code=403,
+                    detail="본인이 생성한 보고서만 다운로드할 수 있습니다."
+                )
+
+        elif request.start and request.end:
+            start = to_utc_naive(request.start)
+            end = to_utc_naive(request.end)
+            if start >= end:
+                raise HTTPException(status_code=400, detail="start는 end보다 이전이어야 합니다.")
+
+            user_id = None if current_user.is_admin else current_user.id
+            reports = ReportDB.get_reports_by_period(start, end, user_id)
+
+        else:
+            raise HTTPException(status_code=400, detail="report_ids 또는 start/end를 지정해야 합니다.")
+
+        if not reports:
+            raise HTTPException(status_code=404, detail="다운로드할 보고서가 없습니다.")
+        if len(reports) > BULK_DOWNLOAD_MAX_REPORTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"한 번에 최대 {BULK_DOWNLOAD_MAX_REPORTS}개까지 다운로드할 수 있습니다."
+            )
+
+        filename = f"reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        return stream_response(iter_zip(_bulk_members(reports, resources.report_handler)), filename, media_type="application/zip")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"파일 다운로드 중 오류가 발생했습니다: {str(e)}"
+        )
+
+
+@router.get("/signed/{key:path}")
+async def download_signed(
+    key: str,
+    request: Request,
+    filename: str = Query(...),
+    expires: int = Query(...),
+    signature: str = Query(...)
+):
+    """
+    서명 URL 다운로드 (DOWNLOAD_OFFLOAD=signed)
+
+    - 권한 확인을 마친 다운로드 요청이 발급한 짧게 만료되는 URL
+    - 인증 헤더 없이 서명과 만료 시각으로만 검증
+    """
+    if not verify_download_signature(key, filename, expires, signature):
+        raise HTTPException(status_code=403, detail="만료되었거나 잘못된 다운로드 링크입니다.")
+
+    try:
+        # 파일 정보 조회는 블로킹 호출이므로 스레드 풀에서 실행
+        response = await run_in_threadpool(storage_response, request, get_storage(), key, filename)
+        if response is None:
+            raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+
+        return response
+
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+보관 정책 실행 스크립트
+
+RETENTION_* 환경 변수에 설정된 정책을 한 번 실행합니다 (cron 등).
+1. 비정상 종료로 남은 temp/work_* 디렉토리 삭제
+2. 보관 기간이 지난 token_usage 행을 일별 요약으로 이동
+3. 보관 기간이 지난 보고서 파일을 월별 묶음으로 이동
+"""
+from dotenv import load_dotenv
+
+# 환경 변수 로드
+load_dotenv()
+
+from database import init_db
+from utils.retention import retention_engine
+
+
+def run():
+    """보관 정책 실행"""
+    try:
+        init_db()
+
+        retention_engine.run()
+        status = retention_engine.status()
+        if status["last_error"]:
+            print(f"❌ 보관 정책 실행 중 오류 발생: {status['last_error']}")
+            return
+
+        current = status["current"]
+        print(f"✅ 임시 항목 {current['temp_entries_removed']}개 삭제")
+        print(
+            f"✅ 토큰 사용량 {current['usage_days_rolled_up']}일치 요약 "
+            f"(원본 {current['usage_rows_rolled_up']}행)"
+        )
+        print(
+            f"✅ 보고서 파일 {current['files_archived']}개 보관 "
+            f"({current['bytes_archived']:,} bytes, 묶음 {current['archives_created']}개)"
+        )
+
+    except Exception as e:
+        print(f"❌ 보관 정책 실행 중 오류 발생: {str(e)}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+운영용 서버 실행 (워커 프로세스 여러 개)
+
+start.sh / `python main.py`는 개발용(--reload, 단일 프로세스)이라 CPU 코어 하나만 사용합니다.
+이 스크립트는 마스터 프로세스가 워커 N개를 띄워 같은 소켓의 요청을 나눠 처리합니다.
+
+- 마스터가 앱 코드(main)를 미리 import하고 데이터베이스 초기화/관리자 계정 생성을 한 번 실행한 뒤
+  워커를 fork합니다 (워커는 import를 다시 하지 않고 메모리를 copy-on-write로 공유)
+- 워커끼리는 상태를 공유하지 않으며(shared-nothing), 주기 작업은 리더 임대를 가진 워커만 실행합니다
+  (utils/coordination.py)
+- 워커가 비정상 종료하면 다시 띄우고, SIGTERM/SIGINT를 받으면 워커에 전달해 처리 중인 요청을 마친 뒤 종료합니다
+- fork가 없는 플랫폼(Windows)에서는 uvicorn의 다중 워커(워커마다 import)로 실행합니다
+
+사용법:
+    python serve.py                       # 워커 수 = CPU 수 (WEB_CONCURRENCY로 변경)
+    python serve.py --workers 4 --port 8000
+
+환경 변수:
+    WEB_CONCURRENCY: 워커 수 (기본 사용 가능한 CPU 수)
+    HOST / PORT: 바인드 주소 (기본 0.0.0.0:8000)
+    SERVE_GRACEFUL_TIMEOUT: 종료 시 처리 중인 요청을 기다리는 시간 (초, 기본 30)
+"""
+import os
+import sys
+import glob
+import time
+import shutil
+import signal
+import tempfile
+import logging
+import argparse
+
+import uvicorn
+
+logger = logging.getLogger("serve")
+
+# 종료 시 처리 중인 요청을 기다리는 시간 (초)
+SERVE_GRACEFUL_TIMEOUT = int(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30"))
+
+# 워커가 시작 직후 계속 죽을 때 다시 띄우기 전 대기 시간 (초)
+RESTART_BACKOFF_SECONDS = 1.0
+
+
+def default_workers() -> int:
+    """기본 워커 수 (WEB_CONCURRENCY, 없으면 이 프로세스가 쓸 수 있는 CPU 수)"""
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.environ["WEB_CONCURRENCY"]))
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def _prepare_metrics_dir() -> str:
+    """
+    워커별 지표 스냅샷 디렉토리 준비 (/metrics가 전체 워커 합계를 응답하도록)
+
+    앱 코드를 import하기 전에 설정해야 워커가 물려받습니다. 이전 실행의 스냅샷은 지웁니다.
+    """
+    if not os.getenv("METRICS_DIR"):
+        os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="hwp_metrics_")
+
+    metrics_dir = os.environ["METRICS_DIR"]
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+        os.remove(path)
+    return metrics_dir
+
+
+def _prepare():
+    """앱 코드 미리 import + 데이터베이스 초기화 (마스터에서 한 번)"""
+    import main
+    from database.backends import set_backend
+    from utils.startup import bootstrap_once
+
+    if not bootstrap_once(main.is_bootstrapped, main.bootstrap):
+        logger.info("데이터베이스와 관리자 계정이 이미 준비되어 있습니다.")
+
+    # 마스터의 데이터베이스 연결(PostgreSQL 연결 풀)을 워커가 물려받지 않도록 닫음
+    set_backend(None)
+    return main.app
+
+
+def _run_worker(config: uvicorn.Config, sock):
+    """워커 프로세스: 마스터가 연 소켓으로 uvicorn 서버 실행 (시그널은 uvicorn이 처리)"""
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(signum, signal.SIG_DFL)
+
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(config: uvicorn.Config, sock) -> int:
+    """워커 fork"""
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(config, sock)
+        except BaseException:
+            logger.exception("워커 실행 중 오류")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def _reap(workers: dict) -> list:
+    """종료된 워커 정리 (pid, 종료 코드) 목록"""
+    exited = []
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            break
+        if workers.pop(pid, None) is not None:
+            exited.append((pid, os.waitstatus_to_exitcode(status)))
+    return exited
+
+
+def _stop(workers: dict, timeout: int):
+    """워커에 SIGTERM 전달 후 종료 대기 (시간이 지나면 강제 종료)"""
+    for pid in workers:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    deadline = time.monotonic() + timeout
+    while workers and time.monotonic() < deadline:
+        _reap(workers)
+        time.sleep(0.1)
+
+    for pid in list(workers):
+        logger.warning(f"워커 {pid}가 {timeout}초 안에 종료되지 않아 강제 종료합니다.")
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    while workers:
+        if not _reap(workers):
+            time.sleep(0.1)
+
+
+def serve(workers: int, host: str, port: int):
+    """마스터 프로세스: 소켓을 열고 워커 N개를 유지"""
+    from utils.tracing import install_log_record_factory
+
+    created_metrics_dir = not os.getenv("METRICS_DIR")
+    metrics_dir = _prepare_metrics_dir()
+    # 로그 레코드에 trace_id 추가 (fork한 워커가 물려받음, 워커의 lifespan에서는 다시 감싸지 않음)
+    install_log_record_factory()
+    app = _prepare()
+
+    config = uvicorn.Config(
+        app,
+        host=host,
+        port=port,
+        timeout_graceful_shutdown=SERVE_GRACEFUL_TIMEOUT,
+    )
+    sock = config.bind_socket()
+
+    logger.info(f"워커 {workers}개로 시작합니다 (마스터 {os.getpid()}, http://{host}:{port})")
+    running = {}
+    for _ in range(workers):
+        running[_spawn(config, sock)] = time.monotonic()
+
+    stopping = []
+
+    def handle_exit(signum, frame):
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, handle_exit)
+    signal.signal(signal.SIGINT, handle_exit)
+
+    while not stopping:
+        time.sleep(0.5)
+        started = dict(running)
+        for pid, code in _reap(running):
+            if stopping:
+                break
+            logger.warning(f"워커 {pid}가 종료되었습니다 (종료 코드 {code}). 다시 시작합니다.")
+            # 시작 직후 죽는 경우(설정 오류 등) 계속 fork하지 않도록 잠시 대기
+            if time.monotonic() - started[pid] < RESTART_BACKOFF_SECONDS * 5:
+                time.sleep(RESTART_BACKOFF_SECONDS)
+            running[_spawn(config, sock)] = time.monotonic()
+
+    logger.info("종료 신호를 받았습니다. 처리 중인 요청이 끝나면 워커를 종료합니다...")
+    _stop(running, SERVE_GRACEFUL_TIMEOUT + 5)
+    sock.close()
+    if created_metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+    logger.info("서버 종료 완료")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="운영용 서버 실행 (워커 여러 개)")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="워커 프로세스 수")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"), help="바인드 주소")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")), help="포트")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # 워커별 한도(분당 요청 수)를 나누도록 앱 import 전에 실제 워커 수를 알림
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+
+    if not hasattr(os, "fork"):
+        # fork가 없으면 워커마다 앱을 import (초기화는 lifespan의 bootstrap_once가 한 번만 실행)
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+        sys.exit(0)
+
+    serve(args.workers, args.host, args.port)
@@ -23,13 +23,59 @@ function checkAuth() {
     return token;
 }
 
-// 로그아웃
-function logout() {
+// 로그아웃 (서버에서 토큰 폐기 후 삭제)
+async function logout() {
+    const token = localStorage.getItem('access_token');
+    if (token) {
+        try {
+            await fetch('/api/auth/logout', {
+                method: 'POST',
+                headers: {
+                    'Authorization': `Bearer ${token}`,
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ refresh_token: localStorage.getItem('refresh_token') })
+            });
+        } catch (error) {
+            console.error('Error:', error);
+        }
+    }
+
     localStorage.removeItem('access_token');
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('user');
     window.location.href = '/login';
 }
 
+// 액세스 토큰 만료(401) 시 리프레시 토큰으로 갱신 후 한 번 재시도 (클레임 기반 인증)
+const originalFetch = window.fetch.bind(window);
+window.fetch = async (url, options = {}) => {
+    const response = await originalFetch(url, options);
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (response.status !== 401 || !refreshToken || String(url).startsWith('/api/auth/')) {
+        return response;
+    }
+
+    const refreshResponse = await originalFetch('/api/auth/refresh', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ refresh_token: refreshToken })
+    });
+    if (!refreshResponse.ok) {
+        localStorage.removeItem('refresh_token');
+        return response;
+    }
+
+    const data = await refreshResponse.json();
+    localStorage.setItem('access_token', data.access_token);
+    localStorage.setItem('refresh_token', data.refresh_token);
+    localStorage.setItem('user', JSON.stringify(data.user));
+
+    const headers = new Headers(options.headers || {});
+    headers.set('Authorization', `Bearer ${data.access_token}`);
+    return originalFetch(url, { ...options, headers });
+};
+
 // 사용자 목록 조회
 async function loadUsers() {
     const token = checkAuth();
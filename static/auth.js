@@ -25,6 +25,11 @@ if (loginForm) {
                 // 토큰 저장
                 localStorage.setItem('access_token', data.access_token);
                 localStorage.setItem('user', JSON.stringify(data.user));
+                if (data.refresh_token) {
+                    localStorage.setItem('refresh_token', data.refresh_token);
+                } else {
+                    localStorage.removeItem('refresh_token');
+                }
 
                 // 비밀번호 변경이 필요한 경우
                 if (data.user.password_reset_required) {
@@ -0,0 +1,135 @@
+"""
+테스트 공통 fixture
+
+쿼리 레이어(*DB 클래스) 테스트는 `db` fixture로 SQLite와 PostgreSQL 백엔드에서 같은 테스트를 실행합니다.
+PostgreSQL은 다음 순서로 찾고, 없으면 해당 테스트를 건너뜁니다.
+- TEST_DATABASE_URL: 기존 서버 (테스트마다 임시 데이터베이스를 만들고 지움)
+- pgserver 패키지: 임시 디렉토리에 로컬 서버(pg_ctl)를 띄워 사용
+"""
+import os
+import sys
+import uuid
+import shutil
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("CLAUDE_API_KEY", "test")
+os.environ.setdefault("ADMIN_EMAIL", "admin@example.com")
+os.environ.setdefault("ADMIN_PASSWORD", "admin123!@#")
+
+from database import flush_all_writers, init_db, reopen_all_writers  # noqa: E402
+from database.backends import SQLiteBackend, set_backend  # noqa: E402
+from utils.storage import LocalStorage, set_storage  # noqa: E402
+
+
+def _replace_database(url: str, name: str) -> str:
+    """연결 문자열의 데이터베이스 이름 교체"""
+    from psycopg.conninfo import conninfo_to_dict, make_conninfo
+
+    params = conninfo_to_dict(url)
+    params["dbname"] = name
+    return make_conninfo(**params)
+
+
+@pytest.fixture(scope="session")
+def postgres_url():
+    """테스트용 PostgreSQL 서버 연결 문자열 (없으면 건너뜀)"""
+    pytest.importorskip("psycopg")
+    pytest.importorskip("psycopg_pool")
+
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        yield url
+        return
+
+    try:
+        import pgserver
+    except ImportError:
+        pytest.skip("TEST_DATABASE_URL이 없고 pgserver 패키지도 없어 PostgreSQL 테스트를 건너뜁니다.")
+
+    data_dir = tempfile.mkdtemp(prefix="hwp_pgtest_")
+    server = pgserver.get_server(data_dir, cleanup_mode="stop")
+    try:
+        yield server.get_uri()
+    finally:
+        server.cleanup()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def postgres_backend(postgres_url):
+    """테스트마다 새 데이터베이스를 쓰는 PostgreSQL 백엔드"""
+    import psycopg
+    from database.backends.postgres import PostgresBackend
+
+    name = f"hwp_test_{uuid.uuid4().hex[:12]}"
+    with psycopg.connect(postgres_url, autocommit=True) as conn:
+        conn.execute(f"CREATE DATABASE {name}")
+
+    backend = PostgresBackend(_replace_database(postgres_url, name), max_size=4)
+    try:
+        yield backend
+    finally:
+        backend.close()
+        with psycopg.connect(postgres_url, autocommit=True) as conn:
+            conn.execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    """임시 파일을 쓰는 SQLite 백엔드"""
+    return SQLiteBackend(str(tmp_path / "test.db"))
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def db(request):
+    """마이그레이션까지 적용한 백엔드 (SQLite, PostgreSQL 각각 실행)"""
+    backend = request.getfixturevalue(f"{request.param}_backend")
+    set_backend(backend)
+    init_db()
+    # 앞선 테스트의 앱 종료(lifespan)에서 닫힌 기록기를 다시 버퍼링 상태로
+    reopen_all_writers()
+    try:
+        yield backend
+    finally:
+        # 다음 테스트의 데이터베이스로 기록이 넘어가지 않도록 남은 버퍼를 비움
+        flush_all_writers()
+        set_backend(None)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """앱이 쓰는 상대 경로(templates/, output/, temp/, data/)를 임시 디렉토리로 옮김"""
+    for name in ("templates", "static"):
+        shutil.copytree(os.path.join(ROOT, name), tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+    set_storage(LocalStorage("output"))
+    try:
+        yield tmp_path
+    finally:
+        set_storage(None)
+
+
+@pytest.fixture
+def client(workdir, db):
+    """lifespan(데이터베이스 초기화, 관리자 계정 생성)까지 실행한 테스트 클라이언트"""
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def admin_headers(client):
+    """관리자 인증 헤더"""
+    response = client.post(
+        "/api/auth/login",
+        json={"email": os.environ["ADMIN_EMAIL"], "password": os.environ["ADMIN_PASSWORD"]}
+    )
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,58 @@
+"""
+인증 API 테스트
+"""
+import os
+
+import pytest
+
+import utils.auth
+
+
+def login(client, password, email=None):
+    return client.post("/api/auth/login", json={"email": email or os.environ["ADMIN_EMAIL"], "password": password})
+
+
+@pytest.fixture(params=[False, True], ids=["default", "claims"])
+def claims_mode(request, monkeypatch):
+    monkeypatch.setattr(utils.auth, "AUTH_CLAIMS_MODE", request.param)
+    return request.param
+
+
+def test_change_password_revokes_existing_tokens(client, claims_mode):
+    tokens = login(client, os.environ["ADMIN_PASSWORD"]).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    response = client.post(
+        "/api/auth/change-password",
+        json={"current_password": os.environ["ADMIN_PASSWORD"], "new_password": "changed123!@#"},
+        headers=headers
+    )
+    assert response.status_code == 200, response.text
+
+    # 이전 비밀번호로 발급된 토큰은 변경을 처리한 프로세스에서 바로 거절
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+    if claims_mode:
+        assert client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+    assert login(client, os.environ["ADMIN_PASSWORD"]).status_code == 401
+    new_tokens = login(client, "changed123!@#").json()
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {new_tokens['access_token']}"})
+    assert me.status_code == 200
+    assert me.json()["password_reset_required"] is False
+
+
+def test_rejected_user_token_is_revoked(client, admin_headers, claims_mode):
+    response = client.post(
+        "/api/auth/register",
+        json={"email": "user@example.com", "username": "user", "password": "user123!@#"}
+    )
+    assert response.status_code == 200, response.text
+    user_id = next(u["id"] for u in client.get("/api/admin/users", headers=admin_headers).json() if u["username"] == "user")
+    assert client.patch(f"/api/admin/users/{user_id}/approve", headers=admin_headers).status_code == 200
+
+    headers = {"Authorization": f"Bearer {login(client, 'user123!@#', 'user@example.com').json()['access_token']}"}
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+
+    assert client.patch(f"/api/admin/users/{user_id}/reject", headers=admin_headers).status_code == 200
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
@@ -0,0 +1,512 @@
+"""
+쿼리 레이어(*DB 클래스) 테스트 - SQLite와 PostgreSQL에서 같은 테스트를 실행
+"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import (
+    ArchiveDB,
+    BlobDB,
+    BufferedWriter,
+    LeaseDB,
+    LLMCallDB,
+    OutputFileDB,
+    ReportDB,
+    RevokedTokenDB,
+    TokenUsageDB,
+    UserDB,
+    get_db_connection,
+)
+from database.blob_db import BlobDeletingError
+from database.llm_call_db import llm_call_writer
+from database.migrations import MIGRATIONS, run_migrations
+from database.write_buffer import _writers
+from models.llm_call import LLMUsage
+from models.token_usage import TokenUsageCreate
+from models.user import UserCreate, UserUpdate
+from utils.storage import StorageObject
+
+CONTENT = {
+    "title": "디지털 뱅킹 현황",
+    "summary": "모바일 뱅킹 이용 급증",
+    "background": "핀테크 경쟁 심화",
+    "main_content": "오픈뱅킹 도입 이후 100% 비대면 계좌 개설",
+    "conclusion": "대응 필요",
+}
+
+
+def make_user(email="user@example.com", username="tester"):
+    return UserDB.create_user(UserCreate(email=email, username=username, password="password123"), "hashed")
+
+
+def make_report(user_id, title="보고서", topic="보고서 주제", content=None, filename="report.hwpx", **kwargs):
+    return ReportDB.create_report_with_usage(
+        user_id=user_id,
+        topic=topic,
+        title=title,
+        filename=filename,
+        file_path=f"output/{filename}",
+        file_size=100,
+        content=content,
+        **kwargs
+    )
+
+
+def scalar(sql, params=()):
+    conn = get_db_connection()
+    try:
+        row = conn.cursor().execute(sql, params).fetchone()
+        return list(dict(row).values())[0]
+    finally:
+        conn.close()
+
+
+def test_migrations_are_idempotent(db):
+    """이미 적용된 마이그레이션은 다시 적용하지 않음"""
+    assert run_migrations() == []
+    assert scalar("SELECT MAX(version) as version FROM schema_version") == MIGRATIONS[-1].version
+
+
+def test_online_migration_replaces_invalid_index(db):
+    """CREATE INDEX CONCURRENTLY가 실패해 남은 INVALID 인덱스는 지우고 다시 생성"""
+    if db.name != "postgres":
+        pytest.skip("PostgreSQL 전용")
+
+    conn = db.connect()
+    conn.autocommit = True
+    try:
+        # 유일 인덱스를 중복 값에 동시 생성하면 실패하면서 같은 이름의 INVALID 인덱스가 남음
+        conn.execute("DROP INDEX idx_reports_filename")
+        conn.execute("CREATE TABLE dup (x INTEGER)")
+        conn.execute("INSERT INTO dup VALUES (1), (1)")
+        with pytest.raises(Exception):
+            conn.execute("CREATE UNIQUE INDEX CONCURRENTLY idx_reports_filename ON dup (x)")
+        conn.execute("DELETE FROM schema_version WHERE version = 13")
+
+        assert run_migrations() == [13]
+        row = conn.execute(
+            """
+            SELECT i.indisvalid as valid, i.indrelid::regclass::text as table_name
+            FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = 'idx_reports_filename'
+            """
+        ).fetchone()
+        assert (row["valid"], row["table_name"]) == (True, "reports")
+    finally:
+        conn.autocommit = False
+        conn.close()
+
+
+def test_user_crud(db):
+    user = make_user()
+    assert user.id is not None
+    assert not user.is_active and user.token_version == 0
+
+    assert UserDB.get_user_by_email("user@example.com").id == user.id
+    assert UserDB.get_user_by_id(user.id).username == "tester"
+
+    updated = UserDB.update_user(user.id, UserUpdate(is_active=True, password_reset_required=True))
+    assert updated.is_active and updated.password_reset_required
+
+    assert UserDB.update_password(user.id, "new-hash")
+    assert UserDB.get_user_by_id(user.id).hashed_password == "new-hash"
+
+    # 권한 변경(update_user)도 토큰 버전을 올림
+    version = UserDB.get_user_by_id(user.id).token_version
+    assert UserDB.bump_token_version(user.id) == version + 1
+    assert UserDB.get_token_versions() == {user.id: version + 1}
+
+    # 비밀번호 변경은 플래그와 토큰 버전까지 한 번에
+    assert UserDB.change_password(user.id, "changed-hash", reset_required=False) == version + 2
+    changed = UserDB.get_user_by_id(user.id)
+    assert (changed.hashed_password, changed.password_reset_required, changed.token_version) == ("changed-hash", False, version + 2)
+    assert UserDB.change_password(user.id + 100, "x", reset_required=True) is None
+    assert UserDB.get_token_versions(since=datetime.utcnow() + timedelta(days=1)) == {}
+
+    assert [u.id for u in UserDB.get_all_users()] == [user.id]
+    assert UserDB.delete_user(user.id)
+    assert UserDB.get_user_by_id(user.id) is None
+    assert not UserDB.delete_user(user.id)
+
+
+def test_report_with_usage_and_content(db):
+    user = make_user()
+    report = make_report(user.id, content=CONTENT, input_tokens=10, output_tokens=20)
+
+    assert ReportDB.get_report_by_id(report.id).title == "보고서"
+    assert ReportDB.get_report_content(report.id) == CONTENT
+    assert [r.id for r in ReportDB.get_reports_by_user(user.id)] == [report.id]
+
+    usage = TokenUsageDB.get_usage_by_user(user.id)
+    assert [(u.report_id, u.total_tokens) for u in usage] == [(report.id, 30)]
+
+    # 토큰이 0이면 사용량 행을 만들지 않음
+    make_report(user.id, filename="empty.hwpx")
+    assert len(TokenUsageDB.get_usage_by_user(user.id)) == 1
+
+
+def test_reports_by_ids_and_period(db):
+    user = make_user()
+    first = make_report(user.id, filename="a.hwpx")
+    second = make_report(user.id, filename="b.hwpx")
+
+    # 요청 순서 유지, 중복/없는 ID 제외
+    assert [r.id for r in ReportDB.get_reports_by_ids([second.id, 999999, first.id, second.id])] == [second.id, first.id]
+    assert ReportDB.get_reports_by_ids([]) == []
+
+    now = datetime.utcnow()
+    found = ReportDB.get_reports_by_period(now - timedelta(hours=1), now + timedelta(hours=1), user_id=user.id)
+    assert {r.id for r in found} == {first.id, second.id}
+    assert ReportDB.get_reports_by_period(now + timedelta(hours=1), now + timedelta(hours=2)) == []
+
+
+def test_update_and_delete_report_moves_blob_references(db):
+    user = make_user()
+    report = make_report(user.id, content_hash="hash-a")
+    assert scalar("SELECT ref_count FROM blobs WHERE hash = ?", ("hash-a",)) == 1
+
+    ReportDB.update_report_file(report.id, "b.hwpx", "blobs/b.hwpx", 200, content_hash="hash-b")
+    assert scalar("SELECT ref_count FROM blobs WHERE hash = ?", ("hash-a",)) == 0
+    assert scalar("SELECT ref_count FROM blobs WHERE hash = ?", ("hash-b",)) == 1
+
+    assert ReportDB.delete_report(report.id)
+    assert ReportDB.get_report_by_id(report.id) is None
+    assert scalar("SELECT ref_count FROM blobs WHERE hash = ?", ("hash-b",)) == 0
+    assert ReportDB.update_report_file(report.id, "c.hwpx", "c", 1) is None
+
+
+def test_blob_collect_and_recount(db):
+    user = make_user()
+    make_report(user.id, content_hash="kept")
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    BlobDB.acquire(cursor, "orphan", "blobs/orphan.hwpx", 10)
+    BlobDB.release(cursor, "orphan")
+    # 다른 경로로 참조 수가 어긋난 행
+    cursor.execute("UPDATE blobs SET ref_count = 5 WHERE hash = ?", ("kept",))
+    conn.commit()
+    conn.close()
+
+    assert BlobDB.get_all_hashes() == {"kept", "orphan"}
+    assert BlobDB.recount() == 1
+    assert scalar("SELECT ref_count FROM blobs WHERE hash = ?", ("kept",)) == 1
+
+    # 유예 시간 안이면 삭제하지 않음
+    assert BlobDB.collect_unreferenced(grace_seconds=3600) == []
+    assert BlobDB.collect_unreferenced(grace_seconds=-60, dry_run=True) == [("orphan", "blobs/orphan.hwpx")]
+    assert BlobDB.collect_unreferenced(grace_seconds=-60) == [("orphan", "blobs/orphan.hwpx")]
+
+    # 정리 중이면 참조 추가를 거절 (삭제 완료 후 파일을 다시 넣고 revive로 추가)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    with pytest.raises(BlobDeletingError):
+        BlobDB.acquire(cursor, "orphan", "blobs/orphan.hwpx", 10, revive=True)
+    conn.rollback()
+    conn.close()
+
+    assert BlobDB.recount() == 0
+    assert BlobDB.mark_deleted("orphan")
+    BlobDB.wait_deleted("orphan", timeout=0)
+    assert BlobDB.purge_deleted(grace_seconds=3600) == 0
+    assert BlobDB.purge_deleted(grace_seconds=-60) == 1
+    assert BlobDB.get_all_hashes() == {"kept"}
+
+
+def test_blob_revive_after_delete(db):
+    user = make_user()
+    report = make_report(user.id, content_hash="hash-a")
+    ReportDB.update_report_file(report.id, "b.hwpx", "blobs/b.hwpx", 200, content_hash="hash-b")
+    assert BlobDB.collect_unreferenced(grace_seconds=-60) == [("hash-a", "output/report.hwpx")]
+
+    with pytest.raises(BlobDeletingError):
+        make_report(user.id, content_hash="hash-a", filename="c.hwpx")
+    with pytest.raises(TimeoutError):
+        BlobDB.wait_deleted("hash-a", timeout=0)
+
+    BlobDB.mark_deleted("hash-a")
+    with pytest.raises(BlobDeletingError):
+        ReportDB.update_report_file(report.id, "a.hwpx", "blobs/a.hwpx", 100, content_hash="hash-a")
+
+    ReportDB.update_report_file(report.id, "a.hwpx", "blobs/a.hwpx", 100, content_hash="hash-a", revive_blob=True)
+    assert scalar("SELECT ref_count FROM blobs WHERE hash = ?", ("hash-a",)) == 1
+    assert scalar("SELECT deleting_at FROM blobs WHERE hash = ?", ("hash-a",)) is None
+    assert BlobDB.collect_unreferenced(grace_seconds=-60) == [("hash-b", "blobs/b.hwpx")]
+
+
+def test_search_reports(db):
+    user = make_user()
+    other = make_user("other@example.com", "other")
+    report = make_report(user.id, title="디지털 뱅킹 현황", content=CONTENT)
+    make_report(user.id, title="무관한 보고서", content={"summary": "날씨"}, filename="b.hwpx")
+    make_report(other.id, title="디지털 뱅킹 현황", content=CONTENT, filename="c.hwpx")
+    # 내용 없이 만든 보고서도 제목/주제로 검색
+    plain = ReportDB.create_report(user.id, "연금 개혁 방향", "국민연금 개혁", "d.hwpx", "output/d.hwpx", 0)
+    assert [r.id for r, _, _ in ReportDB.search_reports(user.id, "국민연금")[1]] == [plain.id]
+
+    total, results = ReportDB.search_reports(user.id, "모바일 뱅킹")
+    assert total == 1
+    found, snippet, _ = results[0]
+    assert found.id == report.id
+    assert "<mark>" in snippet
+
+    # % 같은 패턴 문자는 글자 그대로 검색
+    assert ReportDB.search_reports(user.id, "100%")[0] == 1
+    assert ReportDB.search_reports(user.id, "1%0")[0] == 0
+    assert ReportDB.search_reports(user.id, "   ") == (0, [])
+
+    # 짧은 검색어는 인덱스로 찾은 결과 안에서 거르고, 짧은 검색어만 있으면 최근 보고서 안에서 찾음
+    assert ReportDB.search_reports(user.id, "디지털 뱅킹")[0] == 1
+    assert ReportDB.search_reports(user.id, "디지털 날씨")[0] == 0
+    total, results = ReportDB.search_reports(user.id, "뱅킹 현황")
+    assert total == 1
+    assert results[0][0].id == report.id
+    assert ReportDB.search_reports(user.id, "날씨")[0] == 1
+
+
+def test_search_scoped_to_user_and_count_capped(db, monkeypatch):
+    from database import report_db
+
+    # 사용자 번호가 다른 번호의 일부인 경우(1과 11 등)에도 다른 사용자의 보고서는 찾지 않음
+    users = [make_user(f"user{i}@example.com", f"user{i}") for i in range(11)]
+    first, last = users[0], users[-1]
+    assert str(first.id) in str(last.id)
+    for i in range(3):
+        make_report(first.id, title=f"디지털 금융 {i}", content=CONTENT, filename=f"{i}.hwpx")
+    make_report(last.id, title="디지털 금융", content=CONTENT, filename="other.hwpx")
+
+    assert ReportDB.search_reports(first.id, "디지털")[0] == 3
+    assert ReportDB.search_reports(first.id, "금융")[0] == 3
+    assert ReportDB.search_reports(last.id, "디지털")[0] == 1
+
+    monkeypatch.setattr(report_db, "SEARCH_COUNT_LIMIT", 2)
+    total, results = ReportDB.search_reports(first.id, "디지털")
+    assert total == 2
+    assert len(results) == 3
+
+    # 짧은 검색어만 있으면 최근 보고서 SEARCH_SCAN_LIMIT개 안에서만 찾음
+    monkeypatch.setattr(report_db, "SEARCH_SCAN_LIMIT", 1)
+    total, results = ReportDB.search_reports(first.id, "금융")
+    assert total == 1
+    assert results[0][0].title in {"디지털 금융 0", "디지털 금융 1", "디지털 금융 2"}
+
+
+def test_search_pg_trgm_is_detected_once(db):
+    if db.name != "postgres":
+        pytest.skip("PostgreSQL 전용")
+
+    # init_db(마이그레이션)에서 읽어 둔 확장 목록을 검색마다 다시 조회하지 않고 사용
+    assert db._extensions is not None
+    db._extensions = frozenset()
+    user = make_user()
+    make_report(user.id, title="디지털 뱅킹 현황", content=CONTENT)
+
+    total, results = ReportDB.search_reports(user.id, "디지털")
+    assert total == 1
+    assert results[0][2] == 0.0
+
+
+def test_token_usage_timeseries_and_totals(db):
+    user = make_user()
+    for tokens in (10, 20, 5):
+        TokenUsageDB.create_token_usage(
+            TokenUsageCreate(user_id=user.id, input_tokens=tokens, output_tokens=tokens, total_tokens=tokens * 2)
+        )
+
+    now = datetime.utcnow()
+    series = TokenUsageDB.get_usage_timeseries(now - timedelta(days=1), now + timedelta(days=1), 86400)
+    assert len(series) == 1
+    assert sum(p.total_tokens for p in series[0].points) == 70
+    assert sum(p.request_count for p in series[0].points) == 3
+
+    # end가 방금 기록한 행과 같은 초여도 포함
+    series = TokenUsageDB.get_usage_timeseries(now - timedelta(days=1), datetime.utcnow(), 86400)
+    assert sum(p.total_tokens for p in series[0].points) == 70
+
+    stats = TokenUsageDB.get_user_stats(user.id)
+    assert stats.total_tokens == 70
+
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    assert TokenUsageDB.get_token_totals(day_start, day_start.replace(day=1), user.id) == (70, 70)
+    assert TokenUsageDB.get_token_totals(day_start + timedelta(days=1), day_start.replace(day=1)) == (0, 70)
+
+
+def test_token_usage_rollup_keeps_totals(db):
+    user = make_user()
+    TokenUsageDB.create_token_usage(
+        TokenUsageCreate(user_id=user.id, input_tokens=1, output_tokens=2, total_tokens=3)
+    )
+
+    tomorrow = datetime.utcnow() + timedelta(days=1)
+    day = TokenUsageDB.get_oldest_usage_day(tomorrow)
+    assert day is not None
+    assert TokenUsageDB.rollup_day(day) == 1
+    assert TokenUsageDB.get_oldest_usage_day(tomorrow) is None
+
+    # 일별 요약으로 옮긴 사용량도 통계와 시계열에 포함
+    assert TokenUsageDB.get_user_stats(user.id).total_tokens == 3
+    series = TokenUsageDB.get_usage_timeseries(day - timedelta(days=1), tomorrow, 3600)
+    assert [(p.bucket_start, p.total_tokens) for p in series[0].points] == [(day, 3)]
+
+
+def test_output_files_and_archive(db):
+    OutputFileDB.upsert("old.hwpx", 10, 100.0)
+    OutputFileDB.upsert("new.hwpx", 20, 200.0)
+    OutputFileDB.upsert("old.hwpx", 11, 100.0)
+
+    total, files = OutputFileDB.list_files(limit=10)
+    assert total == 2
+    assert [f["filename"] for f in files] == ["new.hwpx", "old.hwpx"]
+    assert OutputFileDB.get_files_before(150.0, limit=10) == [("old.hwpx", 11, 100.0)]
+
+    ArchiveDB.record_archive("archives/2024-01/a.zip", [("old.hwpx", 30, 11, 100.0)])
+    assert OutputFileDB.count() == 1
+    archived = ArchiveDB.get_archived_file("old.hwpx")
+    assert (archived.archive_key, archived.data_offset, archived.size) == ("archives/2024-01/a.zip", 30, 11)
+    assert ArchiveDB.list_files(limit=10)[0] == 1
+    assert ArchiveDB.get_archived_file("missing.hwpx") is None
+
+
+def test_output_files_reconcile(db):
+    OutputFileDB.upsert("kept.hwpx", 1, 1.0)
+    OutputFileDB.upsert("changed.hwpx", 1, 1.0)
+    OutputFileDB.upsert("removed.hwpx", 1, 1.0)
+    objects = [
+        StorageObject("kept.hwpx", 1, 1.0),
+        StorageObject("changed.hwpx", 2, 2.0),
+        StorageObject("added.hwpx", 3, 3.0),
+    ]
+
+    assert OutputFileDB.reconcile(objects, dry_run=True) == (1, 1, 1)
+    assert OutputFileDB.count() == 3
+    assert OutputFileDB.reconcile(objects) == (1, 1, 1)
+    assert OutputFileDB.reconcile(objects) == (0, 0, 0)
+
+
+def test_revoked_tokens(db):
+    now = datetime.utcnow()
+    RevokedTokenDB.revoke("active", now + timedelta(hours=1), user_id=None)
+    RevokedTokenDB.revoke("active", now + timedelta(hours=1))
+    RevokedTokenDB.revoke("expired", now - timedelta(hours=1))
+
+    assert RevokedTokenDB.is_revoked("active")
+    assert not RevokedTokenDB.is_revoked("unknown")
+    assert RevokedTokenDB.get_active_jtis() == ["active"]
+    assert RevokedTokenDB.get_active_jtis(since=now + timedelta(days=1)) == []
+    assert RevokedTokenDB.purge_expired() == 1
+
+
+def test_leases(db):
+    assert LeaseDB.acquire("leader", "a", ttl_seconds=30)
+    assert LeaseDB.acquire("leader", "a", ttl_seconds=30)
+    assert not LeaseDB.acquire("leader", "b", ttl_seconds=30)
+    assert not LeaseDB.release("leader", "b")
+    assert LeaseDB.release("leader", "a")
+    assert LeaseDB.acquire("leader", "b", ttl_seconds=-1)
+
+    # 만료된 임대는 다른 보유자가 가져감
+    assert LeaseDB.acquire("leader", "a", ttl_seconds=30)
+    assert [lease["holder"] for lease in LeaseDB.get_leases()] == ["a"]
+
+
+def test_llm_call_stats(db):
+    for latency in range(1, 101):
+        LLMCallDB.enqueue_call(LLMUsage(
+            model="m", latency_ms=float(latency), first_token_ms=latency / 2, output_tokens=10
+        ))
+    LLMCallDB.enqueue_call(LLMUsage(model="m", status="error", error_type="APIStatusError", latency_ms=5000.0, retries=2))
+    assert llm_call_writer.flush() == 101
+
+    now = datetime.utcnow()
+    stats = LLMCallDB.get_stats(now - timedelta(days=1), now)
+    assert len(stats) == 1
+    day = stats[0]
+    assert (day.calls, day.errors, day.retries) == (101, 1, 2)
+    # nearest-rank, 오류 호출은 백분위수에서 제외
+    assert (day.latency_ms.p50, day.latency_ms.p95, day.latency_ms.p99) == (50.0, 95.0, 99.0)
+    assert day.first_token_ms.p50 == 25.0
+    assert day.day == now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    overall = LLMCallDB.get_stats(now - timedelta(days=1), now, per_day=False)
+    assert overall[0].day is None and overall[0].calls == 101
+
+    assert LLMCallDB.delete_before(now + timedelta(seconds=2)) == 101
+
+
+def test_literal_percent_and_question_mark_round_trip(db):
+    """쿼리 문자열 안의 % 와 ? 가 플레이스홀더로 바뀌지 않음"""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        assert dict(cursor.execute("SELECT '100%' as value").fetchone())["value"] == "100%"
+        row = cursor.execute("SELECT '?%' as literal, ? as param", ("x",)).fetchone()
+        assert (row["literal"], row["param"]) == ("?%", "x")
+    finally:
+        conn.close()
+
+
+def make_writer(**kwargs):
+    return BufferedWriter(
+        "test",
+        "INSERT INTO token_usage (user_id, input_tokens, output_tokens, total_tokens) VALUES (?, ?, ?, ?)",
+        **kwargs
+    )
+
+
+def test_buffered_writer_survives_backend_latency(db):
+    """플러시 주기 안에 쌓인 기록이 한 번에 저장됨"""
+    user = make_user()
+    writer = make_writer(flush_interval_ms=50)
+    try:
+        for _ in range(5):
+            writer.add((user.id, 1, 1, 2))
+        deadline = time.monotonic() + 5
+        while scalar("SELECT COUNT(*) as n FROM token_usage") < 5 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert scalar("SELECT COUNT(*) as n FROM token_usage") == 5
+    finally:
+        writer.close()
+        _writers.remove(writer)
+
+
+def test_buffered_writer_flushes_when_full(db):
+    user = make_user()
+    # 배치 크기가 버퍼 크기와 같고 주기가 길면 백그라운드 플러시가 돌지 않음
+    writer = make_writer(flush_interval_ms=60_000, max_batch=10, max_buffer=10)
+    try:
+        # 백그라운드 플러시가 늦어도 버퍼는 max_buffer를 넘지 않음
+        for _ in range(25):
+            writer.add((user.id, 1, 1, 2))
+            assert len(writer._rows) < 10
+
+        assert scalar("SELECT COUNT(*) FROM token_usage") == 20
+        assert writer.flush() == 5
+    finally:
+        writer.close()
+        _writers.remove(writer)
+
+
+def test_buffered_writer_reopen(db):
+    user = make_user()
+    writer = make_writer(flush_interval_ms=50)
+    try:
+        writer.add((user.id, 1, 1, 2))
+        writer.close()
+        assert scalar("SELECT COUNT(*) FROM token_usage") == 1
+
+        # 닫힌 기록기는 바로 저장하고, 다시 열면 새 백그라운드 스레드로 버퍼링
+        writer.add((user.id, 1, 1, 2))
+        assert scalar("SELECT COUNT(*) FROM token_usage") == 2
+
+        writer.reopen()
+        writer.add((user.id, 1, 1, 2))
+        assert scalar("SELECT COUNT(*) FROM token_usage") == 2
+        deadline = time.monotonic() + 5
+        while scalar("SELECT COUNT(*) FROM token_usage") < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert scalar("SELECT COUNT(*) FROM token_usage") == 3
+    finally:
+        writer.close()
+        _writers.remove(writer)
@@ -0,0 +1,58 @@
+"""
+워커별 지표 스냅샷 합계 테스트
+"""
+import json
+import os
+
+from utils import metrics
+from utils.metrics import Counter, Gauge, Registry
+
+
+def _snapshot(registry: Registry):
+    return {name: family.to_dict() for name, family in registry.collect().items()}
+
+
+def _value(families, name):
+    return sum(families[name].values.values()) if name in families else 0
+
+
+def test_dead_worker_snapshots_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "REGISTRY", Registry())
+    monkeypatch.setattr(metrics, "_worker", None)
+
+    dead = Registry()
+    Counter("jobs_total", "완료한 작업 수", registry=dead).inc(3)
+    Gauge("jobs_running", "진행 중인 작업 수", registry=dead).inc(2)
+
+    # 현재 pid를 재사용했지만 시작 시각이 다른(이미 종료된) 워커의 스냅샷
+    reused = f"{os.getpid()}-1"
+    (tmp_path / f"{reused}.json").write_text(json.dumps(_snapshot(dead)))
+
+    families = metrics.collect_all()
+    assert _value(families, "jobs_total") == 3
+    assert _value(families, "jobs_running") == 0
+
+    # 종료된 워커의 스냅샷은 compacted.json에 합쳐지고 지워짐 (다시 세지 않음)
+    assert not (tmp_path / f"{reused}.json").exists()
+    assert (tmp_path / "compacted.json").exists()
+    assert _value(metrics.collect_all(), "jobs_total") == 3
+    assert (tmp_path / f"{metrics._worker_id()}.json").exists()
+
+
+def test_compaction_skips_already_folded(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+
+    dead = Registry()
+    Counter("jobs_total", "완료한 작업 수", registry=dead).inc(5)
+    snapshot = _snapshot(dead)
+
+    # compacted.json에 합친 뒤 스냅샷 삭제 전에 중단된 상태
+    (tmp_path / "999999999-1.json").write_text(json.dumps(snapshot))
+    (tmp_path / "compacted.json").write_text(json.dumps({"workers": ["999999999-1"], "families": snapshot}))
+
+    # 다시 정리해도 두 번 더하지 않고 스냅샷만 지움
+    metrics.compact_snapshots(["999999999-1"])
+    families = metrics._load_compacted()["families"]
+    assert sum(value for _, value in families["jobs_total"]["values"]) == 5
+    assert not (tmp_path / "999999999-1.json").exists()
@@ -0,0 +1,75 @@
+"""
+보고서 생성 한도 테스트
+"""
+import asyncio
+import inspect
+
+import pytest
+from fastapi import HTTPException
+
+from utils import quota
+from utils.quota import QuotaLimits, QuotaManager, check_generation_quota
+
+
+def test_dependency_runs_in_threadpool():
+    # 동기 함수여야 FastAPI가 스레드 풀에서 실행 (DB 합계 조회가 이벤트 루프를 막지 않음)
+    assert not inspect.iscoroutinefunction(check_generation_quota)
+
+
+def test_sync_queries_outside_lock(monkeypatch):
+    manager = QuotaManager(QuotaLimits(0, 100, 0), QuotaLimits(0, 0, 0))
+    calls = []
+
+    def get_token_totals(day_start, month_start, user_id=None):
+        calls.append(user_id)
+        assert not manager._lock.locked()
+        return 40, 40
+
+    monkeypatch.setattr(quota.TokenUsageDB, "get_token_totals", get_token_totals)
+
+    headers = manager.check(1)
+    assert headers["X-Quota-User-Remaining-Tokens-Day"] == "60"
+
+    # 동기화 간격 안에서는 다시 조회하지 않고 메모리 사용량을 더함
+    manager.record(1, 60)
+    with pytest.raises(HTTPException) as exc:
+        manager.check(1)
+    assert exc.value.status_code == 429
+    assert calls == [1]
+
+
+def test_requests_per_minute_split_by_workers(monkeypatch):
+    monkeypatch.setattr(quota, "QUOTA_WORKERS", 4)
+    manager = QuotaManager(QuotaLimits(10, 0, 0), QuotaLimits(0, 0, 0))
+
+    # 워커 4개면 워커마다 10 / 4 (올림) = 3개
+    for _ in range(3):
+        manager.check(1)
+    with pytest.raises(HTTPException) as exc:
+        manager.check(1)
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) >= 1
+
+
+def test_public_generate_validates_before_quota(client, monkeypatch):
+    import main
+
+    calls = []
+
+    def check(user_id):
+        try:
+            asyncio.get_running_loop()
+            calls.append("event loop")
+        except RuntimeError:
+            calls.append("threadpool")
+        raise HTTPException(status_code=429, detail="한도 초과")
+
+    monkeypatch.setattr(main.quota_manager, "check", check)
+
+    # 잘못된 요청은 한도를 확인(소모)하지 않음
+    assert client.post("/api/generate", json={"topic": "ab"}).status_code == 400
+    assert calls == []
+
+    # 한도 확인은 이벤트 루프가 아닌 스레드 풀에서 실행
+    assert client.post("/api/generate", json={"topic": "디지털 뱅킹"}).status_code == 429
+    assert calls == ["threadpool"]
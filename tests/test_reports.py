@@ -0,0 +1,72 @@
+"""
+보고서 API 테스트
+"""
+import io
+import os
+import threading
+import zipfile
+
+import routers.reports
+from database import ReportDB, UserDB
+
+CONTENT = {
+    "title": "디지털 뱅킹 현황",
+    "title_summary": "요약",
+    "summary": "모바일 뱅킹 이용 급증",
+    "title_background": "배경",
+    "background": "핀테크 경쟁 심화",
+    "title_main_content": "주요 내용",
+    "main_content": "오픈뱅킹 도입",
+    "title_conclusion": "결론",
+    "conclusion": "대응 필요",
+}
+
+
+def test_lazy_download_renders_in_worker_thread(client, admin_headers, monkeypatch):
+    """파일이 없는 보고서는 이벤트 루프가 아닌 보고서 생성 스레드 풀에서 만듦"""
+    admin = UserDB.get_user_by_email(os.environ["ADMIN_EMAIL"])
+    report = ReportDB.create_report_with_usage(
+        admin.id, "디지털 뱅킹", "디지털 뱅킹 현황", "report.hwpx", "", 0, content=CONTENT
+    )
+
+    threads = []
+    materialize = routers.reports._materialize_report
+
+    def recording_materialize(*args):
+        threads.append(threading.current_thread().name)
+        return materialize(*args)
+
+    monkeypatch.setattr(routers.reports, "_materialize_report", recording_materialize)
+
+    response = client.get(f"/api/reports/download/{report.id}", headers=admin_headers)
+    assert response.status_code == 200
+    assert zipfile.ZipFile(io.BytesIO(response.content)).testzip() is None
+    assert len(threads) == 1 and threads[0].startswith("report")
+
+    # 만든 파일은 캐시에서 바로 전송
+    assert client.get(f"/api/reports/download/{report.id}", headers=admin_headers).status_code == 200
+    assert len(threads) == 1
+
+
+def test_download_without_file_or_content_is_404(client, admin_headers):
+    admin = UserDB.get_user_by_email(os.environ["ADMIN_EMAIL"])
+    report = ReportDB.create_report(admin.id, "없는 파일", "없는 파일", "gone.hwpx", "output/gone.hwpx", 0)
+
+    response = client.get(f"/api/reports/download/{report.id}", headers=admin_headers)
+    assert response.status_code == 404
+
+
+def test_missing_template_is_created(workdir):
+    """기본 템플릿이 없으면 HWPHandler.create_simple_template으로 만들어 사용"""
+    from utils.resources import TEMPLATE_PATH, AppResources
+
+    os.remove(TEMPLATE_PATH)
+    resources = AppResources(report_workers=1)
+    try:
+        resources.load_templates()
+    finally:
+        resources.executor.shutdown()
+
+    with zipfile.ZipFile(TEMPLATE_PATH) as zf:
+        assert "Contents/section0.xml" in zf.namelist()
+    assert "{{TITLE}}" in resources.report_handler.validate_template()
@@ -0,0 +1,82 @@
+"""
+보관 정책 테스트
+"""
+import os
+import time
+
+from database import ArchiveDB, OutputFileDB, ReportDB, UserDB
+from utils.retention import RetentionEngine, RetentionPolicy
+from utils.storage import get_storage
+
+LEGACY_DATA = b"PK legacy report" * 100
+ORPHAN_DATA = b"PK orphan report" * 50
+
+
+def add_output_file(filename: str, data: bytes, age_days: int) -> float:
+    """저장소 최상위 파일과 목록 색인 추가 (age_days일 전 파일)"""
+    os.makedirs("output", exist_ok=True)
+    path = os.path.join("output", filename)
+    with open(path, "wb") as f:
+        f.write(data)
+    mtime = time.time() - age_days * 86400
+    os.utime(path, (mtime, mtime))
+    OutputFileDB.upsert(filename, len(data), mtime)
+    return mtime
+
+
+def add_legacy_report(user_id: int, filename: str):
+    """저장된 내용 없이 파일만 있는 이전 버전 보고서"""
+    add_output_file(filename, LEGACY_DATA, age_days=30)
+    return ReportDB.create_report(
+        user_id, "이전 버전 보고서", "이전 버전 보고서", filename, f"output/{filename}", len(LEGACY_DATA)
+    )
+
+
+def archive_engine() -> RetentionEngine:
+    return RetentionEngine(RetentionPolicy(output_days=7, usage_days=0, temp_hours=0))
+
+
+def test_archive_skips_files_referenced_by_reports(client, admin_headers):
+    admin = UserDB.get_user_by_email(os.environ["ADMIN_EMAIL"])
+    report = add_legacy_report(admin.id, "report_legacy.hwpx")
+    add_output_file("report_orphan.hwpx", ORPHAN_DATA, age_days=30)
+
+    assert client.get(f"/api/reports/download/{report.id}", headers=admin_headers).status_code == 200
+
+    engine = archive_engine()
+    assert engine.run()
+    assert engine.status()["current"]["files_archived"] == 1
+
+    # 보고서가 가리키지 않는 파일만 보관
+    assert get_storage().exists("report_legacy.hwpx")
+    assert not get_storage().exists("report_orphan.hwpx")
+    assert ArchiveDB.get_archived_file("report_orphan.hwpx") is not None
+    assert OutputFileDB.get_files_before(time.time(), limit=10) == []
+
+    response = client.get(f"/api/reports/download/{report.id}", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.content == LEGACY_DATA
+
+
+def test_download_falls_back_to_archive(client, admin_headers):
+    """이전 실행에서 이미 보관된 보고서 파일도 보고서 다운로드로 받을 수 있음"""
+    admin = UserDB.get_user_by_email(os.environ["ADMIN_EMAIL"])
+    report = add_legacy_report(admin.id, "report_archived.hwpx")
+    mtime = os.path.getmtime(os.path.join("output", "report_archived.hwpx"))
+
+    archive_engine()._archive_batch("2024-01", [("report_archived.hwpx", len(LEGACY_DATA), mtime)])
+    assert not get_storage().exists("report_archived.hwpx")
+
+    response = client.get(f"/api/reports/download/{report.id}", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.content == LEGACY_DATA
+
+    response = client.get(
+        f"/api/reports/download/{report.id}", headers={**admin_headers, "Range": "bytes=0-9"}
+    )
+    assert response.status_code == 206
+    assert response.content == LEGACY_DATA[:10]
+
+    response = client.post("/api/reports/download-bulk", json={"report_ids": [report.id]}, headers=admin_headers)
+    assert response.status_code == 200
+    assert LEGACY_DATA in response.content
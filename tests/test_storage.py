@@ -0,0 +1,195 @@
+"""
+파일 저장소 백엔드 테스트 (로컬, S3는 moto로 대체)
+"""
+import os
+import urllib.parse
+
+import pytest
+
+from utils.download import content_disposition, storage_response
+from utils.storage import LocalStorage, S3Storage, StorageObject
+
+MB = 1024 * 1024
+
+
+def write_file(path, data: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    return LocalStorage(str(tmp_path / "output"))
+
+
+@pytest.fixture
+def s3_client():
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+
+    with moto.mock_aws():
+        client = boto3.client(
+            "s3",
+            region_name="us-east-1",
+            aws_access_key_id="test",
+            aws_secret_access_key="test",
+        )
+        client.create_bucket(Bucket="reports")
+        yield client
+
+
+@pytest.fixture
+def s3_storage(s3_client):
+    return S3Storage(
+        "reports",
+        prefix="hwp",
+        multipart_threshold=5 * MB,
+        multipart_chunk_size=5 * MB,
+        client=s3_client,
+    )
+
+
+@pytest.fixture(params=["local", "s3"])
+def storage(request):
+    return request.getfixturevalue(f"{request.param}_storage")
+
+
+def test_put_file_moves_source(storage, tmp_path):
+    source = write_file(tmp_path / "report.hwpx", b"hwpx-data")
+
+    assert storage.put_file("blobs/ab/report.hwpx", source) == 9
+    assert not os.path.exists(source)
+    assert b"".join(storage.iter_chunks("blobs/ab/report.hwpx")) == b"hwpx-data"
+
+
+def test_iter_chunks_ranges(storage, tmp_path):
+    data = bytes(range(256)) * 4
+    storage.put_file("report.hwpx", write_file(tmp_path / "source", data))
+
+    assert b"".join(storage.iter_chunks("report.hwpx", start=10, end=19)) == data[10:20]
+    assert b"".join(storage.iter_chunks("report.hwpx", start=1000)) == data[1000:]
+    assert b"".join(storage.iter_chunks("report.hwpx", end=0)) == data[:1]
+
+    chunks = list(storage.iter_chunks("report.hwpx", chunk_size=100))
+    assert b"".join(chunks) == data
+    assert max(len(chunk) for chunk in chunks) <= 100
+
+
+def test_stat_exists_delete(storage, tmp_path):
+    storage.put_file("a/report.hwpx", write_file(tmp_path / "source", b"12345"))
+
+    info = storage.stat("a/report.hwpx")
+    assert (info.key, info.size) == ("a/report.hwpx", 5)
+    assert info.mtime > 0
+    assert storage.exists("a/report.hwpx")
+
+    assert storage.delete("a/report.hwpx")
+    assert storage.stat("a/report.hwpx") is None
+    assert not storage.exists("a/report.hwpx")
+    assert not storage.delete("a/report.hwpx")
+
+
+def test_storage_response_stats_once(storage, tmp_path, monkeypatch):
+    from starlette.requests import Request
+
+    request = Request({"type": "http", "method": "GET", "headers": []})
+    storage.put_file("a/report.hwpx", write_file(tmp_path / "source", b"12345"))
+
+    stats = []
+    if storage.local:
+        real_stat = os.stat
+        monkeypatch.setattr(os, "stat", lambda path, *args, **kwargs: stats.append(path) or real_stat(path, *args, **kwargs))
+    else:
+        real_stat = storage.stat
+        monkeypatch.setattr(storage, "stat", lambda key: stats.append(key) or real_stat(key))
+
+    response = storage_response(request, storage, "a/report.hwpx", "보고서.hwpx")
+    assert response.status_code == 200
+    assert response.headers["content-length"] == "5"
+    assert len(stats) == 1
+
+    # 없는 파일은 예외 대신 None (호출자가 보관 묶음 등으로 대체)
+    assert storage_response(request, storage, "a/missing.hwpx", "보고서.hwpx") is None
+
+
+def test_iter_objects(storage, tmp_path):
+    for key in ("top.hwpx", "blobs/ab/one.hwpx", "blobs/cd/two.hwpx", "blobs/three.hwpx"):
+        storage.put_file(key, write_file(tmp_path / "source", key.encode()))
+
+    def keys(*args, **kwargs):
+        return sorted(obj.key for obj in storage.iter_objects(*args, **kwargs))
+
+    assert keys() == ["blobs/ab/one.hwpx", "blobs/cd/two.hwpx", "blobs/three.hwpx", "top.hwpx"]
+    assert keys(recursive=False) == ["top.hwpx"]
+    assert keys("blobs") == ["blobs/ab/one.hwpx", "blobs/cd/two.hwpx", "blobs/three.hwpx"]
+    assert keys("blobs", recursive=False) == ["blobs/three.hwpx"]
+    assert keys("missing") == []
+
+    sizes = {obj.key: obj.size for obj in storage.iter_objects()}
+    assert sizes["top.hwpx"] == len(b"top.hwpx")
+
+
+def test_s3_multipart_upload(s3_storage, s3_client, tmp_path):
+    data = os.urandom(6 * MB)
+    source = write_file(tmp_path / "large.hwpx", data)
+
+    assert s3_storage.put_file("large.hwpx", source) == len(data)
+
+    head = s3_client.head_object(Bucket="reports", Key="hwp/large.hwpx")
+    # 멀티파트로 올린 객체의 ETag는 "<해시>-<조각 수>" 형식
+    assert head["ETag"].strip('"').endswith("-2")
+    assert b"".join(s3_storage.iter_chunks("large.hwpx")) == data
+    assert b"".join(s3_storage.iter_chunks("large.hwpx", start=5 * MB - 2, end=5 * MB + 1)) == data[5 * MB - 2:5 * MB + 2]
+
+
+def test_s3_prefix_is_hidden(s3_storage, s3_client, tmp_path):
+    s3_storage.put_file("/report.hwpx", write_file(tmp_path / "source", b"x"))
+
+    assert [item["Key"] for item in s3_client.list_objects_v2(Bucket="reports")["Contents"]] == ["hwp/report.hwpx"]
+    assert [obj.key for obj in s3_storage.iter_objects()] == ["report.hwpx"]
+
+
+def test_s3_presigned_url(s3_storage, tmp_path):
+    s3_storage.put_file("blobs/report.hwpx", write_file(tmp_path / "source", b"x"))
+
+    url = s3_storage.presigned_url("blobs/report.hwpx", "보고서.hwpx", expires_in=300)
+    parsed = urllib.parse.urlparse(url)
+    query = urllib.parse.parse_qs(parsed.query)
+
+    assert parsed.path.endswith("/hwp/blobs/report.hwpx")
+    # 서명 방식(v2/v4)에 따라 Expires 또는 X-Amz-Expires
+    assert any(name in query for name in ("Expires", "X-Amz-Expires"))
+    assert query["response-content-disposition"] == [content_disposition("보고서.hwpx")]
+
+
+def test_local_presigned_url_is_not_supported(local_storage):
+    assert local_storage.presigned_url("report.hwpx", "report.hwpx", expires_in=60) is None
+
+
+def test_local_normalize_key(local_storage):
+    root = local_storage.root
+
+    # 이전 버전이 저장한 'output/...' 경로와 Windows 구분자 허용
+    assert local_storage.normalize_key(f"{root}/blobs/a.hwpx") == "blobs/a.hwpx"
+    assert local_storage.normalize_key("blobs\\a.hwpx") == "blobs/a.hwpx"
+    assert local_storage.local_path("blobs/a.hwpx") == os.path.join(root, "blobs", "a.hwpx")
+
+
+@pytest.mark.parametrize("key", ["../secret", "blobs/../../secret", "/etc/passwd", "..\\secret"])
+def test_local_normalize_key_rejects_traversal(local_storage, key):
+    with pytest.raises(ValueError):
+        local_storage.normalize_key(key)
+
+    # 조회는 없는 파일로 처리
+    assert local_storage.stat(key) is None
+    assert not local_storage.exists(key)
+
+
+def test_local_put_file_same_path(local_storage):
+    os.makedirs(local_storage.root)
+    path = write_file(os.path.join(local_storage.root, "report.hwpx"), b"abc")
+
+    # 이미 저장소 안에 있는 파일은 그대로 둠
+    assert local_storage.put_file("report.hwpx", path) == 3
+    assert local_storage.stat("report.hwpx") == StorageObject("report.hwpx", 3, os.path.getmtime(path))
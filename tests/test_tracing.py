@@ -0,0 +1,50 @@
+"""
+추적(trace ID) 로그 연동 테스트
+"""
+import logging
+
+import pytest
+
+from utils import tracing
+
+
+@pytest.fixture
+def restore_record_factory():
+    factory = logging.getLogRecordFactory()
+    try:
+        yield
+    finally:
+        logging.setLogRecordFactory(factory)
+
+
+def make_record():
+    return logging.getLogRecordFactory()("test", logging.INFO, __file__, 1, "message", (), None)
+
+
+def test_record_factory_wraps_existing_factory(restore_record_factory):
+    base = logging.getLogRecordFactory()
+
+    def custom_factory(*args, **kwargs):
+        record = base(*args, **kwargs)
+        record.custom = "kept"
+        return record
+
+    logging.setLogRecordFactory(custom_factory)
+    tracing.install_log_record_factory()
+    installed = logging.getLogRecordFactory()
+
+    # 다시 호출해도 한 번만 감쌈
+    tracing.install_log_record_factory()
+    assert logging.getLogRecordFactory() is installed
+
+    record = make_record()
+    assert (record.custom, record.trace_id) == ("kept", "-")
+
+    with tracing.span("test") as current:
+        assert make_record().trace_id == current.trace.trace_id
+
+
+def test_log_handler_formats_records_before_install(restore_record_factory):
+    # 팩토리 설치 전(시작 전 로그)에도 형식 오류 없이 trace_id를 "-"로 표시
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "message", (), None)
+    assert "[-] message" in tracing.log_handler().format(record)
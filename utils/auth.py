@@ -2,46 +2,95 @@
 인증 및 권한 관리 유틸리티
 """
 import os
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional
-from passlib.context import CryptContext
-from jose import JWTError, jwt
+from functools import lru_cache
+from typing import Optional, Tuple
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 
 from models.user import User
 from database.user_db import UserDB
+from utils.password_hasher import password_hasher
+from utils.token_versions import token_versions
+from utils.revocation import revocation_list
 
 load_dotenv()
 
-# 비밀번호 해싱 설정
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt 비용 인자 (2^rounds회 반복, 값이 바뀌면 다음 로그인 때 새 값으로 다시 해싱)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
 
 # JWT 설정
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "1440"))  # 기본 24시간
 
+# 클레임 기반 인증 (선택): 짧게 만료되는 액세스 토큰에 권한을 담아 요청마다 사용자 조회를 생략
+AUTH_CLAIMS_MODE = os.getenv("AUTH_CLAIMS_MODE", "false").lower() in ("1", "true", "yes")
+CLAIMS_ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_REFRESH_EXPIRE_MINUTES", str(ACCESS_TOKEN_EXPIRE_MINUTES)))
+
 # HTTP Bearer 스키마
 security = HTTPBearer()
 
 
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """
+    비밀번호 해싱 설정 (passlib은 처음 사용할 때 로드)
+
+    워커 시작 시간을 줄이기 위해 모듈 로드 시점이 아니라 첫 해싱/검증 때 만듭니다.
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+        bcrypt__max_rounds=BCRYPT_ROUNDS,
+    )
+
+
 def hash_password(password: str) -> str:
     """비밀번호 해싱"""
     # bcrypt는 72바이트까지만 지원하므로 제한
     if len(password.encode('utf-8')) > 72:
         raise ValueError("비밀번호는 72바이트를 초과할 수 없습니다.")
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """비밀번호 검증"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    비밀번호 검증 후 필요하면 현재 설정(BCRYPT_ROUNDS)으로 다시 해싱
+
+    Returns:
+        Tuple[bool, Optional[str]]: (일치 여부, 새 해시 또는 None)
+    """
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """비밀번호 해싱 (해싱 스레드 풀에서 실행, 이벤트 루프를 막지 않음)"""
+    return await password_hasher.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """비밀번호 검증 (해싱 스레드 풀에서 실행, 이벤트 루프를 막지 않음)"""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """JWT 액세스 토큰 생성"""
+    from jose import jwt
+
     to_encode = data.copy()
 
     if expires_delta:
@@ -49,17 +98,52 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire})
+    # jti: 로그아웃 등으로 토큰을 개별 폐기할 때 사용하는 토큰 ID
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
     return encoded_jwt
 
 
+def create_user_tokens(user: User) -> Tuple[str, Optional[str]]:
+    """
+    로그인/갱신 시 발급할 토큰
+
+    클레임 기반 인증이 켜져 있으면 권한 클레임과 token_version을 담은 짧은 액세스 토큰과
+    데이터베이스로 다시 확인하는 리프레시 토큰을, 아니면 기존 액세스 토큰만 발급합니다.
+
+    Returns:
+        Tuple[str, Optional[str]]: (액세스 토큰, 리프레시 토큰 또는 None)
+    """
+    if not AUTH_CLAIMS_MODE:
+        return create_access_token(data={"user_id": user.id, "email": user.email, "ver": user.token_version}), None
+
+    access_token = create_access_token(
+        data={
+            "typ": "access",
+            "user_id": user.id,
+            "email": user.email,
+            "username": user.username,
+            "is_active": user.is_active,
+            "is_admin": user.is_admin,
+            "password_reset_required": user.password_reset_required,
+            "ver": user.token_version,
+        },
+        expires_delta=timedelta(minutes=CLAIMS_ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    refresh_token = create_access_token(
+        data={"typ": "refresh", "user_id": user.id, "ver": user.token_version},
+        expires_delta=timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
+    )
+    return access_token, refresh_token
+
+
 def decode_access_token(token: str) -> dict:
-    """JWT 액세스 토큰 디코드"""
+    """JWT 액세스 토큰 디코드 (폐기된 토큰이면 401)"""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=401,
@@ -67,6 +151,30 @@ def decode_access_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+    jti = payload.get("jti")
+    if jti and revocation_list.is_revoked(jti):
+        raise HTTPException(
+            status_code=401,
+            detail="로그아웃된 토큰입니다. 다시 로그인해주세요.",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    return payload
+
+
+def revoke_token(payload: dict):
+    """
+    디코드된 토큰 폐기 (원래 만료 시각까지 revoked_tokens에 기록)
+
+    jti가 없는 이전 형식의 토큰은 폐기할 수 없으며 만료 시각까지 유효합니다.
+    """
+    jti = payload.get("jti")
+    if not jti:
+        return
+
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    revocation_list.revoke(jti, expires_at, payload.get("user_id"))
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Security(security)
@@ -76,13 +184,17 @@ async def get_current_user(
     payload = decode_access_token(token)
 
     user_id: int = payload.get("user_id")
-    if user_id is None:
+    if user_id is None or payload.get("typ") == "refresh":
         raise HTTPException(
             status_code=401,
             detail="인증 정보가 올바르지 않습니다.",
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+    # 클레임 기반 토큰: 버전이 바뀐 경우에만 데이터베이스 확인
+    if AUTH_CLAIMS_MODE and payload.get("typ") == "access":
+        return _user_from_claims(payload)
+
     user = UserDB.get_user_by_id(user_id)
     if user is None:
         raise HTTPException(
@@ -91,9 +203,53 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+    # 권한 변경이나 비밀번호 변경 전에 발급된 토큰 거절
+    if user.token_version != payload.get("ver", 0):
+        raise HTTPException(
+            status_code=401,
+            detail="권한이 변경되어 토큰이 만료되었습니다. 다시 로그인해주세요.",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
     return user
 
 
+def _user_from_claims(payload: dict) -> User:
+    """
+    액세스 토큰 클레임으로 사용자 구성
+
+    캐시된 token_version과 토큰의 버전이 같거나 캐시에 없으면 데이터베이스를 조회하지 않습니다.
+    다르면 데이터베이스의 현재 버전으로 확인하고, 토큰이 이전 버전이면 401을 반환합니다.
+    """
+    user_id = payload["user_id"]
+    version = payload.get("ver", 0)
+
+    cached = token_versions.get(user_id)
+    if cached is not None and cached != version:
+        user = UserDB.get_user_by_id(user_id)
+        if user is None or user.token_version != version:
+            raise HTTPException(
+                status_code=401,
+                detail="권한이 변경되어 토큰이 만료되었습니다. 다시 로그인해주세요.",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        token_versions.set(user_id, user.token_version)
+
+    # 검증된 클레임이므로 모델 검증 생략 (비밀번호 해시는 담지 않음)
+    return User.model_construct(
+        id=user_id,
+        email=payload.get("email"),
+        username=payload.get("username"),
+        hashed_password="",
+        is_active=payload.get("is_active", False),
+        is_admin=payload.get("is_admin", False),
+        password_reset_required=payload.get("password_reset_required", False),
+        token_version=version,
+        created_at=None,
+        updated_at=None,
+    )
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -120,6 +276,37 @@ async def get_current_admin_user(
     return current_user
 
 
+def refresh_user_tokens(refresh_token: str) -> Tuple[User, str, Optional[str]]:
+    """
+    리프레시 토큰으로 새 토큰 발급 (항상 데이터베이스로 사용자 상태와 토큰 버전 확인)
+
+    Returns:
+        Tuple[User, str, Optional[str]]: (사용자, 액세스 토큰, 리프레시 토큰)
+    """
+    payload = decode_access_token(refresh_token)
+    if payload.get("typ") != "refresh" or payload.get("user_id") is None:
+        raise HTTPException(
+            status_code=401,
+            detail="리프레시 토큰이 올바르지 않습니다.",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    user = UserDB.get_user_by_id(payload["user_id"])
+    if user is None or not user.is_active or user.token_version != payload.get("ver", 0):
+        raise HTTPException(
+            status_code=401,
+            detail="토큰이 만료되었습니다. 다시 로그인해주세요.",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+    token_versions.set(user.id, user.token_version)
+
+    # 사용한 리프레시 토큰은 폐기 (재사용 방지)
+    revoke_token(payload)
+    access_token, new_refresh_token = create_user_tokens(user)
+    return user, access_token, new_refresh_token
+
+
 def authenticate_user(email: str, password: str) -> Optional[User]:
     """사용자 인증"""
     user = UserDB.get_user_by_email(email)
@@ -130,3 +317,26 @@ def authenticate_user(email: str, password: str) -> Optional[User]:
         return None
 
     return user
+
+
+async def authenticate_user_async(email: str, password: str) -> Optional[User]:
+    """
+    사용자 인증 (검증은 해싱 스레드 풀에서 실행)
+
+    저장된 해시의 비용 인자가 BCRYPT_ROUNDS와 다르면 로그인 성공 시 새 해시로 교체합니다.
+    """
+    user = UserDB.get_user_by_email(email)
+    if not user:
+        return None
+
+    valid, new_hash = await password_hasher.run(
+        verify_and_update_password, password, user.hashed_password
+    )
+    if not valid:
+        return None
+
+    if new_hash:
+        UserDB.update_password(user.id, new_hash)
+        user.hashed_password = new_hash
+
+    return user
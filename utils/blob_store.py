@@ -0,0 +1,104 @@
+"""
+내용 주소 기반(content-addressed) 보고서 파일 저장소
+
+생성된 HWPX 파일은 SHA-256 해시로 키를 정해 blobs/ab/cd/<hash>.hwpx에 저장합니다
+(실제 위치는 저장소 백엔드가 정함, utils/storage.py).
+내용이 같은 보고서는 하나의 파일을 공유하며, 참조 수는 blobs 테이블이 관리합니다
+(database/blob_db.py). 참조가 없는 파일은 gc_blobs.py가 정리합니다.
+"""
+import os
+import hashlib
+from typing import Iterator, Optional, Tuple
+
+from utils.storage import Storage, get_storage
+
+# 저장소 안의 키 접두사
+BLOB_PREFIX = os.getenv("REPORT_BLOB_PREFIX", "blobs")
+
+# 해시 계산 시 읽는 단위
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    """SHA-256 해시로 샤딩된 파일 저장소"""
+
+    def __init__(self, storage: Optional[Storage] = None, prefix: str = BLOB_PREFIX, extension: str = ".hwpx"):
+        """
+        Args:
+            storage: 저장소 백엔드 (None이면 설정된 기본 저장소)
+            prefix: 키 접두사
+            extension: 저장 파일 확장자
+        """
+        self._storage = storage
+        self.prefix = prefix.strip("/")
+        self.extension = extension
+
+    @property
+    def storage(self) -> Storage:
+        return self._storage or get_storage()
+
+    def key_for(self, digest: str) -> str:
+        """해시에 해당하는 저장 키 (ab/cd/<hash>.hwpx)"""
+        key = f"{digest[:2]}/{digest[2:4]}/{digest}{self.extension}"
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def contains(self, key: str) -> bool:
+        """저장소 키인지 확인 (이전 버전의 'output/blobs/...' 경로 포함)"""
+        key = key.replace("\\", "/")
+        marker = f"{self.prefix}/" if self.prefix else ""
+        return key.startswith(marker) or f"/{marker}" in key
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        """파일의 SHA-256 해시 (16진수)"""
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def put(self, source_path: str) -> Tuple[str, str, int]:
+        """
+        로컬 파일을 저장소로 이동
+
+        로컬 디스크에서는 같은 해시의 파일이 있어도 원자적으로 덮어쓰므로(내용이 동일)
+        정리 작업과 겹치더라도 이 호출 직후에는 파일이 항상 존재합니다.
+        원격 저장소는 같은 파일이 이미 있으면 업로드를 생략합니다.
+
+        Args:
+            source_path: 생성된 파일 경로 (이동 후 삭제됨)
+
+        Returns:
+            Tuple[str, str, int]: (해시, 저장 키, 파일 크기)
+        """
+        digest = self.hash_file(source_path)
+        size = os.path.getsize(source_path)
+        key = self.key_for(digest)
+
+        storage = self.storage
+        if not storage.local and storage.exists(key):
+            os.remove(source_path)
+        else:
+            storage.put_file(key, source_path)
+
+        return digest, key, size
+
+    def remove(self, digest: str) -> bool:
+        """해시에 해당하는 파일 삭제 (없으면 False)"""
+        return self.storage.delete(self.key_for(digest))
+
+    def iter_blobs(self) -> Iterator[Tuple[str, str, int, float]]:
+        """
+        저장소의 모든 파일 순회
+
+        Yields:
+            Tuple[str, str, int, float]: (해시, 저장 키, 크기, 수정 시각)
+        """
+        for obj in self.storage.iter_objects(self.prefix):
+            name = obj.key.rsplit("/", 1)[-1]
+            if not name.endswith(self.extension):
+                continue
+            yield name[:-len(self.extension)], obj.key, obj.size, obj.mtime
+
+
+blob_store = BlobStore()
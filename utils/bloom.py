@@ -0,0 +1,51 @@
+"""
+블룸 필터 (폐기된 토큰 빠른 조회용)
+
+"없음"은 항상 정확하고 "있음"은 오탐일 수 있는 집합입니다.
+대부분의 요청(폐기되지 않은 토큰)은 메모리 조회만으로 끝나고,
+필터가 "있음"이라고 답한 경우에만 데이터베이스를 확인합니다.
+"""
+import math
+import hashlib
+import threading
+
+
+class BloomFilter:
+    """고정 크기 블룸 필터 (비트 배열 + 이중 해싱)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Args:
+            capacity: 예상 원소 수 (넘으면 오탐률이 올라감)
+            error_rate: capacity개를 담았을 때의 목표 오탐률
+        """
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        """원소 추가"""
+        positions = list(self._positions(item))
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
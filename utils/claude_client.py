@@ -3,20 +3,93 @@ Claude API 클라이언트
 보고서 내용을 생성하기 위한 Claude API 통신 모듈
 """
 import os
+import time
+import random
 import logging
-from typing import Dict
-from anthropic import Anthropic
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional
+
+from database.llm_call_db import LLMCallDB
+from models.llm_call import LLMUsage
+from utils.metrics import CLAUDE_FIRST_TOKEN_SECONDS, CLAUDE_REQUEST_SECONDS, ERRORS, REPORT_STAGE_SECONDS
+from utils.tracing import current_trace_id, log_handler, set_attributes, traced
 
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    handlers=[log_handler()]
 )
 logger = logging.getLogger(__name__)
 
+# 일시적 오류(연결 실패, 429, 5xx/529 과부하) 재시도 횟수와 첫 대기 시간 (초, 재시도마다 2배)
+CLAUDE_MAX_RETRIES = int(os.getenv("CLAUDE_MAX_RETRIES", "2"))
+CLAUDE_RETRY_BASE_SECONDS = float(os.getenv("CLAUDE_RETRY_BASE_SECONDS", "1.0"))
+
+# 재시도 대기 상한 (초)
+MAX_RETRY_DELAY_SECONDS = 30.0
+
+# 재시도할 HTTP 상태 코드 (5xx는 모두 재시도)
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class GenerationResult(NamedTuple):
+    """보고서 내용 생성 결과 (파싱된 섹션, 호출 사용량/성능)"""
+    content: Dict[str, str]
+    usage: LLMUsage
+
+
+def retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """
+    재시도 전 대기 시간 (재시도하지 않을 오류면 None)
+
+    연결 실패/시간 초과, 408/409/429, 5xx(529 과부하 포함)만 재시도하고 서버가 retry-after를 주면 따릅니다.
+    anthropic SDK를 import하지 않도록 예외 속성(status_code)과 클래스 이름으로 판별합니다.
+
+    Args:
+        error: 발생한 예외
+        attempt: 지금까지 재시도한 횟수
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        if not any(cls.__name__ == "APIConnectionError" for cls in type(error).__mro__):
+            return None
+    elif status < 500 and status not in RETRYABLE_STATUS_CODES:
+        return None
+
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after is not None:
+        try:
+            return min(max(float(retry_after), 0.0), MAX_RETRY_DELAY_SECONDS)
+        except ValueError:
+            pass
+
+    # 지수 백오프 + 지터 (동시에 실패한 요청이 같은 시각에 몰리지 않도록)
+    delay = CLAUDE_RETRY_BASE_SECONDS * (2 ** attempt) * random.uniform(0.75, 1.25)
+    return min(delay, MAX_RETRY_DELAY_SECONDS)
+
+
+@lru_cache(maxsize=4)
+def get_anthropic_client(api_key: str):
+    """
+    API 키별 Anthropic 클라이언트 (프로세스에서 재사용)
+
+    anthropic SDK는 로드에 수백 ms가 걸리므로 첫 보고서 생성 때 불러오고,
+    만든 클라이언트는 HTTP 연결 풀과 함께 이후 요청에서 재사용합니다.
+    재시도 횟수를 호출 기록에 남기기 위해 SDK 자동 재시도는 끄고 ClaudeClient에서 재시도합니다.
+    """
+    from anthropic import Anthropic
+
+    return Anthropic(api_key=api_key, max_retries=0)
+
 
 class ClaudeClient:
-    """Claude API를 사용하여 보고서 내용을 생성하는 클라이언트"""
+    """
+    Claude API를 사용하여 보고서 내용을 생성하는 클라이언트
+
+    호출별 상태를 인스턴스에 두지 않으므로(사용량은 반환값으로 전달) 여러 요청이 한 인스턴스를 공유합니다.
+    """
 
     def __init__(self):
         """Claude 클라이언트 초기화"""
@@ -26,22 +99,22 @@ class ClaudeClient:
         if not self.api_key:
             raise ValueError("CLAUDE_API_KEY 환경 변수가 설정되지 않았습니다.")
 
-        self.client = Anthropic(api_key=self.api_key)
+        self.client = get_anthropic_client(self.api_key)
 
-        # 토큰 사용량 추적
-        self.last_input_tokens = 0
-        self.last_output_tokens = 0
-        self.last_total_tokens = 0
-
-    def generate_report(self, topic: str) -> Dict[str, str]:
+    @traced("claude.generate_report")
+    def generate_report(self, topic: str, user_id: Optional[int] = None) -> GenerationResult:
         """
         주제를 받아 금융 업무보고서 내용을 생성합니다.
 
+        일시적 오류는 CLAUDE_MAX_RETRIES번까지 재시도하며, 호출 결과(성공/실패, 지연 시간, 토큰 수 등)는
+        llm_calls 테이블에 기록됩니다.
+
         Args:
             topic: 보고서 주제
+            user_id: 요청한 사용자 ID (호출 기록용, 인증 없는 API면 None)
 
         Returns:
-            Dict[str, str]: 보고서 각 섹션의 내용
+            GenerationResult: 호출 사용량/성능(usage)과 보고서 각 섹션의 내용(content)
                 - title: 보고서 제목
                 - title_background: 배경 섹션 제목
                 - title_main_content: 주요내용 섹션 제목
@@ -84,17 +157,58 @@ class ClaudeClient:
 전문적이고 격식있는 문체로 작성하되, 명확하고 이해하기 쉽게 작성해주세요.
 금융 용어와 데이터를 적절히 활용하여 신뢰성을 높여주세요."""
 
-        try:
-            logger.info(f"Claude API 호출 시작 - 주제: {topic}")
-            logger.info(f"사용 모델: {self.model}")
+        logger.info(f"Claude API 호출 시작 - 주제: {topic}")
+        logger.info(f"사용 모델: {self.model}")
 
-            message = self.client.messages.create(
+        created_at = datetime.utcnow()
+        started = time.perf_counter()
+        first_token_at = None
+        retries = 0
+        usage = None
+
+        try:
+            while True:
+                try:
+                    message, first_token_at = self._stream_message(prompt)
+                    break
+                except Exception as e:
+                    delay = retry_delay(e, retries) if retries < CLAUDE_MAX_RETRIES else None
+                    if delay is None:
+                        raise
+                    retries += 1
+                    ERRORS.inc(stage="claude_retry", type=type(e).__name__)
+                    logger.warning(
+                        f"Claude API 일시 오류, {delay:.1f}초 후 재시도 ({retries}/{CLAUDE_MAX_RETRIES}): {str(e)}"
+                    )
+                    time.sleep(delay)
+
+            # 지연 시간은 재시도를 포함해 첫 시도부터 측정 (사용자가 기다린 시간)
+            finished = time.perf_counter()
+            CLAUDE_REQUEST_SECONDS.observe(finished - started, model=self.model)
+            if first_token_at is not None:
+                CLAUDE_FIRST_TOKEN_SECONDS.observe(first_token_at - started, model=self.model)
+
+            usage = LLMUsage(
                 model=self.model,
-                max_tokens=4096,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
+                stop_reason=message.stop_reason,
+                latency_ms=round((finished - started) * 1000, 1),
+                first_token_ms=round((first_token_at - started) * 1000, 1) if first_token_at else None,
+                input_tokens=message.usage.input_tokens,
+                output_tokens=message.usage.output_tokens,
+                cache_read_tokens=getattr(message.usage, "cache_read_input_tokens", None) or 0,
+                cache_creation_tokens=getattr(message.usage, "cache_creation_input_tokens", None) or 0,
+                retries=retries,
+                trace_id=current_trace_id(),
             )
+            LLMCallDB.enqueue_call(usage, user_id, created_at)
+            set_attributes(**{
+                "llm.model": self.model,
+                "llm.first_token_ms": usage.first_token_ms,
+                "llm.input_tokens": usage.input_tokens,
+                "llm.output_tokens": usage.output_tokens,
+                "llm.stop_reason": usage.stop_reason,
+                "llm.retries": retries,
+            })
 
             # 응답 텍스트 파싱
             content = message.content[0].text
@@ -106,25 +220,59 @@ class ClaudeClient:
             logger.info("=" * 80)
 
             logger.info(f"응답 길이: {len(content)} 문자")
-            logger.info(f"토큰 사용량 - Input: {message.usage.input_tokens}, Output: {message.usage.output_tokens}")
+            logger.info(f"토큰 사용량 - Input: {usage.input_tokens}, Output: {usage.output_tokens}")
 
-            # 토큰 사용량 저장
-            self.last_input_tokens = message.usage.input_tokens
-            self.last_output_tokens = message.usage.output_tokens
-            self.last_total_tokens = self.last_input_tokens + self.last_output_tokens
-
-            parsed_content = self._parse_report_content(content)
+            with REPORT_STAGE_SECONDS.time(stage="parse"):
+                parsed_content = self._parse_report_content(content)
 
             logger.info("내용 파싱 완료:")
             for key, value in parsed_content.items():
                 logger.info(f"  - {key}: {len(value)} 문자")
 
-            return parsed_content
+            return GenerationResult(parsed_content, usage)
 
         except Exception as e:
+            ERRORS.inc(stage="claude", type=type(e).__name__)
+            if usage is None:
+                # 응답을 받지 못한 호출도 기록 (재시도 후 실패, 인증 오류 등)
+                LLMCallDB.enqueue_call(
+                    LLMUsage(
+                        model=self.model,
+                        status="error",
+                        error_type=type(e).__name__,
+                        latency_ms=round((time.perf_counter() - started) * 1000, 1),
+                        first_token_ms=round((first_token_at - started) * 1000, 1) if first_token_at else None,
+                        retries=retries,
+                        trace_id=current_trace_id(),
+                    ),
+                    user_id,
+                    created_at
+                )
             logger.error(f"Claude API 호출 중 오류 발생: {str(e)}")
             raise Exception(f"Claude API 호출 중 오류 발생: {str(e)}")
 
+    def _stream_message(self, prompt: str):
+        """
+        스트리밍 요청 한 번 (첫 토큰까지의 시간을 재기 위해 스트리밍 사용)
+
+        Returns:
+            (최종 메시지, 첫 토큰을 받은 시각(perf_counter), 텍스트가 없으면 None)
+        """
+        first_token_at = None
+        with self.client.messages.stream(
+            model=self.model,
+            max_tokens=4096,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        ) as stream:
+            for _ in stream.text_stream:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+            message = stream.get_final_message()
+        return message, first_token_at
+
+    @traced("claude.parse_report_content")
     def _parse_report_content(self, content: str) -> Dict[str, str]:
         """
         Claude의 응답을 파싱하여 각 섹션으로 분리합니다.
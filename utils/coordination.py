@@ -0,0 +1,127 @@
+"""
+여러 워커 사이의 작업 조정 (리더 임대)
+
+운영 모드(serve.py)에서는 워커 프로세스 여러 개가 상태를 공유하지 않고 요청을 나눠 처리합니다.
+데이터베이스 초기화와 관리자 계정 생성은 파일 잠금(utils/startup.bootstrap_once)으로 한 번만 실행하고,
+주기 작업(보고서 파일 색인 동기화, 보관 정책, 만료된 폐기 토큰 정리)은 데이터베이스의
+리더 임대(leases 테이블)를 가진 워커 하나만 실행합니다.
+
+- 각 워커는 LEADER_LEASE_SECONDS / 3마다 임대 획득(리더는 갱신)을 시도
+- 리더가 정상 종료하면 임대를 반납하고, 비정상 종료하면 LEADER_LEASE_SECONDS 뒤 다른 워커가 이어받음
+- 데이터베이스 기반이므로 같은 PostgreSQL을 쓰는 여러 호스트 사이에서도 동작 (호스트 시계 동기화 필요)
+
+프로세스별 상태(토큰 버전 캐시, 폐기 토큰 필터, 한도 카운터)의 동기화는 모든 워커가 각자 실행합니다.
+"""
+import os
+import time
+import uuid
+import socket
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from database.lease_db import LeaseDB
+from utils.metrics import register_collector
+
+logger = logging.getLogger(__name__)
+
+# 리더 임대 유효 시간 (초, 리더가 비정상 종료하면 이 시간 뒤 다른 워커가 이어받음)
+LEADER_LEASE_SECONDS = int(os.getenv("LEADER_LEASE_SECONDS", "30"))
+
+LEADER_LEASE_NAME = "leader"
+
+
+class Coordinator:
+    """리더 임대로 주기 작업을 실행할 워커 하나를 선출"""
+
+    def __init__(self, name: str = LEADER_LEASE_NAME, ttl_seconds: int = LEADER_LEASE_SECONDS):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self._pid: Optional[int] = None
+        self._worker_id: Optional[str] = None
+        self._held_until = 0.0
+        self._stats = {"elected": 0, "lost": 0, "errors": 0}
+
+    @property
+    def worker_id(self) -> str:
+        """워커 ID (마스터에서 fork된 워커마다 다르도록 프로세스 ID가 바뀌면 새로 만듦)"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._worker_id = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:6]}"
+            self._held_until = 0.0
+        return self._worker_id
+
+    @property
+    def is_leader(self) -> bool:
+        """임대를 보유 중이고 마지막 갱신 기준으로 아직 만료되지 않았으면 True"""
+        return self._pid == os.getpid() and time.monotonic() < self._held_until
+
+    def elect(self) -> bool:
+        """
+        리더 임대 획득 또는 갱신 시도 (블로킹)
+
+        Returns:
+            bool: 이 워커가 리더이면 True
+        """
+        worker_id = self.worker_id
+        was_leader = self.is_leader
+        # 갱신 요청 전 시각 기준으로 만료를 잡아 데이터베이스보다 먼저 만료된 것으로 판단
+        started = time.monotonic()
+
+        try:
+            acquired = LeaseDB.acquire(self.name, worker_id, self.ttl_seconds)
+        except Exception as e:
+            # 갱신에 실패해도 기존 만료 시각까지는 리더로 간주
+            self._stats["errors"] += 1
+            logger.error(f"리더 임대 갱신 중 오류: {str(e)}")
+            return self.is_leader
+
+        if acquired:
+            self._held_until = started + self.ttl_seconds
+            if not was_leader:
+                self._stats["elected"] += 1
+                logger.info(f"리더 임대 획득: {worker_id} (주기 작업 실행)")
+        else:
+            self._held_until = 0.0
+            if was_leader:
+                self._stats["lost"] += 1
+                logger.warning(f"리더 임대를 잃었습니다: {worker_id}")
+
+        return acquired
+
+    def resign(self):
+        """리더 임대 반납 (종료 시, 다른 워커가 바로 이어받음)"""
+        if not self.is_leader:
+            return
+
+        self._held_until = 0.0
+        try:
+            LeaseDB.release(self.name, self.worker_id)
+        except Exception as e:
+            logger.error(f"리더 임대 반납 중 오류: {str(e)}")
+
+    def status(self) -> Dict:
+        """이 워커의 리더 여부와 전체 임대 목록"""
+        return {
+            "worker_id": self.worker_id,
+            "is_leader": self.is_leader,
+            "lease_seconds": self.ttl_seconds,
+            "stats": dict(self._stats),
+            "leases": LeaseDB.get_leases(),
+        }
+
+
+coordinator = Coordinator()
+
+register_collector(
+    lambda: [("hwp_leader", "gauge", "리더 임대 보유 여부 (전체 워커 합계는 1)", {}, int(coordinator.is_leader))]
+)
+
+
+async def run_leader_loop():
+    """리더 임대를 주기적으로 획득/갱신 (스레드에서 실행)"""
+    loop = asyncio.get_running_loop()
+
+    while True:
+        await asyncio.sleep(max(1, coordinator.ttl_seconds // 3))
+        await loop.run_in_executor(None, coordinator.elect)
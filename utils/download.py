@@ -0,0 +1,328 @@
+"""
+보고서 파일 다운로드 응답 생성
+
+로컬 저장소의 파일은 FileResponse(sendfile)로, 원격 저장소의 파일은
+전체를 메모리에 올리지 않고 조각 단위로 스트리밍합니다.
+
+조건부 요청과 범위 요청을 지원합니다.
+- ETag(내용 해시 또는 크기+수정 시각)와 Last-Modified 헤더
+- If-None-Match / If-Modified-Since가 일치하면 304
+- Range(단일 범위)는 206, If-Range가 맞지 않으면 전체 전송
+- 인증이 필요한 다운로드는 공유 캐시에 저장되지 않도록 Cache-Control: private, Vary: Authorization
+"""
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from utils.storage import READ_CHUNK_SIZE, Storage
+
+MEDIA_TYPE = "application/octet-stream"
+
+
+def content_disposition(filename: str) -> str:
+    """첨부 파일 Content-Disposition 헤더 값 (비ASCII 파일명은 RFC 5987 형식)"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def make_etag(size: int, mtime: float, content_hash: Optional[str] = None) -> str:
+    """강한 ETag (내용 해시가 있으면 해시, 없으면 크기+수정 시각)"""
+    if content_hash:
+        return f'"{content_hash}"'
+    return f'"{size:x}-{int(mtime * 1000000):x}"'
+
+
+def cache_headers(etag: str, mtime: Optional[float] = None, private: bool = True) -> Dict[str, str]:
+    """검증자 및 캐시 제어 헤더"""
+    headers = {
+        "ETag": etag,
+        # 캐시는 허용하되 사용할 때마다 검증 (권한이 바뀌었을 수 있으므로)
+        "Cache-Control": "private, no-cache" if private else "no-cache",
+        "Accept-Ranges": "bytes",
+    }
+    if private:
+        headers["Vary"] = "Authorization"
+    if mtime is not None:
+        headers["Last-Modified"] = formatdate(mtime, usegmt=True)
+    return headers
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match 목록에 ETag가 있는지 (약한 비교)"""
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    """If-Modified-Since 이후 변경되지 않았는지 (초 단위 비교)"""
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    return since is not None and int(mtime) <= int(since.timestamp())
+
+
+def is_not_modified(request: Request, etag: str, mtime: Optional[float] = None) -> bool:
+    """
+    조건부 요청이 캐시된 사본과 일치하는지 확인
+
+    If-None-Match가 있으면 If-Modified-Since는 무시합니다 (RFC 9110).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and mtime is not None:
+        return _not_modified_since(if_modified_since, mtime)
+
+    return False
+
+
+def not_modified_response(etag: str, mtime: Optional[float] = None, private: bool = True) -> Response:
+    """304 Not Modified 응답"""
+    return Response(status_code=304, headers=cache_headers(etag, mtime, private))
+
+
+def parse_range(request: Request, size: int, etag: str, mtime: float) -> Optional[Tuple[int, int]]:
+    """
+    Range 헤더 해석
+
+    Returns:
+        (시작, 끝) 바이트 위치(끝 포함). 범위 요청이 아니거나 무시해야 하면 None
+
+    Raises:
+        ValueError: 만족할 수 없는 범위 (416)
+    """
+    header = request.headers.get("range")
+    if not header or not header.startswith("bytes="):
+        return None
+
+    # If-Range가 현재 파일과 다르면 범위를 무시하고 전체 전송
+    if_range = request.headers.get("if-range")
+    if if_range:
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            if if_range != etag:
+                return None
+        else:
+            try:
+                if int(parsedate_to_datetime(if_range).timestamp()) != int(mtime):
+                    return None
+            except (TypeError, ValueError):
+                return None
+
+    spec = header[len("bytes="):].strip()
+    # 여러 범위(multipart/byteranges)는 지원하지 않으므로 전체 전송
+    if "," in spec:
+        return None
+
+    start_text, _, end_text = spec.partition("-")
+    start_text, end_text = start_text.strip(), end_text.strip()
+
+    # 형식이 잘못된 Range는 무시
+    if not (start_text.isdigit() or end_text.isdigit()):
+        return None
+    if (start_text and not start_text.isdigit()) or (end_text and not end_text.isdigit()):
+        return None
+
+    if start_text == "":
+        # 마지막 N 바이트
+        length = int(end_text)
+        if length == 0:
+            raise ValueError("빈 범위")
+        start, end = max(size - length, 0), size - 1
+    else:
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+        if start >= size:
+            raise ValueError("만족할 수 없는 범위")
+        if start > end:
+            return None
+
+    return start, min(end, size - 1)
+
+
+def _download_response(
+    request: Request,
+    filename: str,
+    size: int,
+    mtime: float,
+    etag: str,
+    private: bool,
+    read_range: Callable[[int, int], Iterable[bytes]],
+    full_response: Callable[[Dict[str, str]], Response]
+) -> Response:
+    """조건부/범위 요청을 처리한 다운로드 응답"""
+    if is_not_modified(request, etag, mtime):
+        return not_modified_response(etag, mtime, private)
+
+    headers = cache_headers(etag, mtime, private)
+    headers["Content-Disposition"] = content_disposition(filename)
+
+    try:
+        byte_range = parse_range(request, size, etag, mtime)
+    except ValueError:
+        return Response(
+            status_code=416,
+            headers={"Content-Range": f"bytes */{size}", **cache_headers(etag, mtime, private)}
+        )
+
+    if byte_range is None:
+        return full_response(headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(read_range(start, end), status_code=206, media_type=MEDIA_TYPE, headers=headers)
+
+
+def local_file_response(
+    request: Request,
+    path: str,
+    filename: str,
+    content_hash: Optional[str] = None,
+    private: bool = True
+) -> Response:
+    """
+    로컬 파일 다운로드 응답
+
+    Args:
+        request: 요청 (조건부/범위 헤더)
+        path: 파일 경로
+        filename: 다운로드 파일명
+        content_hash: 내용 해시 (있으면 ETag로 사용)
+        private: 인증이 필요한 다운로드인지
+    """
+    stat = os.stat(path)
+    etag = make_etag(stat.st_size, stat.st_mtime, content_hash)
+
+    def read_range(start: int, end: int):
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    return _download_response(
+        request, filename, stat.st_size, stat.st_mtime, etag, private, read_range,
+        lambda headers: FileResponse(
+            path=path, media_type=MEDIA_TYPE, headers=headers, stat_result=stat
+        )
+    )
+
+
+def stream_response(
+    chunks: Iterable[bytes],
+    filename: str,
+    size: Optional[int] = None,
+    media_type: str = MEDIA_TYPE
+) -> StreamingResponse:
+    """
+    바이트 조각을 그대로 내보내는 다운로드 응답
+
+    Args:
+        chunks: 파일 내용 조각
+        filename: 다운로드 파일명
+        size: 전체 크기 (모르면 None, chunked 전송)
+        media_type: 응답 Content-Type
+    """
+    headers = {"Content-Disposition": content_disposition(filename)}
+    if size is not None:
+        headers["Content-Length"] = str(size)
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+def storage_response(
+    request: Request,
+    storage: Storage,
+    key: str,
+    filename: str,
+    content_hash: Optional[str] = None,
+    private: bool = True
+) -> Optional[Response]:
+    """
+    저장소 파일 다운로드 응답
+
+    존재 확인과 크기/수정 시각 조회를 한 번의 stat으로 처리합니다.
+    블로킹 호출(원격 저장소는 HEAD 요청)이므로 비동기 핸들러에서는 스레드 풀에서 실행합니다.
+
+    Args:
+        request: 요청 (조건부/범위 헤더)
+        storage: 저장소 백엔드
+        key: 저장 키
+        filename: 다운로드 파일명
+        content_hash: 내용 해시 (있으면 ETag로 사용)
+        private: 인증이 필요한 다운로드인지
+
+    Returns:
+        Optional[Response]: FileResponse, StreamingResponse 또는 304/416 응답 (파일이 없으면 None)
+    """
+    if storage.local:
+        try:
+            return local_file_response(request, storage.local_path(key), filename, content_hash, private)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    info = storage.stat(key)
+    if info is None:
+        return None
+    etag = make_etag(info.size, info.mtime, content_hash)
+
+    def full_response(headers):
+        headers["Content-Length"] = str(info.size)
+        return StreamingResponse(storage.iter_chunks(key), media_type=MEDIA_TYPE, headers=headers)
+
+    return _download_response(
+        request, filename, info.size, info.mtime, etag, private,
+        lambda start, end: storage.iter_chunks(key, start, end),
+        full_response
+    )
+
+
+def archived_file_response(
+    request: Request,
+    storage: Storage,
+    archive_key: str,
+    data_offset: int,
+    size: int,
+    mtime: float,
+    filename: str,
+    private: bool = True
+) -> Response:
+    """
+    보관 묶음(STORED ZIP) 안의 파일 다운로드 응답
+
+    묶음을 풀지 않고 엔트리 내용 위치만 범위 읽기로 전송합니다.
+
+    Args:
+        request: 요청 (조건부/범위 헤더)
+        storage: 저장소 백엔드
+        archive_key: 묶음 저장 키
+        data_offset: 묶음 안에서 파일 내용이 시작하는 위치
+        size: 파일 크기
+        mtime: 원본 수정 시각
+        filename: 다운로드 파일명
+        private: 인증이 필요한 다운로드인지
+    """
+    etag = make_etag(size, mtime)
+
+    def read_range(start: int, end: int):
+        return storage.iter_chunks(archive_key, data_offset + start, data_offset + end)
+
+    def full_response(headers):
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(read_range(0, size - 1), media_type=MEDIA_TYPE, headers=headers)
+
+    return _download_response(request, filename, size, mtime, etag, private, read_range, full_response)
@@ -3,17 +3,38 @@ HWP 파일 처리 모듈
 HWPX 형식 파일을 열고, 내용을 수정하고, 저장하는 기능 제공
 """
 import os
+import re
+import copy
+import uuid
 import zipfile
-import shutil
 import xml.etree.ElementTree as ET
 from datetime import datetime
-from typing import Dict
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from utils.metrics import REPORT_STAGE_SECONDS
+from utils.tracing import traced
+from utils.zip_stream import ChunkSink
+
+# ZIP 엔트리 시각 고정 (같은 내용이면 항상 같은 바이트가 되도록)
+ZIP_ENTRY_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# (ZIP 내부 경로, 내용) 목록
+Entries = List[Tuple[str, bytes]]
+
+# 템플릿 플레이스홀더 ({{TITLE}} 등)
+PLACEHOLDER_PATTERN = re.compile(rb"\{\{[A-Z_]+\}\}")
 
 
 class HWPHandler:
     """HWPX 파일을 처리하는 핸들러 클래스"""
 
-    def __init__(self, template_path: str, temp_dir: str = "temp", output_dir: str = "output"):
+    def __init__(
+        self,
+        template_path: str,
+        temp_dir: str = "temp",
+        output_dir: str = "output",
+        preload: bool = False
+    ):
         """
         HWP 핸들러 초기화
 
@@ -21,10 +42,12 @@ class HWPHandler:
             template_path: HWPX 템플릿 파일 경로
             temp_dir: 임시 파일 디렉토리
             output_dir: 출력 파일 디렉토리
+            preload: 템플릿을 미리 읽어 검증하고 메모리에 보관 (앱 전체에서 공유하는 핸들러용)
         """
         self.template_path = template_path
         self.temp_dir = temp_dir
         self.output_dir = output_dir
+        self._template: Optional[Entries] = None
 
         if not os.path.exists(template_path):
             raise FileNotFoundError(f"템플릿 파일을 찾을 수 없습니다: {template_path}")
@@ -32,6 +55,48 @@ class HWPHandler:
         os.makedirs(temp_dir, exist_ok=True)
         os.makedirs(output_dir, exist_ok=True)
 
+        if preload:
+            self._template = self._extract_hwpx(template_path)
+            self.validate_template()
+
+    def with_output_dir(self, output_dir: str) -> "HWPHandler":
+        """미리 읽은 템플릿을 공유하면서 출력 디렉토리만 다른 핸들러"""
+        handler = copy.copy(self)
+        handler.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        return handler
+
+    def template_entries(self) -> Entries:
+        """템플릿 엔트리 (미리 읽었으면 메모리에서, 아니면 파일에서)"""
+        if self._template is not None:
+            return self._template
+        return self._extract_hwpx(self.template_path)
+
+    def validate_template(self) -> List[str]:
+        """
+        템플릿 구조 확인
+
+        Returns:
+            List[str]: 템플릿에 있는 플레이스홀더 목록
+
+        Raises:
+            ValueError: Contents/ 아래 XML이 없거나 플레이스홀더가 하나도 없는 경우
+        """
+        sections = [
+            data for arcname, data in self.template_entries()
+            if arcname.startswith("Contents/") and arcname.endswith(".xml")
+        ]
+        if not sections:
+            raise ValueError(f"템플릿에 Contents 디렉토리가 없습니다: {self.template_path}")
+
+        placeholders = sorted({
+            match.decode("ascii") for data in sections for match in PLACEHOLDER_PATTERN.findall(data)
+        })
+        if not placeholders:
+            raise ValueError(f"템플릿에 플레이스홀더가 없습니다: {self.template_path}")
+
+        return placeholders
+
     def generate_report(self, content: Dict[str, str], output_filename: str = None) -> str:
         """
         템플릿을 기반으로 보고서를 생성합니다.
@@ -48,59 +113,116 @@ class HWPHandler:
         Returns:
             str: 생성된 파일 경로
         """
-        # 출력 파일명 생성
+        # 출력 파일명 생성 (동시 요청에서도 겹치지 않도록 임의 접미사 추가)
         if not output_filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_filename = f"report_{timestamp}.hwpx"
+            output_filename = f"report_{timestamp}_{uuid.uuid4().hex[:8]}.hwpx"
 
         output_path = os.path.join(self.output_dir, output_filename)
 
-        # 임시 작업 디렉토리 생성
-        work_dir = os.path.join(self.temp_dir, f"work_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
-        os.makedirs(work_dir, exist_ok=True)
+        with open(output_path, 'wb') as f:
+            self.write_report(content, f)
 
-        try:
-            # 1. HWPX 파일 압축 해제
-            self._extract_hwpx(self.template_path, work_dir)
+        return output_path
 
-            # 2. 내용 치환
-            self._replace_content(work_dir, content)
+    def write_report(self, content: Dict[str, str], stream: BinaryIO):
+        """
+        보고서를 쓰기 가능한 스트림에 씁니다 (디스크의 작업 디렉토리를 거치지 않음).
+
+        되감을 수 있는 스트림(파일, BytesIO)이면 generate_report와 같은 바이트가 쓰이고,
+        되감을 수 없는 스트림이면 엔트리마다 데이터 디스크립터가 붙습니다.
 
-            # 3. 다시 압축
-            self._compress_to_hwpx(work_dir, output_path)
+        Args:
+            content: 보고서 내용 딕셔너리
+            stream: 출력 스트림
+        """
+        # 1. 템플릿 엔트리 읽기
+        entries = self.template_entries()
+
+        # 2. 내용 치환
+        with REPORT_STAGE_SECONDS.time(stage="render"):
+            entries = self._replace_content(entries, content)
+
+        # 3. 다시 압축
+        with REPORT_STAGE_SECONDS.time(stage="zip"):
+            self._compress_to_hwpx(entries, stream)
+
+    def iter_report(self, content: Dict[str, str]) -> Iterator[bytes]:
+        """
+        보고서 HWPX를 엔트리 단위로 만들면서 바이트 조각으로 내보냅니다.
 
-            return output_path
+        StreamingResponse에 넘기면 전체 압축이 끝나기 전에 첫 바이트가 전송됩니다.
 
-        finally:
-            # 임시 디렉토리 정리
-            if os.path.exists(work_dir):
-                shutil.rmtree(work_dir)
+        Args:
+            content: 보고서 내용 딕셔너리
 
-    def _extract_hwpx(self, hwpx_path: str, extract_dir: str):
+        Yields:
+            bytes: HWPX 파일의 연속된 조각
         """
-        HWPX 파일을 압축 해제합니다.
+        # 압축은 전송과 번갈아 진행되므로 내용 치환만 기록
+        with REPORT_STAGE_SECONDS.time(stage="render"):
+            entries = self._replace_content(self.template_entries(), content)
+
+        sink = ChunkSink()
+        with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for arcname, data in entries:
+                self._write_entry(zipf, arcname, data, self._compress_type(arcname))
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+
+        # 중앙 디렉토리
+        yield sink.drain()
+
+    @traced("hwp.extract_hwpx")
+    def _extract_hwpx(self, hwpx_path: str) -> Entries:
+        """
+        HWPX 파일의 엔트리를 메모리로 읽습니다.
+
+        mimetype을 맨 앞에 두고 나머지는 경로 순으로 정렬합니다
+        (같은 내용이면 항상 같은 파일이 만들어지도록).
 
         Args:
             hwpx_path: HWPX 파일 경로
-            extract_dir: 압축 해제 디렉토리
+
+        Returns:
+            Entries: (ZIP 내부 경로, 내용) 목록
         """
         with zipfile.ZipFile(hwpx_path, 'r') as zip_ref:
-            zip_ref.extractall(extract_dir)
+            names = [info.filename for info in zip_ref.infolist() if not info.is_dir()]
+            names.sort(key=self._entry_sort_key)
+            return [(name, zip_ref.read(name)) for name in names]
 
-    def _replace_content(self, work_dir: str, content: Dict[str, str]):
+    @staticmethod
+    def _entry_sort_key(arcname: str):
+        """
+        엔트리 정렬 키: mimetype 먼저, 각 디렉토리 안에서는 파일 다음 하위 디렉토리
+        (이름순 디렉토리 순회와 같은 순서)
         """
-        압축 해제된 HWPX의 XML 파일에서 플레이스홀더를 실제 내용으로 치환합니다.
+        parts = arcname.split('/')
+        return (
+            arcname != 'mimetype',
+            [(0, part) if i == len(parts) - 1 else (1, part) for i, part in enumerate(parts)]
+        )
+
+    @traced("hwp.replace_content")
+    def _replace_content(self, entries: Entries, content: Dict[str, str]) -> Entries:
+        """
+        Contents/ 아래 XML 엔트리의 플레이스홀더를 실제 내용으로 치환합니다.
 
         Args:
-            work_dir: 작업 디렉토리
+            entries: 템플릿 엔트리 목록
             content: 치환할 내용
+
+        Returns:
+            Entries: 치환된 엔트리 목록
         """
-        # 현재 날짜 추가
-        content["date"] = datetime.now().strftime("%Y년 %m월 %d일")
+        # 현재 날짜 추가 (재렌더링 시에는 저장된 작성일 유지)
+        if not content.get("date"):
+            content["date"] = datetime.now().strftime("%Y년 %m월 %d일")
 
         # Contents 디렉토리 내의 모든 XML 파일 처리
-        contents_dir = os.path.join(work_dir, "Contents")
-        if not os.path.exists(contents_dir):
+        if not any(arcname.startswith("Contents/") for arcname, _ in entries):
             raise FileNotFoundError("Contents 디렉토리를 찾을 수 없습니다.")
 
         # 플레이스홀더 매핑
@@ -120,47 +242,50 @@ class HWPHandler:
             "{{TITLE_SUMARY}}": content.get("title_summary", "요약")
         }
 
-        # 모든 XML 파일 순회
-        for root_dir, dirs, files in os.walk(contents_dir):
-            for filename in files:
-                if filename.endswith('.xml'):
-                    file_path = os.path.join(root_dir, filename)
-                    self._replace_in_file(file_path, placeholders)
+        return [
+            (arcname, self._replace_in_entry(data, placeholders))
+            if arcname.startswith("Contents/") and arcname.endswith('.xml') else (arcname, data)
+            for arcname, data in entries
+        ]
 
-    def _replace_in_file(self, file_path: str, placeholders: Dict[str, str]):
+    def _replace_in_entry(self, data: bytes, placeholders: Dict[str, str]) -> bytes:
         """
-        파일 내용에서 플레이스홀더를 치환합니다.
+        엔트리 내용에서 플레이스홀더를 치환합니다.
 
         Args:
-            file_path: 파일 경로
+            data: 엔트리 내용
             placeholders: 치환할 플레이스홀더 딕셔너리
+
+        Returns:
+            bytes: 치환된 내용 (치환할 것이 없으면 원본)
         """
         try:
-            # 파일을 텍스트로 읽어서 치환 (XML 파싱 대신 단순 텍스트 치환)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # 플레이스홀더 치환
-            modified = False
-            for placeholder, value in placeholders.items():
-                if placeholder in content:
-                    # 줄바꿈을 XML 형식에 맞게 변환
-                    value_formatted = self._format_for_hwp(value)
-                    content = content.replace(placeholder, value_formatted)
-                    modified = True
-
-            # 변경사항이 있으면 파일에 쓰기
-            if modified:
-                # 생성된 <hp:p> 태그들 중 중간 단락들의 linesegarray 제거
-                # (한글이 파일을 열 때 자동으로 재계산하도록)
-                content = self._clean_linesegarray(content)
-
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-
-        except Exception as e:
-            # XML 파싱 에러는 무시 (바이너리 파일일 수 있음)
-            pass
+            # 텍스트로 읽어서 치환 (XML 파싱 대신 단순 텍스트 치환)
+            content = data.decode('utf-8')
+        except UnicodeDecodeError:
+            # 바이너리 파일일 수 있으므로 그대로 둠
+            return data
+
+        # 플레이스홀더 치환
+        modified = False
+        for placeholder, value in placeholders.items():
+            if placeholder in content:
+                # 줄바꿈을 XML 형식에 맞게 변환
+                value_formatted = self._format_for_hwp(value)
+                content = content.replace(placeholder, value_formatted)
+                modified = True
+
+        # 변경사항이 없으면 원본 유지
+        if not modified:
+            return data
+
+        # 생성된 <hp:p> 태그들 중 중간 단락들의 linesegarray 제거
+        # (한글이 파일을 열 때 자동으로 재계산하도록)
+        content = self._clean_linesegarray(content)
+
+        # 텍스트 모드로 읽고 쓰던 이전 방식과 같이 줄바꿈을 \n으로 통일
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content.encode('utf-8')
 
     def _clean_linesegarray(self, content: str) -> str:
         """
@@ -236,66 +361,64 @@ class HWPHandler:
 
             return result
 
-    def _compress_to_hwpx(self, work_dir: str, output_path: str):
+    @classmethod
+    @traced("hwp.compress_to_hwpx")
+    def _compress_to_hwpx(cls, entries: Entries, output: Union[str, BinaryIO]):
         """
-        작업 디렉토리를 HWPX 파일로 압축합니다.
+        엔트리 목록을 HWPX 파일로 압축합니다.
 
         HWPX 표준: mimetype 파일은 압축하지 않고(STORED) 첫 번째 엔트리로 추가해야 함
 
         Args:
-            work_dir: 작업 디렉토리
-            output_path: 출력 HWPX 파일 경로
+            entries: (ZIP 내부 경로, 내용) 목록 (mimetype이 맨 앞)
+            output: 출력 HWPX 파일 경로 또는 쓰기 가능한 스트림
         """
-        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # 1. mimetype 파일을 먼저 압축하지 않고 추가 (HWPX 표준)
-            mimetype_path = os.path.join(work_dir, 'mimetype')
-            if os.path.exists(mimetype_path):
-                zipf.write(mimetype_path, 'mimetype', compress_type=zipfile.ZIP_STORED)
-
-            # 2. 나머지 파일들을 압축하여 추가
-            for root, dirs, files in os.walk(work_dir):
-                for file in files:
-                    # mimetype은 이미 추가했으므로 건너뛰기
-                    if file == 'mimetype' and root == work_dir:
-                        continue
-
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, work_dir)
-                    zipf.write(file_path, arcname, compress_type=zipfile.ZIP_DEFLATED)
-
-    def create_simple_template(self, output_path: str):
+        with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for arcname, data in entries:
+                cls._write_entry(zipf, arcname, data, cls._compress_type(arcname))
+
+    @staticmethod
+    def _compress_type(arcname: str) -> int:
+        """mimetype은 압축하지 않고(HWPX 표준) 나머지는 압축"""
+        return zipfile.ZIP_STORED if arcname == 'mimetype' else zipfile.ZIP_DEFLATED
+
+    @staticmethod
+    def _write_entry(zipf: zipfile.ZipFile, arcname: str, data: bytes, compress_type: int):
         """
-        간단한 HWPX 템플릿을 생성합니다.
-        (실제 한글 프로그램이 없을 때 테스트용으로 사용)
+        고정된 시각/권한의 ZIP 엔트리를 추가합니다.
 
         Args:
-            output_path: 출력 템플릿 경로
+            zipf: 대상 ZIP 파일
+            arcname: ZIP 내부 경로
+            data: 엔트리 내용
+            compress_type: 압축 방식
         """
-        work_dir = os.path.join(self.temp_dir, "template_creation")
-        os.makedirs(work_dir, exist_ok=True)
+        info = zipfile.ZipInfo(arcname, date_time=ZIP_ENTRY_DATE_TIME)
+        info.compress_type = compress_type
+        info.external_attr = 0o644 << 16
 
-        try:
-            # 기본 HWPX 구조 생성
-            self._create_hwpx_structure(work_dir)
+        zipf.writestr(info, data)
 
-            # 압축
-            self._compress_to_hwpx(work_dir, output_path)
+    @classmethod
+    def create_simple_template(cls, output_path: str):
+        """
+        간단한 HWPX 템플릿을 생성합니다.
+        (실제 한글 프로그램이 없을 때 테스트용으로 사용, 템플릿이 없어도 호출 가능)
 
-        finally:
-            if os.path.exists(work_dir):
-                shutil.rmtree(work_dir)
+        Args:
+            output_path: 출력 템플릿 경로
+        """
+        # 기본 HWPX 구조 생성 후 압축
+        cls._compress_to_hwpx(cls._create_hwpx_structure(), output_path)
 
-    def _create_hwpx_structure(self, work_dir: str):
+    @classmethod
+    def _create_hwpx_structure(cls) -> Entries:
         """
         기본 HWPX 파일 구조를 생성합니다.
 
-        Args:
-            work_dir: 작업 디렉토리
+        Returns:
+            Entries: (ZIP 내부 경로, 내용) 목록
         """
-        # Contents 디렉토리 생성
-        contents_dir = os.path.join(work_dir, "Contents")
-        os.makedirs(contents_dir, exist_ok=True)
-
         # section0.xml 생성 (메인 문서)
         section_content = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <section>
@@ -343,13 +466,13 @@ class HWPHandler:
     </p>
 </section>"""
 
-        section_path = os.path.join(contents_dir, "section0.xml")
-        with open(section_path, 'w', encoding='utf-8') as f:
-            f.write(section_content)
-
         # version.xml 생성
         version_content = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <version>5.0.0.0</version>"""
 
-        with open(os.path.join(work_dir, "version.xml"), 'w', encoding='utf-8') as f:
-            f.write(version_content)
+        entries = [
+            ("Contents/section0.xml", section_content.encode('utf-8')),
+            ("version.xml", version_content.encode('utf-8')),
+        ]
+        entries.sort(key=lambda entry: cls._entry_sort_key(entry[0]))
+        return entries
@@ -0,0 +1,612 @@
+"""
+Prometheus 지표 (/metrics)
+
+prometheus_client 없이 텍스트 노출 형식(0.0.4)으로 직접 출력합니다.
+기록은 잠금 하나와 덧셈뿐이라(수 마이크로초 이하) 운영 환경에서 항상 켜 둘 수 있고,
+풀 사용률처럼 이미 다른 곳에서 집계하는 값은 수집 시점에만 읽습니다 (register_collector).
+
+워커가 여러 개이면(serve.py가 METRICS_DIR 설정) 각 워커가 METRICS_FLUSH_SECONDS마다 스냅샷을 파일로 쓰고,
+/metrics는 모든 워커의 스냅샷을 합쳐 응답합니다 (종료된 워커의 게이지는 제외, 카운터는 유지).
+스냅샷 이름은 pid와 프로세스 시작 시각이라 pid가 재사용되어도 다른 워커의 스냅샷을 덮어쓰지 않으며,
+종료된 워커의 카운터/히스토그램은 compacted.json에 합친 뒤 스냅샷을 지웁니다.
+"""
+import os
+import json
+import time
+import glob
+import asyncio
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: 스냅샷 정리(compaction) 없이 합계만 계산
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 워커별 스냅샷 디렉토리 (비어 있으면 이 프로세스의 지표만 응답)
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+
+# 스냅샷 쓰기 간격 (초)
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+# 종료된 워커의 카운터/히스토그램을 합쳐 두는 파일 이름 (METRICS_DIR 안)
+COMPACTED_NAME = "compacted"
+
+# /metrics 조회 토큰 (설정하면 Authorization: Bearer <토큰> 필요)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# 텍스트 노출 형식 (charset은 응답에서 붙임)
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# 지연 시간 히스토그램 구간 (초, Claude API 호출은 수십 초까지)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# 수집 시점에 읽는 값: (이름, 종류, 설명, 레이블, 값)
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+LabelKey = Tuple[str, ...]
+
+
+class Family:
+    """같은 이름의 지표 묶음 (레이블 값별 값)"""
+
+    def __init__(self, name: str, kind: str, help: str, labelnames: Sequence[str], buckets=None):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else None
+        # 카운터/게이지: 값, 히스토그램: [구간별 개수..., +Inf 개수, 합계]
+        self.values: Dict[LabelKey, object] = {}
+
+    def merge(self, other: "Family"):
+        """다른 워커의 값 더하기"""
+        for key, value in other.values.items():
+            current = self.values.get(key)
+            if current is None:
+                self.values[key] = list(value) if isinstance(value, list) else value
+            elif isinstance(current, list):
+                self.values[key] = [a + b for a, b in zip(current, value)]
+            else:
+                self.values[key] = current + value
+
+    def to_dict(self) -> Dict:
+        return {
+            "kind": self.kind,
+            "help": self.help,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets) if self.buckets else None,
+            "values": [[list(key), value] for key, value in self.values.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict) -> "Family":
+        family = cls(name, data["kind"], data["help"], data["labelnames"], data["buckets"])
+        family.values = {tuple(key): value for key, value in data["values"]}
+        return family
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), registry: "Registry" = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, object] = {}
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, object]) -> LabelKey:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name}: 레이블 {self.labelnames}가 필요합니다 (받은 값: {tuple(labels)})")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def family(self) -> Family:
+        family = Family(self.name, self.kind, self.help, self.labelnames, getattr(self, "buckets", None))
+        with self._lock:
+            family.values = {key: list(value) if isinstance(value, list) else value for key, value in self._values.items()}
+        return family
+
+
+class Counter(_Metric):
+    """증가만 하는 값 (이름은 _total로 끝나도록)"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """현재 값 (진행 중인 작업 수 등)"""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """블록 실행 중에만 1 증가"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """관측값 분포 (구간별 개수, 합계)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS, **kwargs):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, **kwargs)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """블록 실행 시간 기록 (예외가 나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+class Registry:
+    """지표와 수집 함수 목록"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"이미 등록된 지표입니다: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def unregister_collector(self, collector: Callable[[], Iterable[Sample]]):
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def collect(self) -> Dict[str, Family]:
+        """현재 값 (수집 함수 결과 포함)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        families = {metric.name: metric.family() for metric in metrics}
+        for collector in collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                logger.warning(f"지표 수집 실패: {str(e)}")
+                continue
+            for name, kind, help, labels, value in samples:
+                family = families.get(name)
+                if family is None:
+                    family = families[name] = Family(name, kind, help, sorted(labels))
+                family.values[tuple(str(labels[label]) for label in family.labelnames)] = value
+
+        return families
+
+
+REGISTRY = Registry()
+
+
+def register_collector(collector: Callable[[], Iterable[Sample]]):
+    """수집 시점에 값을 읽는 함수 등록 (풀 사용률 등, 기록 비용 없음)"""
+    REGISTRY.register_collector(collector)
+
+
+def unregister_collector(collector: Callable[[], Iterable[Sample]]):
+    REGISTRY.unregister_collector(collector)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render(families: Dict[str, Family]) -> str:
+    """Prometheus 텍스트 노출 형식으로 변환"""
+    lines = []
+    for name in sorted(families):
+        family = families[name]
+        lines.append(f"# HELP {name} {family.help}")
+        lines.append(f"# TYPE {name} {family.kind}")
+
+        for key in sorted(family.values):
+            value = family.values[key]
+            if family.kind != "histogram":
+                lines.append(f"{name}{_labels(family.labelnames, key)} {_number(value)}")
+                continue
+
+            cumulative = 0
+            for bound, count in zip(family.buckets + (float("inf"),), value[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{name}_bucket{_labels(family.labelnames, key, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(family.labelnames, key)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(family.labelnames, key)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _process_start_time(pid: int) -> Optional[str]:
+    """프로세스 시작 시각 (Linux /proc의 클럭 틱, 알 수 없으면 None)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # 두 번째 필드(실행 파일 이름)에 공백이 있을 수 있으므로 마지막 ')' 뒤부터 셈 (22번째 필드)
+    return stat.rsplit(")", 1)[-1].split()[19]
+
+
+_worker: Optional[Tuple[int, str]] = None
+
+
+def _worker_id() -> str:
+    """이 워커의 스냅샷 이름 (<pid>-<시작 시각>, fork한 워커는 새로 계산)"""
+    global _worker
+    pid = os.getpid()
+    if _worker is None or _worker[0] != pid:
+        # /proc이 없으면 처음 기록한 시각을 사용 (다른 워커가 시작 시각을 확인할 수 없음을 't'로 표시)
+        started = _process_start_time(pid) or f"t{time.time_ns()}"
+        _worker = (pid, f"{pid}-{started}")
+    return _worker[1]
+
+
+def _snapshot_path(name: str) -> str:
+    return os.path.join(METRICS_DIR, f"{name}.json")
+
+
+def _write_json(path: str, data):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def write_snapshot():
+    """이 워커의 지표를 METRICS_DIR에 기록 (다른 워커가 /metrics 응답에 합침)"""
+    if not METRICS_DIR:
+        return
+
+    data = {name: family.to_dict() for name, family in REGISTRY.collect().items()}
+    _write_json(_snapshot_path(_worker_id()), data)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _worker_alive(worker_id: str) -> bool:
+    """스냅샷을 쓴 워커가 살아 있는지 (같은 pid를 재사용한 다른 프로세스는 종료로 판단)"""
+    pid, _, started = worker_id.partition("-")
+    if not _pid_alive(int(pid)):
+        return False
+    if not started or started.startswith("t"):
+        return True
+    current = _process_start_time(int(pid))
+    return current is None or current == started
+
+
+@contextmanager
+def _snapshot_lock(exclusive: bool):
+    """
+    스냅샷 디렉토리 잠금 (정리는 배타적, 읽기는 공유)
+
+    정리 중인 스냅샷을 두 번 세거나 빠뜨리지 않도록 합니다. fcntl이 없으면 잠그지 않습니다.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    with open(os.path.join(METRICS_DIR, ".lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _load_json(path: str):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (ValueError, OSError):
+        return None
+
+
+def _load_compacted() -> Dict:
+    """정리된 카운터/히스토그램 ({"workers": 합친 워커 이름 목록, "families": 지표})"""
+    data = _load_json(_snapshot_path(COMPACTED_NAME))
+    return data if isinstance(data, dict) else {"workers": [], "families": {}}
+
+
+def _merge_into(merged: Dict[str, Family], data: Dict, include_gauges: bool = True):
+    for name, family_data in data.items():
+        family = Family.from_dict(name, family_data)
+        # 종료된 워커의 게이지(진행 중인 작업 수 등)는 더 이상 유효하지 않음
+        if family.kind == "gauge" and not include_gauges:
+            continue
+        if name in merged:
+            merged[name].merge(family)
+        else:
+            merged[name] = family
+
+
+def compact_snapshots(worker_ids: Iterable[str]):
+    """
+    종료된 워커의 카운터/히스토그램을 compacted.json에 합치고 스냅샷 삭제
+
+    합친 워커 이름을 함께 기록하므로 스냅샷 삭제 전에 중단되어도 다시 세지 않습니다.
+    """
+    if fcntl is None:
+        return
+
+    with _snapshot_lock(exclusive=True):
+        compacted = _load_compacted()
+        folded = set(compacted["workers"])
+        families = {name: Family.from_dict(name, data) for name, data in compacted["families"].items()}
+
+        for worker_id in worker_ids:
+            if worker_id in folded:
+                continue
+            data = _load_json(_snapshot_path(worker_id))
+            if data is None:
+                continue
+            _merge_into(families, data, include_gauges=False)
+            folded.add(worker_id)
+
+        # 삭제가 끝난 스냅샷은 목록에서 제외 (목록이 계속 늘지 않음)
+        folded = {w for w in folded if os.path.exists(_snapshot_path(w))}
+        _write_json(_snapshot_path(COMPACTED_NAME), {
+            "workers": sorted(folded),
+            "families": {name: family.to_dict() for name, family in families.items()},
+        })
+        for worker_id in folded:
+            try:
+                os.remove(_snapshot_path(worker_id))
+            except FileNotFoundError:
+                pass
+
+
+def collect_all() -> Dict[str, Family]:
+    """전체 워커의 지표 (METRICS_DIR이 없으면 이 프로세스만)"""
+    if not METRICS_DIR:
+        return REGISTRY.collect()
+
+    # 이 워커는 최신 값을, 다른 워커는 마지막 스냅샷(최대 METRICS_FLUSH_SECONDS 전)을 사용
+    write_snapshot()
+
+    merged: Dict[str, Family] = {}
+    dead = []
+    with _snapshot_lock(exclusive=False):
+        compacted = _load_compacted()
+        folded = set(compacted["workers"])
+        _merge_into(merged, compacted["families"])
+
+        for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+            worker_id = os.path.splitext(os.path.basename(path))[0]
+            if worker_id == COMPACTED_NAME or worker_id in folded:
+                continue
+            try:
+                alive = _worker_alive(worker_id)
+            except ValueError:
+                continue
+            data = _load_json(path)
+            if data is None:
+                continue
+
+            if not alive:
+                dead.append(worker_id)
+            _merge_into(merged, data, include_gauges=alive)
+
+    if dead:
+        try:
+            compact_snapshots(dead)
+        except OSError as e:
+            logger.warning(f"종료된 워커의 지표 스냅샷 정리 실패: {str(e)}")
+
+    return merged
+
+
+def render_latest() -> str:
+    """/metrics 응답 본문"""
+    return render(collect_all())
+
+
+async def run_metrics_flush_loop():
+    """워커별 스냅샷을 주기적으로 기록 (METRICS_DIR 설정 시, 스레드에서 실행)"""
+    loop = asyncio.get_running_loop()
+
+    while METRICS_DIR:
+        await asyncio.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            await loop.run_in_executor(None, write_snapshot)
+        except Exception as e:
+            logger.error(f"지표 스냅샷 기록 중 오류: {str(e)}")
+
+
+# ---------------------------------------------------------------------------
+# 애플리케이션 지표
+# ---------------------------------------------------------------------------
+
+CLAUDE_FIRST_TOKEN_SECONDS = Histogram(
+    "hwp_claude_first_token_seconds", "Claude API 요청부터 첫 토큰까지 걸린 시간", ["model"]
+)
+CLAUDE_REQUEST_SECONDS = Histogram(
+    "hwp_claude_request_seconds", "Claude API 요청부터 응답 완료까지 걸린 시간", ["model"]
+)
+CLAUDE_TOKENS = Counter(
+    "hwp_claude_tokens_total", "Claude API 토큰 사용량", ["model", "user_class", "direction"]
+)
+REPORT_STAGE_SECONDS = Histogram(
+    "hwp_report_stage_seconds", "보고서 생성 단계별 시간 (parse, render, zip, db_write)", ["stage"]
+)
+GENERATIONS_IN_FLIGHT = Gauge(
+    "hwp_generations_in_flight", "진행 중인 보고서 생성 수"
+)
+ERRORS = Counter(
+    "hwp_errors_total", "단계별 오류 수 (예외 종류별)", ["stage", "type"]
+)
+HTTP_REQUESTS = Counter(
+    "hwp_http_requests_total", "HTTP 요청 수", ["method", "route", "status"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "hwp_http_request_seconds", "HTTP 요청 처리 시간 (응답 본문 전송 완료까지)", ["route"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "hwp_http_requests_in_flight", "처리 중인 HTTP 요청 수"
+)
+DOWNLOAD_SECONDS = Histogram(
+    "hwp_download_seconds", "다운로드 응답 전송 시간", ["route"]
+)
+DOWNLOAD_BYTES = Counter(
+    "hwp_download_bytes_total", "다운로드 응답으로 보낸 바이트 수 (전송 위임 시 0)", ["route"]
+)
+
+
+def user_class(user) -> str:
+    """토큰 사용량 레이블용 사용자 구분 (사용자 ID는 레이블로 쓰지 않음)"""
+    if user is None:
+        return "anonymous"
+    return "admin" if user.is_admin else "user"
+
+
+def record_tokens(model: str, user, input_tokens: int, output_tokens: int):
+    """Claude API 토큰 사용량 기록"""
+    label = user_class(user)
+    CLAUDE_TOKENS.inc(input_tokens, model=model, user_class=label, direction="input")
+    CLAUDE_TOKENS.inc(output_tokens, model=model, user_class=label, direction="output")
+
+
+def _is_download_route(route: str) -> bool:
+    return "/download" in route or route.startswith("/api/reports/signed")
+
+
+class MetricsMiddleware:
+    """
+    HTTP 요청 수/처리 시간, 다운로드 바이트/시간 기록 (ASGI 미들웨어)
+
+    경로는 매칭된 라우트 템플릿(/api/reports/download/{report_id})으로 기록해 레이블 수를 제한합니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        sent = 0
+
+        async def send_wrapper(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            ERRORS.inc(stage="http", type=type(e).__name__)
+            raise
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            elapsed = time.perf_counter() - started
+            route = getattr(scope.get("route"), "path", None) or "other"
+
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status)
+            HTTP_REQUEST_SECONDS.observe(elapsed, route=route)
+            if status < 400 and _is_download_route(route):
+                DOWNLOAD_SECONDS.observe(elapsed, route=route)
+                DOWNLOAD_BYTES.inc(sent, route=route)
+
+
+def pool_samples(pool: str, size: int, busy: int, queued: int) -> List[Sample]:
+    """작업 풀 사용률 (수집 함수에서 사용)"""
+    labels = {"pool": pool}
+    return [
+        ("hwp_pool_size", "gauge", "작업 풀 최대 크기", labels, size),
+        ("hwp_pool_busy", "gauge", "작업 풀에서 실행 중인 작업 수", labels, busy),
+        ("hwp_pool_queued", "gauge", "작업 풀에서 대기 중인 작업 수", labels, queued),
+    ]
+
+
+def _collect_db_pool() -> Iterable[Sample]:
+    """데이터베이스 연결 풀 사용률 (PostgreSQL만)"""
+    from database.backends import get_backend
+
+    stats = get_backend().pool_stats()
+    if not stats:
+        return []
+    return pool_samples("db", stats["size"], stats["busy"], stats["waiting"])
+
+
+register_collector(_collect_db_pool)
@@ -0,0 +1,163 @@
+"""
+보고서 파일 전송 위임 (reverse proxy / 서명 URL)
+
+느린 클라이언트에게 파일을 보내는 동안 uvicorn 워커가 묶이지 않도록,
+권한 확인이 끝난 뒤 파일 전송을 다른 곳에 맡깁니다.
+
+DOWNLOAD_OFFLOAD:
+    none        Python이 직접 전송 (기본값)
+    x-accel     nginx 내부 리다이렉트 (X-Accel-Redirect: DOWNLOAD_ACCEL_PREFIX/<키>)
+    x-sendfile  Apache mod_xsendfile, lighttpd 등 (X-Sendfile: <절대 경로>)
+    signed      짧게 만료되는 서명 URL로 307 리다이렉트 (S3는 presigned URL)
+
+x-accel/x-sendfile은 로컬 저장소 파일에만 적용되며, 그 밖의 경우는 Python이 직접 전송합니다.
+"""
+import os
+import hmac
+import time
+import base64
+import hashlib
+from typing import Optional
+from urllib.parse import quote, urlencode
+
+from fastapi import Request
+from fastapi.responses import RedirectResponse, Response
+
+from utils.download import MEDIA_TYPE, content_disposition, make_etag, storage_response
+from utils.storage import Storage
+
+# 전송 위임 방식
+OFFLOAD_MODE = os.getenv("DOWNLOAD_OFFLOAD", "none").lower()
+
+# nginx의 internal location 경로 (저장소 루트 디렉토리에 매핑)
+ACCEL_PREFIX = os.getenv("DOWNLOAD_ACCEL_PREFIX", "/protected-reports").rstrip("/")
+
+# 서명 URL 유효 시간 (초)
+SIGNED_URL_TTL = int(os.getenv("DOWNLOAD_URL_TTL", "300"))
+
+# 서명 URL 경로
+SIGNED_URL_PATH = "/api/reports/signed"
+
+
+def _signing_key() -> bytes:
+    """서명 키 (DOWNLOAD_SIGNING_KEY, 없으면 JWT 비밀키)"""
+    from utils.auth import SECRET_KEY
+
+    return (os.getenv("DOWNLOAD_SIGNING_KEY") or SECRET_KEY).encode("utf-8")
+
+
+def _signature(key: str, filename: str, expires: int) -> str:
+    """저장 키, 파일명, 만료 시각에 대한 HMAC-SHA256 서명"""
+    message = f"{key}\n{filename}\n{expires}".encode("utf-8")
+    digest = hmac.new(_signing_key(), message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def sign_download_url(key: str, filename: str, expires_in: int = SIGNED_URL_TTL) -> str:
+    """
+    앱이 직접 제공하는 서명 다운로드 URL 생성
+
+    Args:
+        key: 저장 키
+        filename: 다운로드 파일명
+        expires_in: 유효 시간 (초)
+
+    Returns:
+        str: /api/reports/signed/<키>?filename=...&expires=...&signature=...
+    """
+    expires = int(time.time()) + expires_in
+    query = urlencode({
+        "filename": filename,
+        "expires": expires,
+        "signature": _signature(key, filename, expires),
+    })
+    return f"{SIGNED_URL_PATH}/{quote(key)}?{query}"
+
+
+def verify_download_signature(key: str, filename: str, expires: int, signature: str) -> bool:
+    """서명 URL 검증 (만료 또는 위조 시 False)"""
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(_signature(key, filename, expires), signature)
+
+
+def offload_response(
+    storage: Storage,
+    key: str,
+    filename: str,
+    content_hash: Optional[str] = None,
+    private: bool = True
+) -> Optional[Response]:
+    """
+    설정된 방식으로 파일 전송을 위임하는 응답
+
+    Args:
+        storage: 저장소 백엔드
+        key: 저장 키 (로컬 저장소는 'output/...' 경로도 허용)
+        filename: 다운로드 파일명
+        content_hash: 내용 해시 (있으면 ETag로 사용)
+        private: 인증이 필요한 다운로드인지
+
+    Returns:
+        Optional[Response]: 위임 응답 (위임하지 않으면 None, 호출자가 직접 전송)
+    """
+    if OFFLOAD_MODE in ("x-accel", "x-sendfile"):
+        if not storage.local:
+            return None
+
+        try:
+            key = storage.normalize_key(key)
+        except ValueError:
+            # 저장소 밖의 파일은 위임하지 않음
+            return None
+
+        headers = {
+            "Content-Disposition": content_disposition(filename),
+            "Cache-Control": "private, no-cache" if private else "no-cache",
+        }
+        if private:
+            headers["Vary"] = "Authorization"
+        if content_hash:
+            headers["ETag"] = make_etag(0, 0, content_hash)
+
+        if OFFLOAD_MODE == "x-accel":
+            headers["X-Accel-Redirect"] = f"{ACCEL_PREFIX}/{quote(key)}"
+        else:
+            headers["X-Sendfile"] = os.path.abspath(storage.local_path(key))
+
+        return Response(media_type=MEDIA_TYPE, headers=headers)
+
+    if OFFLOAD_MODE == "signed":
+        url = storage.presigned_url(key, filename, SIGNED_URL_TTL)
+        if url is None:
+            try:
+                url = sign_download_url(storage.normalize_key(key), filename)
+            except ValueError:
+                return None
+
+        # 서명 URL은 재사용되면 안 되므로 리다이렉트 자체는 캐시하지 않음
+        return RedirectResponse(url, status_code=307, headers={"Cache-Control": "no-store"})
+
+    return None
+
+
+def storage_download(
+    request: Request,
+    storage: Storage,
+    key: str,
+    filename: str,
+    content_hash: Optional[str] = None,
+    private: bool = True
+) -> Optional[Response]:
+    """
+    저장소 파일 다운로드 응답 (설정된 경우 전송 위임)
+
+    파일 정보 조회(stat)를 한 번만 하는 블로킹 함수이므로 스레드 풀에서 실행합니다.
+
+    Returns:
+        Optional[Response]: 다운로드 응답 (파일이 없으면 None)
+    """
+    response = storage_response(request, storage, key, filename, content_hash, private)
+    if response is None:
+        return None
+    return offload_response(storage, key, filename, content_hash, private) or response
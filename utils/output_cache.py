@@ -0,0 +1,118 @@
+"""
+지연 생성(lazy) 보고서 파일 캐시
+
+REPORT_LAZY_RENDER가 켜져 있으면 보고서 생성 시 HWPX를 만들지 않고 내용만 저장합니다.
+첫 다운로드 때 저장된 내용으로 HWPX를 만들어 캐시 디렉토리에 두며,
+캐시 용량을 넘으면 가장 오래 사용되지 않은 파일부터 삭제합니다.
+삭제된 파일은 다음 다운로드 때 다시 생성됩니다.
+캐시 파일도 내용 해시로 이름을 정하므로 내용이 같은 보고서는 파일 하나를 공유합니다.
+"""
+import os
+import logging
+import threading
+import uuid
+from typing import Callable
+
+from utils.blob_store import BlobStore
+from utils.storage import LocalStorage
+
+logger = logging.getLogger(__name__)
+
+# 지연 생성 모드 사용 여부
+LAZY_RENDER = os.getenv("REPORT_LAZY_RENDER", "false").lower() in ("1", "true", "yes")
+
+# 캐시 디렉토리 및 최대 용량 (기본 1GB)
+CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "output/cache")
+CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+
+class ReportFileCache:
+    """다시 만들 수 있는 보고서 파일을 담는 LRU 디스크 캐시"""
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        """
+        Args:
+            directory: 캐시 디렉토리
+            max_bytes: 캐시 최대 용량 (바이트)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # 캐시는 노드마다 로컬 디스크에 둠 (없으면 저장된 내용으로 다시 생성)
+        self.store = BlobStore(LocalStorage(directory), prefix="")
+        self._lock = threading.Lock()
+
+    def contains(self, path: str) -> bool:
+        """캐시 디렉토리 안의 파일인지 확인"""
+        directory = os.path.abspath(self.directory)
+        return os.path.commonpath([directory, os.path.abspath(path)]) == directory
+
+    def materialize(self, report_id: int, render: Callable[[str, str], str]) -> str:
+        """
+        보고서 파일을 캐시에 생성
+
+        임시 파일명으로 만든 뒤 원자적으로 이름을 바꾸므로 여러 워커가 동시에
+        생성해도 반쯤 쓰인 파일이 노출되지 않습니다.
+
+        Args:
+            report_id: 보고서 ID
+            render: render(output_dir, output_filename) -> 생성된 파일 경로
+
+        Returns:
+            str: 캐시 파일 경로
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        temp_path = render(self.directory, f".report_{report_id}.{uuid.uuid4().hex}.tmp")
+        _, key, _ = self.store.put(temp_path)
+        final_path = self.store.storage.local_path(key)
+
+        self.evict(keep=final_path)
+        return final_path
+
+    def touch(self, path: str):
+        """사용 시각 갱신 (LRU 기준)"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def evict(self, keep: str = None) -> int:
+        """
+        용량을 넘으면 오래 사용되지 않은 파일부터 삭제
+
+        Args:
+            keep: 삭제하지 않을 파일 경로 (방금 생성한 파일)
+
+        Returns:
+            int: 삭제한 파일 수
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for _, key, size, mtime in self.store.iter_blobs():
+                entries.append((mtime, size, self.store.storage.local_path(key)))
+                total += size
+
+            if total <= self.max_bytes:
+                return 0
+
+            removed = 0
+            keep = os.path.abspath(keep) if keep else None
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if keep and os.path.abspath(path) == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                    removed += 1
+                except OSError:
+                    pass
+
+            if removed:
+                logger.info(f"보고서 캐시에서 {removed}개 파일을 삭제했습니다.")
+            return removed
+
+
+report_cache = ReportFileCache()
@@ -0,0 +1,84 @@
+"""
+저장소 최상위 보고서 파일 목록 색인 (/api/reports)
+
+- 앱이 파일을 저장하면 store_output_file(record_output_file)로 색인을 바로 갱신
+- 앱 밖에서 추가/삭제된 파일은 reconcile_output_index로 동기화
+  (reconcile_output_files.py, 시작 시 색인이 비어 있을 때, 또는 주기 실행)
+"""
+import os
+import asyncio
+import logging
+from typing import Iterator, Optional, Tuple
+
+from database.output_file_db import OutputFileDB
+from utils.coordination import coordinator
+from utils.storage import Storage, StorageObject, get_storage
+
+logger = logging.getLogger(__name__)
+
+# 주기적 동기화 간격 (초, 0이면 사용 안 함)
+RECONCILE_INTERVAL = int(os.getenv("OUTPUT_INDEX_RECONCILE_INTERVAL", "0"))
+
+
+def iter_output_files(storage: Optional[Storage] = None) -> Iterator[StorageObject]:
+    """저장소 최상위의 .hwpx 파일 (blobs/, cache/ 등 하위 경로 제외)"""
+    storage = storage or get_storage()
+    for obj in storage.iter_objects(recursive=False):
+        if obj.key.endswith(".hwpx"):
+            yield obj
+
+
+def record_output_file(filename: str, storage: Optional[Storage] = None):
+    """저장소에 저장한 파일을 색인에 반영"""
+    storage = storage or get_storage()
+    info = storage.stat(filename)
+    if info is not None:
+        OutputFileDB.upsert(filename, info.size, info.mtime)
+
+
+def store_output_file(filename: str, source_path: str, storage: Optional[Storage] = None):
+    """
+    로컬 파일을 저장소에 저장하고 색인에 반영
+
+    업로드와 색인 DB 기록이 모두 블로킹 호출이므로 비동기 핸들러에서는 스레드 풀에서 실행합니다.
+    """
+    storage = storage or get_storage()
+    storage.put_file(filename, source_path)
+    record_output_file(filename, storage)
+
+
+def reconcile_output_index(dry_run: bool = False) -> Tuple[int, int, int]:
+    """
+    저장소 목록과 색인 동기화
+
+    Returns:
+        Tuple[int, int, int]: (추가, 수정, 삭제) 건수
+    """
+    return OutputFileDB.reconcile(iter_output_files(), dry_run=dry_run)
+
+
+def _reconcile_logged():
+    """동기화 실행 후 결과 로그"""
+    try:
+        added, updated, removed = reconcile_output_index()
+        logger.info(f"보고서 파일 색인 동기화: 추가 {added}, 수정 {updated}, 삭제 {removed}")
+    except Exception as e:
+        logger.error(f"보고서 파일 색인 동기화 중 오류: {str(e)}")
+
+
+async def run_reconcile_loop():
+    """
+    시작 시 색인이 비어 있으면 한 번 동기화하고,
+    RECONCILE_INTERVAL이 설정되어 있으면 주기적으로 동기화 (저장소 나열은 스레드에서 실행)
+
+    워커가 여러 개이면 리더 워커만 실행합니다.
+    """
+    loop = asyncio.get_running_loop()
+
+    if coordinator.is_leader and await loop.run_in_executor(None, OutputFileDB.count) == 0:
+        await loop.run_in_executor(None, _reconcile_logged)
+
+    while RECONCILE_INTERVAL > 0:
+        await asyncio.sleep(RECONCILE_INTERVAL)
+        if coordinator.is_leader:
+            await loop.run_in_executor(None, _reconcile_logged)
@@ -0,0 +1,130 @@
+"""
+비밀번호 해싱 전용 스레드 풀
+
+bcrypt 해싱/검증은 한 번에 수백 ms의 CPU를 쓰므로 async 핸들러에서 바로 호출하면
+그동안 이벤트 루프 전체가 멈춥니다. 전용 스레드 풀(bcrypt는 계산 중 GIL을 놓음)에서
+실행하고, 대기열 길이를 제한해 몰릴 때는 503으로 빠르게 거절합니다.
+"""
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+from fastapi import HTTPException
+
+from utils.metrics import pool_samples, register_collector
+
+T = TypeVar("T")
+
+# 동시에 해싱하는 스레드 수 (기본: CPU 코어 수, 최대 4)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# 실행 중인 작업 외에 대기할 수 있는 최대 요청 수 (넘으면 503)
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+
+class PasswordHasher:
+    """크기가 제한된 대기열을 가진 해싱 스레드 풀 (대기/실행 시간 측정)"""
+
+    def __init__(self, max_workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "run_seconds_total": 0.0,
+        }
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="password-hash"
+                    )
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """
+        해싱 함수를 스레드 풀에서 실행
+
+        Raises:
+            HTTPException: 대기열이 가득 찬 경우 (503)
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+                    headers={"Retry-After": "1"}
+                )
+            self._pending += 1
+            self._stats["submitted"] += 1
+
+        queued_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            with self._lock:
+                self._running += 1
+                wait = started_at - queued_at
+                self._stats["wait_seconds_total"] += wait
+                self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], wait)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._stats["run_seconds_total"] += time.perf_counter() - started_at
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, task)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._stats["completed"] += 1
+
+    def stats(self) -> Dict:
+        """대기열/실행 통계"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["running"] = self._running
+            stats["queued"] = self._pending - self._running
+        stats["max_workers"] = self.max_workers
+        stats["max_queue"] = self.max_queue
+        completed = stats["completed"] or 1
+        stats["wait_seconds_avg"] = stats["wait_seconds_total"] / completed
+        stats["run_seconds_avg"] = stats["run_seconds_total"] / completed
+        return stats
+
+    def shutdown(self):
+        """스레드 풀 종료"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+
+def _collect_metrics():
+    """해싱 스레드 풀 사용률과 거절 수 (/metrics 수집 시점)"""
+    stats = password_hasher.stats()
+    return pool_samples("password_hash", stats["max_workers"], stats["running"], stats["queued"]) + [
+        ("hwp_password_hash_rejected_total", "counter", "대기열이 가득 차 거절된 해싱 요청 수", {}, stats["rejected"]),
+    ]
+
+
+register_collector(_collect_metrics)
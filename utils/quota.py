@@ -0,0 +1,293 @@
+"""
+보고서 생성 한도 (분당 요청 수 / 일·월 토큰 수)
+
+토큰 사용량은 생성이 끝난 뒤에야 기록되므로, Claude API를 호출하기 전에
+사용자별·전체 한도를 확인해 넘으면 429로 거절합니다.
+
+- 분당 요청 수: 메모리의 토큰 버킷 (분당 한도만큼 채워지고 요청마다 1개 소모)
+  워커 프로세스마다 따로 있으므로 워커가 N개(WEB_CONCURRENCY)이면 워커마다 한도의 1/N(올림)을 적용
+- 일·월 토큰 수: token_usage + token_usage_daily 합계를 QUOTA_SYNC_SECONDS마다 다시 읽고,
+  그 사이에는 이 프로세스에서 생성한 사용량을 메모리에서 더함 (합계 조회는 잠금 밖에서 실행)
+
+한도 값이 0이면 해당 한도는 사용하지 않습니다.
+"""
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Response
+
+from database.token_usage_db import TokenUsageDB
+from utils.auth import get_current_active_user
+from utils.metrics import register_collector
+
+# 사용량 합계를 데이터베이스에서 다시 읽는 간격 (초)
+QUOTA_SYNC_SECONDS = int(os.getenv("QUOTA_SYNC_SECONDS", "60"))
+
+# 분당 요청 한도를 나눠 가질 워커 프로세스 수 (serve.py가 설정)
+QUOTA_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+
+class QuotaLimits(NamedTuple):
+    """한도 (0이면 사용 안 함)"""
+    requests_per_minute: int
+    tokens_per_day: int
+    tokens_per_month: int
+
+    @classmethod
+    def from_env(cls, scope: str) -> "QuotaLimits":
+        return cls(
+            requests_per_minute=int(os.getenv(f"QUOTA_{scope}_REQUESTS_PER_MINUTE", "0")),
+            tokens_per_day=int(os.getenv(f"QUOTA_{scope}_TOKENS_PER_DAY", "0")),
+            tokens_per_month=int(os.getenv(f"QUOTA_{scope}_TOKENS_PER_MONTH", "0")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return any(self)
+
+
+class TokenBucket:
+    """분당 rate개씩 채워지는 토큰 버킷 (최대 rate개)"""
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> int:
+        self._refill()
+        return int(self.tokens)
+
+    def retry_after(self) -> int:
+        """다음 요청이 가능해질 때까지의 시간 (초)"""
+        return max(1, int((1 - self.tokens) / self.rate + 0.999))
+
+    def consume(self):
+        self.tokens -= 1
+
+
+class UsageCounter:
+    """오늘/이번 달 사용 토큰 수 (데이터베이스 합계 + 이후 메모리 누적)"""
+
+    def __init__(self):
+        self.day_start: Optional[datetime] = None
+        self.day_tokens = 0
+        self.month_tokens = 0
+        self.synced_at = 0.0
+
+
+def _period_starts(now: datetime) -> Tuple[datetime, datetime]:
+    """오늘과 이번 달의 시작 시각 (UTC)"""
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return day_start, day_start.replace(day=1)
+
+
+def _seconds_until_next_day(now: datetime) -> int:
+    day_start, _ = _period_starts(now)
+    return int((day_start + timedelta(days=1) - now).total_seconds()) + 1
+
+
+def _seconds_until_next_month(now: datetime) -> int:
+    _, month_start = _period_starts(now)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    return int((next_month - now).total_seconds()) + 1
+
+
+class QuotaManager:
+    """사용자별·전체 보고서 생성 한도 확인"""
+
+    def __init__(self, user_limits: Optional[QuotaLimits] = None, global_limits: Optional[QuotaLimits] = None):
+        self.user_limits = user_limits or QuotaLimits.from_env("USER")
+        self.global_limits = global_limits or QuotaLimits.from_env("GLOBAL")
+        self._lock = threading.Lock()
+        self._buckets: Dict[Optional[int], TokenBucket] = {}
+        self._counters: Dict[Optional[int], UsageCounter] = {}
+        self._stats = {"admitted": 0, "rejected": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.user_limits.enabled or self.global_limits.enabled
+
+    def _bucket(self, key: Optional[int], limits: QuotaLimits) -> Optional[TokenBucket]:
+        if limits.requests_per_minute <= 0:
+            return None
+        # 워커마다 버킷이 따로 있으므로 한도를 워커 수로 나눔 (올림, 최소 1)
+        rate = -(-limits.requests_per_minute // QUOTA_WORKERS)
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.capacity != rate:
+            bucket = self._buckets[key] = TokenBucket(rate)
+        return bucket
+
+    def _sync_counters(self, scopes, now: datetime):
+        """
+        날짜가 바뀌었거나 동기화 간격이 지난 사용량 카운터를 데이터베이스에서 다시 읽음
+
+        합계 조회는 잠금 밖에서 실행해 다른 요청의 한도 확인을 막지 않습니다.
+        주기 동기화는 한 요청만 조회하고 나머지는 조회가 끝날 때까지 이전 값을 씁니다.
+        """
+        day_start, month_start = _period_starts(now)
+
+        for key, limits in scopes:
+            if limits.tokens_per_day <= 0 and limits.tokens_per_month <= 0:
+                continue
+
+            with self._lock:
+                counter = self._counters.setdefault(key, UsageCounter())
+                if counter.day_start == day_start:
+                    if time.monotonic() - counter.synced_at < QUOTA_SYNC_SECONDS:
+                        continue
+                    counter.synced_at = time.monotonic()
+
+            # key None은 전체 사용자 합계
+            day_tokens, month_tokens = TokenUsageDB.get_token_totals(day_start, month_start, key)
+
+            with self._lock:
+                counter.day_tokens, counter.month_tokens = day_tokens, month_tokens
+                counter.day_start = day_start
+                counter.synced_at = time.monotonic()
+
+    def _remaining(self, key: Optional[int], limits: QuotaLimits, now: datetime) -> Dict[str, Optional[int]]:
+        """한도별 남은 양 (사용하지 않는 한도는 None)"""
+        remaining = {"requests": None, "tokens_day": None, "tokens_month": None}
+
+        bucket = self._bucket(key, limits)
+        if bucket is not None:
+            remaining["requests"] = bucket.available()
+
+        if limits.tokens_per_day > 0 or limits.tokens_per_month > 0:
+            counter = self._counters[key]
+            if limits.tokens_per_day > 0:
+                remaining["tokens_day"] = max(0, limits.tokens_per_day - counter.day_tokens)
+            if limits.tokens_per_month > 0:
+                remaining["tokens_month"] = max(0, limits.tokens_per_month - counter.month_tokens)
+
+        return remaining
+
+    def check(self, user_id: Optional[int]) -> Dict[str, str]:
+        """
+        보고서 생성 허용 여부 확인 (허용되면 분당 요청 1개 소모)
+
+        Args:
+            user_id: 사용자 ID (없으면 전체 한도만 확인)
+
+        Returns:
+            Dict[str, str]: 남은 한도 응답 헤더
+
+        Raises:
+            HTTPException: 한도를 넘은 경우 (429, Retry-After와 남은 한도 헤더 포함)
+        """
+        if not self.enabled:
+            return {}
+
+        now = datetime.utcnow()
+        scopes = [(None, self.global_limits)]
+        if user_id is not None:
+            scopes.insert(0, (user_id, self.user_limits))
+
+        self._sync_counters(scopes, now)
+
+        with self._lock:
+            headers: Dict[str, str] = {}
+            retry_after = 0
+            detail = None
+
+            for key, limits in scopes:
+                if not limits.enabled:
+                    continue
+
+                scope = "user" if key is not None else "global"
+                remaining = self._remaining(key, limits, now)
+                for name, value in remaining.items():
+                    if value is not None:
+                        headers[f"X-Quota-{scope.capitalize()}-Remaining-{name.replace('_', '-').title()}"] = str(value)
+
+                if detail is not None:
+                    continue
+                if remaining["requests"] is not None and remaining["requests"] < 1:
+                    retry_after = self._bucket(key, limits).retry_after()
+                    detail = "요청이 너무 많습니다. 잠시 후 다시 시도해주세요."
+                elif remaining["tokens_day"] == 0:
+                    retry_after = _seconds_until_next_day(now)
+                    detail = "오늘 사용할 수 있는 토큰 한도를 모두 사용했습니다."
+                elif remaining["tokens_month"] == 0:
+                    retry_after = _seconds_until_next_month(now)
+                    detail = "이번 달 사용할 수 있는 토큰 한도를 모두 사용했습니다."
+                if detail is not None and key is None:
+                    detail = f"서비스 전체 한도 초과: {detail}"
+
+            if detail is not None:
+                self._stats["rejected"] += 1
+                headers["Retry-After"] = str(retry_after)
+                raise HTTPException(status_code=429, detail=detail, headers=headers)
+
+            for key, limits in scopes:
+                bucket = self._bucket(key, limits)
+                if bucket is not None:
+                    bucket.consume()
+                    scope = "User" if key is not None else "Global"
+                    headers[f"X-Quota-{scope}-Remaining-Requests"] = str(max(0, int(bucket.tokens)))
+            self._stats["admitted"] += 1
+
+        return headers
+
+    def record(self, user_id: Optional[int], tokens: int):
+        """생성에 사용한 토큰을 메모리 카운터에 반영 (다음 동기화 전까지)"""
+        if not self.enabled or tokens <= 0:
+            return
+
+        with self._lock:
+            for key in {user_id, None}:
+                counter = self._counters.get(key)
+                if counter is not None and counter.day_start is not None:
+                    counter.day_tokens += tokens
+                    counter.month_tokens += tokens
+
+    def stats(self) -> Dict:
+        """한도 설정과 허용/거절 건수"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["user_limits"] = self.user_limits._asdict()
+        stats["global_limits"] = self.global_limits._asdict()
+        stats["sync_seconds"] = QUOTA_SYNC_SECONDS
+        stats["workers"] = QUOTA_WORKERS
+        return stats
+
+
+quota_manager = QuotaManager()
+
+
+def _collect_metrics():
+    """한도 확인 결과 수 (/metrics 수집 시점)"""
+    stats = quota_manager.stats()
+    help = "보고서 생성 한도 확인 결과 수"
+    return [
+        ("hwp_quota_decisions_total", "counter", help, {"result": "admitted"}, stats["admitted"]),
+        ("hwp_quota_decisions_total", "counter", help, {"result": "rejected"}, stats["rejected"]),
+    ]
+
+
+register_collector(_collect_metrics)
+
+
+def check_generation_quota(
+    response: Response,
+    current_user = Depends(get_current_active_user)
+):
+    """
+    보고서 생성 한도 확인 의존성 (Claude API 호출 전)
+
+    허용되면 남은 한도를 응답 헤더에 담고 현재 사용자를 반환합니다.
+    사용량 합계를 데이터베이스에서 다시 읽을 수 있으므로 동기 함수로 두어 스레드 풀에서 실행합니다.
+    """
+    headers = quota_manager.check(current_user.id)
+    response.headers.update(headers)
+    return current_user
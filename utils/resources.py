@@ -0,0 +1,192 @@
+"""
+앱 전체에서 공유하는 자원 (lifespan에서 한 번 만들고 의존성으로 주입)
+
+- 보고서 템플릿: 시작 시 읽어 검증한 뒤 메모리에 보관 (요청마다 템플릿 ZIP을 다시 읽지 않음)
+- 보고서 생성 스레드 풀: Claude API 호출과 HWPX 생성을 이벤트 루프 밖에서 실행
+- Claude 클라이언트: 처음 사용할 때 만들어 모든 요청이 공유 (호출별 사용량은 반환값으로 전달)
+- 예열(warm-up): anthropic SDK 클라이언트, 비밀번호 해싱, JWT 모듈을 백그라운드에서 미리 로드
+
+예열이 끝나기 전에도 요청은 처리하며(첫 요청이 로드 비용을 부담), 완료 여부는 /ready에서 확인합니다.
+"""
+import os
+import time
+import glob
+import asyncio
+import logging
+import importlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional, TypeVar
+
+from fastapi import Depends, HTTPException, Request
+
+from utils.claude_client import ClaudeClient, get_anthropic_client
+from utils.hwp_handler import HWPHandler
+from utils.metrics import pool_samples
+from utils.output_cache import report_cache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+TEMPLATE_DIR = "templates"
+TEMPLATE_PATH = os.path.join(TEMPLATE_DIR, "report_template.hwpx")
+
+# 보고서 생성(Claude API 호출, HWPX 생성) 동시 실행 수
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "8"))
+
+
+class AppResources:
+    """앱 수명 동안 공유하는 템플릿 핸들러, 스레드 풀, 예열 상태"""
+
+    def __init__(self, report_workers: int = REPORT_WORKERS):
+        self.report_workers = report_workers
+        self.report_handler: Optional[HWPHandler] = None  # 기본 템플릿 → output/
+        self.cache_handler: Optional[HWPHandler] = None   # 기본 템플릿 → 노드 로컬 캐시
+        self._templates: Dict[str, HWPHandler] = {}
+        self._claude_client: Optional[ClaudeClient] = None
+        self.executor = ThreadPoolExecutor(max_workers=report_workers, thread_name_prefix="report")
+        self._submitted = 0  # 스레드 풀에 넣은 뒤 끝나지 않은 작업 수 (이벤트 루프에서만 변경)
+        self.warmup: Dict = {
+            "state": "pending",
+            "started_at": None,
+            "finished_at": None,
+            "steps": {},
+            "errors": {},
+        }
+
+    @property
+    def ready(self) -> bool:
+        return self.report_handler is not None and self.warmup["state"] == "ready"
+
+    def load_templates(self):
+        """
+        templates/ 아래 HWPX 템플릿을 읽어 검증하고 메모리에 보관
+
+        기본 템플릿이 없으면 간단한 템플릿을 만들고, 검증에 실패한 추가 템플릿은 제외합니다.
+        """
+        started = time.perf_counter()
+
+        if not os.path.exists(TEMPLATE_PATH):
+            logger.warning("템플릿 파일이 없습니다. 기본 템플릿을 생성합니다.")
+            os.makedirs(TEMPLATE_DIR, exist_ok=True)
+            HWPHandler.create_simple_template(TEMPLATE_PATH)
+            logger.info("기본 템플릿이 생성되었습니다.")
+
+        self.report_handler = HWPHandler(TEMPLATE_PATH, temp_dir="temp", output_dir="output", preload=True)
+        self.cache_handler = self.report_handler.with_output_dir(report_cache.directory)
+        self._templates = {TEMPLATE_PATH: self.report_handler}
+
+        for template_path in sorted(glob.glob(os.path.join(TEMPLATE_DIR, "*.hwpx"))):
+            if template_path in self._templates:
+                continue
+            try:
+                self._templates[template_path] = HWPHandler(
+                    template_path, temp_dir="temp", output_dir="output", preload=True
+                )
+            except Exception as e:
+                logger.error(f"템플릿 검증 실패 (제외): {template_path} ({str(e)})")
+
+        self.warmup["steps"]["templates"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"템플릿 {len(self._templates)}개 로드 완료")
+
+    def template_handler(self, template_path: str) -> HWPHandler:
+        """
+        템플릿별 핸들러 (시작 후 추가된 템플릿은 처음 사용할 때 읽어 보관)
+
+        Raises:
+            ValueError: 템플릿 검증에 실패한 경우
+        """
+        handler = self._templates.get(template_path)
+        if handler is None:
+            handler = HWPHandler(template_path, temp_dir="temp", output_dir="output", preload=True)
+            self._templates[template_path] = handler
+        return handler
+
+    @property
+    def claude_client(self) -> ClaudeClient:
+        """
+        공유 Claude 클라이언트 (처음 사용할 때 생성)
+
+        Raises:
+            ValueError: CLAUDE_API_KEY가 설정되지 않은 경우
+        """
+        if self._claude_client is None:
+            self._claude_client = ClaudeClient()
+        return self._claude_client
+
+    def _warm_up_steps(self):
+        """무거운 모듈과 클라이언트를 미리 로드 (스레드에서 실행)"""
+        from utils.auth import get_pwd_context
+
+        steps: Dict[str, Callable[[], object]] = {
+            "password_hashing": get_pwd_context,
+            "jwt": lambda: importlib.import_module("jose.jwt"),
+        }
+        api_key = os.getenv("CLAUDE_API_KEY")
+        if api_key:
+            steps["anthropic"] = lambda: get_anthropic_client(api_key)
+
+        for name, step in steps.items():
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self.warmup["errors"][name] = str(e)
+                logger.error(f"예열 실패: {name} ({str(e)})")
+            self.warmup["steps"][name] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def warm_up(self):
+        """백그라운드 예열 (끝나면 /ready가 200)"""
+        self.warmup["state"] = "warming"
+        self.warmup["started_at"] = datetime.utcnow()
+
+        await asyncio.get_running_loop().run_in_executor(self.executor, self._warm_up_steps)
+
+        self.warmup["state"] = "ready"
+        self.warmup["finished_at"] = datetime.utcnow()
+        logger.info(f"예열 완료: {self.warmup['steps']}")
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """블로킹 작업을 보고서 생성 스레드 풀에서 실행 (현재 추적 span이 이어지도록 컨텍스트 복사)"""
+        context = contextvars.copy_context()
+        self._submitted += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, context.run, func, *args)
+        finally:
+            self._submitted -= 1
+
+    def collect_metrics(self):
+        """보고서 생성 스레드 풀 사용률 (/metrics 수집 시점)"""
+        busy = min(self._submitted, self.report_workers)
+        return pool_samples("report", self.report_workers, busy, self._submitted - busy)
+
+    def status(self) -> Dict:
+        """준비 상태 (/ready 응답)"""
+        return {
+            "ready": self.ready,
+            "templates": sorted(self._templates),
+            "report_workers": self.report_workers,
+            "warmup": self.warmup,
+        }
+
+    def shutdown(self):
+        """스레드 풀 종료"""
+        self.executor.shutdown(wait=False)
+
+
+def get_resources(request: Request) -> AppResources:
+    """공유 자원 의존성 (lifespan 시작 전이면 503)"""
+    resources = getattr(request.app.state, "resources", None)
+    if resources is None:
+        raise HTTPException(status_code=503, detail="서버가 아직 준비되지 않았습니다.")
+    return resources
+
+
+def get_claude_client(resources: AppResources = Depends(get_resources)) -> ClaudeClient:
+    """Claude 클라이언트 의존성 (앱 전체에서 한 인스턴스 공유)"""
+    try:
+        return resources.claude_client
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=f"설정 오류: {str(e)}")
@@ -0,0 +1,326 @@
+"""
+보관 정책 (오래된 보고서 파일 / 토큰 사용량 / 임시 디렉토리 정리)
+
+1. 임시 파일 정리: 비정상 종료로 남은 temp/work_* 디렉토리와 만들다 만 보관 묶음 삭제
+2. 사용량 요약: 보관 기간이 지난 token_usage 행을 사용자별 일별 요약(token_usage_daily)으로 이동
+3. 파일 보관: 보관 기간이 지난 저장소 최상위 보고서 파일을 월별 ZIP 묶음으로 이동
+   (archived_files 색인으로 묶음 안에서 바로 내려받을 수 있음, 보고서 행이 가리키는 파일은 제외)
+4. 호출 기록 정리: 보관 기간이 지난 Claude API 호출 기록(llm_calls) 삭제
+
+각 단계는 작은 단위로 나눠 처리하고 단위 사이에 쉬어(RETENTION_THROTTLE_MS)
+요청 처리와 데이터베이스에 주는 부하를 제한합니다.
+진행 상황은 retention_engine.status()로 조회합니다 (/api/admin/retention).
+"""
+import os
+import time
+import uuid
+import shutil
+import struct
+import asyncio
+import logging
+import threading
+import zipfile
+from datetime import datetime, timedelta
+from fnmatch import fnmatch
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from database.archive_db import ArchiveDB
+from database.llm_call_db import LLMCallDB
+from database.output_file_db import OutputFileDB
+from database.token_usage_db import TokenUsageDB
+from utils.coordination import coordinator
+from utils.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# 주기적 실행 간격 (초, 0이면 사용 안 함)
+RETENTION_INTERVAL = int(os.getenv("RETENTION_INTERVAL", "0"))
+
+# 한 번에 처리하는 단위 (묶음 하나에 담는 파일 수)
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "200"))
+
+# 처리 단위 사이 대기 시간 (밀리초)
+RETENTION_THROTTLE_MS = int(os.getenv("RETENTION_THROTTLE_MS", "200"))
+
+# 보관 묶음 키 접두사
+ARCHIVE_PREFIX = os.getenv("RETENTION_ARCHIVE_PREFIX", "archives").strip("/")
+
+# 임시 디렉토리와 정리 대상 이름 패턴
+TEMP_DIR = "temp"
+TEMP_PATTERNS = ("work_*", "archive_*.zip")
+
+# ZIP 로컬 파일 헤더 (시그니처 ~ 확장 필드 길이, 30바이트)
+_LOCAL_HEADER = struct.Struct("<4s5HL2L2H")
+
+
+class RetentionPolicy(NamedTuple):
+    """보관 정책 (0이면 해당 단계 사용 안 함)"""
+    output_days: int  # 보고서 파일을 월별 묶음으로 옮기기까지의 일수
+    usage_days: int   # 토큰 사용량 원본 행을 일별 요약으로 옮기기까지의 일수
+    temp_hours: int   # 임시 디렉토리를 고아로 간주하기까지의 시간
+    llm_call_days: int = 0  # Claude API 호출 기록을 삭제하기까지의 일수
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        return cls(
+            output_days=int(os.getenv("RETENTION_OUTPUT_DAYS", "0")),
+            usage_days=int(os.getenv("RETENTION_USAGE_DAYS", "0")),
+            temp_hours=int(os.getenv("RETENTION_TEMP_HOURS", "24")),
+            llm_call_days=int(os.getenv("RETENTION_LLM_CALL_DAYS", "0")),
+        )
+
+
+def _data_offset(f, header_offset: int) -> int:
+    """로컬 파일 헤더 위치에서 엔트리 내용이 시작하는 위치 계산"""
+    f.seek(header_offset)
+    header = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+    name_length, extra_length = header[-2], header[-1]
+    return header_offset + _LOCAL_HEADER.size + name_length + extra_length
+
+
+class RetentionEngine:
+    """보관 정책 실행기 (한 번에 하나의 실행만 허용)"""
+
+    def __init__(self, policy: Optional[RetentionPolicy] = None):
+        self.policy = policy or RetentionPolicy.from_env()
+        self._run_lock = threading.Lock()
+        self._status_lock = threading.Lock()
+        self._status = {
+            "state": "idle",
+            "phase": None,
+            "runs": 0,
+            "started_at": None,
+            "finished_at": None,
+            "duration_seconds": None,
+            "last_error": None,
+            "current": self._empty_counters(),
+            "totals": self._empty_counters(),
+        }
+
+    @staticmethod
+    def _empty_counters() -> Dict[str, int]:
+        return {
+            "temp_entries_removed": 0,
+            "usage_days_rolled_up": 0,
+            "usage_rows_rolled_up": 0,
+            "files_archived": 0,
+            "bytes_archived": 0,
+            "archives_created": 0,
+            "llm_calls_deleted": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._run_lock.locked()
+
+    def status(self) -> Dict:
+        """진행 상황 (현재 실행 건수와 누적 건수)"""
+        with self._status_lock:
+            status = dict(self._status)
+            status["current"] = dict(self._status["current"])
+            status["totals"] = dict(self._status["totals"])
+        status["policy"] = self.policy._asdict()
+        status["interval_seconds"] = RETENTION_INTERVAL
+        return status
+
+    def _set(self, **values):
+        with self._status_lock:
+            self._status.update(values)
+
+    def _count(self, name: str, amount: int = 1):
+        with self._status_lock:
+            self._status["current"][name] += amount
+            self._status["totals"][name] += amount
+
+    def _throttle(self):
+        if RETENTION_THROTTLE_MS > 0:
+            time.sleep(RETENTION_THROTTLE_MS / 1000)
+
+    def run(self) -> bool:
+        """
+        보관 정책 한 번 실행 (블로킹, 스레드에서 호출)
+
+        Returns:
+            bool: 실행했으면 True, 이미 실행 중이면 False
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return False
+
+        started = time.time()
+        with self._status_lock:
+            self._status.update(
+                state="running",
+                started_at=datetime.utcnow(),
+                finished_at=None,
+                last_error=None,
+                current=self._empty_counters(),
+            )
+            self._status["runs"] += 1
+
+        try:
+            if self.policy.temp_hours > 0:
+                self._set(phase="temp")
+                self.sweep_temp()
+
+            if self.policy.usage_days > 0:
+                self._set(phase="usage")
+                self.rollup_usage()
+
+            if self.policy.output_days > 0:
+                self._set(phase="archive")
+                self.archive_outputs()
+
+            if self.policy.llm_call_days > 0:
+                self._set(phase="llm_calls")
+                self.purge_llm_calls()
+
+            logger.info(f"보관 정책 실행 완료: {self.status()['current']}")
+        except Exception as e:
+            logger.error(f"보관 정책 실행 중 오류: {str(e)}", exc_info=True)
+            self._set(last_error=str(e))
+        finally:
+            self._set(
+                state="idle",
+                phase=None,
+                finished_at=datetime.utcnow(),
+                duration_seconds=round(time.time() - started, 3),
+            )
+            self._run_lock.release()
+
+        return True
+
+    def sweep_temp(self):
+        """비정상 종료로 남은 임시 디렉토리/파일 삭제"""
+        if not os.path.isdir(TEMP_DIR):
+            return
+
+        cutoff = time.time() - self.policy.temp_hours * 3600
+        with os.scandir(TEMP_DIR) as entries:
+            for entry in entries:
+                if not any(fnmatch(entry.name, pattern) for pattern in TEMP_PATTERNS):
+                    continue
+                try:
+                    if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path)
+                    else:
+                        os.remove(entry.path)
+                    self._count("temp_entries_removed")
+                except OSError as e:
+                    logger.warning(f"임시 항목 삭제 실패: {entry.path} ({str(e)})")
+
+    def rollup_usage(self):
+        """보관 기간이 지난 토큰 사용량을 하루 단위로 일별 요약에 합침 (오래된 날부터)"""
+        cutoff = (datetime.utcnow() - timedelta(days=self.policy.usage_days)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+        while True:
+            day = TokenUsageDB.get_oldest_usage_day(cutoff)
+            if day is None:
+                break
+
+            rows = TokenUsageDB.rollup_day(day)
+            self._count("usage_days_rolled_up")
+            self._count("usage_rows_rolled_up", rows)
+            self._throttle()
+
+    def purge_llm_calls(self):
+        """보관 기간이 지난 Claude API 호출 기록 삭제"""
+        cutoff = datetime.utcnow() - timedelta(days=self.policy.llm_call_days)
+        self._count("llm_calls_deleted", LLMCallDB.delete_before(cutoff))
+
+    def archive_outputs(self):
+        """보관 기간이 지난 보고서 파일을 월별 묶음으로 이동 (RETENTION_BATCH_SIZE개씩)"""
+        cutoff = time.time() - self.policy.output_days * 86400
+
+        while True:
+            files = OutputFileDB.get_files_before(cutoff, RETENTION_BATCH_SIZE)
+            if not files:
+                break
+
+            # 같은 달(UTC) 파일끼리 묶음
+            months: Dict[str, List[Tuple[str, int, float]]] = {}
+            for filename, size, mtime in files:
+                month = datetime.utcfromtimestamp(mtime).strftime("%Y-%m")
+                months.setdefault(month, []).append((filename, size, mtime))
+
+            for month, month_files in months.items():
+                self._archive_batch(month, month_files)
+                self._throttle()
+
+    def _archive_batch(self, month: str, files: List[Tuple[str, int, float]]):
+        """
+        파일 묶음 하나 생성 → 저장소에 저장 → 색인 기록 → 원본 삭제
+
+        묶음 하나는 STORED(재압축 없음) ZIP이므로 색인의 위치/크기로 범위 읽기가 가능합니다.
+        색인 기록 전에 실패하면 원본이 그대로 남으므로 다음 실행에서 다시 시도합니다.
+        """
+        storage = get_storage()
+        os.makedirs(TEMP_DIR, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        archive_key = f"{ARCHIVE_PREFIX}/{month}/{month}_{stamp}_{uuid.uuid4().hex[:8]}.zip"
+        temp_path = os.path.join(TEMP_DIR, f"archive_{uuid.uuid4().hex}.zip")
+
+        archived = []
+        missing = []
+        try:
+            with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_STORED) as zipf:
+                for filename, size, mtime in files:
+                    if storage.stat(filename) is None:
+                        missing.append(filename)
+                        continue
+
+                    zinfo = zipfile.ZipInfo(filename, date_time=datetime.utcfromtimestamp(mtime).timetuple()[:6])
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                    zinfo.external_attr = 0o644 << 16
+                    zinfo.file_size = size
+                    with zipf.open(zinfo, "w") as entry:
+                        for chunk in storage.iter_chunks(filename):
+                            entry.write(chunk)
+                    archived.append((filename, mtime))
+
+            if archived:
+                # 엔트리별 내용 시작 위치 (로컬 헤더의 확장 필드 길이는 중앙 디렉토리와 다를 수 있음)
+                records = []
+                with zipfile.ZipFile(temp_path) as zipf, open(temp_path, "rb") as f:
+                    mtimes = dict(archived)
+                    for info in zipf.infolist():
+                        offset = _data_offset(f, info.header_offset)
+                        records.append((info.filename, offset, info.file_size, mtimes[info.filename]))
+
+                archive_size = os.path.getsize(temp_path)
+                storage.put_file(archive_key, temp_path)
+                ArchiveDB.record_archive(archive_key, records)
+
+                for filename, _, size, _ in records:
+                    storage.delete(filename)
+                    self._count("files_archived")
+                    self._count("bytes_archived", size)
+                self._count("archives_created")
+                logger.info(f"보고서 파일 {len(records)}개 보관: {archive_key} ({archive_size:,} bytes)")
+
+            # 저장소에서 이미 사라진 파일은 목록 색인에서 제거
+            if missing:
+                OutputFileDB.remove_many(missing)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+retention_engine = RetentionEngine()
+
+
+async def run_retention_loop():
+    """
+    RETENTION_INTERVAL이 설정되어 있으면 주기적으로 보관 정책 실행 (스레드에서 실행)
+
+    워커가 여러 개이면 리더 워커만 실행합니다.
+    """
+    loop = asyncio.get_running_loop()
+
+    while RETENTION_INTERVAL > 0:
+        await asyncio.sleep(RETENTION_INTERVAL)
+        if coordinator.is_leader:
+            await loop.run_in_executor(None, retention_engine.run)
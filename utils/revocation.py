@@ -0,0 +1,170 @@
+"""
+토큰 폐기 확인 (블룸 필터 + revoked_tokens 테이블)
+
+폐기된 토큰의 jti는 만료 시각과 함께 revoked_tokens 테이블에 기록되고,
+각 프로세스는 아직 만료되지 않은 jti를 담은 블룸 필터를 메모리에 둡니다.
+
+- 필터에 없으면 폐기되지 않은 토큰 (데이터베이스 조회 없음)
+- 필터에 있으면 오탐일 수 있으므로 테이블에서 확인
+- REVOCATION_SYNC_SECONDS마다 다른 프로세스에서 새로 폐기된 jti를 필터에 추가하고,
+  REVOCATION_COMPACT_SECONDS마다 만료된 행을 지운 뒤(리더 워커만) 필터를 새로 만듦
+"""
+import os
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from database.revoked_token_db import RevokedTokenDB
+from utils.bloom import BloomFilter
+from utils.coordination import coordinator
+from utils.metrics import register_collector
+
+logger = logging.getLogger(__name__)
+
+# 다른 프로세스에서 폐기된 토큰을 가져오는 간격 (초)
+REVOCATION_SYNC_SECONDS = int(os.getenv("REVOCATION_SYNC_SECONDS", "30"))
+
+# 만료된 행 정리 및 필터 재생성 간격 (초)
+REVOCATION_COMPACT_SECONDS = int(os.getenv("REVOCATION_COMPACT_SECONDS", "3600"))
+
+# 블룸 필터 최소 크기 (원소 수)와 목표 오탐률
+REVOCATION_BLOOM_CAPACITY = int(os.getenv("REVOCATION_BLOOM_CAPACITY", "10000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+
+# revoked_at은 초 단위이므로 이전 동기화 시각보다 조금 앞에서부터 다시 읽음
+_SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class RevocationList:
+    """프로세스 로컬 폐기 토큰 필터"""
+
+    def __init__(self):
+        self._filter = BloomFilter(REVOCATION_BLOOM_CAPACITY, REVOCATION_BLOOM_ERROR_RATE)
+        self._synced_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._stats = {"checks": 0, "filter_hits": 0, "revoked": 0, "purged": 0}
+
+    def revoke(self, jti: str, expires_at: datetime, user_id: Optional[int] = None):
+        """토큰 폐기 (테이블 기록 후 이 프로세스의 필터에 바로 반영)"""
+        RevokedTokenDB.revoke(jti, expires_at, user_id)
+        self._filter.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        """폐기 여부 (필터에 있을 때만 데이터베이스 확인)"""
+        self._stats["checks"] += 1
+        if jti not in self._filter:
+            return False
+
+        self._stats["filter_hits"] += 1
+        revoked = RevokedTokenDB.is_revoked(jti)
+        if revoked:
+            self._stats["revoked"] += 1
+        return revoked
+
+    def sync(self) -> int:
+        """
+        마지막 동기화 이후 폐기된 jti를 필터에 추가
+
+        Returns:
+            int: 추가한 jti 수
+        """
+        with self._lock:
+            if self._synced_at is None:
+                return self._rebuild()
+
+            started = datetime.utcnow()
+            jtis = RevokedTokenDB.get_active_jtis(self._synced_at - _SYNC_OVERLAP)
+            bloom = self._filter
+            for jti in jtis:
+                bloom.add(jti)
+            self._synced_at = started
+
+            # 예상보다 많이 담기면 오탐률이 올라가므로 더 큰 필터로 다시 만듦
+            if len(bloom) > bloom.capacity:
+                self._rebuild()
+
+        return len(jtis)
+
+    def compact(self, purge: bool = True) -> int:
+        """
+        만료된 행을 지우고 남은 jti로 필터 재생성
+
+        Args:
+            purge: 만료된 행 삭제 여부 (워커가 여러 개이면 리더만 삭제하고 나머지는 필터만 재생성)
+
+        Returns:
+            int: 삭제된 행 수
+        """
+        purged = RevokedTokenDB.purge_expired() if purge else 0
+        self._stats["purged"] += purged
+        with self._lock:
+            self._rebuild()
+        return purged
+
+    def _rebuild(self) -> int:
+        """만료되지 않은 jti 전체로 새 필터를 만들어 교체 (_lock 안에서 호출)"""
+        started = datetime.utcnow()
+        jtis = set(RevokedTokenDB.get_active_jtis())
+
+        bloom = BloomFilter(max(REVOCATION_BLOOM_CAPACITY, len(jtis) * 2), REVOCATION_BLOOM_ERROR_RATE)
+        for jti in jtis:
+            bloom.add(jti)
+
+        # 교체하는 동안 이 프로세스에서 폐기된 jti를 놓치지 않도록 다시 읽어 추가
+        for jti in RevokedTokenDB.get_active_jtis(started - _SYNC_OVERLAP):
+            if jti not in jtis:
+                bloom.add(jti)
+
+        self._filter = bloom
+        self._synced_at = started
+        return len(jtis)
+
+    def stats(self) -> Dict:
+        """필터 크기와 조회 통계"""
+        bloom = self._filter
+        stats = dict(self._stats)
+        stats.update(
+            entries=len(bloom),
+            capacity=bloom.capacity,
+            filter_bytes=(bloom.size + 7) // 8,
+            hash_count=bloom.hash_count,
+            synced_at=self._synced_at,
+        )
+        return stats
+
+
+revocation_list = RevocationList()
+
+
+def _collect_metrics():
+    """폐기 토큰 필터 크기와 조회 수 (/metrics 수집 시점)"""
+    stats = revocation_list.stats()
+    return [
+        ("hwp_revocation_filter_entries", "gauge", "폐기 토큰 필터에 담긴 jti 수", {}, stats["entries"]),
+        ("hwp_revocation_checks_total", "counter", "폐기 여부를 확인한 토큰 수", {}, stats["checks"]),
+        ("hwp_revocation_filter_hits_total", "counter", "필터에 있어 데이터베이스를 확인한 횟수", {}, stats["filter_hits"]),
+    ]
+
+
+register_collector(_collect_metrics)
+
+
+async def run_revocation_loop():
+    """폐기 토큰 필터 주기적 동기화와 만료 행 정리 (스레드에서 실행)"""
+    loop = asyncio.get_running_loop()
+    last_compact = loop.time()
+
+    while True:
+        await asyncio.sleep(REVOCATION_SYNC_SECONDS)
+        try:
+            if loop.time() - last_compact >= REVOCATION_COMPACT_SECONDS:
+                purged = await loop.run_in_executor(None, revocation_list.compact, coordinator.is_leader)
+                last_compact = loop.time()
+                if purged:
+                    logger.info(f"만료된 폐기 토큰 {purged}개 정리")
+            else:
+                await loop.run_in_executor(None, revocation_list.sync)
+        except Exception as e:
+            logger.error(f"폐기 토큰 필터 동기화 중 오류: {str(e)}")
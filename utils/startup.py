@@ -0,0 +1,172 @@
+"""
+워커 시작 시간 최적화 (시작 시간 측정, 한 번만 실행하는 초기화, import 시간 분석)
+
+- 데이터베이스 마이그레이션과 관리자 계정 생성(bcrypt 해싱)은 파일 잠금으로 감싸
+  여러 워커가 동시에 시작해도 한 워커만 실행하고, 이미 끝난 상태면 잠금 없이 건너뜁니다.
+- STARTUP_IMPORT_PROFILE=true이면 `python -X importtime`으로 main 모듈을 따로 import해
+  오래 걸린 모듈을 로그에 남깁니다 (별도 프로세스라 워커 시작을 늦추지 않음).
+"""
+import os
+import sys
+import logging
+import threading
+import subprocess
+from contextlib import contextmanager
+from typing import Callable, List, NamedTuple, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 실행
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 여러 워커가 공유하는 초기화 잠금 파일
+BOOTSTRAP_LOCK_PATH = os.getenv("BOOTSTRAP_LOCK_PATH", "data/.bootstrap.lock")
+
+# 시작 시 import 시간 분석 여부와 로그에 남길 모듈 수
+STARTUP_IMPORT_PROFILE = os.getenv("STARTUP_IMPORT_PROFILE", "false").lower() in ("1", "true", "yes")
+STARTUP_IMPORT_PROFILE_TOP = int(os.getenv("STARTUP_IMPORT_PROFILE_TOP", "15"))
+
+
+class ImportTime(NamedTuple):
+    """-X importtime 한 줄 (마이크로초)"""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def process_uptime() -> Optional[float]:
+    """
+    프로세스가 시작된 뒤 지난 시간 (초, 인터프리터 시작 포함)
+
+    Linux의 /proc에서 읽으며, 다른 플랫폼에서는 None을 반환합니다.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # 실행 파일 이름에 공백이 있을 수 있으므로 ')' 뒤부터 나눔 (starttime은 22번째 필드)
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+@contextmanager
+def _file_lock(path: str):
+    """프로세스 간 배타 잠금 (같은 호스트의 워커끼리)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def bootstrap_once(
+    is_done: Callable[[], bool],
+    bootstrap: Callable[[], None],
+    lock_path: str = BOOTSTRAP_LOCK_PATH
+) -> bool:
+    """
+    여러 워커 중 한 곳에서만 초기화 실행
+
+    이미 초기화된 상태면 잠금 없이 바로 돌아오고, 아니면 잠금을 잡은 뒤 다시 확인해서
+    먼저 잠금을 잡은 워커가 끝낸 경우에는 실행하지 않습니다.
+
+    Args:
+        is_done: 초기화가 이미 끝났는지 확인 (가볍게 조회)
+        bootstrap: 초기화 함수
+        lock_path: 잠금 파일 경로
+
+    Returns:
+        bool: 이 프로세스에서 초기화를 실행했으면 True
+    """
+    try:
+        if is_done():
+            return False
+    except Exception:
+        # 테이블이 아직 없는 경우 등은 초기화가 필요한 것으로 봄
+        pass
+
+    with _file_lock(lock_path):
+        try:
+            if is_done():
+                return False
+        except Exception:
+            pass
+
+        bootstrap()
+        return True
+
+
+def parse_importtime(output: str) -> List[ImportTime]:
+    """`-X importtime` 출력(stderr) 파싱"""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 머리글 줄
+        name = parts[2].rstrip()
+        module = name.lstrip()
+        depth = (len(name) - len(module)) // 2
+        entries.append(ImportTime(module, int(parts[0]), int(parts[1]), depth))
+    return entries
+
+
+def profile_imports(module: str = "main", top: int = STARTUP_IMPORT_PROFILE_TOP) -> List[ImportTime]:
+    """
+    새 인터프리터에서 모듈을 import하며 시간 측정
+
+    Returns:
+        List[ImportTime]: 대상 모듈과 그 모듈이 직접 import한 모듈 (누적 시간 순 top개)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+    # 하위 모듈이 먼저 출력되므로 대상 모듈 줄 직전까지가 대상 모듈이 불러온 것
+    # (인터프리터 시작 시 site 등이 불러온 모듈은 제외)
+    group: List[ImportTime] = []
+    for entry in parse_importtime(result.stderr):
+        if entry.depth == 0 and entry.module != module:
+            group = []
+            continue
+        group.append(entry)
+        if entry.depth == 0:
+            break
+
+    # 대상 모듈과 대상 모듈이 직접 import한 모듈
+    direct = [entry for entry in group if entry.depth <= 1]
+    return sorted(direct, key=lambda entry: entry.cumulative_us, reverse=True)[:top]
+
+
+def format_import_profile(entries: List[ImportTime]) -> str:
+    """import 시간 요약 문자열"""
+    lines = [f"{'누적(ms)':>10}{'자체(ms)':>10}  모듈"]
+    for entry in entries:
+        lines.append(f"{entry.cumulative_us / 1000:>10.1f}{entry.self_us / 1000:>10.1f}  {entry.module}")
+    return "\n".join(lines)
+
+
+def log_import_profile(module: str = "main"):
+    """import 시간 요약을 로그에 기록 (백그라운드 스레드에서 실행)"""
+
+    def run():
+        try:
+            entries = profile_imports(module)
+            logger.info(f"import 시간 요약 (-X importtime, {module}):\n{format_import_profile(entries)}")
+        except Exception as e:
+            logger.warning(f"import 시간 측정 실패: {str(e)}")
+
+    threading.Thread(target=run, name="import-profile", daemon=True).start()
@@ -0,0 +1,364 @@
+"""
+보고서 파일 저장소 백엔드
+
+생성된 파일은 키(예: blobs/ab/cd/<hash>.hwpx)로 저장하며, 실제 위치는 백엔드가 정합니다.
+- local: 로컬 디스크 (기본값, output/ 아래)
+- s3: S3 호환 오브젝트 스토리지 (AWS S3, MinIO 등, boto3 필요)
+
+여러 노드가 같은 S3 버킷을 사용하면 어느 노드에서 만든 보고서든 다른 노드에서 내려받을 수 있습니다.
+
+환경 변수:
+    STORAGE_BACKEND: local | s3 (기본 local)
+    STORAGE_LOCAL_ROOT: 로컬 저장소 루트 디렉토리 (기본 output)
+    S3_BUCKET: 버킷 이름
+    S3_PREFIX: 버킷 안의 키 접두사 (선택)
+    S3_ENDPOINT_URL: S3 호환 서버 주소 (MinIO 등, 선택)
+    S3_REGION: 리전 (선택)
+    S3_MULTIPART_THRESHOLD / S3_MULTIPART_CHUNK_SIZE: 멀티파트 업로드 기준/조각 크기 (바이트)
+    (인증 정보는 boto3 표준 방식: AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY 등)
+"""
+import os
+import threading
+from typing import Iterator, NamedTuple, Optional
+
+# 스트리밍 읽기 단위
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class StorageObject(NamedTuple):
+    """저장된 파일 정보"""
+    key: str
+    size: int
+    mtime: float
+
+
+class Storage:
+    """저장소 백엔드 공통 인터페이스"""
+
+    name = "base"
+    local = False  # True면 local_path()로 로컬 파일에 직접 접근 가능
+
+    def put_file(self, key: str, source_path: str) -> int:
+        """
+        로컬 파일을 저장소에 저장 (저장 후 원본은 삭제)
+
+        Args:
+            key: 저장 키
+            source_path: 저장할 로컬 파일 경로
+
+        Returns:
+            int: 파일 크기 (바이트)
+        """
+        raise NotImplementedError
+
+    def stat(self, key: str) -> Optional[StorageObject]:
+        """파일 정보 조회 (없으면 None)"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        """파일 존재 여부"""
+        return self.stat(key) is not None
+
+    def iter_chunks(
+        self,
+        key: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        chunk_size: int = READ_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        파일 내용을 조각 단위로 읽기
+
+        Args:
+            key: 저장 키
+            start: 시작 위치 (바이트)
+            end: 끝 위치 (포함, None이면 파일 끝까지)
+            chunk_size: 조각 크기
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        """파일 삭제 (없으면 False)"""
+        raise NotImplementedError
+
+    def iter_objects(self, prefix: str = "", recursive: bool = True) -> Iterator[StorageObject]:
+        """
+        접두사 아래 파일 순회
+
+        Args:
+            prefix: 키 접두사 (디렉토리, 예: "blobs")
+            recursive: False면 바로 아래 파일만
+        """
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """로컬 파일 경로 (로컬 저장소가 아니면 None)"""
+        return None
+
+    def normalize_key(self, key: str) -> str:
+        """저장 키 정규화"""
+        return key.replace("\\", "/").lstrip("/")
+
+    def presigned_url(self, key: str, filename: str, expires_in: int) -> Optional[str]:
+        """
+        인증 없이 내려받을 수 있는 만료 URL (저장소가 직접 제공하지 못하면 None)
+
+        Args:
+            key: 저장 키
+            filename: 다운로드 파일명
+            expires_in: 유효 시간 (초)
+        """
+        return None
+
+
+class LocalStorage(Storage):
+    """로컬 디스크 저장소"""
+
+    name = "local"
+    local = True
+
+    def __init__(self, root: str = "output"):
+        """
+        Args:
+            root: 저장소 루트 디렉토리
+        """
+        self.root = root
+
+    def normalize_key(self, key: str) -> str:
+        """키 정규화 (이전 버전이 저장한 'output/...' 형태의 경로도 허용)"""
+        key = key.replace("\\", "/")
+        root_prefix = self.root.replace("\\", "/").rstrip("/") + "/"
+        if key.startswith(root_prefix):
+            key = key[len(root_prefix):]
+
+        # 보안: 저장소 밖 경로 접근 방지
+        if key.startswith("/") or ".." in key.split("/"):
+            raise ValueError(f"잘못된 저장소 키입니다: {key}")
+        return key
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, *self.normalize_key(key).split("/"))
+
+    def put_file(self, key: str, source_path: str) -> int:
+        target_path = self.local_path(key)
+        size = os.path.getsize(source_path)
+
+        if os.path.abspath(source_path) != os.path.abspath(target_path):
+            os.makedirs(os.path.dirname(target_path) or ".", exist_ok=True)
+            os.replace(source_path, target_path)
+        return size
+
+    def stat(self, key: str) -> Optional[StorageObject]:
+        try:
+            stat = os.stat(self.local_path(key))
+        except (OSError, ValueError):
+            return None
+        return StorageObject(self.normalize_key(key), stat.st_size, stat.st_mtime)
+
+    def iter_chunks(self, key, start=0, end=None, chunk_size=READ_CHUNK_SIZE):
+        with open(self.local_path(key), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self.local_path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def iter_objects(self, prefix="", recursive=True):
+        prefix = self.normalize_key(prefix).strip("/")
+        base = os.path.join(self.root, *prefix.split("/")) if prefix else self.root
+        if not os.path.isdir(base):
+            return
+
+        for root, dirs, files in os.walk(base):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                yield StorageObject(key, stat.st_size, stat.st_mtime)
+            if not recursive:
+                break
+
+
+class S3Storage(Storage):
+    """S3 호환 오브젝트 스토리지 (멀티파트 업로드, 범위 지정 스트리밍 읽기)"""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: str = None,
+        region: str = None,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        multipart_chunk_size: int = 8 * 1024 * 1024,
+        client=None
+    ):
+        """
+        Args:
+            bucket: 버킷 이름
+            prefix: 모든 키 앞에 붙일 접두사
+            endpoint_url: S3 호환 서버 주소 (MinIO 등)
+            region: 리전
+            multipart_threshold: 이 크기 이상이면 멀티파트로 업로드
+            multipart_chunk_size: 멀티파트 조각 크기
+            client: 미리 만든 boto3 S3 클라이언트 (테스트용)
+        """
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError:
+            raise ValueError("S3 저장소를 사용하려면 'boto3' 패키지를 설치해야 합니다.")
+
+        if not bucket:
+            raise ValueError("S3_BUCKET 환경 변수가 설정되지 않았습니다.")
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = client or boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunk_size
+        )
+
+    def _object_key(self, key: str) -> str:
+        key = key.replace("\\", "/").lstrip("/")
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _storage_key(self, object_key: str) -> str:
+        return object_key[len(self.prefix) + 1:] if self.prefix else object_key
+
+    def _is_not_found(self, error) -> bool:
+        code = error.response.get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def put_file(self, key: str, source_path: str) -> int:
+        size = os.path.getsize(source_path)
+        # upload_file은 크기가 기준 이상이면 멀티파트로 나눠 병렬 업로드
+        self.client.upload_file(
+            source_path,
+            self.bucket,
+            self._object_key(key),
+            ExtraArgs={"ContentType": "application/octet-stream"},
+            Config=self.transfer_config
+        )
+        os.remove(source_path)
+        return size
+
+    def stat(self, key: str) -> Optional[StorageObject]:
+        from botocore.exceptions import ClientError
+
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+        except ClientError as e:
+            if self._is_not_found(e):
+                return None
+            raise
+        return StorageObject(key, response["ContentLength"], response["LastModified"].timestamp())
+
+    def iter_chunks(self, key, start=0, end=None, chunk_size=READ_CHUNK_SIZE):
+        params = {"Bucket": self.bucket, "Key": self._object_key(key)}
+        if start or end is not None:
+            params["Range"] = f"bytes={start}-{'' if end is None else end}"
+
+        body = self.client.get_object(**params)["Body"]
+        try:
+            for chunk in body.iter_chunks(chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    def presigned_url(self, key: str, filename: str, expires_in: int) -> Optional[str]:
+        from utils.download import content_disposition
+
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._object_key(key),
+                "ResponseContentDisposition": content_disposition(filename),
+            },
+            ExpiresIn=expires_in
+        )
+
+    def delete(self, key: str) -> bool:
+        if not self.exists(key):
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        return True
+
+    def iter_objects(self, prefix="", recursive=True):
+        prefix = prefix.strip("/")
+        if prefix:
+            object_prefix = self._object_key(prefix + "/")
+        else:
+            object_prefix = f"{self.prefix}/" if self.prefix else ""
+
+        params = {"Bucket": self.bucket, "Prefix": object_prefix}
+        if not recursive:
+            params["Delimiter"] = "/"
+
+        for page in self.client.get_paginator("list_objects_v2").paginate(**params):
+            for item in page.get("Contents", []):
+                yield StorageObject(
+                    self._storage_key(item["Key"]),
+                    item["Size"],
+                    item["LastModified"].timestamp()
+                )
+
+
+def create_storage() -> Storage:
+    """환경 변수 설정에 따라 저장소 백엔드 생성"""
+    backend = os.getenv("STORAGE_BACKEND", "local").lower()
+
+    if backend == "local":
+        return LocalStorage(os.getenv("STORAGE_LOCAL_ROOT", "output"))
+
+    if backend == "s3":
+        return S3Storage(
+            bucket=os.getenv("S3_BUCKET", ""),
+            prefix=os.getenv("S3_PREFIX", ""),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+            region=os.getenv("S3_REGION") or None,
+            multipart_threshold=int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024))),
+            multipart_chunk_size=int(os.getenv("S3_MULTIPART_CHUNK_SIZE", str(8 * 1024 * 1024))),
+        )
+
+    raise ValueError(f"지원하지 않는 저장소 백엔드입니다: {backend}")
+
+
+_storage: Optional[Storage] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> Storage:
+    """현재 저장소 백엔드 (최초 호출 시 생성)"""
+    global _storage
+
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+
+def set_storage(storage: Optional[Storage]):
+    """저장소 백엔드 교체 (테스트 또는 명시적 설정용, None이면 다음 호출 시 다시 생성)"""
+    global _storage
+
+    with _storage_lock:
+        _storage = storage
@@ -0,0 +1,75 @@
+"""
+사용자별 토큰 버전 캐시 (클레임 기반 인증용)
+
+클레임 기반 인증(AUTH_CLAIMS_MODE)에서는 요청마다 사용자 행을 읽지 않고
+토큰에 담긴 권한과 token_version만으로 인가합니다.
+관리자가 권한을 바꾸면 users.token_version이 증가하며, 각 프로세스는 이 캐시를
+주기적으로(AUTH_VERSION_SYNC_SECONDS) 바뀐 사용자만 읽어 갱신합니다.
+토큰의 버전이 캐시와 다를 때만 데이터베이스에서 사용자를 다시 확인합니다.
+"""
+import os
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from database.user_db import UserDB
+
+logger = logging.getLogger(__name__)
+
+# 변경된 토큰 버전 동기화 간격 (초)
+VERSION_SYNC_SECONDS = int(os.getenv("AUTH_VERSION_SYNC_SECONDS", "30"))
+
+# updated_at은 초 단위이므로 이전 동기화 시각보다 조금 앞에서부터 다시 읽음
+_SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class TokenVersionCache:
+    """프로세스 로컬 사용자별 최신 토큰 버전"""
+
+    def __init__(self):
+        self._versions: Dict[int, int] = {}
+        self._synced_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[int]:
+        """알고 있는 최신 버전 (모르면 None)"""
+        return self._versions.get(user_id)
+
+    def set(self, user_id: int, version: int):
+        """데이터베이스에서 확인한 버전 반영"""
+        with self._lock:
+            self._versions[user_id] = version
+
+    def sync(self) -> int:
+        """
+        마지막 동기화 이후 바뀐 사용자의 버전 반영 (처음에는 전체)
+
+        Returns:
+            int: 읽은 사용자 수
+        """
+        started = datetime.utcnow()
+        since = self._synced_at - _SYNC_OVERLAP if self._synced_at else None
+        versions = UserDB.get_token_versions(since)
+
+        with self._lock:
+            self._versions.update(versions)
+            self._synced_at = started
+
+        return len(versions)
+
+
+token_versions = TokenVersionCache()
+
+
+async def run_version_sync_loop():
+    """토큰 버전 캐시를 주기적으로 동기화 (스레드에서 실행)"""
+    loop = asyncio.get_running_loop()
+
+    while True:
+        try:
+            await loop.run_in_executor(None, token_versions.sync)
+        except Exception as e:
+            logger.error(f"토큰 버전 동기화 중 오류: {str(e)}")
+        await asyncio.sleep(VERSION_SYNC_SECONDS)
@@ -0,0 +1,485 @@
+"""
+요청 추적 (OpenTelemetry 형식의 span)
+
+보고서 생성이 느릴 때 시간이 Claude API, HWPX 처리(읽기/치환/압축), 데이터베이스 중 어디에 쓰였는지
+요청 단위로 확인하기 위해 단계별 span을 기록합니다 (opentelemetry 패키지 없이 같은 형식으로 출력).
+
+- 요청마다 trace ID를 만들고(W3C traceparent 헤더가 오면 이어받음) 응답 헤더(X-Trace-Id, traceparent)와
+  로그(%(trace_id)s)에 남깁니다. 현재 span은 contextvars로 전달되므로 스레드 풀 작업에도 이어집니다
+  (AppResources.run이 컨텍스트를 복사)
+- TRACE_EXPORTER가 file이면 span을 JSON 한 줄씩 TRACE_FILE_PATH에, otlp이면 OTLP/HTTP(JSON)로
+  TRACE_OTLP_ENDPOINT에 보냅니다. 내보내기는 백그라운드 스레드에서 묶어서 하며, 대기열이 가득 차면 버립니다
+- 샘플링: TRACE_SAMPLE_RATE 비율만 내보내되(들어온 traceparent의 샘플링 여부는 그대로 따름),
+  오류가 난 추적과 TRACE_SLOW_MS보다 오래 걸린 추적은 비율과 관계없이 내보냅니다
+- 내보내기를 끄면(기본값) span을 만들지 않고 trace ID만 로그/헤더에 남깁니다
+"""
+import os
+import json
+import time
+import queue
+import random
+import logging
+import threading
+import contextvars
+import urllib.request
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 내보내기 방식: none(기록 안 함) / file / otlp
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+
+# file: span을 JSON 한 줄씩 추가하는 파일
+TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", "data/traces.jsonl")
+
+# otlp: OTLP/HTTP 수집기 주소와 추가 헤더 ("이름=값,이름=값")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_OTLP_HEADERS = os.getenv("TRACE_OTLP_HEADERS", "")
+
+# 내보낼 추적 비율 (0~1), 이보다 오래 걸린 추적은 항상 내보냄 (ms, 0이면 사용 안 함)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "0"))
+
+# 서비스 이름 (OTLP resource의 service.name)
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "hwp-report-generator")
+
+# 내보내기 간격 (초)과 대기열 크기 (span 수)
+TRACE_EXPORT_SECONDS = float(os.getenv("TRACE_EXPORT_SECONDS", "2"))
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "4096"))
+
+# 한 번에 내보내는 최대 span 수
+EXPORT_BATCH_SIZE = 512
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class _Trace:
+    """한 요청(추적)에서 이 프로세스가 만든 span 묶음"""
+
+    __slots__ = ("trace_id", "sampled", "recording", "spans", "error")
+
+    def __init__(self, trace_id: str, sampled: bool, recording: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.recording = recording
+        self.spans: List["Span"] = []
+        self.error = False
+
+
+class Span:
+    """작업 한 단계 (시작/종료 시각, 속성, 오류 여부)"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: _Trace, name: str, parent_id: Optional[str], attributes: Dict):
+        self.trace = trace
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent 헤더 값"""
+        return f"00-{self.trace.trace_id}-{self.span_id}-{'01' if self.trace.sampled else '00'}"
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+            "service": TRACE_SERVICE_NAME,
+        }
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace.trace_id if span is not None else None
+
+
+def set_attributes(**attributes):
+    """현재 span에 속성 추가 (기록하지 않는 추적이면 무시, 값이 None인 속성은 제외)"""
+    span = _current_span.get()
+    if span is not None and span.trace.recording:
+        span.attributes.update((key, value) for key, value in attributes.items() if value is not None)
+
+
+def parse_traceparent(value: Optional[str]):
+    """W3C traceparent 헤더 → (trace ID, 부모 span ID, 샘플링 여부), 형식이 틀리면 None"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1].lower(), parts[2].lower(), bool(flags & 1)
+
+
+@contextmanager
+def span(name: str, traceparent: Optional[str] = None, **attributes) -> Iterator[Span]:
+    """
+    span 기록 (현재 span이 없으면 새 추적 시작)
+
+    Args:
+        name: span 이름 (claude.generate_report, ReportDB.get_report 등)
+        traceparent: 새 추적을 시작할 때 이어받을 W3C traceparent 헤더 값
+        **attributes: span 속성
+    """
+    parent = _current_span.get()
+
+    if parent is None:
+        remote = parse_traceparent(traceparent)
+        if remote is not None:
+            trace_id, parent_id, sampled = remote
+        else:
+            trace_id, parent_id = _new_trace_id(), None
+            sampled = TRACE_SAMPLE_RATE >= 1 or random.random() < TRACE_SAMPLE_RATE
+        trace = _Trace(trace_id, sampled, recording=exporter is not None)
+    elif not parent.trace.recording:
+        # 기록하지 않는 추적: trace ID만 유지
+        yield parent
+        return
+    else:
+        trace, parent_id = parent.trace, parent.span_id
+
+    current = Span(trace, name, parent_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        trace.error = True
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+        if trace.recording:
+            trace.spans.append(current)
+            if parent is None:
+                _finish(trace, current)
+
+
+def _finish(trace: _Trace, root: Span):
+    """추적이 끝나면 샘플링 조건에 맞는 경우 내보내기"""
+    slow = TRACE_SLOW_MS > 0 and (root.end_ns - root.start_ns) / 1e6 >= TRACE_SLOW_MS
+    if trace.sampled or trace.error or slow:
+        exporter.submit(trace.spans)
+
+
+def traced(name: Optional[str] = None, child_only: bool = False):
+    """
+    함수 실행을 span으로 기록하는 데코레이터
+
+    Args:
+        name: span 이름 (없으면 함수의 __qualname__)
+        child_only: 진행 중인 추적이 있을 때만 기록 (주기 작업의 DB 호출 등은 새 추적을 만들지 않음)
+    """
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            parent = _current_span.get()
+            if exporter is None or (parent is None and child_only) or (parent is not None and not parent.trace.recording):
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_methods(cls):
+    """
+    클래스 데코레이터: 정적 메서드(*DB 클래스의 데이터베이스 작업)를 모두 span으로 기록
+
+    span 이름은 "클래스.메서드"이며, 진행 중인 추적(요청) 안에서 호출된 경우에만 기록합니다
+    (행 변환 같은 내부 도우미 _메서드는 제외).
+    """
+    for attr, value in list(vars(cls).items()):
+        if isinstance(value, staticmethod) and not attr.startswith("_"):
+            setattr(cls, attr, staticmethod(traced(f"{cls.__name__}.{attr}", child_only=True)(value.__func__)))
+    return cls
+
+
+# ---------------------------------------------------------------------------
+# 내보내기
+# ---------------------------------------------------------------------------
+
+class FileExporter:
+    """span을 JSON 한 줄씩 파일에 추가 (워커 여러 개가 같은 파일에 써도 줄 단위로 섞이지 않음)"""
+
+    def __init__(self, path: str = TRACE_FILE_PATH):
+        self.path = path
+
+    def export(self, spans: List[Span]):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = "".join(json.dumps(span.to_dict(), ensure_ascii=False) + "\n" for span in spans)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict) -> List[Dict]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class OTLPExporter:
+    """OTLP/HTTP(JSON)로 수집기에 전송 (OpenTelemetry Collector, Jaeger, Tempo 등)"""
+
+    def __init__(self, endpoint: str = TRACE_OTLP_ENDPOINT, headers: str = TRACE_OTLP_HEADERS, timeout: float = 10):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.headers = {"Content-Type": "application/json"}
+        for item in filter(None, (part.strip() for part in headers.split(","))):
+            key, _, value = item.partition("=")
+            self.headers[key.strip()] = value.strip()
+
+    def payload(self, spans: List[Span]) -> Dict:
+        otlp_spans = []
+        for span in spans:
+            item = {
+                "traceId": span.trace.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 2 if span.parent_id is None or span.name.startswith("HTTP ") else 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": _otlp_attributes(span.attributes),
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                item["parentSpanId"] = span.parent_id
+            otlp_spans.append(item)
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": TRACE_SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": otlp_spans}],
+            }]
+        }
+
+    def export(self, spans: List[Span]):
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(self.payload(spans)).encode("utf-8"),
+            headers=self.headers,
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class BatchExporter:
+    """
+    끝난 추적의 span을 대기열에 넣고 백그라운드 스레드가 묶어서 내보냄 (요청 처리를 막지 않음)
+
+    스레드는 처음 내보낼 때 시작하며, fork된 워커에서는 다시 시작합니다.
+    """
+
+    def __init__(self, backend, interval: float = TRACE_EXPORT_SECONDS, max_queue: int = TRACE_QUEUE_SIZE):
+        self.backend = backend
+        self.interval = interval
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self.stats = {"exported": 0, "dropped": 0, "errors": 0}
+
+    def submit(self, spans: List[Span]):
+        self._ensure_thread()
+        for span in spans:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                self.stats["dropped"] += 1
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _drain(self) -> List[Span]:
+        batch = []
+        while len(batch) < EXPORT_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self):
+        """대기열의 span을 모두 내보냄"""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            try:
+                self.backend.export(batch)
+                self.stats["exported"] += len(batch)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"추적 내보내기 실패 ({len(batch)}개 버림): {str(e)}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+def _create_exporter() -> Optional[BatchExporter]:
+    if TRACE_EXPORTER in ("", "none"):
+        return None
+    if TRACE_EXPORTER == "file":
+        return BatchExporter(FileExporter())
+    if TRACE_EXPORTER == "otlp":
+        return BatchExporter(OTLPExporter())
+    logger.warning(f"알 수 없는 TRACE_EXPORTER={TRACE_EXPORTER}, 추적을 기록하지 않습니다.")
+    return None
+
+
+exporter = _create_exporter()
+
+
+def shutdown():
+    """종료 시 남은 span 내보내기"""
+    if exporter is not None:
+        exporter.flush()
+
+
+# ---------------------------------------------------------------------------
+# 로그, HTTP 미들웨어
+# ---------------------------------------------------------------------------
+
+def install_log_record_factory():
+    """
+    모든 로그 레코드에 trace_id를 추가하는 팩토리 설치 (추적 밖이면 "-")
+
+    import 시점이 아니라 애플리케이션 시작 시(lifespan, serve.py) 호출하며,
+    그때 설정된 팩토리(다른 라이브러리가 바꾼 것 포함)를 감싸므로 기존 동작을 유지합니다.
+    여러 번 호출해도 한 번만 감쌉니다.
+    """
+    base_factory = logging.getLogRecordFactory()
+    if getattr(base_factory, "adds_trace_id", False):
+        return
+
+    def record_factory(*args, **kwargs):
+        record = base_factory(*args, **kwargs)
+        span = _current_span.get()
+        record.trace_id = span.trace.trace_id if span is not None else "-"
+        return record
+
+    record_factory.adds_trace_id = True
+    logging.setLogRecordFactory(record_factory)
+
+
+# 로그 형식 (main, claude_client의 logging.basicConfig에서 log_handler로 사용)
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s'
+
+
+def log_handler() -> logging.Handler:
+    """
+    LOG_FORMAT을 쓰는 콘솔 핸들러
+
+    install_log_record_factory가 설치되기 전(시작 전 로그)의 레코드는 trace_id를 "-"로 표시합니다.
+    """
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, defaults={"trace_id": "-"}))
+    return handler
+
+
+class TracingMiddleware:
+    """
+    요청마다 추적 시작 (ASGI 미들웨어)
+
+    들어온 traceparent 헤더를 이어받고, 응답에 X-Trace-Id와 traceparent 헤더를 붙입니다.
+    span 이름은 "HTTP 메서드 라우트 템플릿"입니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        with span(f"HTTP {scope['method']}", traceparent, **{"http.method": scope["method"]}) as root:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        root.error = f"HTTP {message['status']}"
+                        root.trace.error = True
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-trace-id", root.trace.trace_id.encode("latin-1")),
+                        (b"traceparent", root.traceparent.encode("latin-1")),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                root.name = f"HTTP {scope['method']} {route or scope['path']}"
+                root.set_attribute("http.route", route or "")
+                root.set_attribute("http.target", scope["path"])
@@ -0,0 +1,89 @@
+"""
+ZIP 스트리밍 생성
+
+zipfile은 되감을 수 없는 스트림에 쓸 때 각 엔트리 뒤에 데이터 디스크립터를 붙이므로
+(크기/CRC를 엔트리를 다 쓴 뒤에 기록) 전체 ZIP을 메모리나 디스크에 모으지 않고
+엔트리 내용을 조각 단위로 바로 내보낼 수 있습니다.
+"""
+import io
+import zipfile
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# ZIP 형식이 표현할 수 있는 가장 이른 시각
+MIN_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# (ZIP 내부 경로, 수정 시각, 예상 크기, 내용 조각)
+ZipMember = Tuple[str, Optional[datetime], Optional[int], Iterable[bytes]]
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    쓰인 바이트를 모아 두었다가 꺼내 주는 되감기 불가(non-seekable) 스트림
+
+    zipfile은 되감을 수 없는 스트림에 쓸 때 각 엔트리 뒤에 데이터 디스크립터를 붙이므로
+    엔트리를 다 쓰는 즉시 그 바이트를 응답으로 내보낼 수 있습니다.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        """지금까지 쓰인 바이트를 꺼내고 비움"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _date_time(value: Optional[datetime]) -> Tuple[int, int, int, int, int, int]:
+    """ZIP 엔트리 시각 (1980년 이전이나 없으면 MIN_DATE_TIME)"""
+    if value is None or value.year < 1980:
+        return MIN_DATE_TIME
+    return value.timetuple()[:6]
+
+
+def iter_zip(members: Iterable[ZipMember], compress_type: int = zipfile.ZIP_STORED) -> Iterator[bytes]:
+    """
+    엔트리 내용 조각을 받아 ZIP 파일 조각으로 내보냅니다.
+
+    이미 압축된 파일(HWPX 등)은 ZIP_STORED로 그대로 담아 다시 압축하지 않습니다.
+    메모리에는 한 번에 내용 조각 하나 분량만 머뭅니다.
+
+    Args:
+        members: (ZIP 내부 경로, 수정 시각, 예상 크기, 내용 조각) 목록.
+                 예상 크기는 ZIP64 사용 여부 판단에만 쓰며 모르면 None
+        compress_type: 압축 방식
+
+    Yields:
+        bytes: ZIP 파일의 연속된 조각
+    """
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compress_type) as zipf:
+        for arcname, modified, size, chunks in members:
+            zinfo = zipfile.ZipInfo(arcname, date_time=_date_time(modified))
+            zinfo.compress_type = compress_type
+            zinfo.external_attr = 0o644 << 16
+            if size:
+                zinfo.file_size = size
+
+            with zipf.open(zinfo, 'w') as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+
+            # 데이터 디스크립터
+            data = sink.drain()
+            if data:
+                yield data
+
+    # 중앙 디렉토리
+    yield sink.drain()